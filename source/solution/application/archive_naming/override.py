@@ -8,19 +8,18 @@ import os
 import urllib.request
 from typing import TYPE_CHECKING
 
-import boto3
+from solution.application.util.clients import get_client
 
 if TYPE_CHECKING:
     from mypy_boto3_s3.client import S3Client
 else:
     S3Client = object
 
-from solution.application import __boto_config__
 from solution.infrastructure.output_keys import OutputKeys
 
 
 def create_header_file(workflow_run: str) -> None:
-    s3_client: S3Client = boto3.client("s3", config=__boto_config__)
+    s3_client: S3Client = get_client("s3")
     file_name = f"{workflow_run}/naming_overrides/override_headers.csv"
 
     s3_client.put_object(
@@ -31,12 +30,36 @@ def create_header_file(workflow_run: str) -> None:
     )
 
 
-def upload_provided_file(workflow_run: str, presigned_url: str) -> None:
-    s3_client: S3Client = boto3.client("s3", config=__boto_config__)
+def upload_provided_file(
+    workflow_run: str,
+    presigned_url: str,
+    file_name: str = "naming_overrides/name_overrides.csv",
+) -> None:
+    s3_client: S3Client = get_client("s3")
     with urllib.request.urlopen(presigned_url) as response:
         content = response.read()
         s3_client.upload_fileobj(
             io.BytesIO(content),
             os.environ[OutputKeys.INVENTORY_BUCKET_NAME],
-            f"{workflow_run}/naming_overrides/name_overrides.csv",
+            f"{workflow_run}/{file_name}",
         )
+
+
+def create_priority_list_header_file(workflow_run: str) -> None:
+    s3_client: S3Client = get_client("s3")
+    file_name = f"{workflow_run}/priority_list/priority_list_headers.csv"
+
+    s3_client.put_object(
+        Body=b"GlacierArchiveID\n",
+        Bucket=os.environ[OutputKeys.INVENTORY_BUCKET_NAME],
+        Key=file_name,
+        ExpectedBucketOwner=os.environ["AWS_ACCOUNT_ID"],
+    )
+
+
+def upload_priority_list(workflow_run: str, presigned_url: str) -> None:
+    """
+    Uploads the priority list file, listing the IDs of the archives to retrieve
+    first under a GlacierArchiveID header, from the highest priority.
+    """
+    upload_provided_file(workflow_run, presigned_url, "priority_list/priority_list.csv")
@@ -0,0 +1,173 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import logging
+import math
+import os
+import time
+from typing import TYPE_CHECKING, List
+
+from solution.application.archive_retrieval.lanes import RETRIEVAL_LANES
+from solution.application.model.metric_record import MetricRecord
+from solution.application.model.partition_metric_record import PartitionMetricRecord
+from solution.application.util.clients import get_client
+from solution.application.util.metrics import put_metrics
+from solution.infrastructure.output_keys import OutputKeys
+
+if TYPE_CHECKING:
+    from mypy_boto3_dynamodb import DynamoDBClient
+    from mypy_boto3_sqs import SQSClient
+    from mypy_boto3_sqs.literals import QueueAttributeFilterType
+else:
+    DynamoDBClient = object
+    SQSClient = object
+    QueueAttributeFilterType = str
+
+logger = logging.getLogger()
+logger.setLevel(int(os.environ.get("LOGGING_LEVEL", logging.INFO)))
+
+# Staged archives are downloadable for 24 hours. Initiations are held back while
+# the staged bytes not downloaded yet take longer than ADMISSION_WINDOW_RATIO of
+# the window to download at the measured throughput, leaving the rest for the
+# archives that are staged while they drain
+DOWNLOAD_WINDOW_SECONDS = 24 * 60 * 60
+ADMISSION_WINDOW_RATIO = 0.75
+# The download throughput is measured from the downloaded bytes of the workflow
+# run sampled at least THROUGHPUT_SAMPLE_SECONDS apart
+THROUGHPUT_SAMPLE_SECONDS = 5 * 60
+# Admission is checked again at least this often while initiations are held back
+MAX_ADMISSION_DELAY_SECONDS = 60 * 60
+
+CHUNK_QUEUE_DEPTH_ATTRIBUTES: List[QueueAttributeFilterType] = [
+    "ApproximateNumberOfMessages",
+    "ApproximateNumberOfMessagesNotVisible",
+    "ApproximateNumberOfMessagesDelayed",
+]
+
+
+def admission_delay(
+    staged_bytes: int, download_throughput: float | None, chunk_queue_depth: int
+) -> int:
+    """
+    Returns the seconds to hold back initiations for the staged_bytes not downloaded
+    yet to fit in the download window at download_throughput, in bytes per second.
+    Initiations are admitted when no chunks are queued, as the staged bytes are
+    then being downloaded already, or when no throughput was measured yet.
+    """
+    if staged_bytes <= 0 or chunk_queue_depth <= 0 or download_throughput is None:
+        return 0
+    window = DOWNLOAD_WINDOW_SECONDS * ADMISSION_WINDOW_RATIO
+    if download_throughput <= 0:
+        return MAX_ADMISSION_DELAY_SECONDS
+    drain_seconds = staged_bytes / download_throughput
+    if drain_seconds <= window:
+        return 0
+    return min(math.ceil(drain_seconds - window), MAX_ADMISSION_DELAY_SECONDS)
+
+
+def chunk_queue_depth(sqs_client: SQSClient) -> int:
+    """
+    Number of chunk retrieval events queued or in flight in the retrieval lanes.
+    """
+    depth = 0
+    for lane in RETRIEVAL_LANES:
+        if not (queue_url := os.environ.get(lane.queue_url_key)):
+            continue
+        attributes = sqs_client.get_queue_attributes(
+            QueueUrl=queue_url,
+            AttributeNames=CHUNK_QUEUE_DEPTH_ATTRIBUTES,
+        )["Attributes"]
+        depth += sum(int(count) for count in attributes.values())
+    return depth
+
+
+def measure_download_throughput(
+    ddb_client: DynamoDBClient, workflow_run: str, downloaded_size: int, now: float
+) -> float | None:
+    """
+    Returns the download throughput of the workflow run, in bytes per second,
+    measured between its last sample of downloaded bytes and downloaded_size once
+    the sample is THROUGHPUT_SAMPLE_SECONDS old. Samples over which nothing was
+    downloaded keep the previous throughput, as the workers were then waiting for
+    archives to be staged rather than limited by their capacity.
+    """
+    key = PartitionMetricRecord(
+        pk=PartitionMetricRecord.partition_key(workflow_run)
+    ).key
+    item = ddb_client.get_item(
+        TableName=os.environ[OutputKeys.METRIC_TABLE_NAME],
+        Key=key,
+        ConsistentRead=True,
+    ).get("Item")
+    record = PartitionMetricRecord.parse(item) if item else None
+    throughput = record.download_throughput if record else None
+    sample_time = record.downloaded_sample_time if record else None
+    sample_size = record.downloaded_sample_size if record else None
+    if sample_time is not None and now - sample_time < THROUGHPUT_SAMPLE_SECONDS:
+        return throughput
+
+    if sample_time is not None and sample_size is not None:
+        if downloaded_size > sample_size:
+            throughput = (downloaded_size - sample_size) / (now - sample_time)
+
+    condition = "attribute_not_exists(downloaded_sample_time)"
+    values = {
+        ":ds": {"N": str(downloaded_size)},
+        ":dt": {"N": str(now)},
+    }
+    update = "SET downloaded_sample_size = :ds, downloaded_sample_time = :dt"
+    if sample_time is not None:
+        condition = "downloaded_sample_time = :previous"
+        values[":previous"] = {"N": str(sample_time)}
+    if throughput is not None:
+        update += ", download_throughput = :tp"
+        values[":tp"] = {"N": str(throughput)}
+    try:
+        ddb_client.update_item(
+            TableName=os.environ[OutputKeys.METRIC_TABLE_NAME],
+            Key=key,
+            UpdateExpression=update,
+            ConditionExpression=condition,
+            ExpressionAttributeValues=values,
+        )
+    except ddb_client.exceptions.ConditionalCheckFailedException:
+        # Sampled concurrently, the throughput measured here is as good
+        pass
+    return throughput
+
+
+def admit_initiation(workflow_run: str) -> int:
+    """
+    Returns the seconds to hold back the next initiations of the workflow run, for
+    the archives it has staged to be downloaded within their download window.
+    """
+    ddb_client: DynamoDBClient = get_client("dynamodb")
+    item = ddb_client.get_item(
+        TableName=os.environ[OutputKeys.METRIC_TABLE_NAME],
+        Key=MetricRecord(pk=workflow_run).key,
+        ConsistentRead=True,
+    ).get("Item")
+    metric = MetricRecord.parse(item) if item else MetricRecord(pk=workflow_run)
+    downloaded_size = metric.size_downloaded or 0
+    staged_bytes = max((metric.size_staged or 0) - downloaded_size, 0)
+
+    throughput = measure_download_throughput(
+        ddb_client, workflow_run, downloaded_size, time.time()
+    )
+    queue_depth = chunk_queue_depth(get_client("sqs"))
+    delay = admission_delay(staged_bytes, throughput, queue_depth)
+
+    logger.info(
+        f"{staged_bytes} staged bytes of {workflow_run} in flight, {queue_depth} chunks queued, download throughput {throughput} B/s, initiations held back {delay}s"
+    )
+    put_metrics(
+        {
+            "StagedBytesInFlight": (staged_bytes, "Bytes"),
+            "ChunkQueueDepth": (queue_depth, "Count"),
+            "DownloadThroughput": (throughput or 0, "Bytes/Second"),
+            "InitiationAdmissionDelay": (delay, "Seconds"),
+        }
+    )
+    return delay
@@ -7,13 +7,23 @@ import logging
 import os
 from concurrent import futures
 from datetime import datetime
+from functools import partial
 from timeit import default_timer as timer
-from typing import TYPE_CHECKING, Any, List
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Set,
+    Tuple,
+    TypeVar,
+)
 
-import boto3
+from botocore.exceptions import ClientError
 
-from solution.application import __boto_config__
-from solution.application.chunking.chunk_generator import calculate_chunk_size
+from solution.application.archive_retrieval.lanes import plan_archive_chunk_size
 from solution.application.glacier_service.glacier_typing import GlacierJobType
 from solution.application.model import events
 from solution.application.model.glacier_transfer_meta_model import (
@@ -22,54 +32,225 @@ from solution.application.model.glacier_transfer_meta_model import (
 )
 from solution.application.model.glacier_transfer_model import GlacierTransferModel
 from solution.application.model.partition_metric_record import PartitionMetricRecord
+from solution.application.util.clients import get_client
+from solution.application.util.dynamodb import (
+    MAX_BATCH_WRITE_ITEMS,
+    batch_get_items,
+    batch_write_items,
+)
+from solution.application.util.exceptions import (
+    GlacierThrottled,
+    MaximumRetryLimitExceeded,
+)
+from solution.application.util.metrics import put_metrics
+from solution.application.util.rate_controller import RateController
 from solution.infrastructure.output_keys import OutputKeys
 
 if TYPE_CHECKING:
     from mypy_boto3_dynamodb import DynamoDBClient
-    from mypy_boto3_dynamodb.type_defs import PutItemOutputTypeDef
+    from mypy_boto3_dynamodb.type_defs import WriteRequestTypeDef
     from mypy_boto3_glacier.client import GlacierClient
     from mypy_boto3_glacier.type_defs import JobParametersTypeDef
 else:
     DynamoDBClient = object
-    PutItemOutputTypeDef = object
+    WriteRequestTypeDef = object
     GlacierClient = object
     JobParametersTypeDef = object
 
 logger = logging.getLogger()
 logger.setLevel(int(os.environ.get("LOGGING_LEVEL", logging.INFO)))
 
+INITIATION_WORKERS = 10
+# Glacier initiate_job calls of the process are paced by a shared AIMD rate
+# controller, whose rate carries over warm invocations. It probes up while jobs
+# are initiated and is halved when Glacier throttles, and a throttled archive is
+# queued again within its batch instead of being left for a later resume
+INITIATION_INITIAL_RATE = 20.0
+INITIATION_MIN_RATE = 1.0
+INITIATION_MAX_RATE = 100.0
+INITIATION_ATTEMPTS = 8
+GLACIER_THROTTLING_ERROR_CODES = ("ThrottlingException", "LimitExceededException")
+# Initiations are checked at least this often for stale metadata writes and for
+# the time left
+INITIATION_POLL_SECONDS = 0.5
+# Metadata of initiated jobs is not buffered for longer than this, so that few
+# jobs are left without their metadata if the Lambda is cut off
+WRITE_FLUSH_SECONDS = 1.0
+# No more jobs are initiated with less time left, so that the running ones and
+# their metadata writes complete before the Lambda timeout and the batch is retried
+INITIATION_DEADLINE_MS = 30 * 1000
+
+initiation_rate_controller = RateController(
+    INITIATION_INITIAL_RATE, INITIATION_MIN_RATE, INITIATION_MAX_RATE
+)
+
+Item = TypeVar("Item")
+Result = TypeVar("Result")
+
+
+def initiate_jobs(
+    items: List[Item],
+    initiate: Callable[[Item], Result | None],
+    poll: Callable[[], bool] | None = None,
+) -> Iterator[Result]:
+    """
+    Initiates the jobs of the items on INITIATION_WORKERS threads and yields the
+    results of the initiated ones as they complete. Items throttled by Glacier
+    are queued again up to INITIATION_ATTEMPTS times. The first error is raised
+    once the other initiations completed, and the achieved initiation rate is
+    published either way.
+
+    poll is called at least every INITIATION_POLL_SECONDS, and once it returns
+    True the initiations not started yet are cancelled and a TimeoutError is
+    raised after the running ones completed.
+    """
+    start = timer()
+    initiated = throttled = 0
+    error: Exception | None = None
+    stopped = False
+    try:
+        with futures.ThreadPoolExecutor(max_workers=INITIATION_WORKERS) as executor:
+            running = {executor.submit(initiate, item): (item, 1) for item in items}
+            while running:
+                done, _ = futures.wait(
+                    running,
+                    timeout=INITIATION_POLL_SECONDS,
+                    return_when=futures.FIRST_COMPLETED,
+                )
+                if poll is not None and poll() and not stopped:
+                    stopped = True
+                    cancelled = [future for future in running if future.cancel()]
+                    for future in cancelled:
+                        running.pop(future)
+                    logger.warning(
+                        f"Not enough time left, {len(cancelled)} job initiations cancelled"
+                    )
+                    error = error or TimeoutError(
+                        "Not enough time left to initiate the batch"
+                    )
+                for future in done:
+                    item, attempt = running.pop(future)
+                    try:
+                        result = future.result()
+                    except GlacierThrottled as e:
+                        throttled += 1
+                        if stopped:
+                            continue
+                        if attempt < INITIATION_ATTEMPTS:
+                            running[executor.submit(initiate, item)] = (
+                                item,
+                                attempt + 1,
+                            )
+                        else:
+                            error = error or MaximumRetryLimitExceeded(
+                                INITIATION_ATTEMPTS, str(e)
+                            )
+                        continue
+                    except Exception as e:
+                        error = error or e
+                        continue
+                    if result is not None:
+                        initiated += 1
+                        yield result
+    finally:
+        elapsed = max(timer() - start, 1e-6)
+        logger.info(
+            f"Initiated {initiated} jobs in {elapsed:.3f}s, {throttled} throttled, initiation rate limit {initiation_rate_controller.rate:.1f}/s"
+        )
+        put_metrics(
+            {
+                "ArchivesInitiated": (initiated, "Count"),
+                "ArchiveInitiationRate": (initiated / elapsed, "Count/Second"),
+                "InitiationsThrottled": (throttled, "Count"),
+                "InitiationRateLimit": (
+                    initiation_rate_controller.rate,
+                    "Count/Second",
+                ),
+            }
+        )
+    if error is not None:
+        raise error
+
 
 def initiate_retrieval(
     account_id: str,
     sns_topic: str,
     items: List[events.InitiateArchiveRetrievalItem],
     glacier_client: GlacierClient,
-) -> None:
-    ddb_client: DynamoDBClient = boto3.client("dynamodb", config=__boto_config__)
+    context: Any = None,
+) -> int:
+    """
+    Initiates the retrieval jobs of the archives that are not downloaded yet, and
+    returns the total size of the archives whose jobs were initiated. With the
+    Lambda context, initiations stop once INITIATION_DEADLINE_MS are left.
+
+    :raises TimeoutError: If initiations stopped for lack of time, after the
+        metadata of the initiated jobs was written.
+    """
+    ddb_client: DynamoDBClient = get_client("dynamodb")
 
     if not items:
-        return
-
-    start = timer()
+        return 0
 
     workflow_run = items[0]["workflow_run"]
-    with futures.ThreadPoolExecutor(max_workers=10) as upload_executor:
-        upload_futures = [
-            upload_executor.submit(
+    downloaded = downloaded_archives(
+        ddb_client,
+        [(item["workflow_run"], item["item"]["ArchiveId"]) for item in items],
+    )
+    pending = [
+        item
+        for item in items
+        if (item["workflow_run"], item["item"]["ArchiveId"]) not in downloaded
+    ]
+    if downloaded:
+        logger.info(
+            f"{len(downloaded)} archives already downloaded, skipping job initiation"
+        )
+
+    # Metadata of the initiated jobs is written a BatchWriteItem at a time as
+    # soon as enough jobs are initiated or the oldest write is WRITE_FLUSH_SECONDS
+    # old, while the others are still initiating, and what is left is written
+    # before an initiation failure is raised, so a failed batch does not leave
+    # jobs behind without their metadata
+    table_name = os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME]
+    writes: List[WriteRequestTypeDef] = []
+    oldest_write = 0.0
+    initiated_size = 0
+
+    def flush(stale_only: bool = False) -> None:
+        nonlocal writes
+        if stale_only and timer() - oldest_write < WRITE_FLUSH_SECONDS:
+            return
+        batch_write_items(ddb_client, table_name, writes)
+        writes = []
+
+    def poll() -> bool:
+        if writes:
+            flush(stale_only=True)
+        return (
+            context is not None
+            and context.get_remaining_time_in_millis() < INITIATION_DEADLINE_MS
+        )
+
+    try:
+        for archive_metadata in initiate_jobs(
+            pending,
+            partial(
                 initiate_request,
-                item,
-                ddb_client,
-                glacier_client,
-                sns_topic,
-                account_id,
-            )
-            for item in items
-        ]
-        for future in upload_futures:
-            future.result()
-
-    tps = len(items) / (timer() - start)
-    logger.info(f"TPS: {tps}")
+                glacier_client=glacier_client,
+                sns_topic=sns_topic,
+                account_id=account_id,
+            ),
+            poll,
+        ):
+            if not writes:
+                oldest_write = timer()
+            writes.append({"PutRequest": {"Item": archive_metadata.marshal()}})
+            initiated_size += archive_metadata.size or 0
+            if len(writes) == MAX_BATCH_WRITE_ITEMS:
+                flush()
+    finally:
+        flush()
 
     total_archives_size = sum(int(item["item"]["Size"]) for item in items)
 
@@ -82,6 +263,7 @@ def initiate_retrieval(
         TableName=os.environ[OutputKeys.METRIC_TABLE_NAME],
         **partition_metric_record.update_parameters(),
     )
+    return initiated_size
 
 
 def extend_retrieval(
@@ -90,25 +272,36 @@ def extend_retrieval(
     items: List[events.ExtendArchiveRetrievalItem],
     glacier_client: GlacierClient,
 ) -> None:
-    ddb_client: DynamoDBClient = boto3.client("dynamodb", config=__boto_config__)
+    ddb_client: DynamoDBClient = get_client("dynamodb")
 
     if not items:
         return
 
-    with futures.ThreadPoolExecutor(max_workers=10) as upload_executor:
-        upload_futures = [
-            upload_executor.submit(
-                extend_request,
-                item,
-                ddb_client,
-                glacier_client,
-                sns_topic,
-                account_id,
-            )
-            for item in items
-        ]
-        for future in upload_futures:
-            future.result()
+    downloaded = downloaded_archives(
+        ddb_client,
+        [(item["workflow_run"], item["item"]["archive_id"]["S"]) for item in items],
+    )
+    pending = [
+        item
+        for item in items
+        if (item["workflow_run"], item["item"]["archive_id"]["S"]) not in downloaded
+    ]
+    if downloaded:
+        logger.info(
+            f"{len(downloaded)} archives already downloaded, skipping job extension"
+        )
+
+    for _ in initiate_jobs(
+        pending,
+        partial(
+            extend_request,
+            ddb_client=ddb_client,
+            glacier_client=glacier_client,
+            sns_topic=sns_topic,
+            account_id=account_id,
+        ),
+    ):
+        pass
 
 
 def extend_request(
@@ -117,25 +310,23 @@ def extend_request(
     glacier_client: GlacierClient,
     sns_topic: str,
     account_id: str,
-) -> None:
+) -> str | None:
+    """
+    Initiates a new retrieval job of the archive and records it on the archive
+    metadata. Returns the job id, or None if no job was initiated.
+    """
     vault_name = item["vault_name"]
     workflow_run = item["workflow_run"]
     archive = item["item"]
     archive_id = archive["archive_id"]["S"]
     tier = item["tier"]
 
-    if is_already_downloaded(workflow_run, archive_id, ddb_client):
-        logger.info(
-            "Archive {workflow_run}:{archive_id} already downloaded, skipping job extension"
-        )
-        return
-
     job_id = glacier_initiate_job(
         glacier_client, vault_name, sns_topic, archive_id, tier, account_id
     )
 
     if not job_id:
-        return
+        return None
 
     ddb_client.update_item(
         TableName=os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME],
@@ -148,6 +339,7 @@ def extend_request(
             ":rs": {"S": f"{workflow_run}/{GlacierTransferModel.StatusCode.EXTENDED}"},
         },
     )
+    return job_id
 
 
 def glacier_initiate_job(
@@ -164,28 +356,43 @@ def glacier_initiate_job(
         "ArchiveId": archive_id,
         "Tier": tier,
     }
+    initiation_rate_controller.acquire()
     try:
         initiate_job_response = glacier_client.initiate_job(
             vaultName=vault_name,
             accountId=account_id,
             jobParameters=job_parameters,
         )
+    except ClientError as e:
+        code = e.response.get("Error", {}).get("Code", "")
+        if code in GLACIER_THROTTLING_ERROR_CODES:
+            initiation_rate_controller.throttled()
+            raise GlacierThrottled(code) from e
+        logger.error(
+            f"An error occurred while initiating job for {job_parameters}. Error: {e}"
+        )
+        return None
     except Exception as e:
         logger.error(
             f"An error occurred while initiating job for {job_parameters}. Error: {e}"
         )
         return None
 
+    initiation_rate_controller.succeeded()
     return initiate_job_response["jobId"]
 
 
 def initiate_request(
     item: events.InitiateArchiveRetrievalItem,
-    ddb_client: DynamoDBClient,
     glacier_client: GlacierClient,
     sns_topic: str,
     account_id: str,
-) -> None:
+) -> GlacierTransferMetadata | None:
+    """
+    Initiates the retrieval job of the archive. Returns the metadata of the
+    requested archive, to be written by the caller, or None if no job was
+    initiated.
+    """
     vault_name = item["vault_name"]
     workflow_run = item["workflow_run"]
     tier = item["tier"]
@@ -193,20 +400,14 @@ def initiate_request(
     s3_storage_class = item["s3_storage_class"]
     archive_id = archive["ArchiveId"]
 
-    if is_already_downloaded(workflow_run, archive_id, ddb_client):
-        logger.info(
-            "Archive {workflow_run}:{archive_id} already downloaded, skipping job initiation"
-        )
-        return
-
     job_id = glacier_initiate_job(
         glacier_client, vault_name, sns_topic, archive_id, tier, account_id
     )
 
     if not job_id:
-        return
+        return None
 
-    archive_metadata = GlacierTransferMetadata(
+    return GlacierTransferMetadata(
         workflow_run=workflow_run,
         glacier_object_id=archive_id,
         job_id=job_id,
@@ -216,38 +417,44 @@ def initiate_request(
         sha256_tree_hash=archive["SHA256TreeHash"],
         retrieval_type=GlacierJobType.ARCHIVE_RETRIEVAL,
         size=int(archive["Size"]),
-        chunk_size=calculate_chunk_size(int(archive["Size"])),
+        chunk_size=plan_archive_chunk_size(int(archive["Size"])),
         archive_creation_date=archive["CreationDate"],
         retrieve_status=f"{workflow_run}/{GlacierTransferModel.StatusCode.REQUESTED}",
         file_name=archive["Filename"] or archive_id,
         s3_storage_class=s3_storage_class,
         description=archive["ArchiveDescription"],
     )
-    put_glacier_transfer_metadata(archive_metadata.marshal(), ddb_client)
 
 
-def is_already_downloaded(
-    workflow_run: str, archive_id: str, ddb_client: DynamoDBClient
-) -> bool:
-    response = ddb_client.get_item(
-        TableName=os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME],
-        Key=GlacierTransferMetadataRead(
+def downloaded_archives(
+    ddb_client: DynamoDBClient, archives: List[Tuple[str, str]]
+) -> Set[Tuple[str, str]]:
+    """
+    Returns the (workflow run, archive id) pairs of the archives already downloaded,
+    reading the status of a batch of archives with BatchGetItem instead of a
+    GetItem per archive.
+    """
+    archives_by_pk: Dict[str, Tuple[str, str]] = {}
+    keys = []
+    for workflow_run, archive_id in archives:
+        key = GlacierTransferMetadataRead(
             workflow_run=workflow_run, glacier_object_id=archive_id
-        ).key,
+        ).key
+        # Keys must be unique within a BatchGetItem
+        if key["pk"]["S"] not in archives_by_pk:
+            archives_by_pk[key["pk"]["S"]] = (workflow_run, archive_id)
+            keys.append(key)
+
+    items = batch_get_items(
+        ddb_client,
+        os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME],
+        keys,
+        ProjectionExpression="pk, retrieve_status",
     )
-
-    if "Item" in response:
-        return bool(
-            response["Item"]["retrieve_status"]["S"].endswith(
-                f"/{GlacierTransferModel.StatusCode.DOWNLOADED}"
-            )
+    return {
+        archives_by_pk[item["pk"]["S"]]
+        for item in items
+        if item["retrieve_status"]["S"].endswith(
+            f"/{GlacierTransferModel.StatusCode.DOWNLOADED}"
         )
-    return False
-
-
-def put_glacier_transfer_metadata(
-    item: dict[str, Any], ddb_client: DynamoDBClient
-) -> PutItemOutputTypeDef:
-    return ddb_client.put_item(
-        TableName=os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME], Item={**item}
-    )
+    }
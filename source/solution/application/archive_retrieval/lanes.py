@@ -0,0 +1,105 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import os
+from dataclasses import dataclass
+
+from solution.application.chunking.chunk_generator import plan_chunk_size
+from solution.application.glacier_s3_transfer.download import DOWNLOAD_CONCURRENCY
+from solution.application.glacier_s3_transfer.memory_budget import MEMORY_BUDGET_RATIO
+from solution.application.glacier_s3_transfer.upload import UPLOAD_CONCURRENCY
+from solution.application.hashing.tree_hash import ONE_MB
+from solution.infrastructure.output_keys import OutputKeys
+
+
+@dataclass(frozen=True)
+class RetrievalLane:
+    """
+    Size class of archives whose chunks are retrieved through their own queue and
+    chunk retrieval Lambda, so that chunks of small archives do not wait behind
+    long transfers of large ones. The chunks of an archive are sent to the first
+    lane it fits in.
+    """
+
+    name: str
+    max_archive_size: int | None
+    memory_size: int
+    batch_size: int
+    max_concurrency: int
+    download_concurrency: int
+    upload_concurrency: int
+
+    @property
+    def queue_url_key(self) -> str:
+        return f"{OutputKeys.CHUNKS_SQS_URL}{self.name}"
+
+    @property
+    def chunk_memory_budget(self) -> int:
+        """
+        Memory budget of each chunk of a batch processed by the lane Lambda.
+        """
+        return int(self.memory_size * ONE_MB * MEMORY_BUDGET_RATIO) // self.batch_size
+
+
+# Small archives, whose chunks are processed many at a time by a small Lambda
+SMALL_LANE = RetrievalLane(
+    name="Small",
+    max_archive_size=64 * 2**20,
+    memory_size=512,
+    batch_size=10,
+    max_concurrency=20,
+    download_concurrency=1,
+    upload_concurrency=1,
+)
+# Archives up to 1 GiB
+MEDIUM_LANE = RetrievalLane(
+    name="Medium",
+    max_archive_size=2**30,
+    memory_size=1024,
+    batch_size=4,
+    max_concurrency=30,
+    download_concurrency=DOWNLOAD_CONCURRENCY,
+    upload_concurrency=1,
+)
+# Multi-chunk archives, through the original chunk retrieval queue and Lambda
+LARGE_LANE = RetrievalLane(
+    name="",
+    max_archive_size=None,
+    memory_size=1536,
+    batch_size=4,
+    max_concurrency=70,
+    download_concurrency=DOWNLOAD_CONCURRENCY,
+    upload_concurrency=UPLOAD_CONCURRENCY,
+)
+RETRIEVAL_LANES = (SMALL_LANE, MEDIUM_LANE, LARGE_LANE)
+
+
+def retrieval_lane(archive_size: int) -> RetrievalLane:
+    return next(
+        lane
+        for lane in RETRIEVAL_LANES
+        if lane.max_archive_size is None or archive_size <= lane.max_archive_size
+    )
+
+
+def lane_queue_url(archive_size: int | None) -> str:
+    """
+    Queue URL of the lane of an archive, falling back to the chunk retrieval queue
+    when its size is unknown or its lane is not deployed.
+    """
+    if archive_size is not None and (
+        queue_url := os.environ.get(retrieval_lane(archive_size).queue_url_key)
+    ):
+        return queue_url
+    return os.environ[OutputKeys.CHUNKS_SQS_URL]
+
+
+def plan_archive_chunk_size(archive_size: int) -> int:
+    """
+    Chunk size of an archive, planned for the workers of its lane.
+    """
+    return plan_chunk_size(
+        archive_size, retrieval_lane(archive_size).chunk_memory_budget
+    )
@@ -5,34 +5,69 @@ SPDX-License-Identifier: Apache-2.0
 import json
 import logging
 import os
+import time
+from base64 import b64encode
+from timeit import default_timer as timer
 from typing import TYPE_CHECKING, List
 
-import boto3
-
-from solution.application import __boto_config__
-from solution.application.chunking.chunk_generator import (
-    calculate_chunk_size,
-    generate_chunk_array,
+from solution.application.archive_retrieval.lanes import (
+    lane_queue_url,
+    plan_archive_chunk_size,
 )
+from solution.application.chunking.chunk_plan import ChunkPlan
+from solution.application.glacier_s3_transfer.download import download_archive
+from solution.application.glacier_service.glacier_apis_factory import GlacierAPIsFactory
+from solution.application.model import events
 from solution.application.model.facilitator import JobCompletionEvent
 from solution.application.model.glacier_transfer_meta_model import (
     GlacierTransferMetadata,
     GlacierTransferMetadataRead,
 )
 from solution.application.model.glacier_transfer_model import GlacierTransferModel
+from solution.application.util.clients import get_client
+from solution.application.util.exceptions import (
+    FanOutInProgress,
+    GlacierValidationMismatch,
+    MaximumRetryLimitExceeded,
+)
+from solution.application.util.executor import shared_executor
+from solution.application.util.metrics import put_metrics
 from solution.infrastructure.output_keys import OutputKeys
 
 if TYPE_CHECKING:
     from mypy_boto3_dynamodb import DynamoDBClient
     from mypy_boto3_s3.client import S3Client
+    from mypy_boto3_sqs.client import SQSClient
+    from mypy_boto3_sqs.type_defs import SendMessageBatchRequestEntryTypeDef
 else:
     DynamoDBClient = object
     S3Client = object
+    SQSClient = object
+    SendMessageBatchRequestEntryTypeDef = object
 
 
 logger = logging.getLogger()
 logger.setLevel(int(os.environ.get("LOGGING_LEVEL", logging.INFO)))
 
+# Archives up to this size are copied by the notification processor with a single
+# download and a single PutObject, instead of being staged as a multipart upload
+# of chunks retrieved by the chunk retrieval Lambda
+SMALL_ARCHIVE_SIZE = 8 * 2**20
+# Notifications of a batch processed concurrently by the notifications processor
+NOTIFICATION_WORKERS = 10
+
+# Chunk events are sent in batches of the SendMessageBatch limit, several at a
+# time, and the entries of a batch that failed are sent again with backoff
+SEND_BATCH_SIZE = 10
+FAN_OUT_WORKERS = 8
+SEND_BATCH_ATTEMPTS = 5
+SEND_BATCH_BACKOFF_SECONDS = 0.1
+# The notification that stages an archive owns the fan-out of its chunk events for
+# as long as the notifications processor can run. A notification for the staged
+# archive resumes the fan-out only once this lease expired without every event
+# being sent, and is retried until then, as the owner may still fail to send them
+FAN_OUT_LEASE_SECONDS = 15 * 60
+
 
 def handle_archive_job_notification(message_str: str) -> None:
     logging.info(f"SNS Archive job notification: {message_str}")
@@ -45,7 +80,7 @@ def handle_archive_job_notification(message_str: str) -> None:
         logger.info(f"ignoring incomplete event: {message_str}")
         return
 
-    ddb_client = boto3.client("dynamodb", config=__boto_config__)
+    ddb_client = get_client("dynamodb")
 
     archive_id = message["ArchiveId"]
     glacier_transfer_record = get_glacier_transfer_metadata(ddb_client, event.job_id)
@@ -66,9 +101,24 @@ def handle_archive_job_notification(message_str: str) -> None:
         return
 
     if retrieve_status.endswith(f"/{GlacierTransferModel.StatusCode.STAGED}"):
+        if not is_fan_out_incomplete(glacier_transfer_record):
+            logger.info(
+                f"Archive {workflow_run}:{archive_id} already staged, duplicate job notification"
+            )
+            return
+        now = time.time()
+        if not (
+            (glacier_transfer_record.fan_out_lease or 0) <= now
+            and claim_fan_out(ddb_client, glacier_transfer_record, now)
+        ):
+            raise FanOutInProgress(archive_id)
+        # The notification is redriven after chunk events failed to be sent and
+        # the lease of their fan-out expired, and they are all sent again, since
+        # chunks are only committed once
         logger.info(
-            f"Archive {workflow_run}:{archive_id} already staged, duplicate job notification"
+            f"Archive {workflow_run}:{archive_id} already staged, resuming chunk events fan-out"
         )
+        resume_chunk_events(ddb_client, glacier_transfer_record)
         return
 
     archive_size = glacier_transfer_record.size
@@ -85,31 +135,255 @@ def handle_archive_job_notification(message_str: str) -> None:
         logging.info("Can not retrieve Archive size from metadata.")
         return
 
-    chunks = generate_chunk_array(archive_size, calculate_chunk_size(archive_size))
+    retrieve_status_staged = f"{workflow_run}/{GlacierTransferModel.StatusCode.STAGED}"
+
+    if archive_size <= int(os.environ.get("PACK_ARCHIVE_SIZE", 0)):
+        send_packing_event(glacier_transfer_record, event.job_id, event.completion_date)
+        # Staged after the event is sent, so that a failed send is retried with
+        # the notification, and only if the archive was not packed in between.
+        # Events sent again by duplicate notifications are skipped by the packing
+        # Lambda once the archive is packed
+        try:
+            ddb_client.update_item(
+                TableName=os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME],
+                Key=GlacierTransferMetadataRead(
+                    workflow_run=workflow_run, glacier_object_id=archive_id
+                ).key,
+                UpdateExpression="SET retrieve_status = :rs, download_window = :dw, staged_job_id = :sji",
+                ConditionExpression="retrieve_status <> :downloaded",
+                ExpressionAttributeValues={
+                    ":rs": {"S": retrieve_status_staged},
+                    ":dw": {"S": event.completion_date},
+                    ":sji": {"S": event.job_id},
+                    ":downloaded": {
+                        "S": f"{workflow_run}/{GlacierTransferModel.StatusCode.DOWNLOADED}"
+                    },
+                },
+            )
+        except ddb_client.exceptions.ConditionalCheckFailedException:
+            logger.info(f"Archive {workflow_run}:{archive_id} already packed")
+        return
+
+    if archive_size <= int(os.environ.get("SMALL_ARCHIVE_SIZE", 0)):
+        transfer_small_archive(
+            ddb_client, glacier_transfer_record, event.job_id, event.completion_date
+        )
+        return
+
+    # Planned when the retrieval was initiated, and planned again for archives
+    # initiated without one
+    chunk_size = glacier_transfer_record.chunk_size or plan_archive_chunk_size(
+        archive_size
+    )
+    chunk_plan = ChunkPlan(archive_size, chunk_size)
 
     upload_id = create_multipart_upload(object_key, storage_class)
 
-    retrieve_status_staged = f"{workflow_run}/{GlacierTransferModel.StatusCode.STAGED}"
-    update_glacier_transfer_metadata(
+    if not update_glacier_transfer_metadata(
         ddb_client,
         workflow_run,
         archive_id,
-        str(len(chunks)),
+        str(len(chunk_plan)),
         upload_id,
         object_key,
         retrieve_status_staged,
         event.completion_date,
         event.job_id,
-    )
+        chunk_size,
+        time.time() + FAN_OUT_LEASE_SECONDS,
+    ):
+        # A duplicate notification processed concurrently staged the archive
+        # with its own upload, which is the only one its chunks are sent for
+        logger.info(
+            f"Archive {workflow_run}:{archive_id} staged by a duplicate job notification, aborting upload {upload_id}"
+        )
+        abort_multipart_upload(object_key, upload_id)
+        return
 
     send_chunk_events(
-        chunks,
+        chunk_plan,
         event.job_id,
         workflow_run,
         vault_name,
         archive_id,
         upload_id,
         object_key,
+        event.completion_date,
+    )
+    update_enqueued_chunks(ddb_client, workflow_run, archive_id, len(chunk_plan))
+
+
+def is_fan_out_incomplete(glacier_transfer_record: GlacierTransferMetadata) -> bool:
+    """
+    Returns whether chunk events of the staged archive are still to be sent.
+    """
+    # Archives staged before chunk events were counted have no enqueued_chunks
+    return (
+        glacier_transfer_record.enqueued_chunks is not None
+        and glacier_transfer_record.chunks_count is not None
+        and glacier_transfer_record.enqueued_chunks
+        < glacier_transfer_record.chunks_count
+    )
+
+
+def claim_fan_out(
+    ddb_client: DynamoDBClient,
+    glacier_transfer_record: GlacierTransferMetadata,
+    now: float,
+) -> bool:
+    """
+    Takes over the expired fan-out lease of the staged archive, so that a single
+    notification resumes it. Returns whether the lease was claimed.
+    """
+    condition = "enqueued_chunks < chunks_count AND attribute_not_exists(fan_out_lease)"
+    values = {":fl": {"N": str(now + FAN_OUT_LEASE_SECONDS)}}
+    if glacier_transfer_record.fan_out_lease is not None:
+        condition = "enqueued_chunks < chunks_count AND fan_out_lease = :previous"
+        values[":previous"] = {"N": str(glacier_transfer_record.fan_out_lease)}
+    try:
+        ddb_client.update_item(
+            TableName=os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME],
+            Key=GlacierTransferMetadataRead(
+                workflow_run=glacier_transfer_record.workflow_run,
+                glacier_object_id=glacier_transfer_record.glacier_object_id,
+            ).key,
+            UpdateExpression="SET fan_out_lease = :fl",
+            ConditionExpression=condition,
+            ExpressionAttributeValues=values,
+        )
+    except ddb_client.exceptions.ConditionalCheckFailedException:
+        return False
+    return True
+
+
+def resume_chunk_events(
+    ddb_client: DynamoDBClient, glacier_transfer_record: GlacierTransferMetadata
+) -> None:
+    workflow_run = glacier_transfer_record.workflow_run
+    archive_id = glacier_transfer_record.glacier_object_id
+    size = glacier_transfer_record.size
+    upload_id = glacier_transfer_record.upload_id
+    object_key = glacier_transfer_record.s3_destination_key
+    if size is None or upload_id is None or object_key is None:
+        logger.error(
+            f"Archive {workflow_run}:{archive_id} is staged without its size, upload or destination key, chunk events can not be sent"
+        )
+        return
+    chunk_plan = ChunkPlan(
+        size, glacier_transfer_record.chunk_size or plan_archive_chunk_size(size)
+    )
+    send_chunk_events(
+        chunk_plan,
+        glacier_transfer_record.staged_job_id or glacier_transfer_record.job_id,
+        workflow_run,
+        glacier_transfer_record.vault_name,
+        archive_id,
+        upload_id,
+        object_key,
+        glacier_transfer_record.download_window,
+    )
+    update_enqueued_chunks(ddb_client, workflow_run, archive_id, len(chunk_plan))
+
+
+def update_enqueued_chunks(
+    ddb_client: DynamoDBClient, workflow_run: str, archive_id: str, count: int
+) -> None:
+    ddb_client.update_item(
+        TableName=os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME],
+        Key=GlacierTransferMetadataRead(
+            workflow_run=workflow_run, glacier_object_id=archive_id
+        ).key,
+        UpdateExpression="SET enqueued_chunks = :ec",
+        ExpressionAttributeValues={":ec": {"N": str(count)}},
+    )
+
+
+def transfer_small_archive(
+    ddb_client: DynamoDBClient,
+    glacier_transfer_record: GlacierTransferMetadata,
+    job_id: str,
+    completion_date: str,
+) -> None:
+    """
+    Downloads the whole archive, validates it against its Glacier tree hash and
+    copies it to the output bucket with a single PutObject, then marks it as
+    downloaded.
+
+    :raises GlacierValidationMismatch: If the downloaded archive does not match
+        the tree hash returned by Glacier or the one from the inventory.
+    """
+    workflow_run = glacier_transfer_record.workflow_run
+    archive_id = glacier_transfer_record.glacier_object_id
+    assert glacier_transfer_record.size is not None
+    bucket_name = os.environ[OutputKeys.OUTPUT_BUCKET_NAME]
+    object_key = f"{workflow_run}/{glacier_transfer_record.file_name}"
+
+    try:
+        body, chunk_hash = download_archive(
+            GlacierAPIsFactory.create_instance(os.getenv("MockGlacier") == "True"),
+            job_id,
+            glacier_transfer_record.vault_name,
+            glacier_transfer_record.size,
+            glacier_transfer_record.sha256_tree_hash,
+        )
+    except GlacierValidationMismatch:
+        logger.error(
+            f"Archive {workflow_run}:{archive_id} does not match its tree hash {glacier_transfer_record.sha256_tree_hash}"
+        )
+        raise
+
+    s3_client: S3Client = get_client("s3")
+    s3_client.put_object(
+        Bucket=bucket_name,
+        Key=object_key,
+        Body=body,
+        ChecksumAlgorithm="SHA256",
+        ChecksumSHA256=b64encode(chunk_hash.digest()).decode("ascii"),
+        StorageClass=glacier_transfer_record.s3_storage_class,  # type: ignore
+        ExpectedBucketOwner=os.environ["AWS_ACCOUNT_ID"],
+    )
+
+    ddb_client.update_item(
+        TableName=os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME],
+        Key=GlacierTransferMetadataRead(
+            workflow_run=workflow_run, glacier_object_id=archive_id
+        ).key,
+        UpdateExpression="SET s3_destination_bucket = :db, s3_destination_key = :dk, retrieve_status = :rs, download_window = :dw, staged_job_id = :sji",
+        ExpressionAttributeValues={
+            ":db": {"S": bucket_name},
+            ":dk": {"S": object_key},
+            ":rs": {
+                "S": f"{workflow_run}/{GlacierTransferModel.StatusCode.DOWNLOADED}"
+            },
+            ":dw": {"S": completion_date},
+            ":sji": {"S": job_id},
+        },
+    )
+    logger.info(
+        f"Archive {workflow_run}:{archive_id} of {glacier_transfer_record.size} bytes copied with a single request"
+    )
+
+
+def send_packing_event(
+    glacier_transfer_record: GlacierTransferMetadata,
+    job_id: str,
+    completion_date: str,
+) -> None:
+    assert glacier_transfer_record.size is not None
+    message_body: events.ArchivePacking = {
+        "JobId": job_id,
+        "VaultName": glacier_transfer_record.vault_name,
+        "WorkflowRun": glacier_transfer_record.workflow_run,
+        "GlacierObjectId": glacier_transfer_record.glacier_object_id,
+        "FileName": glacier_transfer_record.file_name,
+        "ArchiveSize": glacier_transfer_record.size,
+        "SHA256TreeHash": glacier_transfer_record.sha256_tree_hash,
+        "S3StorageClass": glacier_transfer_record.s3_storage_class,
+        "DownloadWindow": completion_date,
+    }
+    get_client("sqs").send_message(
+        QueueUrl=os.environ[OutputKeys.PACKING_SQS_URL],
+        MessageBody=json.dumps(message_body),
     )
 
 
@@ -129,9 +403,19 @@ def get_glacier_transfer_metadata(
     return None
 
 
+def abort_multipart_upload(object_key: str, upload_id: str) -> None:
+    s3_client: S3Client = get_client("s3")
+    s3_client.abort_multipart_upload(
+        Bucket=os.environ[OutputKeys.OUTPUT_BUCKET_NAME],
+        Key=object_key,
+        UploadId=upload_id,
+        ExpectedBucketOwner=os.environ["AWS_ACCOUNT_ID"],
+    )
+
+
 def create_multipart_upload(object_key: str, storage_class: str) -> str:
     bucket_name = os.environ[OutputKeys.OUTPUT_BUCKET_NAME]
-    s3_client: S3Client = boto3.client("s3", config=__boto_config__)
+    s3_client: S3Client = get_client("s3")
     multipart_response = s3_client.create_multipart_upload(
         Bucket=bucket_name,
         Key=object_key,
@@ -143,30 +427,104 @@ def create_multipart_upload(object_key: str, storage_class: str) -> str:
 
 
 def send_chunk_events(
-    chunks: List[str],
+    chunk_plan: ChunkPlan,
     job_id: str,
     workflow_run: str,
     vault_name: str,
     archive_id: str,
     upload_id: str,
     object_key: str,
+    download_window: str | None = None,
 ) -> None:
-    chunk_sqs_url = os.environ[OutputKeys.CHUNKS_SQS_URL]
+    """
+    Sends a chunk retrieval event per chunk to the retrieval lane of the archive.
+    Besides where to upload it, each event carries what does not change once the
+    archive is staged, including the descriptor of the chunk plan, so that chunks
+    are retrieved without reading the archive metadata.
+
+    Events are sent in batches of SEND_BATCH_SIZE on a thread pool, and the enqueue
+    throughput is published as a metric.
+
+    :raises MaximumRetryLimitExceeded: If some events could not be sent, after
+        the others were.
+    """
+    start = timer()
+    chunk_sqs_url = lane_queue_url(chunk_plan.size)
     bucket_name = os.environ[OutputKeys.OUTPUT_BUCKET_NAME]
-    sqs = boto3.client("sqs", config=__boto_config__)
-    for index, chunk in enumerate(chunks):
-        message_body = {
+    sqs: SQSClient = get_client("sqs")
+    descriptor = chunk_plan.descriptor()
+
+    def message_entry(index: int) -> SendMessageBatchRequestEntryTypeDef:
+        message_body: events.ChunkRetrieval = {
             "JobId": job_id,
             "VaultName": vault_name,
-            "ByteRange": chunk,
+            "ByteRange": chunk_plan.byte_range(index),
             "S3DestinationBucket": bucket_name,
             "S3DestinationKey": object_key,
             "GlacierObjectId": archive_id,
             "UploadId": upload_id,
             "PartNumber": index + 1,
             "WorkflowRun": workflow_run,
+            "ChunkPlan": descriptor,
         }
-        sqs.send_message(QueueUrl=chunk_sqs_url, MessageBody=json.dumps(message_body))
+        if download_window is not None:
+            message_body["DownloadWindow"] = download_window
+        return {"Id": str(index), "MessageBody": json.dumps(message_body)}
+
+    def send_batch(first: int) -> None:
+        last = min(first + SEND_BATCH_SIZE, len(chunk_plan))
+        send_message_batch(
+            sqs, chunk_sqs_url, [message_entry(index) for index in range(first, last)]
+        )
+
+    executor = shared_executor("chunk-fan-out", FAN_OUT_WORKERS)
+    batches = [
+        executor.submit(send_batch, first)
+        for first in range(0, len(chunk_plan), SEND_BATCH_SIZE)
+    ]
+    # Every batch is given its chance before the failure is raised
+    errors = [batch.exception() for batch in batches]
+    if error := next((error for error in errors if error is not None), None):
+        raise error
+
+    elapsed = timer() - start
+    logger.info(
+        f"Sent {len(chunk_plan)} chunk events of {workflow_run}:{archive_id} in {elapsed:.3f}s"
+    )
+    put_metrics(
+        {
+            "ChunkEventsEnqueued": (len(chunk_plan), "Count"),
+            "ChunkEnqueueThroughput": (
+                len(chunk_plan) / max(elapsed, 1e-6),
+                "Count/Second",
+            ),
+        }
+    )
+
+
+def send_message_batch(
+    sqs: SQSClient, queue_url: str, entries: List[SendMessageBatchRequestEntryTypeDef]
+) -> None:
+    """
+    Sends the entries with SendMessageBatch, sending again those that failed.
+
+    :raises MaximumRetryLimitExceeded: If entries still failed after
+        SEND_BATCH_ATTEMPTS attempts.
+    """
+    for attempt in range(SEND_BATCH_ATTEMPTS):
+        if attempt:
+            time.sleep(SEND_BATCH_BACKOFF_SECONDS * 2 ** (attempt - 1))
+        response = sqs.send_message_batch(QueueUrl=queue_url, Entries=entries)
+        if not (failed := response.get("Failed")):
+            return
+        failed_ids = {entry["Id"] for entry in failed}
+        entries = [entry for entry in entries if entry["Id"] in failed_ids]
+        logger.warning(
+            f"Failed to send {len(entries)} messages: {failed[0].get('Code')} {failed[0].get('Message')}"
+        )
+    raise MaximumRetryLimitExceeded(
+        SEND_BATCH_ATTEMPTS, f"{len(entries)} messages not sent to {queue_url}"
+    )
 
 
 def update_glacier_transfer_metadata(
@@ -179,21 +537,41 @@ def update_glacier_transfer_metadata(
     retrieve_status: str,
     completion_date: str,
     job_id: str,
-) -> None:
+    chunk_size: int,
+    fan_out_lease: float,
+) -> bool:
+    """
+    Stages the archive for the job and claims it for the upload, unless it was
+    already staged or downloaded, or the archive was requested again with
+    another job in between. The fan-out of its chunk events is owned until
+    fan_out_lease. Returns whether the archive was staged.
+    """
     bucket_name = os.environ[OutputKeys.OUTPUT_BUCKET_NAME]
-    ddb_client.update_item(
-        TableName=os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME],
-        Key=GlacierTransferMetadataRead(
-            workflow_run=workflow_run, glacier_object_id=archive_id
-        ).key,
-        UpdateExpression="SET chunks_count = :cc, upload_id = :ui, s3_destination_bucket = :db, s3_destination_key = :dk, retrieve_status = :rs, download_window = :dw, staged_job_id = :sji",
-        ExpressionAttributeValues={
-            ":cc": {"N": chunk_count},
-            ":ui": {"S": upload_id},
-            ":db": {"S": bucket_name},
-            ":dk": {"S": object_key},
-            ":rs": {"S": retrieve_status},
-            ":dw": {"S": completion_date},
-            ":sji": {"S": job_id},
-        },
-    )
+    try:
+        ddb_client.update_item(
+            TableName=os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME],
+            Key=GlacierTransferMetadataRead(
+                workflow_run=workflow_run, glacier_object_id=archive_id
+            ).key,
+            UpdateExpression="SET chunks_count = :cc, upload_id = :ui, s3_destination_bucket = :db, s3_destination_key = :dk, retrieve_status = :rs, download_window = :dw, staged_job_id = :sji, completed_parts = :cp, chunk_size = :cs, enqueued_chunks = :ec, fan_out_lease = :fl",
+            ConditionExpression="job_id = :sji AND NOT retrieve_status IN (:rs, :downloaded)",
+            ExpressionAttributeValues={
+                ":cc": {"N": chunk_count},
+                ":ui": {"S": upload_id},
+                ":db": {"S": bucket_name},
+                ":dk": {"S": object_key},
+                ":rs": {"S": retrieve_status},
+                ":dw": {"S": completion_date},
+                ":sji": {"S": job_id},
+                ":cp": {"N": "0"},
+                ":cs": {"N": str(chunk_size)},
+                ":ec": {"N": "0"},
+                ":fl": {"N": str(fan_out_lease)},
+                ":downloaded": {
+                    "S": f"{workflow_run}/{GlacierTransferModel.StatusCode.DOWNLOADED}"
+                },
+            },
+        )
+    except ddb_client.exceptions.ConditionalCheckFailedException:
+        return False
+    return True
@@ -0,0 +1,104 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import logging
+import math
+import os
+import time
+from typing import TYPE_CHECKING
+
+from solution.application.model.partition_metric_record import PartitionMetricRecord
+from solution.application.model.workflow_metadata_model import WorkflowMetadataRecord
+from solution.application.util.clients import get_client
+from solution.infrastructure.output_keys import OutputKeys
+
+if TYPE_CHECKING:
+    from mypy_boto3_dynamodb import DynamoDBClient
+else:
+    DynamoDBClient = object
+
+logger = logging.getLogger()
+logger.setLevel(int(os.environ.get("LOGGING_LEVEL", logging.INFO)))
+
+SECONDS_PER_DAY = 24 * 60 * 60
+# Initiations are released continuously at the daily quota spread over the day.
+# Each initiated batch moves paced_until, the time by which its bytes are within
+# the quota pace, forward by its size over the quota rate, starting from now when
+# the workflow run was idle, so idle time builds up no credit. The next batch is
+# held back while paced_until is more than PACING_BURST_SECONDS ahead
+PACING_BURST_SECONDS = 15 * 60
+PACING_UPDATE_ATTEMPTS = 5
+
+
+def pacing_delay(
+    paced_until: float, initiated_size: int, daily_quota: int, now: float
+) -> tuple[float, int]:
+    """
+    Returns paced_until once initiated_size bytes more were initiated at now, and
+    the seconds to wait before the next initiation.
+    """
+    paced_until = max(paced_until, now) + initiated_size * SECONDS_PER_DAY / daily_quota
+    return paced_until, max(0, math.ceil(paced_until - now - PACING_BURST_SECONDS))
+
+
+def pace_initiation(workflow_run: str, initiated_size: int) -> int:
+    """
+    Accounts for a batch of initiated_size bytes initiated by the workflow run, and
+    returns the seconds to wait before its next batch is initiated. Nothing is
+    waited for when the workflow run has no daily quota.
+    """
+    ddb_client: DynamoDBClient = get_client("dynamodb")
+    workflow_metadata = ddb_client.get_item(
+        TableName=os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME],
+        Key={"pk": {"S": workflow_run}, "sk": {"S": WorkflowMetadataRecord.sk}},
+        ProjectionExpression="daily_quota",
+    ).get("Item")
+    if not workflow_metadata or "daily_quota" not in workflow_metadata:
+        return 0
+    daily_quota = int(workflow_metadata["daily_quota"]["N"])
+    if daily_quota <= 0 or initiated_size <= 0:
+        return 0
+
+    key = PartitionMetricRecord(
+        pk=PartitionMetricRecord.partition_key(workflow_run)
+    ).key
+    for _ in range(PACING_UPDATE_ATTEMPTS):
+        partition_metric = ddb_client.get_item(
+            TableName=os.environ[OutputKeys.METRIC_TABLE_NAME],
+            Key=key,
+            ConsistentRead=True,
+        ).get("Item")
+        previous = (
+            PartitionMetricRecord.parse(partition_metric).paced_until
+            if partition_metric
+            else None
+        )
+        paced_until, delay = pacing_delay(
+            previous or 0.0, initiated_size, daily_quota, time.time()
+        )
+        condition = "attribute_not_exists(paced_until)"
+        values = {":pu": {"N": str(paced_until)}}
+        if previous is not None:
+            condition = "paced_until = :previous"
+            values[":previous"] = {"N": str(previous)}
+        try:
+            ddb_client.update_item(
+                TableName=os.environ[OutputKeys.METRIC_TABLE_NAME],
+                Key=key,
+                UpdateExpression="SET paced_until = :pu",
+                ConditionExpression=condition,
+                ExpressionAttributeValues=values,
+            )
+        except ddb_client.exceptions.ConditionalCheckFailedException:
+            continue
+        logger.info(
+            f"Paced {initiated_size} bytes of {workflow_run}, next initiation in {delay}s"
+        )
+        return delay
+
+    # Another batch of the workflow run paced concurrently, which the initiation
+    # workflow does not do, so its pace is left to it
+    logger.warning(f"Failed to pace {initiated_size} bytes of {workflow_run}")
+    return 0
@@ -5,6 +5,16 @@ SPDX-License-Identifier: Apache-2.0
 
 from typing import List
 
+from solution.application.chunking.chunk_plan import ChunkPlan
+from solution.application.hashing.tree_hash import ONE_MB
+
+# S3 rejects multipart upload parts other than the last below 5 MiB, so chunks
+# are planned down to the next tree hash aligned size
+MIN_CHUNK_SIZE = 8 * ONE_MB
+MAX_CHUNKS_COUNT = 10000
+# Chunks of an archive planned to be retrieved in parallel
+TARGET_PARALLELISM = 16
+
 
 def generate_chunk_array(
     size: int, chunk_size: int, check_power_of_two: bool = True
@@ -20,15 +30,7 @@ def generate_chunk_array(
             "Archive chunk size should be a power of 2 to be megabyte and treehash aligned."
         )
 
-    chunks = []
-    start_index = 0
-    end_index = min(size, chunk_size) - 1
-    while end_index < size - 1:
-        chunks.append(f"{start_index}-{end_index}")
-        start_index = end_index + 1
-        end_index = min(start_index + chunk_size - 1, size - 1)
-    chunks.append(f"{start_index}-{end_index}")
-    return chunks
+    return list(ChunkPlan(size, chunk_size).byte_ranges())
 
 
 def is_power_of_two(n: int) -> bool:
@@ -42,3 +44,26 @@ def calculate_chunk_size(total_size: int) -> int:
     while chunk_size < min_size_per_chunk:
         chunk_size = chunk_size * 2
     return chunk_size
+
+
+def plan_chunk_size(
+    total_size: int,
+    memory_budget: int,
+    target_parallelism: int = TARGET_PARALLELISM,
+    max_chunks_count: int = MAX_CHUNKS_COUNT,
+) -> int:
+    """
+    Picks the largest power of two chunk size, from MIN_CHUNK_SIZE up, that splits
+    the archive into at least target_parallelism chunks and whose chunks fit in the
+    memory budget of a chunk on a worker, where a chunk is held twice while its
+    sub-ranges are joined. The chunks count limit takes precedence over both.
+    """
+    smallest = MIN_CHUNK_SIZE
+    while smallest * max_chunks_count < total_size:
+        smallest *= 2
+
+    largest = min(total_size // target_parallelism, memory_budget // 2)
+    chunk_size = smallest
+    while chunk_size * 2 <= largest:
+        chunk_size *= 2
+    return chunk_size
@@ -0,0 +1,70 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from dataclasses import dataclass
+from typing import Iterator, Tuple
+
+from solution.application.model import events
+from solution.application.util.exceptions import ChunkSizeTooSmall
+
+
+@dataclass(frozen=True)
+class ChunkPlan:
+    """
+    Byte ranges splitting size bytes into chunks of chunk_size bytes, each chunk
+    starting overlap bytes before the end of the previous one. Ranges are computed
+    when indexed instead of being held as a list, and are inclusive, as in the
+    Glacier and S3 Range headers.
+    """
+
+    size: int
+    chunk_size: int
+    overlap: int = 0
+
+    def __post_init__(self) -> None:
+        if self.chunk_size <= self.overlap:
+            raise ChunkSizeTooSmall(self.chunk_size, self.overlap)
+
+    @property
+    def step(self) -> int:
+        return self.chunk_size - self.overlap
+
+    def __len__(self) -> int:
+        if self.size <= self.chunk_size:
+            return 1
+        return 1 - (-(self.size - self.chunk_size) // self.step)
+
+    def __getitem__(self, index: int) -> Tuple[int, int]:
+        count = len(self)
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("Chunk index out of range")
+        start = index * self.step
+        return start, min(start + self.chunk_size, self.size) - 1
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        step, chunk_size, size = self.step, self.chunk_size, self.size
+        for start in range(0, len(self) * step, step):
+            yield start, min(start + chunk_size, size) - 1
+
+    def byte_range(self, index: int) -> str:
+        start, end = self[index]
+        return f"{start}-{end}"
+
+    def byte_ranges(self) -> Iterator[str]:
+        for start, end in self:
+            yield f"{start}-{end}"
+
+    def descriptor(self) -> events.ChunkPlanDescriptor:
+        return {
+            "Size": self.size,
+            "ChunkSize": self.chunk_size,
+            "Overlap": self.overlap,
+        }
+
+    @classmethod
+    def from_descriptor(cls, descriptor: events.ChunkPlanDescriptor) -> "ChunkPlan":
+        return cls(descriptor["Size"], descriptor["ChunkSize"], descriptor["Overlap"])
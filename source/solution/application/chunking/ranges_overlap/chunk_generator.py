@@ -5,6 +5,7 @@ SPDX-License-Identifier: Apache-2.0
 
 from typing import List
 
+from solution.application.chunking.chunk_plan import ChunkPlan
 from solution.application.util.exceptions import ChunkSizeTooSmall
 
 
@@ -17,17 +18,11 @@ def generate_chunk_array(
     When retrieving the inventory, newline delimiter will be used to trim data to only include complete records.
     """
 
-    chunks = []
-    start_index = 0
-    end_index = min(inventory_size, chunk_size) - 1
-
     if chunk_size < maximum_inventory_record_size:
         raise ChunkSizeTooSmall(chunk_size, maximum_inventory_record_size)
 
-    while end_index < inventory_size - 1:
-        chunks.append(f"{start_index}-{end_index}")
-        start_index = end_index - maximum_inventory_record_size + 1
-        end_index = min(start_index + chunk_size - 1, inventory_size - 1)
-
-    chunks.append(f"{start_index}-{end_index}")
-    return chunks
+    return list(
+        ChunkPlan(
+            inventory_size, chunk_size, maximum_inventory_record_size
+        ).byte_ranges()
+    )
@@ -8,11 +8,9 @@ import logging
 import os
 from typing import TYPE_CHECKING
 
-import boto3
-
-from solution.application import __boto_config__
 from solution.application.model.facilitator import AsyncRecord, JobCompletionEvent
 from solution.application.model.metric_record import MetricRecord
+from solution.application.util.clients import get_client
 from solution.infrastructure.output_keys import OutputKeys
 
 if TYPE_CHECKING:
@@ -26,7 +24,7 @@ logger.setLevel(int(os.environ.get("LOGGING_LEVEL", logging.INFO)))
 
 
 def check_workflow_completion(workflow_run: str) -> str:
-    ddb_client: DynamoDBClient = boto3.client("dynamodb", config=__boto_config__)
+    ddb_client: DynamoDBClient = get_client("dynamodb")
     if is_workflow_completed(workflow_run, ddb_client):
         job_id = f"{workflow_run}|COMPLETION"
         async_record = AsyncRecord(
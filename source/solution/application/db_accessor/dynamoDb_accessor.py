@@ -7,9 +7,7 @@ import logging
 import os
 from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
-import boto3
-
-from solution.application import __boto_config__
+from solution.application.util.clients import get_client
 
 if TYPE_CHECKING:
     from mypy_boto3_dynamodb import DynamoDBClient
@@ -24,9 +22,7 @@ class DynamoDBAccessor:
     def __init__(
         self, table_name: str, client: Optional[DynamoDBClient] = None
     ) -> None:
-        self.dynamodb: DynamoDBClient = client or boto3.client(
-            "dynamodb", config=__boto_config__
-        )
+        self.dynamodb: DynamoDBClient = client or get_client("dynamodb")
         self.table_name = table_name
 
     def insert_item(self, item: Dict[str, Any]) -> None:
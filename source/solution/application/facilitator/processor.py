@@ -7,10 +7,8 @@ import logging
 import os
 from typing import TYPE_CHECKING, Any
 
-import boto3
-
-from solution.application import __boto_config__
 from solution.application.model.facilitator import AsyncRecord, JobCompletionEvent
+from solution.application.util.clients import get_client
 from solution.infrastructure.output_keys import OutputKeys
 
 if TYPE_CHECKING:
@@ -56,7 +54,7 @@ def handle_record_changed(attributes: dict[str, Any]) -> None:
 
 
 def update_record(record: AsyncRecord) -> None:
-    client: DynamoDBClient = boto3.client("dynamodb", config=__boto_config__)
+    client: DynamoDBClient = get_client("dynamodb")
 
     update_parameters = record.inventory_job_completion_update_parameters
     client.update_item(
@@ -85,5 +83,5 @@ def notify_of_result(task_token: str, event: JobCompletionEvent) -> None:
 
 
 def get_sfn_client() -> SFNClient:
-    client: SFNClient = boto3.client("stepfunctions", config=__boto_config__)
+    client: SFNClient = get_client("stepfunctions")
     return client
@@ -3,9 +3,18 @@ Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 SPDX-License-Identifier: Apache-2.0
 """
 
-from typing import TYPE_CHECKING, Optional
+from collections import deque
+from concurrent import futures
+from typing import TYPE_CHECKING, Iterator, Optional
 
-from solution.application.util.exceptions import AccessViolation
+from solution.application.chunking.chunk_generator import is_power_of_two
+from solution.application.hashing.chunk_hash import ChunkHash
+from solution.application.hashing.tree_hash import ONE_MB, TreeHash
+from solution.application.util.exceptions import (
+    AccessViolation,
+    GlacierValidationMismatch,
+)
+from solution.application.util.executor import shared_executor
 
 if TYPE_CHECKING:
     from mypy_boto3_glacier.client import GlacierClient
@@ -14,6 +23,9 @@ else:
     GlacierClient = object
     GetJobOutputOutputTypeDef = object
 
+DOWNLOAD_CONCURRENCY = 4
+DOWNLOAD_RANGE_SIZE = 64 * ONE_MB
+
 
 class GlacierDownload:
     def __init__(
@@ -39,5 +51,181 @@ class GlacierDownload:
         self.accessed = True
         return self.response["body"].read()
 
+    def stream(self, buffer_size: int) -> Iterator[bytes]:
+        """
+        Yields the downloaded range in buffers of exactly buffer_size bytes,
+        except for the last one, so that only one buffer is held at a time.
+        """
+        if self.accessed:
+            raise AccessViolation()
+        self.accessed = True
+        body = self.response["body"]
+        while buffer := body.read(buffer_size):
+            while len(buffer) < buffer_size and (
+                remaining := body.read(buffer_size - len(buffer))
+            ):
+                buffer += remaining
+            yield buffer
+
     def checksum(self) -> Optional[str]:
         return self.response.get("checksum")
+
+
+class GlacierRangedDownload:
+    """
+    Downloads a byte range as consecutive sub-ranges of range_size bytes, fetching
+    up to concurrency sub-ranges at a time and returning them in order.
+
+    range_size is a power of 2 number of megabytes and the byte range starts at a
+    multiple of it, as archive chunks do, so every sub-range is treehash aligned and
+    Glacier returns its tree hash. Only the sub-ranges in flight are held in memory.
+    """
+
+    def __init__(
+        self,
+        glacier_client: GlacierClient,
+        job_id: str,
+        vault_name: str,
+        byte_range: str,
+        concurrency: int = DOWNLOAD_CONCURRENCY,
+        range_size: int = DOWNLOAD_RANGE_SIZE,
+    ) -> None:
+        if range_size % ONE_MB or not is_power_of_two(range_size // ONE_MB):
+            raise ValueError(
+                "Download range size should be a power of 2 number of megabytes to be treehash aligned."
+            )
+        if concurrency < 1:
+            raise ValueError("Download concurrency should be at least 1.")
+        self.glacier_client = glacier_client
+        self.job_id = job_id
+        self.vault_name = vault_name
+        self.concurrency = concurrency
+        self.range_size = range_size
+
+        start, end = (int(index) for index in byte_range.split("-"))
+        self.byte_ranges = [
+            f"{offset}-{min(offset + range_size, end + 1) - 1}"
+            for offset in range(start, end + 1, range_size)
+        ]
+        self.checksums: list[Optional[str]] = []
+        self.accessed = False
+
+        self._pending: deque[futures.Future[tuple[bytes, Optional[str]]]] = deque()
+        self._next_range = 0
+        self._fill()
+        # Surfaces request errors, such as an expired job, on construction
+        # as GlacierDownload does
+        if (error := self._pending[0].exception()) is not None:
+            raise error
+
+    def read(self) -> bytes:
+        return b"".join(self._sub_ranges())
+
+    def stream(self, buffer_size: int) -> Iterator[bytes]:
+        """
+        Yields the downloaded range in buffers of exactly buffer_size bytes,
+        except for the last one, regardless of the sub-range boundaries.
+        """
+        buffer = bytearray()
+        for data in self._sub_ranges():
+            view = memoryview(data)
+            offset = 0
+            if buffer:
+                offset = min(len(view), buffer_size - len(buffer))
+                buffer += view[:offset]
+                if len(buffer) < buffer_size:
+                    continue
+                yield bytes(buffer)
+                buffer = bytearray()
+            while offset + buffer_size <= len(view):
+                yield view[offset : offset + buffer_size].tobytes()
+                offset += buffer_size
+            buffer += view[offset:]
+        if buffer:
+            yield bytes(buffer)
+
+    def checksum(self) -> Optional[str]:
+        """
+        Tree hash of the whole range, folded from the tree hashes Glacier returned
+        for each sub-range, as each of them is a complete subtree of the range.
+        """
+        if len(self.checksums) != len(self.byte_ranges):
+            return None
+        tree_hash = TreeHash()
+        for checksum in self.checksums:
+            if checksum is None:
+                return None
+            tree_hash.include(bytes.fromhex(checksum))
+        return tree_hash.digest().hex()
+
+    def mismatched_ranges(self, leaves: list[bytes]) -> list[str]:
+        """
+        Returns the sub-ranges whose tree hash, computed from the given 1 MB tree
+        hash leaves of the whole range, differs from the one returned by Glacier.
+        """
+        leaves_per_range = self.range_size // ONE_MB
+        mismatched = []
+        for index, byte_range in enumerate(self.byte_ranges):
+            tree_hash = TreeHash()
+            for leaf in leaves[
+                index * leaves_per_range : (index + 1) * leaves_per_range
+            ]:
+                tree_hash.include(leaf)
+            checksum = self.checksums[index] if index < len(self.checksums) else None
+            if tree_hash.digest().hex() != checksum:
+                mismatched.append(byte_range)
+        return mismatched
+
+    def _sub_ranges(self) -> Iterator[bytes]:
+        if self.accessed:
+            raise AccessViolation()
+        self.accessed = True
+        while self._pending:
+            data, checksum = self._pending.popleft().result()
+            self._fill()
+            self.checksums.append(checksum)
+            yield data
+
+    def _fill(self) -> None:
+        executor = shared_executor("glacier-download", self.concurrency)
+        while len(self._pending) < self.concurrency and self._next_range < len(
+            self.byte_ranges
+        ):
+            self._pending.append(
+                executor.submit(self._fetch, self.byte_ranges[self._next_range])
+            )
+            self._next_range += 1
+
+    def _fetch(self, byte_range: str) -> tuple[bytes, Optional[str]]:
+        download = GlacierDownload(
+            self.glacier_client, self.job_id, self.vault_name, byte_range
+        )
+        return download.read(), download.checksum()
+
+
+def download_archive(
+    glacier_client: GlacierClient,
+    job_id: str,
+    vault_name: str,
+    size: int,
+    sha256_tree_hash: Optional[str] = None,
+) -> tuple[bytes, ChunkHash]:
+    """
+    Downloads a whole archive with a single request and hashes it, for archives
+    small enough to be held in memory.
+
+    :raises GlacierValidationMismatch: If the archive does not match the tree hash
+        returned by Glacier, or sha256_tree_hash when it is known.
+    """
+    download = GlacierDownload(glacier_client, job_id, vault_name, f"0-{size - 1}")
+    body = download.read()
+    chunk_hash = ChunkHash()
+    chunk_hash.update(body)
+    tree_checksum = chunk_hash.tree_digest().hex()
+    if (
+        len(body) != size
+        or tree_checksum != download.checksum()
+        or (sha256_tree_hash is not None and tree_checksum != sha256_tree_hash)
+    ):
+        raise GlacierValidationMismatch
+    return body, chunk_hash
@@ -8,45 +8,73 @@ import logging
 import os
 from base64 import b64encode
 from datetime import datetime, timedelta
-from typing import TYPE_CHECKING
+from timeit import default_timer as timer
+from typing import TYPE_CHECKING, Iterable
 
-import boto3
-
-from solution.application import __boto_config__
+from solution.application.archive_retrieval.lanes import plan_archive_chunk_size
 from solution.application.db_accessor.dynamoDb_accessor import DynamoDBAccessor
-from solution.application.glacier_s3_transfer.download import GlacierDownload
-from solution.application.glacier_s3_transfer.upload import S3Upload
+from solution.application.glacier_s3_transfer import manifest
+from solution.application.glacier_s3_transfer.download import (
+    DOWNLOAD_RANGE_SIZE,
+    GlacierDownload,
+    GlacierRangedDownload,
+)
+from solution.application.glacier_s3_transfer.stream import ChunkStream
+from solution.application.glacier_s3_transfer.upload import (
+    S3Upload,
+    parts_per_chunk,
+    sub_part_number,
+)
+from solution.application.glacier_s3_transfer.validator import (
+    get_archive_parts,
+    validate_upload,
+)
 from solution.application.glacier_service.glacier_typing import GlacierJobType
-from solution.application.hashing.tree_hash import TreeHash
+from solution.application.hashing.chunk_hash import ChunkHash
 from solution.application.model.glacier_transfer_meta_model import (
     GlacierTransferMetadata,
     GlacierTransferMetadataRead,
 )
 from solution.application.model.glacier_transfer_model import GlacierTransferModel
-from solution.application.model.glacier_transfer_part_model import (
-    GlacierTransferPart,
-    GlacierTransferPartRead,
-)
+from solution.application.model.glacier_transfer_part_model import GlacierTransferPart
+from solution.application.util.clients import get_client
 from solution.application.util.exceptions import (
     ExpiredDownloadWindow,
     GlacierValidationMismatch,
     InvalidGlacierRetrievalMetadata,
 )
+from solution.application.util.ttl_cache import TTLCache
 from solution.infrastructure.output_keys import OutputKeys
 
 if TYPE_CHECKING:
+    from mypy_boto3_dynamodb import DynamoDBClient
+    from mypy_boto3_dynamodb.type_defs import UpdateTypeDef
     from mypy_boto3_glacier import GlacierClient
 
     from solution.application.model.responses import (
         GlacierRetrieval as GlacierRetrievalResponse,
     )
 else:
+    DynamoDBClient = object
+    UpdateTypeDef = object
     GlacierClient = object
     GlacierRetrievalResponse = object
 
 logger = logging.getLogger()
 logger.setLevel(int(os.environ.get("LOGGING_LEVEL", logging.INFO)))
 
+# Retrieval metadata only changes when an archive is staged again or downloaded,
+# so the chunks of an archive handled by a container share a single read of it
+METADATA_CACHE_TTL = 60
+
+_metadata_cache: TTLCache[tuple[str, str], GlacierTransferMetadata] = TTLCache(
+    METADATA_CACHE_TTL
+)
+
+
+def clear_metadata_cache() -> None:
+    _metadata_cache.clear()
+
 
 class GlacierToS3Facilitator:
     def __init__(
@@ -62,6 +90,16 @@ class GlacierToS3Facilitator:
         upload_id: str,
         part_number: int,
         glacier_job_type: str,
+        stream_buffer_size: int | None = None,
+        hashing_workers: int = 1,
+        download_concurrency: int = 1,
+        download_range_size: int = DOWNLOAD_RANGE_SIZE,
+        upload_concurrency: int = 1,
+        staged_job_id: str | None = None,
+        download_window: str | None = None,
+        archive_size: int | None = None,
+        chunks_count: int | None = None,
+        chunk_size: int | None = None,
     ) -> None:
         self.glacier_client = glacier_client
         self.vault_name = vault_name
@@ -74,6 +112,17 @@ class GlacierToS3Facilitator:
         self.upload_id = upload_id
         self.part_number = part_number
         self.glacier_job_type = glacier_job_type
+        self.stream_buffer_size = stream_buffer_size
+        self.hashing_workers = hashing_workers
+        self.download_concurrency = download_concurrency
+        self.download_range_size = download_range_size
+        self.upload_concurrency = upload_concurrency
+        self.staged_job_id = staged_job_id
+        self.download_window = download_window
+        self.archive_size = archive_size
+        self.chunks_count = chunks_count
+        self.chunk_size = chunk_size
+        self.completed_parts: int | None = None
 
         self._get_metadata()
 
@@ -83,6 +132,18 @@ class GlacierToS3Facilitator:
 
         Returns a dictionary containing information about the uploaded part.
 
+        When stream_buffer_size is set, the chunk is streamed from Glacier to S3 in
+        buffers of that size and hashed on the fly instead of being read into memory.
+        Tree hash leaves are hashed on hashing_workers threads.
+
+        When download_concurrency is above 1, archive chunks are downloaded as
+        download_range_size sub-ranges, up to download_concurrency at a time, and
+        each sub-range is validated against the tree hash returned by Glacier.
+
+        When upload_concurrency is above 1, archive chunks are uploaded as several
+        S3 parts, up to upload_concurrency at a time. Sub-parts are numbered from the
+        chunk part number, see sub_part_number, and recorded with the chunk part.
+
         :return: A dictionary containing information about the uploaded part.
         :rtype: GlacierRetrievalResponse
 
@@ -92,10 +153,14 @@ class GlacierToS3Facilitator:
 
         :raises ExpiredDownloadWindow: If the download window has expired
 
+        The staged job id, download window, archive size and chunks count are taken
+        from the chunk event when it carries them, and otherwise from the retrieval
+        metadata, which is cached for METADATA_CACHE_TTL seconds per container.
+
         :raises botocore.exceptions.ClientError: If there is an error communicating with AWS.
         """
-        job_id = self.metadata.staged_job_id
-        download_window = self.metadata.download_window
+        job_id = self.staged_job_id or self.metadata.staged_job_id
+        download_window = self.download_window or self.metadata.download_window
         retrieve_status = self.metadata.retrieve_status
 
         if self.glacier_job_type is GlacierJobType.ARCHIVE_RETRIEVAL:
@@ -115,71 +180,189 @@ class GlacierToS3Facilitator:
             ):
                 raise ExpiredDownloadWindow
 
+        sub_part_size = self._sub_part_size()
+        start = timer()
+        download: GlacierDownload | GlacierRangedDownload
         try:
-            download = GlacierDownload(
-                self.glacier_client,
-                job_id,
-                self.vault_name,
-                self.byte_range,
-            )
-            chunk = download.read()
+            if (
+                self.glacier_job_type is GlacierJobType.ARCHIVE_RETRIEVAL
+                and self.download_concurrency > 1
+            ):
+                download = GlacierRangedDownload(
+                    self.glacier_client,
+                    job_id,
+                    self.vault_name,
+                    self.byte_range,
+                    self.download_concurrency,
+                    self.download_range_size,
+                )
+            else:
+                download = GlacierDownload(
+                    self.glacier_client,
+                    job_id,
+                    self.vault_name,
+                    self.byte_range,
+                )
+            if self.stream_buffer_size is None:
+                chunk = download.read()
         except self.glacier_client.exceptions.ResourceNotFoundException:
             raise ExpiredDownloadWindow
 
-        if self.glacier_job_type is GlacierJobType.ARCHIVE_RETRIEVAL:
-            glacier_hash = TreeHash()
-            glacier_hash.update(chunk)
-            if glacier_hash.digest().hex() != download.checksum():
-                raise GlacierValidationMismatch
-
         upload = S3Upload(
             self.s3_destination_bucket,
             self.s3_destination_key,
             self.upload_id,
         )
-        part = upload.upload_part(chunk, self.part_number)
+
+        if self.stream_buffer_size is None:
+            chunk_hash = ChunkHash(max_workers=self.hashing_workers)
+            chunk_hash.update(chunk)
+            if self.glacier_job_type is GlacierJobType.ARCHIVE_RETRIEVAL:
+                self._validate_tree_hash(chunk_hash, download)
+            if sub_part_size is None:
+                part = upload.upload_part(chunk, self.part_number, chunk_hash.digest())
+            else:
+                view = memoryview(chunk)
+                part = self._upload_sub_parts(
+                    upload,
+                    (
+                        view[offset : offset + sub_part_size]
+                        for offset in range(0, len(view), sub_part_size)
+                    ),
+                    chunk_hash,
+                )
+        else:
+            stream = ChunkStream(
+                download,
+                self._byte_range_size(),
+                self.stream_buffer_size,
+                self.hashing_workers,
+            )
+            if sub_part_size is None:
+                part = upload.upload_part_stream(stream, self.part_number)
+            else:
+                part = self._upload_sub_parts(
+                    upload, stream.parts(sub_part_size), stream.chunk_hash
+                )
+                if stream.bytes_read != stream.length:
+                    raise GlacierValidationMismatch
+            chunk_hash = stream.chunk_hash
+            if self.glacier_job_type is GlacierJobType.ARCHIVE_RETRIEVAL:
+                # The uploaded part is only recorded after validation, so a
+                # mismatching part is overwritten when the chunk is retried
+                self._validate_tree_hash(chunk_hash, download)
+
+        logger.info(
+            f"Transferred chunk {self.part_number} of {self.workflow_run}:{self.glacier_object_id} in {timer() - start:.3f}s using {self.download_concurrency} concurrent downloads and {self.upload_concurrency} concurrent uploads, hashed in {chunk_hash.elapsed:.3f}s using {self.hashing_workers} hashing workers"
+        )
 
         if self.glacier_job_type is GlacierJobType.ARCHIVE_RETRIEVAL:
-            part["TreeChecksum"] = b64encode(glacier_hash.digest()).decode("ascii")
+            part["TreeChecksum"] = b64encode(chunk_hash.tree_digest()).decode("ascii")
         self._write_part_info(part)
         return part
 
-    def send_validation_event(self) -> None:
-        if not self._is_last_chunk():
-            logger.info(
-                "Exiting send validation events: More chunks remain for download"
+    def _validate_tree_hash(
+        self,
+        chunk_hash: ChunkHash,
+        download: GlacierDownload | GlacierRangedDownload,
+    ) -> None:
+        if isinstance(download, GlacierRangedDownload) and (
+            mismatched := download.mismatched_ranges(chunk_hash.leaves)
+        ):
+            logger.error(
+                f"Sub-ranges {mismatched} of chunk {self.part_number} of {self.workflow_run}:{self.glacier_object_id} do not match the Glacier tree hash"
             )
+            raise GlacierValidationMismatch
+        if chunk_hash.tree_digest().hex() != download.checksum():
+            raise GlacierValidationMismatch
+
+    def _sub_part_size(self) -> int | None:
+        if (
+            self.glacier_job_type is not GlacierJobType.ARCHIVE_RETRIEVAL
+            or self.upload_concurrency <= 1
+            or not (size := self.archive_size or self.metadata.size)
+        ):
             return None
-        sqs = boto3.client("sqs", config=__boto_config__)
-        validation_sqs_url = os.environ[OutputKeys.VALIDATION_SQS_URL]
-        message_body = {
-            "WorkflowRun": self.workflow_run,
-            "GlacierObjectId": self.glacier_object_id,
+        chunk_size = (
+            self.chunk_size or self.metadata.chunk_size or plan_archive_chunk_size(size)
+        )
+        chunks_count = (
+            self.chunks_count or self.metadata.chunks_count or -(-size // chunk_size)
+        )
+        if self._byte_range_size() > chunk_size:
+            # Its last sub-parts would take part numbers owned by the next chunk
+            raise InvalidGlacierRetrievalMetadata("Byte range exceeds chunk size")
+        self.parts_per_chunk = parts_per_chunk(chunk_size, chunks_count)
+        if self.parts_per_chunk == 1:
+            # A single sub-part would hold the whole chunk in memory, while the
+            # chunk part is streamed
+            return None
+        return chunk_size // self.parts_per_chunk
+
+    def _upload_sub_parts(
+        self,
+        upload: S3Upload,
+        sub_parts: Iterable[bytes | memoryview],
+        chunk_hash: ChunkHash,
+    ) -> GlacierRetrievalResponse:
+        s3_parts = upload.upload_sub_parts(
+            sub_parts,
+            sub_part_number(self.part_number, 0, self.parts_per_chunk),
+            self.upload_concurrency,
+        )
+        return {
+            "PartNumber": self.part_number,
+            "ETag": "",
+            "ChecksumSHA256": b64encode(chunk_hash.digest()).decode("ascii"),
+            "SubParts": [
+                {
+                    "PartNumber": s3_part["PartNumber"],
+                    "ETag": s3_part["ETag"],
+                    "ChecksumSHA256": s3_part["ChecksumSHA256"],
+                }
+                for s3_part in s3_parts
+            ],
         }
-        sqs.send_message(
-            QueueUrl=validation_sqs_url, MessageBody=json.dumps(message_body)
+
+    def _byte_range_size(self) -> int:
+        start, end = self.byte_range.split("-")
+        return int(end) - int(start) + 1
+
+    def validate_if_last_chunk(self) -> None:
+        """
+        Validates the archive and completes its multipart upload when the chunk
+        was the last one to be committed, instead of handing it to the
+        validation queue.
+        """
+        if not self._is_last_chunk():
+            logger.info("Exiting validation: More chunks remain for download")
+            return None
+        validate_upload(
+            workflow_run=self.workflow_run,
+            glacier_object_id=self.glacier_object_id,
+            glacier_job_type=GlacierJobType.ARCHIVE_RETRIEVAL,
         )
 
     def _is_last_chunk(self) -> bool:
-        self._get_metadata()
-        ddb_accessor = DynamoDBAccessor(
-            os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME]
-        )
-        self.glacier_part_items = ddb_accessor.query_items(
-            "pk = :pk",
-            {
-                ":pk": GlacierTransferModel(
-                    workflow_run=self.workflow_run,
-                    glacier_object_id=self.glacier_object_id,
-                ).key["pk"],
-                ":sk": {"S": GlacierTransferPartRead.prefix},
-            },
-            "begins_with ( sk, :sk)",
-            consistent_read=True,
+        if not (chunks_count := self.chunks_count or self.metadata.chunks_count):
+            # Older chunk events do not carry it, and the cached metadata may
+            # predate it being set
+            self._get_metadata(cached=False)
+            if not (chunks_count := self.metadata.chunks_count):
+                return False
+        if self.completed_parts is not None:
+            return self.completed_parts >= int(chunks_count)
+
+        # Archives staged before parts were counted, and retried chunks
+        self._get_metadata(cached=False)
+        parts = get_archive_parts(
+            self.metadata,
+            self.glacier_job_type,
+            self.workflow_run,
+            self.glacier_object_id,
+            DynamoDBAccessor(os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME]),
         )
-        if not self.metadata.chunks_count:
-            return False
-        return len(self.glacier_part_items) == int(self.metadata.chunks_count)
+        return len(parts) >= int(chunks_count)
 
     def _write_part_info(self, part: GlacierRetrievalResponse) -> None:
         glacier_transfer_part = GlacierTransferPart(
@@ -189,21 +372,137 @@ class GlacierToS3Facilitator:
             e_tag=part["ETag"],
             part_number=part["PartNumber"],
             tree_checksum=part.get("TreeChecksum"),
+            sub_parts=json.dumps(
+                [
+                    [s3_part["PartNumber"], s3_part["ETag"], s3_part["ChecksumSHA256"]]
+                    for s3_part in part["SubParts"]
+                ]
+            )
+            if "SubParts" in part
+            else None,
         )
-        ddb_accessor = DynamoDBAccessor(
-            os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME]
+        if self.glacier_job_type is GlacierJobType.ARCHIVE_RETRIEVAL:
+            glacier_transfer_part.upload_id = self.upload_id
+            self._commit_part(glacier_transfer_part, self._manifest_update(part))
+        else:
+            ddb_accessor = DynamoDBAccessor(
+                os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME]
+            )
+            ddb_accessor.insert_item(glacier_transfer_part.marshal())
+
+    def _manifest_update(self, part: GlacierRetrievalResponse) -> UpdateTypeDef | None:
+        size = self.archive_size or self.metadata.size
+        chunks_count = self.chunks_count or self.metadata.chunks_count
+        if not size or not chunks_count:
+            return None
+        try:
+            entry = manifest.pack_part(part)
+        except ValueError as e:
+            logger.warning(
+                f"Chunk {self.part_number} of {self.workflow_run}:{self.glacier_object_id} is recorded as a part item: {e}"
+            )
+            return None
+        chunk_size = (
+            self.chunk_size or self.metadata.chunk_size or plan_archive_chunk_size(size)
+        )
+        shard = manifest.part_shard(
+            self.part_number, manifest.shard_parts(chunk_size, int(chunks_count))
         )
-        ddb_accessor.insert_item(glacier_transfer_part.marshal())
+        return {
+            "TableName": os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME],
+            "Key": manifest.shard_key(
+                self.workflow_run, self.glacier_object_id, self.upload_id, shard
+            ),
+            "UpdateExpression": "SET #p = :entry",
+            "ConditionExpression": "attribute_not_exists(#p)",
+            "ExpressionAttributeNames": {"#p": manifest.entry_name(self.part_number)},
+            "ExpressionAttributeValues": {":entry": {"B": entry}},
+        }
+
+    def _commit_part(
+        self,
+        glacier_transfer_part: GlacierTransferPart,
+        manifest_update: UpdateTypeDef | None = None,
+    ) -> None:
+        """
+        Writes the part, then counts it on the archive metadata, reading back how
+        many parts of the upload were committed.
+
+        The part is written as an entry of the upload manifest when
+        manifest_update is given, and as a part item otherwise. A part is only
+        counted the first time it is written for the upload, so retried chunks
+        are not counted twice. The committed parts are recounted instead, see
+        _is_last_chunk, since the chunk may have failed before counting its part.
+        """
+        table_name = os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME]
+        item = glacier_transfer_part.marshal()
+        dynamodb: DynamoDBClient = get_client("dynamodb")
+        self.completed_parts = None
+
+        if self.metadata.upload_id != self.upload_id:
+            self._get_metadata(cached=False)
+        if (
+            self.metadata.completed_parts is None
+            or self.metadata.upload_id != self.upload_id
+        ):
+            # Staged before parts were counted, or by another upload
+            dynamodb.put_item(TableName=table_name, Item=item)
+            return
+
+        try:
+            if manifest_update is not None:
+                dynamodb.update_item(**manifest_update)
+            else:
+                dynamodb.put_item(
+                    TableName=table_name,
+                    Item=item,
+                    ConditionExpression="attribute_not_exists(upload_id) OR upload_id <> :ui",
+                    ExpressionAttributeValues={":ui": {"S": self.upload_id}},
+                )
+        except dynamodb.exceptions.ConditionalCheckFailedException:
+            # Already written by a previous attempt of the chunk
+            if manifest_update is not None:
+                overwrite = manifest_update.copy()
+                del overwrite["ConditionExpression"]
+                dynamodb.update_item(**overwrite)
+            else:
+                dynamodb.put_item(TableName=table_name, Item=item)
+            return
+
+        try:
+            response = dynamodb.update_item(
+                TableName=table_name,
+                Key=GlacierTransferMetadataRead(
+                    workflow_run=self.workflow_run,
+                    glacier_object_id=self.glacier_object_id,
+                ).key,
+                UpdateExpression="ADD completed_parts :one",
+                ConditionExpression="attribute_exists(completed_parts) AND upload_id = :ui",
+                ExpressionAttributeValues={
+                    ":one": {"N": "1"},
+                    ":ui": {"S": self.upload_id},
+                },
+                ReturnValues="UPDATED_NEW",
+            )
+        except dynamodb.exceptions.ConditionalCheckFailedException:
+            # Staged again by another upload since the metadata was read
+            return
+        self.completed_parts = int(response["Attributes"]["completed_parts"]["N"])
 
-    def _get_metadata(self) -> None:
+    def _get_metadata(self, cached: bool = True) -> None:
         """
         Retrieves Glacier retrieval metadata
 
-        Returns the contents of the DynamoDB metadata entry for the current retrieval
+        Returns the contents of the DynamoDB metadata entry for the current retrieval,
+        from the container cache unless cached is False
 
         :raises InvalidGlacierRetrievalMetadata: If metadata could not be found
 
         """
+        key = (self.workflow_run, self.glacier_object_id)
+        if cached and (cached_metadata := _metadata_cache.get(key)) is not None:
+            self.metadata: GlacierTransferMetadata = cached_metadata
+            return
         ddb_accessor = DynamoDBAccessor(
             os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME]
         )
@@ -215,4 +514,5 @@ class GlacierToS3Facilitator:
         )
         if metadata is None:
             raise InvalidGlacierRetrievalMetadata("Metadata not found")
-        self.metadata: GlacierTransferMetadata = GlacierTransferMetadata.parse(metadata)
+        self.metadata = GlacierTransferMetadata.parse(metadata)
+        _metadata_cache.put(key, self.metadata)
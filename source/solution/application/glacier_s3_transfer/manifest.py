@@ -0,0 +1,170 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import json
+import os
+import re
+import struct
+from base64 import b64decode, b64encode
+from hashlib import sha256
+from typing import TYPE_CHECKING, Any, Dict
+
+from solution.application.glacier_s3_transfer.upload import parts_per_chunk
+from solution.application.model.glacier_transfer_manifest_model import (
+    GlacierTransferManifestRead,
+)
+from solution.application.model.glacier_transfer_part_model import GlacierTransferPart
+from solution.application.util.clients import get_client
+from solution.application.util.dynamodb import batch_get_items
+from solution.infrastructure.output_keys import OutputKeys
+
+if TYPE_CHECKING:
+    from mypy_boto3_dynamodb import DynamoDBClient
+
+    from solution.application.model.responses import (
+        GlacierRetrieval as GlacierRetrievalResponse,
+    )
+else:
+    DynamoDBClient = object
+    GlacierRetrievalResponse = object
+
+# Instead of an item per part, each committed part is a fixed-width binary entry
+# named after its part number, p00001 onwards, on a manifest shard item. An entry
+# is the chunk tree hash followed by a (part number, ETag, SHA256) record per S3
+# part, so the manifest of an archive is read back with BatchGetItem.
+# Shards are keyed by their upload, so parts of a previous upload of the archive
+# are never mistaken for the current one. The entries of a shard, with their
+# names, are kept within MANIFEST_SHARD_SIZE bytes, leaving room for its keys
+# within the 400 KB item limit, so that a manifest is a few shards even for
+# chunks uploaded as several S3 parts. Writes to a shard consume a write unit
+# per KB of the whole shard
+MANIFEST_SHARD_SIZE = 350 * 1024
+
+CHECKSUM_SIZE = 32
+_S3_PART = struct.Struct(">I16s32s")
+_ETAG = re.compile(r'^"?([0-9a-fA-F]{32})"?$')
+_ENTRY_NAME = re.compile(r"^p(\d{5})$")
+
+
+def upload_key(upload_id: str) -> str:
+    return sha256(upload_id.encode("utf-8")).hexdigest()[:16]
+
+
+def shard_parts(chunk_size: int, chunks_count: int) -> int:
+    """
+    Returns how many chunk entries each manifest shard holds, sized for chunks
+    uploaded as the most S3 parts they can be split into.
+    """
+    entry_size = (
+        len(entry_name(chunks_count))
+        + CHECKSUM_SIZE
+        + _S3_PART.size * parts_per_chunk(chunk_size, chunks_count)
+    )
+    return max(1, MANIFEST_SHARD_SIZE // entry_size)
+
+
+def shard_key(
+    workflow_run: str,
+    glacier_object_id: str,
+    upload_id: str,
+    shard: int,
+) -> Dict[str, Any]:
+    return GlacierTransferManifestRead(
+        workflow_run=workflow_run,
+        glacier_object_id=glacier_object_id,
+        upload_key=upload_key(upload_id),
+        shard=shard,
+    ).key
+
+
+def part_shard(part_number: int, parts_in_shard: int) -> int:
+    return (part_number - 1) // parts_in_shard
+
+
+def entry_name(part_number: int) -> str:
+    return f"p{str(part_number).zfill(5)}"
+
+
+def pack_part(part: GlacierRetrievalResponse) -> bytes:
+    """
+    Packs the tree checksum and S3 parts of an uploaded chunk into its manifest
+    entry.
+
+    :raises ValueError: If an ETag is not 32 hexadecimal characters, as returned
+        for parts by S3, or a checksum is not a SHA256
+    """
+    tree_checksum = b64decode(part["TreeChecksum"].encode("ascii"))
+    if len(tree_checksum) != CHECKSUM_SIZE:
+        raise ValueError("Tree checksum is not a SHA256")
+    entry = bytearray(tree_checksum)
+    for s3_part in part.get("SubParts") or [part]:
+        if (etag := _ETAG.match(s3_part["ETag"])) is None:
+            raise ValueError(f"ETag {s3_part['ETag']} can not be packed")
+        checksum = b64decode(s3_part["ChecksumSHA256"].encode("ascii"))
+        if len(checksum) != CHECKSUM_SIZE:
+            raise ValueError("Checksum is not a SHA256")
+        entry += _S3_PART.pack(
+            s3_part["PartNumber"], bytes.fromhex(etag.group(1)), checksum
+        )
+    return bytes(entry)
+
+
+def unpack_part(
+    workflow_run: str, glacier_object_id: str, part_number: int, entry: bytes
+) -> GlacierTransferPart:
+    s3_parts = [
+        (
+            s3_part_number,
+            f'"{etag.hex()}"',
+            b64encode(checksum).decode("ascii"),
+        )
+        for s3_part_number, etag, checksum in _S3_PART.iter_unpack(
+            entry[CHECKSUM_SIZE:]
+        )
+    ]
+    part = GlacierTransferPart(
+        workflow_run=workflow_run,
+        glacier_object_id=glacier_object_id,
+        part_number=part_number,
+        checksum_sha_256=s3_parts[0][2],
+        e_tag=s3_parts[0][1],
+        tree_checksum=b64encode(entry[:CHECKSUM_SIZE]).decode("ascii"),
+    )
+    if len(s3_parts) > 1 or s3_parts[0][0] != part_number:
+        # The checksum of the whole chunk is not kept, only its S3 parts are
+        # needed to complete the upload
+        part.sub_parts = json.dumps(s3_parts)
+    return part
+
+
+def read_manifest(
+    workflow_run: str,
+    glacier_object_id: str,
+    upload_id: str,
+    chunk_size: int,
+    chunks_count: int,
+) -> Dict[int, GlacierTransferPart]:
+    """
+    Returns the parts committed to the manifest of the upload by part number
+    """
+    table_name = os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME]
+    dynamodb: DynamoDBClient = get_client("dynamodb")
+    shards = part_shard(chunks_count, shard_parts(chunk_size, chunks_count)) + 1
+    keys = [
+        shard_key(workflow_run, glacier_object_id, upload_id, shard)
+        for shard in range(shards)
+    ]
+
+    items = batch_get_items(dynamodb, table_name, keys, ConsistentRead=True)
+
+    parts = {}
+    for item in items:
+        for name, value in item.items():
+            if match := _ENTRY_NAME.match(name):
+                part_number = int(match.group(1))
+                parts[part_number] = unpack_part(
+                    workflow_run, glacier_object_id, part_number, value["B"]
+                )
+    return parts
@@ -0,0 +1,70 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+from solution.application.hashing.tree_hash import ONE_MB
+
+# Share of the Lambda memory handed to chunks, the rest is left to the runtime
+MEMORY_BUDGET_RATIO = 0.75
+
+
+def lambda_memory_budget() -> int:
+    memory_size = int(os.environ.get("AWS_LAMBDA_FUNCTION_MEMORY_SIZE", 1536))
+    return int(memory_size * ONE_MB * MEMORY_BUDGET_RATIO)
+
+
+def chunk_memory_estimate(
+    length: int,
+    stream_buffer_size: int | None,
+    download_concurrency: int,
+    download_range_size: int,
+    upload_concurrency: int,
+    sub_part_size: int | None,
+) -> int:
+    """
+    Rough upper bound of the memory held while transferring a chunk of length
+    bytes with the given facilitator settings, its sub-parts being sub_part_size
+    bytes, or None when it is uploaded as a single part.
+    """
+    if stream_buffer_size is None:
+        # The chunk, plus its sub-ranges while they are joined
+        return 2 * length
+    memory = 2 * stream_buffer_size
+    if download_concurrency > 1:
+        memory += download_concurrency * min(download_range_size, length)
+    if upload_concurrency > 1 and sub_part_size is not None:
+        memory += upload_concurrency * min(sub_part_size, length)
+    return memory
+
+
+class MemoryBudget:
+    """
+    Bounds the estimated memory held by the chunks in flight. Reservations block
+    until enough of the budget is released, and a reservation larger than the
+    whole budget is admitted once nothing else is in flight.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.reserved = 0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def reserve(self, size: int) -> Iterator[None]:
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self.reserved == 0 or self.reserved + size <= self.limit
+            )
+            self.reserved += size
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.reserved -= size
+                self._condition.notify_all()
@@ -6,9 +6,7 @@ import logging
 import os
 from typing import TYPE_CHECKING
 
-import boto3
-
-from solution.application import __boto_config__
+from solution.application.util.clients import get_client
 
 if TYPE_CHECKING:
     from mypy_boto3_s3.type_defs import (
@@ -27,7 +25,7 @@ class MultipartCleanup:
     def __init__(self, workflow_run: str, bucket_name: str):
         self.workflow_run = workflow_run
         self.bucket_name = bucket_name
-        self.client = boto3.client("s3", config=__boto_config__)
+        self.client = get_client("s3")
 
     def cleanup(self) -> int:
         open_uploads: ListMultipartUploadsOutputTypeDef = (
@@ -0,0 +1,259 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import io
+import json
+import logging
+import os
+import tarfile
+from base64 import b64encode
+from collections import defaultdict
+from dataclasses import dataclass
+from hashlib import sha256
+from typing import TYPE_CHECKING, Dict, List, Tuple, TypedDict
+
+from solution.application.archive_retrieval.initiator import downloaded_archives
+from solution.application.glacier_s3_transfer.download import download_archive
+from solution.application.hashing.chunk_hash import ChunkHash
+from solution.application.model import events
+from solution.application.model.glacier_transfer_meta_model import (
+    GlacierTransferMetadataRead,
+)
+from solution.application.model.glacier_transfer_model import GlacierTransferModel
+from solution.application.util.clients import get_client
+from solution.application.util.exceptions import GlacierValidationMismatch
+from solution.application.util.executor import shared_executor
+from solution.infrastructure.output_keys import OutputKeys
+
+if TYPE_CHECKING:
+    from mypy_boto3_dynamodb import DynamoDBClient
+    from mypy_boto3_glacier.client import GlacierClient
+    from mypy_boto3_s3.client import S3Client
+else:
+    DynamoDBClient = object
+    GlacierClient = object
+    S3Client = object
+
+logger = logging.getLogger()
+logger.setLevel(int(os.environ.get("LOGGING_LEVEL", logging.INFO)))
+
+# Archives below the packing threshold are not copied to an object each. The
+# archives of a batch of packing events are written to an uncompressed tar object
+# per workflow run under {workflow_run}/packs/, which any tar tool can unpack, and
+# an index of where the data of each archive starts within the pack is written
+# next to it as JSON lines, so a single archive is read back with a ranged GET
+PACK_BATCH_SIZE = 500
+# Largest packing threshold, so that a batch and its pack fit in the Lambda memory
+PACK_ARCHIVE_SIZE_LIMIT = 256 * 1024
+PACKING_WORKERS = 16
+PACKS_PREFIX = "packs"
+INDEX_SUFFIX = ".index.jsonl"
+
+
+class PackIndexEntry(TypedDict):
+    ArchiveId: str
+    Filename: str
+    Offset: int
+    Length: int
+    ChecksumSHA256: str
+    SHA256TreeHash: str
+
+
+@dataclass
+class PackedArchive:
+    message_id: str
+    event: events.ArchivePacking
+    body: bytes
+    chunk_hash: ChunkHash
+
+
+def pack_key(workflow_run: str, archive_ids: List[str]) -> str:
+    """
+    Key of the pack of the archives. It only depends on the archives, so a batch
+    retried with the same archives overwrites its pack. Archives already packed
+    are left out of the batch before it is packed, see pack_archives.
+    """
+    digest = sha256("\n".join(sorted(archive_ids)).encode("utf-8")).hexdigest()
+    return f"{workflow_run}/{PACKS_PREFIX}/{digest[:32]}.tar"
+
+
+def index_key(pack_key: str) -> str:
+    return f"{pack_key}{INDEX_SUFFIX}"
+
+
+def pack_archives(
+    glacier_client: GlacierClient,
+    packing_events: Dict[str, events.ArchivePacking],
+    workers: int = PACKING_WORKERS,
+) -> List[str]:
+    """
+    Downloads the archives of the packing events, keyed by message id, and packs
+    them into a pack per workflow run. Events of archives already downloaded, sent
+    again by duplicate notifications or redriven, are skipped. Returns the message
+    ids of the archives that could not be packed.
+    """
+    ddb_client: DynamoDBClient = get_client("dynamodb")
+    downloaded = downloaded_archives(
+        ddb_client,
+        [
+            (event["WorkflowRun"], event["GlacierObjectId"])
+            for event in packing_events.values()
+        ],
+    )
+    pending: Dict[Tuple[str, str], str] = {}
+    for message_id, event in packing_events.items():
+        archive = (event["WorkflowRun"], event["GlacierObjectId"])
+        if archive in downloaded or archive in pending:
+            logger.info(
+                f"Archive {archive[0]}:{archive[1]} already packed, skipping message {message_id}"
+            )
+            continue
+        pending[archive] = message_id
+    packing_events = {
+        message_id: packing_events[message_id] for message_id in pending.values()
+    }
+
+    executor = shared_executor("archive-packing", workers)
+    downloads = {
+        message_id: executor.submit(
+            download_archive,
+            glacier_client,
+            event["JobId"],
+            event["VaultName"],
+            event["ArchiveSize"],
+            event["SHA256TreeHash"],
+        )
+        for message_id, event in packing_events.items()
+    }
+
+    failed = []
+    packs: Dict[str, List[PackedArchive]] = defaultdict(list)
+    for message_id, download in downloads.items():
+        event = packing_events[message_id]
+        try:
+            body, chunk_hash = download.result()
+        except Exception:
+            logger.exception(
+                f"Failed to download Archive {event['WorkflowRun']}:{event['GlacierObjectId']} of message {message_id}"
+            )
+            failed.append(message_id)
+            continue
+        packs[event["WorkflowRun"]].append(
+            PackedArchive(message_id, event, body, chunk_hash)
+        )
+
+    for workflow_run, archives in packs.items():
+        try:
+            write_pack(workflow_run, archives)
+        except Exception:
+            logger.exception(f"Failed to write a pack of {len(archives)} archives")
+            failed.extend(archive.message_id for archive in archives)
+    return failed
+
+
+def write_pack(workflow_run: str, archives: List[PackedArchive]) -> str:
+    """
+    Writes the archives to a pack and its index, then marks them as downloaded
+    unless a concurrent batch already packed them. Returns the key of the pack.
+    """
+    archives = sorted(archives, key=lambda archive: archive.event["GlacierObjectId"])
+    key = pack_key(
+        workflow_run, [archive.event["GlacierObjectId"] for archive in archives]
+    )
+
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w", format=tarfile.PAX_FORMAT) as tar:
+        for archive in archives:
+            info = tarfile.TarInfo(archive.event["FileName"])
+            info.size = len(archive.body)
+            tar.addfile(info, io.BytesIO(archive.body))
+    data = buffer.getvalue()
+    # Headers are variable length in the PAX format, so data offsets are read back
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r") as tar:
+        offsets = [member.offset_data for member in tar]
+
+    index: List[PackIndexEntry] = [
+        {
+            "ArchiveId": archive.event["GlacierObjectId"],
+            "Filename": archive.event["FileName"],
+            "Offset": offset,
+            "Length": len(archive.body),
+            "ChecksumSHA256": b64encode(archive.chunk_hash.digest()).decode("ascii"),
+            "SHA256TreeHash": archive.chunk_hash.tree_digest().hex(),
+        }
+        for archive, offset in zip(archives, offsets)
+    ]
+
+    bucket_name = os.environ[OutputKeys.OUTPUT_BUCKET_NAME]
+    s3_client: S3Client = get_client("s3")
+    s3_client.put_object(
+        Bucket=bucket_name,
+        Key=key,
+        Body=data,
+        ChecksumAlgorithm="SHA256",
+        ChecksumSHA256=b64encode(sha256(data).digest()).decode("ascii"),
+        StorageClass=archives[0].event["S3StorageClass"],  # type: ignore
+        ExpectedBucketOwner=os.environ["AWS_ACCOUNT_ID"],
+    )
+    # The index is kept readable whatever the storage class of the pack
+    s3_client.put_object(
+        Bucket=bucket_name,
+        Key=index_key(key),
+        Body="".join(f"{json.dumps(entry)}\n" for entry in index).encode("utf-8"),
+        ChecksumAlgorithm="SHA256",
+        ExpectedBucketOwner=os.environ["AWS_ACCOUNT_ID"],
+    )
+
+    ddb_client: DynamoDBClient = get_client("dynamodb")
+    for entry in index:
+        try:
+            ddb_client.update_item(
+                TableName=os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME],
+                Key=GlacierTransferMetadataRead(
+                    workflow_run=workflow_run, glacier_object_id=entry["ArchiveId"]
+                ).key,
+                UpdateExpression="SET s3_destination_bucket = :db, s3_destination_key = :dk, pack_offset = :po, pack_length = :pl, retrieve_status = :rs",
+                ConditionExpression="retrieve_status <> :rs",
+                ExpressionAttributeValues={
+                    ":db": {"S": bucket_name},
+                    ":dk": {"S": key},
+                    ":po": {"N": str(entry["Offset"])},
+                    ":pl": {"N": str(entry["Length"])},
+                    ":rs": {
+                        "S": f"{workflow_run}/{GlacierTransferModel.StatusCode.DOWNLOADED}"
+                    },
+                },
+            )
+        except ddb_client.exceptions.ConditionalCheckFailedException:
+            # Its record keeps pointing at the pack that marked it downloaded
+            logger.info(
+                f"Archive {workflow_run}:{entry['ArchiveId']} packed concurrently, keeping its first pack"
+            )
+    logger.info(f"Packed {len(index)} archives of {workflow_run} in {key}")
+    return key
+
+
+def read_pack_index(bucket_name: str, pack_key: str) -> List[PackIndexEntry]:
+    s3_client: S3Client = get_client("s3")
+    body = s3_client.get_object(Bucket=bucket_name, Key=index_key(pack_key))["Body"]
+    return [json.loads(line) for line in body.read().splitlines() if line]
+
+
+def extract_archive(bucket_name: str, pack_key: str, entry: PackIndexEntry) -> bytes:
+    """
+    Reads a packed archive with a ranged GET of the pack.
+
+    :raises GlacierValidationMismatch: If the data read does not match the SHA256
+        checksum of the archive in the index.
+    """
+    s3_client: S3Client = get_client("s3")
+    body = s3_client.get_object(
+        Bucket=bucket_name,
+        Key=pack_key,
+        Range=f"bytes={entry['Offset']}-{entry['Offset'] + entry['Length'] - 1}",
+    )["Body"].read()
+    if b64encode(sha256(body).digest()).decode("ascii") != entry["ChecksumSHA256"]:
+        raise GlacierValidationMismatch
+    return body
@@ -0,0 +1,82 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from typing import Iterator
+
+from solution.application.glacier_s3_transfer.download import (
+    GlacierDownload,
+    GlacierRangedDownload,
+)
+from solution.application.hashing.chunk_hash import ChunkHash
+from solution.application.hashing.tree_hash import ONE_MB
+
+STREAM_BUFFER_SIZE = 8 * ONE_MB
+
+
+class ChunkStream:
+    """
+    Read-only file-like view over a Glacier download, consumed by the S3 upload.
+
+    The download is pulled in fixed size buffers and each buffer is hashed as it
+    arrives, so the tree hash and the SHA256 checksum of the chunk are available
+    once the upload has read the stream to the end. At most one buffer is held.
+    """
+
+    def __init__(
+        self,
+        download: GlacierDownload | GlacierRangedDownload,
+        length: int,
+        buffer_size: int = STREAM_BUFFER_SIZE,
+        hashing_workers: int = 1,
+    ) -> None:
+        if buffer_size <= 0:
+            raise ValueError("Stream buffer size should be a positive number of bytes.")
+        self.length = length
+        self.buffer_size = buffer_size
+        self.bytes_read = 0
+        self.chunk_hash = ChunkHash(max_workers=hashing_workers)
+        self._buffers = download.stream(buffer_size)
+        self._buffer = memoryview(b"")
+        self._position = 0
+
+    def __len__(self) -> int:
+        return self.length
+
+    def read(self, size: int | None = -1) -> bytes:
+        if size is None or size < 0:
+            return b"".join(iter(lambda: self.read(self.buffer_size), b""))
+        if self._position >= len(self._buffer) and not self._next_buffer():
+            return b""
+        data = self._buffer[self._position : self._position + size]
+        self._position += len(data)
+        return bytes(data)
+
+    def parts(self, size: int) -> Iterator[bytes]:
+        """
+        Yields the rest of the stream in parts of exactly size bytes, except for the
+        last one, regardless of the buffer boundaries.
+        """
+        while data := self.read(size):
+            if len(data) < size:
+                pieces = [data]
+                remaining = size - len(data)
+                while remaining and (piece := self.read(remaining)):
+                    pieces.append(piece)
+                    remaining -= len(piece)
+                data = b"".join(pieces)
+            yield data
+
+    def checksum(self) -> bytes:
+        return self.chunk_hash.digest()
+
+    def _next_buffer(self) -> bool:
+        buffer = next(self._buffers, None)
+        if buffer is None:
+            return False
+        self.chunk_hash.update(buffer)
+        self.bytes_read += len(buffer)
+        self._buffer = memoryview(buffer)
+        self._position = 0
+        return True
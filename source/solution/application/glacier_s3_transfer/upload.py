@@ -3,15 +3,20 @@ Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 SPDX-License-Identifier: Apache-2.0
 """
 
+import io
 import os
 from base64 import b64decode, b64encode
-from typing import TYPE_CHECKING
+from collections import deque
+from concurrent import futures
+from typing import TYPE_CHECKING, Iterable, Optional
 
-import boto3
-
-from solution.application import __boto_config__
+from solution.application.glacier_s3_transfer.stream import ChunkStream
 from solution.application.hashing.s3_hash import S3Hash
+from solution.application.hashing.tree_hash import ONE_MB
 from solution.application.model.glacier_transfer_part_model import GlacierTransferPart
+from solution.application.util.clients import get_client
+from solution.application.util.exceptions import GlacierValidationMismatch
+from solution.application.util.executor import shared_executor
 
 if TYPE_CHECKING:
     from mypy_boto3_s3.client import S3Client
@@ -29,6 +34,77 @@ else:
     CompleteMultipartUploadOutputTypeDef = object
     GlacierRetrievalResponse = object
 
+MAX_PARTS = 10000
+UPLOAD_CONCURRENCY = 4
+# Not configurable, as part numbers derived from it must stay stable for an archive
+UPLOAD_PART_SIZE = 64 * ONE_MB
+
+
+def parts_per_chunk(
+    chunk_size: int, chunks_count: int, part_size: int = UPLOAD_PART_SIZE
+) -> int:
+    """
+    Number of S3 parts each chunk of an archive is uploaded as. It is a power of 2,
+    so that chunks, whose size is a power of 2, split into equal parts, and it is
+    halved until all the parts of the archive fit within the S3 limit.
+    """
+    count = max(1, chunk_size // part_size)
+    while count > 1 and count * chunks_count > MAX_PARTS:
+        count //= 2
+    return count
+
+
+def upload_sub_part_size(chunk_size: int, chunks_count: int) -> int | None:
+    """
+    Size of the S3 parts each chunk of an archive is uploaded as, or None when each
+    chunk is uploaded as a single part.
+    """
+    count = parts_per_chunk(chunk_size, chunks_count)
+    return chunk_size // count if count > 1 else None
+
+
+def sub_part_number(part_number: int, index: int, parts_per_chunk: int) -> int:
+    """
+    S3 part number of the sub-part at index of the chunk with part_number. Each
+    chunk owns a contiguous block of part numbers, so the numbering does not depend
+    on the order in which chunks are uploaded.
+    """
+    return (part_number - 1) * parts_per_chunk + index + 1
+
+
+class _ViewReader(io.RawIOBase):
+    """
+    Seekable file-like body over a memoryview, so that slices of an in-memory
+    chunk are uploaded without being copied.
+    """
+
+    def __init__(self, view: memoryview) -> None:
+        self.view = view
+        self.position = 0
+
+    def __len__(self) -> int:
+        return len(self.view)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.position, io.SEEK_END: len(self)}
+        self.position = base[whence] + offset
+        return self.position
+
+    def readinto(self, buffer: bytearray | memoryview) -> int:  # type: ignore[override]
+        data = self.view[self.position : self.position + len(buffer)]
+        buffer[: len(data)] = data
+        self.position += len(data)
+        return len(data)
+
 
 class S3Upload:
     def __init__(
@@ -37,17 +113,22 @@ class S3Upload:
         key: str,
         upload_id: str,
     ) -> None:
-        self.s3: S3Client = boto3.client("s3", config=__boto_config__)
+        self.s3: S3Client = get_client("s3")
 
         self.bucket_name = bucket_name
         self.key = key
         self.parts: list[GlacierRetrievalResponse] = []
         self.upload_id = upload_id
 
-    def upload_part(self, chunk: bytes, part_number: int) -> GlacierRetrievalResponse:
-        checksum = b64encode(S3Hash.hash(chunk)).decode("ascii")
+    def upload_part(
+        self,
+        chunk: bytes | memoryview,
+        part_number: int,
+        sha256: Optional[bytes] = None,
+    ) -> GlacierRetrievalResponse:
+        checksum = b64encode(sha256 or S3Hash.hash(chunk)).decode("ascii")
         response: UploadPartOutputTypeDef = self.s3.upload_part(
-            Body=chunk,
+            Body=_ViewReader(chunk) if isinstance(chunk, memoryview) else chunk,  # type: ignore
             Bucket=self.bucket_name,
             Key=self.key,
             PartNumber=part_number,
@@ -58,18 +139,60 @@ class S3Upload:
         )
         return S3Upload._build_part(part_number, response["ETag"], checksum)
 
-    def include_part(self, part: GlacierTransferPart) -> None:
-        self.parts.append(
-            S3Upload._build_part(part.part_number, part.e_tag, part.checksum_sha_256)
+    def upload_part_stream(
+        self, stream: ChunkStream, part_number: int
+    ) -> GlacierRetrievalResponse:
+        # The checksum is only known once the stream has been read, so it is sent
+        # as a trailer computed while the body is uploaded
+        response: UploadPartOutputTypeDef = self.s3.upload_part(
+            Body=stream,  # type: ignore
+            Bucket=self.bucket_name,
+            Key=self.key,
+            PartNumber=part_number,
+            UploadId=self.upload_id,
+            ChecksumAlgorithm="SHA256",
+            ExpectedBucketOwner=os.environ["AWS_ACCOUNT_ID"],
         )
+        checksum = b64encode(stream.checksum()).decode("ascii")
+        if (
+            stream.bytes_read != stream.length
+            or response.get("ChecksumSHA256", checksum) != checksum
+        ):
+            raise GlacierValidationMismatch
+        return S3Upload._build_part(part_number, response["ETag"], checksum)
+
+    def upload_sub_parts(
+        self,
+        sub_parts: Iterable[bytes | memoryview],
+        first_part_number: int,
+        max_workers: int,
+    ) -> list[GlacierRetrievalResponse]:
+        """
+        Uploads the sub-parts of a chunk as consecutive S3 parts starting from
+        first_part_number, up to max_workers at a time. Sub-parts are pulled from
+        the iterable as uploads complete, so at most max_workers of them are held.
+        """
+        executor = shared_executor("s3-upload", max_workers)
+        pending: deque[futures.Future[GlacierRetrievalResponse]] = deque()
+        parts = []
+        for part_number, sub_part in enumerate(sub_parts, first_part_number):
+            if len(pending) == max_workers:
+                parts.append(pending.popleft().result())
+            pending.append(executor.submit(self.upload_part, sub_part, part_number))
+        parts.extend(future.result() for future in pending)
+        return parts
+
+    def include_part(self, part: GlacierTransferPart) -> None:
+        for part_number, e_tag, checksum in part.s3_parts:
+            self.parts.append(S3Upload._build_part(part_number, e_tag, checksum))
 
     def complete_upload(self) -> CompleteMultipartUploadOutputTypeDef:
+        # Part numbers of chunks uploaded as sub-parts may have gaps, which S3
+        # allows as long as the parts are listed in ascending order
+        self.parts.sort(key=lambda part: part["PartNumber"])
         s3_hash = S3Hash()
         for part in self.parts:
-            s3_hash.include(
-                b64decode(part["ChecksumSHA256"].encode("ascii")),
-                part["PartNumber"] - 1,
-            )
+            s3_hash.include(b64decode(part["ChecksumSHA256"].encode("ascii")))
 
         return self.s3.complete_multipart_upload(
             Bucket=self.bucket_name,
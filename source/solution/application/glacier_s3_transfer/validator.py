@@ -7,11 +7,11 @@ import os
 from base64 import b64decode
 from typing import TYPE_CHECKING, Any, Dict, List
 
-import boto3
 from botocore.exceptions import ClientError
 
-from solution.application import __boto_config__
+from solution.application.archive_retrieval.lanes import plan_archive_chunk_size
 from solution.application.db_accessor.dynamoDb_accessor import DynamoDBAccessor
+from solution.application.glacier_s3_transfer import manifest
 from solution.application.glacier_s3_transfer.upload import S3Upload
 from solution.application.glacier_service.glacier_typing import GlacierJobType
 from solution.application.hashing.tree_hash import TreeHash
@@ -24,6 +24,7 @@ from solution.application.model.glacier_transfer_part_model import (
     GlacierTransferPart,
     GlacierTransferPartRead,
 )
+from solution.application.util.clients import get_client
 from solution.application.util.exceptions import (
     GlacierValidationMismatch,
     InvalidGlacierRetrievalMetadata,
@@ -119,12 +120,13 @@ def add_glacier_parts(
     s3_upload: S3Upload,
     tree_hash: TreeHash,
 ) -> None:
-    glacier_part_items = get_glacier_object_parts(
-        workflow_run, glacier_object_id, ddb_accessor
-    )
-
-    for glacier_part_dict in glacier_part_items:
-        part = GlacierTransferPart.parse(glacier_part_dict)
+    for part in get_archive_parts(
+        glacier_metadata,
+        glacier_job_type,
+        workflow_run,
+        glacier_object_id,
+        ddb_accessor,
+    ):
         s3_upload.include_part(part)
         if glacier_job_type is GlacierJobType.ARCHIVE_RETRIEVAL:
             if part.tree_checksum is None:
@@ -143,10 +145,52 @@ def add_glacier_parts(
             raise GlacierValidationMismatch
 
 
+def get_archive_parts(
+    glacier_metadata: GlacierTransferMetadata,
+    glacier_job_type: str,
+    workflow_run: str,
+    glacier_object_id: str,
+    ddb_accessor: DynamoDBAccessor,
+) -> List[GlacierTransferPart]:
+    """
+    Returns the committed parts in part number order, from the upload manifest
+    of archives staged with a part counter, and from the part items otherwise
+    """
+    parts: Dict[int, GlacierTransferPart] = {}
+    if (
+        glacier_job_type is GlacierJobType.ARCHIVE_RETRIEVAL
+        and glacier_metadata.completed_parts is not None
+        and glacier_metadata.chunks_count
+        and glacier_metadata.upload_id
+        and glacier_metadata.size
+    ):
+        parts = manifest.read_manifest(
+            workflow_run,
+            glacier_object_id,
+            glacier_metadata.upload_id,
+            glacier_metadata.chunk_size
+            or plan_archive_chunk_size(glacier_metadata.size),
+            int(glacier_metadata.chunks_count),
+        )
+
+    if not glacier_metadata.chunks_count or len(parts) < int(
+        glacier_metadata.chunks_count
+    ):
+        # Parts that could not be packed into the manifest
+        for glacier_part_dict in get_glacier_object_parts(
+            workflow_run, glacier_object_id, ddb_accessor
+        ):
+            part = GlacierTransferPart.parse(glacier_part_dict)
+            if part.upload_id in (None, glacier_metadata.upload_id):
+                parts.setdefault(part.part_number, part)
+
+    return [parts[part_number] for part_number in sorted(parts)]
+
+
 def s3_glacier_object_exists(
     s3_destination_bucket: str, s3_destination_key: str
 ) -> bool:
-    s3_client: S3Client = boto3.client("s3", config=__boto_config__)
+    s3_client: S3Client = get_client("s3")
 
     try:
         logger.info(f"Check if S3 object exists: {s3_destination_key}")
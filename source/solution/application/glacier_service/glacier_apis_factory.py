@@ -5,9 +5,7 @@ SPDX-License-Identifier: Apache-2.0
 
 from typing import TYPE_CHECKING
 
-import boto3
-
-from solution.application import __boto_config__
+from solution.application.util.clients import get_client
 
 if TYPE_CHECKING:
     from mypy_boto3_glacier.client import GlacierClient
@@ -35,5 +33,5 @@ class GlacierAPIsFactory:
             from solution.application.mocking.mock_glacier_apis import MockGlacierAPIs
 
             return MockGlacierAPIs()
-        client: GlacierClient = boto3.client("glacier", config=__boto_config__)
+        client: GlacierClient = get_client("glacier")
         return client
@@ -6,31 +6,46 @@ SPDX-License-Identifier: Apache-2.0
 import json
 import logging
 import os
+from concurrent import futures
 from functools import wraps
 from typing import TYPE_CHECKING, Any, Callable, Dict, cast
 
 from solution.application.archive_naming.override import (
     create_header_file,
+    create_priority_list_header_file,
+    upload_priority_list,
     upload_provided_file,
 )
 from solution.application.archive_retrieval import notification_processor
+from solution.application.archive_retrieval.admission import admit_initiation
 from solution.application.archive_retrieval.initiator import (
     extend_retrieval,
     initiate_retrieval,
 )
-from solution.application.archive_retrieval.timeout import calculate_timeout
+from solution.application.archive_retrieval.lanes import plan_archive_chunk_size
+from solution.application.archive_retrieval.pacing import pace_initiation
 from solution.application.chunking.chunk_generator import (
     calculate_chunk_size,
     generate_chunk_array,
 )
+from solution.application.chunking.chunk_plan import ChunkPlan
 from solution.application.completion.checker import check_workflow_completion
 from solution.application.download_window.extension import generate_archives_s3_object
 from solution.application.facilitator import processor
+from solution.application.glacier_s3_transfer.download import DOWNLOAD_RANGE_SIZE
 from solution.application.glacier_s3_transfer.facilitator import GlacierToS3Facilitator
+from solution.application.glacier_s3_transfer.memory_budget import (
+    MemoryBudget,
+    chunk_memory_estimate,
+    lambda_memory_budget,
+)
 from solution.application.glacier_s3_transfer.multipart_cleanup import MultipartCleanup
+from solution.application.glacier_s3_transfer.packing import pack_archives
+from solution.application.glacier_s3_transfer.upload import upload_sub_part_size
 from solution.application.glacier_s3_transfer.validator import validate_upload
 from solution.application.glacier_service.glacier_apis_factory import GlacierAPIsFactory
 from solution.application.glacier_service.glacier_typing import GlacierJobType
+from solution.application.hashing.chunk_hash import available_cpus
 from solution.application.metrics.status_controller import StatusMetricController
 from solution.application.model import events
 from solution.application.operational_metrics.anonymized_stats import send_job_stats
@@ -40,6 +55,7 @@ from solution.application.partial_run.archives_status_cleanup import (
 )
 from solution.application.post_workflow.dashboard_update import handle_failed_archives
 from solution.application.util.exceptions import InvalidLambdaParameter
+from solution.application.util.executor import shared_executor
 
 if TYPE_CHECKING:
     from mypy_boto3_glacier.type_defs import (
@@ -66,6 +82,9 @@ logger.setLevel(int(os.environ.get("LOGGING_LEVEL", logging.INFO)))
 
 DYNAMODB_EVENT_SOURCE = "aws:dynamodb"
 SQS_EVENT_SOURCE = "aws:sqs"
+# Chunks are not started with less time left, so that they are redriven instead
+# of being cut off by the Lambda timeout
+CHUNK_START_DEADLINE_MS = 10 * 60 * 1000
 
 
 def handler(func: Callable[[Any, Any], Any]) -> Any:
@@ -82,18 +101,49 @@ def handler(func: Callable[[Any, Any], Any]) -> Any:
 
 
 @handler
-def notifications_processor(event: dict[str, Any], _: Any) -> None:
+def notifications_processor(event: dict[str, Any], _: Any) -> dict[str, Any]:
+    notification_workers = int(os.environ.get("NOTIFICATION_WORKERS", 1))
+
+    def process_notification(message_str: str) -> None:
+        message = json.loads(message_str)
+
+        logging.debug(f"SNS job notification: {message}")
+
+        if message.get("Action") == "ArchiveRetrieval":
+            notification_processor.handle_archive_job_notification(message_str)
+        elif message.get("Action") == "InventoryRetrieval":
+            processor.handle_job_notification(message_str)
+
+    # Duplicate notifications of a job within the batch are processed once, and
+    # succeed or fail together
+    executor = shared_executor("notifications", notification_workers)
+    notifications: Dict[str, futures.Future[None]] = {}
+    processings = {}
+    # Failed records are reported individually, so that only they are redriven
+    batch_item_failures = []
     for record in event["Records"]:
-        if record.get("eventSource") == SQS_EVENT_SOURCE:
-            body = json.loads(record["body"])
-            message = json.loads(body["Message"])
-
-            logging.debug(f"SNS job notification: {message}")
+        if record.get("eventSource") != SQS_EVENT_SOURCE:
+            continue
+        try:
+            message_str = json.loads(record["body"])["Message"]
+            job_id = json.loads(message_str).get("JobId") or record["messageId"]
+        except Exception:
+            logger.exception(
+                f"Failed to parse notification of message {record['messageId']}"
+            )
+            batch_item_failures.append({"itemIdentifier": record["messageId"]})
+            continue
+        if job_id not in notifications:
+            notifications[job_id] = executor.submit(process_notification, message_str)
+        processings[record["messageId"]] = notifications[job_id]
 
-            if message.get("Action") == "ArchiveRetrieval":
-                notification_processor.handle_archive_job_notification(body["Message"])
-            elif message.get("Action") == "InventoryRetrieval":
-                processor.handle_job_notification(body["Message"])
+    for message_id, processing in processings.items():
+        try:
+            processing.result()
+        except Exception:
+            logger.exception(f"Failed to process notification of message {message_id}")
+            batch_item_failures.append({"itemIdentifier": message_id})
+    return {"batchItemFailures": batch_item_failures}
 
 
 @handler
@@ -109,14 +159,55 @@ def async_facilitator(event: dict[str, Any], _: Any) -> None:
 
 
 @handler
-def archive_retrieval(event: dict[str, Any], _context: Any) -> None:
-    for record in event["Records"]:
-        if record.get("eventSource") == SQS_EVENT_SOURCE:
-            body: events.GlacierRetrieval = json.loads(record["body"])
+def archive_retrieval(event: dict[str, Any], context: Any) -> dict[str, Any]:
+    stream_buffer_size = (
+        int(buffer_size)
+        if (buffer_size := os.environ.get("STREAM_BUFFER_SIZE"))
+        else None
+    )
+    mock_glacier = os.getenv("MockGlacier") == "True"
+    # Mocked job outputs are recorded per chunk range, so they are not split
+    download_concurrency = (
+        1 if mock_glacier else int(os.environ.get("DOWNLOAD_CONCURRENCY", 1))
+    )
+    download_range_size = int(
+        os.environ.get("DOWNLOAD_RANGE_SIZE", DOWNLOAD_RANGE_SIZE)
+    )
+    upload_concurrency = int(os.environ.get("UPLOAD_CONCURRENCY", 1))
+    chunk_workers = int(os.environ.get("CHUNK_RETRIEVAL_WORKERS", 1))
+
+    # Shared by the chunk workers, mock Glacier APIs are not cached
+    glacier_client = GlacierAPIsFactory.create_instance(mock_glacier)
+    memory_budget = MemoryBudget(lambda_memory_budget())
+
+    def retrieve_chunk(body: events.ChunkRetrieval) -> None:
+        chunk_plan = (
+            ChunkPlan.from_descriptor(body["ChunkPlan"])
+            if "ChunkPlan" in body
+            else None
+        )
+        start, end = body["ByteRange"].split("-")
+        length = int(end) - int(start) + 1
+        memory_estimate = chunk_memory_estimate(
+            length,
+            stream_buffer_size,
+            download_concurrency,
+            download_range_size,
+            upload_concurrency,
+            (
+                upload_sub_part_size(chunk_plan.chunk_size, len(chunk_plan))
+                if chunk_plan
+                else upload_sub_part_size(length, body.get("ChunksCount") or 1)
+            ),
+        )
+        with memory_budget.reserve(memory_estimate):
+            if (
+                context
+                and context.get_remaining_time_in_millis() < CHUNK_START_DEADLINE_MS
+            ):
+                raise TimeoutError("Not enough time left to retrieve the chunk")
             facilitator = GlacierToS3Facilitator(
-                glacier_client=GlacierAPIsFactory.create_instance(
-                    os.getenv("MockGlacier") == "True"
-                ),
+                glacier_client=glacier_client,
                 vault_name=body["VaultName"],
                 workflow_run=body["WorkflowRun"],
                 byte_range=body["ByteRange"],
@@ -126,9 +217,54 @@ def archive_retrieval(event: dict[str, Any], _context: Any) -> None:
                 upload_id=body["UploadId"],
                 part_number=body["PartNumber"],
                 glacier_job_type=GlacierJobType.ARCHIVE_RETRIEVAL,
+                stream_buffer_size=stream_buffer_size,
+                hashing_workers=available_cpus(),
+                download_concurrency=download_concurrency,
+                download_range_size=download_range_size,
+                upload_concurrency=upload_concurrency,
+                staged_job_id=body.get("JobId"),
+                download_window=body.get("DownloadWindow"),
+                archive_size=chunk_plan.size if chunk_plan else body.get("ArchiveSize"),
+                chunks_count=len(chunk_plan) if chunk_plan else body.get("ChunksCount"),
+                chunk_size=chunk_plan.chunk_size if chunk_plan else None,
             )
             if facilitator.transfer():
-                facilitator.send_validation_event()
+                facilitator.validate_if_last_chunk()
+
+    executor = shared_executor("chunk-retrieval", chunk_workers)
+    retrievals = {
+        record["messageId"]: executor.submit(retrieve_chunk, json.loads(record["body"]))
+        for record in event["Records"]
+        if record.get("eventSource") == SQS_EVENT_SOURCE
+    }
+
+    # Failed records are reported individually, so that only they are redriven
+    batch_item_failures = []
+    for message_id, retrieval in retrievals.items():
+        try:
+            retrieval.result()
+        except Exception:
+            logger.exception(f"Failed to retrieve chunk of message {message_id}")
+            batch_item_failures.append({"itemIdentifier": message_id})
+    return {"batchItemFailures": batch_item_failures}
+
+
+@handler
+def archive_packing(event: dict[str, Any], _context: Any) -> dict[str, Any]:
+    glacier_client = GlacierAPIsFactory.create_instance(
+        os.getenv("MockGlacier") == "True"
+    )
+    failed = pack_archives(
+        glacier_client,
+        {
+            record["messageId"]: json.loads(record["body"])
+            for record in event["Records"]
+            if record.get("eventSource") == SQS_EVENT_SOURCE
+        },
+    )
+    return {
+        "batchItemFailures": [{"itemIdentifier": message_id} for message_id in failed]
+    }
 
 
 @handler
@@ -178,9 +314,11 @@ def inventory_retrieval(
 
 
 @handler
-def archive_chunking(event: events.Chunk, _context: Any) -> Dict[str, Any]:
+def archive_chunking(event: events.ArchiveChunk, _context: Any) -> Dict[str, Any]:
     archive_size = int(event["TotalSize"])
-    archive_chunk_size = int(event["ChunkSize"])
+    archive_chunk_size = int(
+        event.get("ChunkSize") or plan_archive_chunk_size(archive_size)
+    )
 
     chunks = generate_chunk_array(archive_size, archive_chunk_size)
 
@@ -200,8 +338,8 @@ def inventory_validation(
 
 @handler
 def initiate_archive_retrieval_batch(
-    event: events.InitiateArchiveRetrievalBatch, _context: Any
-) -> None:
+    event: events.InitiateArchiveRetrievalBatch, context: Any
+) -> Dict[str, Any]:
     glacier_client = GlacierAPIsFactory.create_instance(
         os.getenv("MockGlacier") == "True"
     )
@@ -209,7 +347,20 @@ def initiate_archive_retrieval_batch(
     sns_topic = event["SNSTopic"]
     items = event["Items"]
 
-    initiate_retrieval(account_id, sns_topic, items, glacier_client)
+    initiated_size = initiate_retrieval(
+        account_id, sns_topic, items, glacier_client, context
+    )
+    if not items:
+        return {"wait_sec": 0}
+    # Seconds the initiation workflow waits before the next batch, to stay within
+    # the daily quota and for the staged archives to be downloaded in time
+    workflow_run = items[0]["workflow_run"]
+    return {
+        "wait_sec": max(
+            pace_initiation(workflow_run, initiated_size),
+            admit_initiation(workflow_run),
+        )
+    }
 
 
 @handler
@@ -272,6 +423,12 @@ def archive_naming_overrides(
     else:
         logger.info("No name override file is provided.")
 
+    # The priority list is read by Glue in the same way, for the PriorityList
+    # retrieval priority
+    create_priority_list_header_file(event["WorkflowRun"])
+    if event.get("PriorityListPresignedURL") not in (None, ""):
+        upload_priority_list(event["WorkflowRun"], event["PriorityListPresignedURL"])
+
 
 @handler
 def archives_needing_window_extension(event: dict[str, Any], _: Any) -> Dict[str, Any]:
@@ -304,12 +461,6 @@ def anonymized_stats(event: dict[str, Any], _: Any) -> None:
     )
 
 
-@handler
-def initiation_timeout(event: dict[str, Any], _: Any) -> Dict[str, Any]:
-    timeout = calculate_timeout(event["workflow_run"])
-    return {"wait_sec": timeout}
-
-
 @handler
 def completion_checker(event: dict[str, Any], _: Any) -> Dict[str, Any]:
     status = check_workflow_completion(event["workflow_run"])
@@ -0,0 +1,111 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import hashlib
+import os
+from timeit import default_timer as timer
+
+from solution.application.hashing.tree_hash import ONE_MB, TreeHash
+from solution.application.util.executor import shared_executor
+
+
+def available_cpus() -> int:
+    return os.cpu_count() or 1
+
+
+def _leaf_digest(view: memoryview) -> bytes:
+    return hashlib.sha256(view).digest()
+
+
+class ChunkHash:
+    """
+    Computes the tree hash leaves, the tree hash and the SHA256 checksum of a chunk
+    in a single pass. Data is walked one leaf at a time through memoryviews, so each
+    leaf is fed to both digests while it is still in cache and is never copied.
+    Leaves may span several update() calls.
+
+    With max_workers above 1, the leaves of each update are hashed on a thread pool
+    (hashlib releases the GIL) while the sequential SHA256 checksum runs alongside
+    them. Leaves are collected in order, so the digests are identical.
+    """
+
+    def __init__(self, leaf_size: int = ONE_MB, max_workers: int = 1) -> None:
+        self.leaf_size = leaf_size
+        self.max_workers = max_workers
+        self.hashes: list[bytes] = []
+        self.tree_hash = TreeHash(leaf_size)
+        self.elapsed = 0.0
+        self._sha256 = hashlib.sha256()
+        self._leaf = hashlib.sha256()
+        self._leaf_length = 0
+
+    def update(self, data: bytes | bytearray | memoryview) -> None:
+        start = timer()
+        view = memoryview(data).cast("B")
+        if self.max_workers > 1 and len(view) > self.leaf_size:
+            self._parallel_update(view)
+        else:
+            offset = 0
+            if self._leaf_length:
+                offset = min(len(view), self.leaf_size - self._leaf_length)
+                self._update_leaf(view[:offset])
+            while offset < len(view):
+                end = min(offset + self.leaf_size, len(view))
+                self._update_leaf(view[offset:end])
+                offset = end
+        self.elapsed += timer() - start
+
+    @property
+    def leaves(self) -> list[bytes]:
+        if self._leaf_length:
+            return self.hashes + [self._leaf.digest()]
+        return self.hashes.copy()
+
+    def tree_digest(self) -> bytes:
+        if not self._leaf_length:
+            return self.tree_hash.digest()
+        tree_hash = self.tree_hash.copy()
+        tree_hash.include(self._leaf.digest())
+        return tree_hash.digest()
+
+    def digest(self) -> bytes:
+        return self._sha256.digest()
+
+    def _update_leaf(self, view: memoryview, sha256: bool = True) -> None:
+        if sha256:
+            self._sha256.update(view)
+        self._leaf.update(view)
+        self._leaf_length += len(view)
+        if self._leaf_length == self.leaf_size:
+            self._include_leaf(self._leaf.digest())
+            self._leaf = hashlib.sha256()
+            self._leaf_length = 0
+
+    def _include_leaf(self, leaf: bytes) -> None:
+        self.hashes.append(leaf)
+        self.tree_hash.include(leaf)
+
+    def _parallel_update(self, view: memoryview) -> None:
+        executor = shared_executor("chunk-hash", self.max_workers)
+        sha256_future = executor.submit(self._sha256.update, view)
+
+        offset = 0
+        if self._leaf_length:
+            offset = min(len(view), self.leaf_size - self._leaf_length)
+            self._update_leaf(view[:offset], sha256=False)
+        aligned_end = offset + (len(view) - offset) // self.leaf_size * self.leaf_size
+        leaves = executor.map(
+            _leaf_digest,
+            (
+                view[i : i + self.leaf_size]
+                for i in range(offset, aligned_end, self.leaf_size)
+            ),
+        )
+        for leaf in leaves:
+            self._include_leaf(leaf)
+        if aligned_end < len(view):
+            self._update_leaf(view[aligned_end:], sha256=False)
+
+        sha256_future.result()
@@ -9,30 +9,40 @@ ONE_MB = 2**20
 
 
 class TreeHash:
+    """
+    Incremental tree hash. Hashes are folded as they are included into a stack
+    holding at most one partial hash per tree level, so only O(log n) state is kept
+    https://docs.aws.amazon.com/amazonglacier/latest/dev/checksum-calculations.html
+    """
+
     def __init__(self, chunk_size: int = ONE_MB) -> None:
-        self.hashes: list[bytes] = []
+        # (level, hash) pairs, levels strictly decreasing from bottom to top
+        self.stack: list[tuple[int, bytes]] = []
         self.chunk_size = chunk_size
 
     def update(self, data: bytes) -> None:
-        for i in range(0, len(data), self.chunk_size):
-            self.hashes.append(hashlib.sha256(data[i : i + self.chunk_size]).digest())
+        view = memoryview(data)
+        for i in range(0, len(view), self.chunk_size):
+            self.include(hashlib.sha256(view[i : i + self.chunk_size]).digest())
 
     def include(self, checksum: bytes) -> None:
-        self.hashes.append(checksum)
+        level = 0
+        while self.stack and self.stack[-1][0] == level:
+            checksum = hashlib.sha256(self.stack.pop()[1] + checksum).digest()
+            level += 1
+        self.stack.append((level, checksum))
+
+    def copy(self) -> "TreeHash":
+        tree_hash = TreeHash(self.chunk_size)
+        tree_hash.stack = self.stack.copy()
+        return tree_hash
 
-    # Calculates the tree hash for the hashes generated by update()
-    # https://docs.aws.amazon.com/amazonglacier/latest/dev/checksum-calculations.html
+    # Folds the remaining complete subtrees from right to left. Each odd hash is
+    # promoted unchanged to the next level, as in the pairwise Glacier algorithm
     def digest(self) -> bytes:
-        if len(self.hashes) == 0:
+        if not self.stack:
             return b""
-        calc_hashes: list[bytes] = self.hashes.copy()
-        while len(calc_hashes) > 1:
-            next_hashes = []
-            while len(calc_hashes) > 1:
-                next_hashes.append(
-                    hashlib.sha256(calc_hashes.pop(0) + calc_hashes.pop(0)).digest()
-                )
-            if len(calc_hashes) > 0:
-                next_hashes.append(calc_hashes.pop(0))
-            calc_hashes = next_hashes
-        return calc_hashes[0]
+        result = self.stack[-1][1]
+        for _, checksum in reversed(self.stack[:-1]):
+            result = hashlib.sha256(checksum + result).digest()
+        return result
@@ -10,14 +10,12 @@ import os
 from collections import defaultdict
 from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
-import boto3
-
-from solution.application import __boto_config__
 from solution.application.glacier_service.glacier_typing import GlacierJobType
 from solution.application.model.glacier_transfer_meta_model import (
     GlacierTransferMetadata,
 )
 from solution.application.model.glacier_transfer_model import GlacierTransferModel
+from solution.application.util.clients import get_client
 from solution.application.util.retry import retry
 from solution.infrastructure.output_keys import OutputKeys
 
@@ -73,9 +71,7 @@ class StatusMetricController:
     @retry(max_retries=10, raise_exception=True)
     def update_metric_query(self) -> None:
         if self.records:
-            ddb_client: DynamoDBClient = boto3.client(
-                "dynamodb", config=__boto_config__
-            )
+            ddb_client: DynamoDBClient = get_client("dynamodb")
 
             transact_items: List[TransactWriteItemTypeDef] = []
             for workflow_run, metrics in self.workflow_run_metrics.items():
@@ -142,34 +138,43 @@ class StatusMetricController:
             else None
         )
 
+        # Small archives are copied as soon as they are staged, so they go from
+        # requested to downloaded and are counted as staged and downloaded at once
         status_mapping = {
-            (
-                None,
+            (None, GlacierTransferModel.StatusCode.REQUESTED): (
                 GlacierTransferModel.StatusCode.REQUESTED,
-            ): GlacierTransferModel.StatusCode.REQUESTED,
+            ),
             (
                 GlacierTransferModel.StatusCode.REQUESTED,
                 GlacierTransferModel.StatusCode.STAGED,
-            ): GlacierTransferModel.StatusCode.STAGED,
+            ): (GlacierTransferModel.StatusCode.STAGED,),
+            (
+                GlacierTransferModel.StatusCode.STAGED,
+                GlacierTransferModel.StatusCode.DOWNLOADED,
+            ): (GlacierTransferModel.StatusCode.DOWNLOADED,),
             (
+                GlacierTransferModel.StatusCode.REQUESTED,
+                GlacierTransferModel.StatusCode.DOWNLOADED,
+            ): (
                 GlacierTransferModel.StatusCode.STAGED,
                 GlacierTransferModel.StatusCode.DOWNLOADED,
-            ): GlacierTransferModel.StatusCode.DOWNLOADED,
+            ),
         }
-        result_status = status_mapping.get((old_status, new_status), None)
+        result_statuses = status_mapping.get((old_status, new_status), ())
 
         archive_id = GlacierTransferModel(
             workflow_run=new_metadata.workflow_run,
             glacier_object_id=new_metadata.archive_id,
         ).key["pk"]
-        if result_status:
+        if result_statuses:
             logger.debug(f"Archive:{archive_id} - handled_status:{new_status}")
+        for result_status in result_statuses:
             self.counted_logs.append(
-                f"Archive:{archive_id} - counted_status:{new_status}"
+                f"Archive:{archive_id} - counted_status:{result_status}"
             )
             self.workflow_run_metrics[workflow_run][f"{result_status}_count"] += 1
             self.workflow_run_metrics[workflow_run][
                 f"{result_status}_size"
             ] += new_metadata.size
-        else:
+        if not result_statuses:
             logger.info(f"Archive:{archive_id} - unhandled_status:{new_status}")
@@ -23,6 +23,32 @@ class GlacierRetrieval(TypedDict):
     WorkflowRun: str
 
 
+class ChunkPlanDescriptor(TypedDict):
+    Size: int
+    ChunkSize: int
+    Overlap: int
+
+
+class ChunkRetrieval(GlacierRetrieval, total=False):
+    DownloadWindow: str
+    ChunkPlan: ChunkPlanDescriptor
+    # Sent instead of the chunk plan by earlier versions
+    ArchiveSize: int
+    ChunksCount: int
+
+
+class ArchivePacking(TypedDict):
+    JobId: str
+    VaultName: str
+    WorkflowRun: str
+    GlacierObjectId: str
+    FileName: str
+    ArchiveSize: int
+    SHA256TreeHash: str | None
+    S3StorageClass: str
+    DownloadWindow: str
+
+
 class InventoryChunkOverlap(TypedDict):
     InventorySize: int
     MaximumInventoryRecordSize: int
@@ -31,6 +57,9 @@ class InventoryChunkOverlap(TypedDict):
 
 class Chunk(TypedDict):
     TotalSize: int
+
+
+class ArchiveChunk(Chunk, total=False):
     ChunkSize: int
 
 
@@ -47,6 +76,7 @@ class ArchiveNaming(TypedDict):
 class ArchiveNamingOverride(TypedDict):
     WorkflowRun: str
     NameOverridePresignedURL: str
+    PriorityListPresignedURL: str
 
 
 class InitiateArchiveRetrieval(InitiateJobInputRequestTypeDef, total=False):
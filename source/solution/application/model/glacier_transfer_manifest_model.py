@@ -0,0 +1,28 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from dataclasses import dataclass
+from typing import ClassVar
+
+from solution.application.model.base import Model
+from solution.application.model.glacier_transfer_model import GlacierTransferModel
+
+
+@dataclass
+class GlacierTransferManifestRead(GlacierTransferModel):
+    """
+    Shard of the part manifest of a multipart upload. Each committed part is a
+    packed binary attribute of its shard, see glacier_s3_transfer.manifest
+    """
+
+    upload_key: str = Model.field(["sk", "S"], composite_index=1)
+    shard: int = Model.field(["sk", "S"], composite_index=2)
+    prefix: ClassVar[str] = "m"
+
+    _sk: str = Model.view(["sk", "S"], ["prefix", "upload_key", "padded_shard"])
+
+    @property
+    def padded_shard(self) -> str:
+        return str(self.shard).zfill(5)
@@ -34,6 +34,20 @@ class GlacierTransferMetadata(GlacierTransferMetadataRead):
         ["chunks_count", "N"], marshal_as=str, optional=True
     )
     upload_id: str | None = Model.field(["upload_id", "S"], optional=True)
+    # Parts committed to upload_id, set to 0 when the archive is staged
+    completed_parts: int | None = Model.field(
+        ["completed_parts", "N"], marshal_as=str, optional=True
+    )
+    # Chunk events sent for upload_id, set to 0 when the archive is staged and to
+    # chunks_count once they were all sent
+    enqueued_chunks: int | None = Model.field(
+        ["enqueued_chunks", "N"], marshal_as=str, optional=True
+    )
+    # Time until which the notification that staged or resumed the archive owns
+    # the fan-out of its chunk events
+    fan_out_lease: float | None = Model.field(
+        ["fan_out_lease", "N"], marshal_as=str, optional=True
+    )
     download_window: str | None = Model.field(["download_window", "S"], optional=True)
     archive_id: str | None = Model.field(["archive_id", "S"], optional=True)
     archive_creation_date: str | None = Model.field(
@@ -46,3 +60,11 @@ class GlacierTransferMetadata(GlacierTransferMetadataRead):
     s3_destination_key: str | None = Model.field(
         ["s3_destination_key", "S"], optional=True
     )
+    # Packed archives are stored at this offset of the aggregate object at
+    # s3_destination_key, see glacier_s3_transfer.packing
+    pack_offset: int | None = Model.field(
+        ["pack_offset", "N"], marshal_as=str, optional=True
+    )
+    pack_length: int | None = Model.field(
+        ["pack_length", "N"], marshal_as=str, optional=True
+    )
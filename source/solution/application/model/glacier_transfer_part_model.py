@@ -3,6 +3,7 @@ Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 SPDX-License-Identifier: Apache-2.0
 """
 
+import json
 from dataclasses import dataclass
 from typing import ClassVar
 
@@ -28,3 +29,17 @@ class GlacierTransferPart(GlacierTransferPartRead):
     checksum_sha_256: str = Model.field(["checksum_sha_256", "S"])
     e_tag: str = Model.field(["e_tag", "S"])
     tree_checksum: str | None = Model.field(["tree_checksum", "S"], optional=True)
+    # JSON list of [part_number, e_tag, checksum_sha_256] for chunks uploaded as
+    # several S3 parts, in which case checksum_sha_256 covers the whole chunk
+    sub_parts: str | None = Model.field(["sub_parts", "S"], optional=True)
+    # Multipart upload the part was counted for, see GlacierTransferMetadata
+    upload_id: str | None = Model.field(["upload_id", "S"], optional=True)
+
+    @property
+    def s3_parts(self) -> list[tuple[int, str, str]]:
+        if self.sub_parts is None:
+            return [(self.part_number, self.e_tag, self.checksum_sha_256)]
+        return [
+            (int(part_number), str(e_tag), str(checksum))
+            for part_number, e_tag, checksum in json.loads(self.sub_parts)
+        ]
@@ -18,6 +18,21 @@ class PartitionMetricRecord(Model):
         ["archives_size", "N"], optional=True, marshal_as=str
     )
     start_time: str | None = Model.field(["start_time", "S"], optional=True)
+    # Time by which the bytes initiated by the workflow run are within its quota
+    paced_until: float | None = Model.field(
+        ["paced_until", "N"], optional=True, marshal_as=str
+    )
+    # Last sample of the downloaded bytes of the workflow run, from which the
+    # download throughput is measured
+    downloaded_sample_size: int | None = Model.field(
+        ["downloaded_sample_size", "N"], optional=True, marshal_as=str
+    )
+    downloaded_sample_time: float | None = Model.field(
+        ["downloaded_sample_time", "N"], optional=True, marshal_as=str
+    )
+    download_throughput: float | None = Model.field(
+        ["download_throughput", "N"], optional=True, marshal_as=str
+    )
 
     @property
     def key(self) -> Dict[str, Any]:
@@ -9,6 +9,7 @@ from mypy_boto3_s3.type_defs import CompletedPartTypeDef
 
 class GlacierRetrieval(CompletedPartTypeDef, total=False):
     TreeChecksum: str
+    SubParts: list[CompletedPartTypeDef]
 
 
 class InitiateArchiveRetrieval(InitiateJobOutputTypeDef, total=False):
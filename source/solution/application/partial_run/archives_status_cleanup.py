@@ -8,13 +8,12 @@ import os
 from datetime import datetime
 from typing import TYPE_CHECKING, Any, Dict, List
 
-import boto3
-
-from solution.application import __boto_config__
 from solution.application.model.glacier_transfer_meta_model import (
     GlacierTransferMetadata,
 )
 from solution.application.model.glacier_transfer_model import GlacierTransferModel
+from solution.application.util.clients import get_client
+from solution.application.util.dynamodb import batch_write_items
 from solution.infrastructure.output_keys import OutputKeys
 
 if TYPE_CHECKING:
@@ -32,7 +31,7 @@ else:
 def generate_archives_needing_status_cleanup_s3_object(
     workflow_run: str, bucket_name: str
 ) -> str:
-    client: DynamoDBClient = boto3.client("dynamodb", config=__boto_config__)
+    client: DynamoDBClient = get_client("dynamodb")
 
     archives_needing_status_cleanup = collect_non_downloaded_archives(
         client, workflow_run
@@ -77,7 +76,7 @@ def query_archives_status(
 def write_result_to_s3(
     archives: List[Dict[str, Any]], workflow_run: str, bucket_name: str
 ) -> str:
-    s3_client: S3Client = boto3.client("s3", config=__boto_config__)
+    s3_client: S3Client = get_client("s3")
 
     items_json_data = json.dumps(archives)
     file_name = f"{workflow_run}/archives_status_cleanup/{datetime.now().strftime('%Y%m%d%H%M%S')}.json"
@@ -91,7 +90,7 @@ def write_result_to_s3(
 
 
 def cleanup_archives_status(archives_list: List[Dict[str, Any]]) -> None:
-    client: DynamoDBClient = boto3.client("dynamodb", config=__boto_config__)
+    client: DynamoDBClient = get_client("dynamodb")
 
     put_request_list = []
     for archive in archives_list:
@@ -103,11 +102,6 @@ def cleanup_archives_status(archives_list: List[Dict[str, Any]]) -> None:
         }
         put_request_list.append(put_request)
 
-    for i in range(0, len(put_request_list), 25):
-        batch = put_request_list[i : i + 25]
-        if batch:
-            client.batch_write_item(
-                RequestItems={
-                    os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME]: batch
-                }
-            )
+    batch_write_items(
+        client, os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME], put_request_list
+    )
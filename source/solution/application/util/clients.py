@@ -0,0 +1,44 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import threading
+from typing import Any
+
+import boto3
+from botocore.config import Config
+
+from solution.application import __boto_config__
+
+# Sized for the most concurrent calls made through one client: the initiation
+# workers, or the chunk workers each running concurrent downloads and sub-part
+# uploads. botocore keeps 10 connections by default
+MAX_POOL_CONNECTIONS = 32
+
+_client_config = __boto_config__.merge(
+    Config(max_pool_connections=MAX_POOL_CONNECTIONS)
+)
+_clients: dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+def get_client(service_name: str) -> Any:
+    """
+    Returns the process wide client of service_name, created on first use and
+    reused by later calls and warm invocations. Clients are thread safe once
+    created, but creating them from the default session is not.
+    """
+    if (client := _clients.get(service_name)) is None:
+        with _lock:
+            if (client := _clients.get(service_name)) is None:
+                client = boto3.client(  # type: ignore[call-overload]
+                    service_name, config=_client_config
+                )
+                _clients[service_name] = client
+    return client
+
+
+def clear_clients() -> None:
+    with _lock:
+        _clients.clear()
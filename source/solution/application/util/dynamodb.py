@@ -0,0 +1,88 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import time
+from typing import TYPE_CHECKING, Any, Dict, List
+
+from solution.application.util.exceptions import MaximumRetryLimitExceeded
+
+if TYPE_CHECKING:
+    from mypy_boto3_dynamodb import DynamoDBClient
+    from mypy_boto3_dynamodb.type_defs import WriteRequestTypeDef
+else:
+    DynamoDBClient = object
+    WriteRequestTypeDef = object
+
+# BatchGetItem and BatchWriteItem limits
+MAX_BATCH_GET_KEYS = 100
+MAX_BATCH_WRITE_ITEMS = 25
+BATCH_WRITE_ATTEMPTS = 8
+BATCH_BACKOFF_SECONDS = 0.05
+MAX_BATCH_BACKOFF_SECONDS = 1.0
+
+
+def batch_get_items(
+    ddb_client: DynamoDBClient,
+    table_name: str,
+    keys: List[Dict[str, Any]],
+    **options: Any,
+) -> List[Dict[str, Any]]:
+    """
+    Reads the items of the keys with a BatchGetItem per MAX_BATCH_GET_KEYS keys,
+    requesting the keys left unprocessed again with backoff. Options such as
+    ConsistentRead and ProjectionExpression are passed on to each request, and
+    keys that have no item are left out of the returned items.
+    """
+    items: List[Dict[str, Any]] = []
+    for index in range(0, len(keys), MAX_BATCH_GET_KEYS):
+        request: Dict[str, Any] = {
+            table_name: {"Keys": keys[index : index + MAX_BATCH_GET_KEYS], **options}
+        }
+        attempt = 0
+        while request:
+            response = ddb_client.batch_get_item(RequestItems=request)
+            items.extend(response["Responses"].get(table_name, []))
+            request = response.get("UnprocessedKeys") or {}
+            if request:
+                time.sleep(
+                    min(BATCH_BACKOFF_SECONDS * 2**attempt, MAX_BATCH_BACKOFF_SECONDS)
+                )
+                attempt += 1
+    return items
+
+
+def batch_write_items(
+    ddb_client: DynamoDBClient,
+    table_name: str,
+    requests: List[WriteRequestTypeDef],
+) -> None:
+    """
+    Writes the requests with a BatchWriteItem per MAX_BATCH_WRITE_ITEMS requests,
+    sending the requests left unprocessed again with backoff.
+
+    :raises MaximumRetryLimitExceeded: If requests are still unprocessed after
+        BATCH_WRITE_ATTEMPTS attempts.
+    """
+    for index in range(0, len(requests), MAX_BATCH_WRITE_ITEMS):
+        request: Dict[str, Any] = {
+            table_name: requests[index : index + MAX_BATCH_WRITE_ITEMS]
+        }
+        for attempt in range(BATCH_WRITE_ATTEMPTS):
+            if attempt:
+                time.sleep(
+                    min(
+                        BATCH_BACKOFF_SECONDS * 2 ** (attempt - 1),
+                        MAX_BATCH_BACKOFF_SECONDS,
+                    )
+                )
+            response = ddb_client.batch_write_item(RequestItems=request)
+            request = dict(response.get("UnprocessedItems") or {})
+            if not request:
+                break
+        else:
+            raise MaximumRetryLimitExceeded(
+                BATCH_WRITE_ATTEMPTS,
+                f"{len(request[table_name])} items of {table_name} left unprocessed",
+            )
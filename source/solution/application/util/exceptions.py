@@ -58,3 +58,15 @@ class MaximumRetryLimitExceeded(Exception):
             f"Maximum retry limit {max_retries} exceeded. Exception: {message}"
         )
         super().__init__(self.message)
+
+
+class GlacierThrottled(Exception):
+    def __init__(self, code: str) -> None:
+        self.message = f"Glacier request throttled with {code}"
+        super().__init__(self.message)
+
+
+class FanOutInProgress(Exception):
+    def __init__(self, archive_id: str) -> None:
+        self.message = f"Chunk events of archive {archive_id} are still being sent."
+        super().__init__(self.message)
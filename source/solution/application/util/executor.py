@@ -0,0 +1,16 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from concurrent import futures
+from functools import cache
+
+
+@cache
+def shared_executor(name: str, max_workers: int) -> futures.ThreadPoolExecutor:
+    """
+    Returns a thread pool shared by every caller using the same name and size,
+    so warm Lambda invocations reuse their threads instead of starting new ones.
+    """
+    return futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
@@ -0,0 +1,39 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import json
+import time
+from typing import Dict, Tuple
+
+METRICS_NAMESPACE = "DataTransferFromAmazonS3GlacierVaultsToAmazonS3"
+
+
+def put_metrics(metrics: Dict[str, Tuple[float, str]]) -> None:
+    """
+    Publishes metrics, keyed by name with their value and unit, in the CloudWatch
+    embedded metric format. They are extracted from the Lambda logs, so no
+    PutMetricData call is made from the Lambda.
+    """
+    print(
+        json.dumps(
+            {
+                "_aws": {
+                    "Timestamp": int(time.time() * 1000),
+                    "CloudWatchMetrics": [
+                        {
+                            "Namespace": METRICS_NAMESPACE,
+                            "Dimensions": [[]],
+                            "Metrics": [
+                                {"Name": name, "Unit": unit}
+                                for name, (_, unit) in metrics.items()
+                            ],
+                        }
+                    ],
+                },
+                **{name: value for name, (value, _) in metrics.items()},
+            }
+        ),
+        flush=True,
+    )
@@ -0,0 +1,73 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import math
+import threading
+import time
+from typing import Callable
+
+
+class RateController:
+    """
+    Paces calls shared by several threads to a rate, in calls per second, that is
+    adjusted by additive increase and multiplicative decrease (AIMD). Each call
+    that succeeds raises the rate by additive_increase / rate, which probes up by
+    about additive_increase calls per second every second, and a throttled call
+    multiplies it by decrease_factor. The rate is decreased at most once per
+    decrease_interval seconds, so the calls in flight when the limit was reached
+    only decrease it once.
+    """
+
+    def __init__(
+        self,
+        initial_rate: float,
+        min_rate: float,
+        max_rate: float,
+        additive_increase: float = 1.0,
+        decrease_factor: float = 0.5,
+        decrease_interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.additive_increase = additive_increase
+        self.decrease_factor = decrease_factor
+        self.decrease_interval = decrease_interval
+        self._rate = min(max(initial_rate, min_rate), max_rate)
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._next_call = -math.inf
+        self._last_decrease = -math.inf
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    def acquire(self) -> None:
+        """
+        Waits for the next call slot at the current rate.
+        """
+        with self._lock:
+            now = self._clock()
+            call = max(now, self._next_call)
+            self._next_call = call + 1 / self._rate
+        if call > now:
+            self._sleep(call - now)
+
+    def succeeded(self) -> None:
+        with self._lock:
+            self._rate = min(
+                self._rate + self.additive_increase / self._rate, self.max_rate
+            )
+
+    def throttled(self) -> None:
+        with self._lock:
+            now = self._clock()
+            if now - self._last_decrease < self.decrease_interval:
+                return
+            self._last_decrease = now
+            self._rate = max(self._rate * self.decrease_factor, self.min_rate)
@@ -23,7 +23,7 @@ SELECT myDataSource.ArchiveId,
        myDataSource.PartitionId
 FROM myDataSource
 LEFT JOIN namingOverrides ON myDataSource.ArchiveId = namingOverrides.GlacierArchiveID
-ORDER BY myDataSource.CreationDate;"""
+ORDER BY myDataSource.PartitionId, myDataSource.RetrievalOrder;"""
 VALIDATION_CODE = """
 node_inputs = list(dfc.values())
 assert node_inputs[0].toDF().count() == node_inputs[1].toDF().count()
@@ -55,9 +55,11 @@ glueContext.purge_s3_path(f"s3://{inventory_bucket}/{workflow_run}/sorted_invent
 """
 
 NAMING_SCRIPT_APPENDIX = """
+args = getResolvedOptions(sys.argv, ["retrieval_priority"])
 df = dfc.select(list(dfc.keys())[0]).toDF()
+priority_list = dfc.select(list(dfc.keys())[1]).toDF()
 df_result = parse_and_remove_duplicates(df)
-df_result = add_partitions(df_result)
+df_result = add_partitions(df_result, args["retrieval_priority"], priority_list)
 dyf = DynamicFrame.fromDF(df_result, glueContext, "parsed_description")
 return DynamicFrameCollection({"NamingTransform": dyf}, glueContext)
 """
@@ -102,6 +104,10 @@ class GlueSfnUpdate(object):
         {"Name": "FileName", "Type": "string"},
     ]
 
+    priority_list_columns = [
+        {"Name": "GlacierArchiveID", "Type": "string"},
+    ]
+
     def __init__(
         self,
         stack: Stack,
@@ -278,7 +284,7 @@ class GlueSfnUpdate(object):
             "node-9": {
                 "CustomCode": {
                     "Name": ARCHIVE_NAMING_CODE_NAME,
-                    "Inputs": ["node-7"],
+                    "Inputs": ["node-7", "node-19"],
                     "ClassName": ARCHIVE_NAMING_CODE_NAME,
                     "Code": self.custom_code,
                 }
@@ -385,6 +391,18 @@ class GlueSfnUpdate(object):
                     "Path.$": f"States.Format('s3://{self.s3_bucket_name}/{{}}/sorted_inventory/', $.workflow_run)",
                 }
             },
+            "node-19": {
+                "S3CsvSource": {
+                    "Name": "S3 bucket - Priority List",
+                    "Paths.$": f"States.Array(States.Format('s3://{self.s3_bucket_name}/{{}}/priority_list/', $.workflow_run))",
+                    "QuoteChar": "quote",
+                    "Separator": "comma",
+                    "Recurse": True,
+                    "WithHeader": True,
+                    "Escaper": "",
+                    "OutputSchemas": [{"Columns": self.priority_list_columns}],
+                },
+            },
         }
 
         return tasks.CallAwsService(
@@ -426,6 +444,7 @@ class GlueSfnUpdate(object):
                     "--workflow_run_name.$": "$.workflow_run",
                     "--metric_table_name": self.metric_table,
                     "--migration_type.$": "$.migration_type",
+                    "--retrieval_priority.$": "$.retrieval_priority",
                     "--inventory_bucket": self.s3_bucket_name,
                     "--additional-python-modules": "defusedxml",
                     "--enable-job-insights": "true",
@@ -2,22 +2,117 @@
 Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 SPDX-License-Identifier: Apache-2.0
 """
-from pyspark.sql import DataFrame, Window
+import math
+from typing import List, Optional, Tuple
+
+from pyspark.sql import Column, DataFrame, Window
 from pyspark.sql import functions as F
 
 PARTITION_SIZE = 40 * pow(2, 40)
 
+# Retrieval priority policies, deciding the order in which archives are assigned
+# to partitions and initiated. Archives of the same priority keep their
+# CreationDate order
+CREATION_DATE = "CreationDate"
+KEY_PREFIX = "KeyPrefix"
+SIZE_ASCENDING = "SizeAscending"
+SIZE_DESCENDING = "SizeDescending"
+PRIORITY_LIST = "PriorityList"
+REQUEST_EFFICIENCY = "RequestEfficiency"
+RETRIEVAL_PRIORITIES = (
+    CREATION_DATE,
+    KEY_PREFIX,
+    SIZE_ASCENDING,
+    SIZE_DESCENDING,
+    PRIORITY_LIST,
+    REQUEST_EFFICIENCY,
+)
+
+# Each archive costs a job initiation and a ranged download per request range, so
+# its bytes per request grow with its size up to about the request range size
+REQUEST_RANGE_SIZE = 8 * pow(2, 20)
+
 
 def assign_partition(cumulative_sum: int) -> str:
     partition = int(cumulative_sum // PARTITION_SIZE)
     return f"{partition:010d}"
 
 
-def add_partitions(df: DataFrame) -> DataFrame:
-    window_spec = Window.orderBy("CreationDate")
+def parse_retrieval_priority(retrieval_priority: str) -> Tuple[str, List[str]]:
+    """
+    Parses a retrieval priority of the form <policy>[:<prefix>,<prefix>...] into
+    its policy and key prefixes, the prefixes being listed for the KeyPrefix
+    policy from the highest priority.
+    """
+    policy, _, prefixes = retrieval_priority.strip().partition(":")
+    policy = policy or CREATION_DATE
+    if policy not in RETRIEVAL_PRIORITIES:
+        raise ValueError(f"Unknown retrieval priority {policy}")
+    return policy, [prefix for prefix in prefixes.split(",") if prefix]
+
+
+def request_efficiency(size: int) -> float:
+    """
+    Bytes retrieved per request, counting the job initiation and a ranged download
+    per REQUEST_RANGE_SIZE bytes of the archive.
+    """
+    return size / (1 + max(1, math.ceil(size / REQUEST_RANGE_SIZE)))
+
+
+def retrieval_order(
+    df: DataFrame,
+    retrieval_priority: str,
+    priority_list: Optional[DataFrame] = None,
+) -> Tuple[DataFrame, List[Column]]:
+    """
+    Returns the archives with the columns the policy orders them by, and the order
+    of their retrieval from the highest priority.
+    """
+    policy, prefixes = parse_retrieval_priority(retrieval_priority)
+    order: List[Column] = []
+    if policy == KEY_PREFIX and prefixes:
+        rank = F.lit(len(prefixes))
+        for index, prefix in reversed(list(enumerate(prefixes))):
+            rank = F.when(F.col("Filename").startswith(prefix), index).otherwise(rank)
+        df = df.withColumn("PriorityRank", rank)
+        order.append(F.col("PriorityRank").asc())
+    elif policy == SIZE_ASCENDING:
+        order.append(F.col("Size").asc())
+    elif policy == SIZE_DESCENDING:
+        order.append(F.col("Size").desc())
+    elif policy == PRIORITY_LIST and priority_list is not None:
+        # Archives are listed from the highest priority, those not listed follow
+        ranks = (
+            priority_list.where(F.col("GlacierArchiveID") != "")
+            .withColumn("PriorityRank", F.monotonically_increasing_id())
+            .groupBy("GlacierArchiveID")
+            .agg(F.min("PriorityRank").alias("PriorityRank"))
+        )
+        df = df.join(ranks, df.ArchiveId == ranks.GlacierArchiveID, "left").drop(
+            "GlacierArchiveID"
+        )
+        order.append(F.col("PriorityRank").asc_nulls_last())
+    elif policy == REQUEST_EFFICIENCY:
+        efficiency_udf = F.udf(request_efficiency, "double")
+        df = df.withColumn("RequestEfficiency", efficiency_udf(F.col("Size")))
+        order.append(F.col("RequestEfficiency").desc())
+    return df, order + [F.col("CreationDate").asc(), F.col("ArchiveId").asc()]
+
+
+def add_partitions(
+    df: DataFrame,
+    retrieval_priority: str = CREATION_DATE,
+    priority_list: Optional[DataFrame] = None,
+) -> DataFrame:
+    """
+    Numbers the archives in RetrievalOrder by their retrieval priority, and assigns
+    them to partitions of PARTITION_SIZE bytes in that order.
+    """
+    df, order = retrieval_order(df, retrieval_priority, priority_list)
+    window_spec = Window.orderBy(*order)
     df_cumulative_sum = df.withColumn(
-        "CumulativeSum", F.sum(F.col("Size")).over(window_spec)
-    )
+        "RetrievalOrder", F.row_number().over(window_spec)
+    ).withColumn("CumulativeSum", F.sum(F.col("Size")).over(window_spec))
     assign_partition_udf = F.udf(assign_partition)
 
     df_result = df_cumulative_sum.withColumn(
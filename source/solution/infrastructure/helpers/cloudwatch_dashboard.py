@@ -10,7 +10,8 @@ from aws_cdk import Aws, Duration, Fn, Stack
 from aws_cdk import aws_cloudwatch as cw
 from aws_cdk import aws_sqs as sqs
 
-METRICS_NAMESPACE = "DataTransferFromAmazonS3GlacierVaultsToAmazonS3"
+from solution.application.util.metrics import METRICS_NAMESPACE
+
 METRIC_LABEL_LIST = [
     ("TotalArchiveCount", "Aggregated Count of Archives"),
     ("TotalArchiveSize", "Aggregated Size of Archives"),
@@ -28,7 +29,12 @@ METRIC_LABEL_LIST = [
 
 
 class CwDashboard(object):
-    def __init__(self, scope: Stack, queues: List[Tuple[str, sqs.Queue]]) -> None:
+    def __init__(
+        self,
+        scope: Stack,
+        queues: List[Tuple[str, sqs.Queue]],
+        lane_queues: List[Tuple[str, sqs.Queue]] | None = None,
+    ) -> None:
         count_metrics_list = []
         size_metrics_list = []
         stack_id = Fn.select(2, Fn.split("/", Aws.STACK_ID))
@@ -94,6 +100,54 @@ class CwDashboard(object):
 
         self.add_graph_widgets(sqs_metrics, "ApproximateAgeOfOldestMessage")
 
+        if lane_queues:
+            # Chunks are deleted from the queue of their lane once retrieved
+            lane_metrics = [
+                self.create_metric(
+                    "NumberOfMessagesDeleted",
+                    name,
+                    {"QueueName": queue.queue_name},
+                    cw.Stats.SUM,
+                    "AWS/SQS",
+                )
+                for name, queue in lane_queues
+            ]
+            self.add_graph_widgets(
+                lane_metrics, "Chunk Retrieval Lane Throughput (chunks per 5 minutes)"
+            )
+
+        # Published by the notifications processor as it fans out chunk events
+        self.add_graph_widgets(
+            [
+                self.create_metric(
+                    "ChunkEventsEnqueued",
+                    "Chunk events enqueued",
+                    {},
+                    cw.Stats.SUM,
+                    METRICS_NAMESPACE,
+                )
+            ],
+            "Chunk Events Enqueue Throughput (chunks per 5 minutes)",
+        )
+
+        # Published by the archive retrieval initiation batches
+        self.add_graph_widgets(
+            [
+                self.create_metric(
+                    metric_name,
+                    label,
+                    {},
+                    cw.Stats.SUM,
+                    METRICS_NAMESPACE,
+                )
+                for metric_name, label in (
+                    ("ArchivesInitiated", "Archive retrieval jobs initiated"),
+                    ("InitiationsThrottled", "Initiations throttled"),
+                )
+            ],
+            "Archive Retrieval Initiation Throughput (jobs per 5 minutes)",
+        )
+
     def add_number_widgets(
         self, metrics_list: list[cw.Metric], title: str, full_precision: bool
     ) -> None:
@@ -22,6 +22,10 @@ class LogsInsightsQuery:
             raise ResourceNotFound("Notifications processor Lambda")
         if stack_info.lambdas.chunk_retrieval_lambda is None:
             raise ResourceNotFound("Chunk retrieval Lambda")
+        if stack_info.lambdas.small_chunk_retrieval_lambda is None:
+            raise ResourceNotFound("Small chunk retrieval Lambda")
+        if stack_info.lambdas.medium_chunk_retrieval_lambda is None:
+            raise ResourceNotFound("Medium chunk retrieval Lambda")
         if stack_info.lambdas.archive_validation_lambda is None:
             raise ResourceNotFound("Archive validation Lambda")
         if stack_info.lambdas.metric_update_on_status_change_lambda is None:
@@ -39,6 +43,8 @@ class LogsInsightsQuery:
             f"/aws/lambda/{stack_info.lambdas.metric_update_on_status_change_lambda.function_name}",
             f"/aws/lambda/{stack_info.lambdas.archives_needing_window_extension_lambda.function_name}",
             f"/aws/lambda/{stack_info.lambdas.extend_download_window_initiate_retrieval_lambda.function_name}",
+            f"/aws/lambda/{stack_info.lambdas.small_chunk_retrieval_lambda.function_name}",
+            f"/aws/lambda/{stack_info.lambdas.medium_chunk_retrieval_lambda.function_name}",
         ]
 
         query_string = "fields @timestamp, @message, @logStream, @log \
@@ -11,9 +11,11 @@ class OutputKeys:
     NOTIFICATIONS_SQS_URL = "NotificationsSQSUrl"
     CHUNKS_SQS_URL = "ChunksSQSUrl"
     VALIDATION_SQS_URL = "ValidationSQSUrl"
+    PACKING_SQS_URL = "PackingSQSUrl"
     NOTIFICATIONS_SQS_ARN = "NotificationsSQSArn"
     CHUNKS_SQS_ARN = "ChunksSQSArn"
     VALIDATION_SQS_ARN = "ValidationSQSArn"
+    PACKING_SQS_ARN = "PackingSQSArn"
     OUTPUT_BUCKET_NAME = "OutputBucketName"
     INVENTORY_BUCKET_NAME = "InventoryBucketName"
     CHUNK_RETRIEVAL_LAMBDA_ARN = "ChunkRetrievalLambdaArn"
@@ -10,6 +10,7 @@ import yaml
 
 from solution.infrastructure.output_keys import OutputKeys
 from solution.infrastructure.ssm_automation_docs.scripts.orchestration_doc_script import (
+    retrieval_priorities,
     s3_storage_class_mapping,
 )
 from solution.infrastructure.ssm_automation_docs.ssm_document_template import (
@@ -36,6 +37,9 @@ class BaseAutomationDocument(ExecuteScriptAutomationDocument):
             "description": "{{ Description }}",  # Reusing Possible User inputs
             "name_override_presigned_url": "{{ NamingOverrideFile }}",  # Reusing Possible User inputs
             "s3_storage_class": "{{ S3StorageClass }}",
+            "retrieval_priority_policy": "{{ RetrievalPriority }}",
+            "priority_prefixes": "{{ PriorityPrefixes }}",
+            "priority_list_presigned_url": "{{ PriorityListFile }}",
             "acknowledge_cross_region": "{{ AcknowledgeAdditionalCostForCrossRegionTransfer }}",
             "bucket_name": bucket_name,
             "region": region,
@@ -73,6 +77,24 @@ class BaseAutomationDocument(ExecuteScriptAutomationDocument):
                 "allowedValues": list(s3_storage_class_mapping.keys()),
                 "description": "(Required) Input to specify the S3 storage class for the transfered archives. See Amazon S3 pricing: https://aws.amazon.com/s3/pricing",
             },
+            "RetrievalPriority": {
+                "type": "String",
+                "default": retrieval_priorities[0],
+                "allowedValues": retrieval_priorities,
+                "description": "(Optional) Input to specify the order in which archives are retrieved: by CreationDate, by KeyPrefix from PriorityPrefixes, by size with SizeAscending or SizeDescending, listed first in the PriorityListFile with PriorityList, or by bytes per request with RequestEfficiency.",
+            },
+            "PriorityPrefixes": {
+                "type": "String",
+                "default": "",
+                "description": "(Optional) Input can be used to provide a comma-separated list of archive key prefixes, from the highest priority, for the KeyPrefix retrieval priority.",
+                "allowedPattern": r"^[^\r\n]*$",
+            },
+            "PriorityListFile": {
+                "type": "String",
+                "default": "",
+                "description": "(Optional) Input can be used to provide a pre-signed URL for the priority list file, listing the IDs of the archives to retrieve first for the PriorityList retrieval priority.",
+                "allowedPattern": r"^(?:https://[a-zA-Z0-9.-]+\.s3\.[a-zA-Z0-9.-]+\.amazonaws\.com(?:/[^\s]*)?)?$",
+            },
             "AcknowledgeAdditionalCostForCrossRegionTransfer": {
                 "type": "String",
                 "default": "NO",
@@ -121,6 +143,9 @@ class LaunchAutomationDocument(BaseAutomationDocument):
         " * **ProvidedInventory**: **No**\n"
         " * **VaultName**: (Required) Input to specify the name of the vault that needs to be retrieved from Glacier and copied to S3.\n"
         " * **NamingOverrideFile**: (Optional) Input can be used to provide a pre-signed URL for the naming override file.\n"
+        " * **RetrievalPriority**: (Optional) Input to specify the order in which archives are retrieved: CreationDate, KeyPrefix, SizeAscending, SizeDescending, PriorityList or RequestEfficiency.\n"
+        " * **PriorityPrefixes**: (Optional) Input can be used to provide a comma-separated list of archive key prefixes, from the highest priority, for the KeyPrefix retrieval priority.\n"
+        " * **PriorityListFile**: (Optional) Input can be used to provide a pre-signed URL for the priority list file for the PriorityList retrieval priority.\n"
         " * **S3StorageClass**: (Required) Input to specify the S3 storage class for the transfered archives. [Learn more](https://docs.aws.amazon.com/console/s3/storageclasses) or see [Amazon S3 pricing](https://aws.amazon.com/s3/pricing).\n"
         " * **WorkflowRun**: (Optional) Input can be used to provide a workflow identifier. If this field remains empty, the solution assigns a value.\n"
         "  \n"
@@ -132,6 +157,9 @@ class LaunchAutomationDocument(BaseAutomationDocument):
         " * **ProvidedInventory**: **Yes**\n"
         " * **VaultName**: (Required) Input to specify the name of the vault that needs to be retrieved from Glacier and copied to S3.\n"
         " * **NamingOverrideFile**: (Optional) Input can be used to provide a pre-signed URL for the naming override file.\n"
+        " * **RetrievalPriority**: (Optional) Input to specify the order in which archives are retrieved: CreationDate, KeyPrefix, SizeAscending, SizeDescending, PriorityList or RequestEfficiency.\n"
+        " * **PriorityPrefixes**: (Optional) Input can be used to provide a comma-separated list of archive key prefixes, from the highest priority, for the KeyPrefix retrieval priority.\n"
+        " * **PriorityListFile**: (Optional) Input can be used to provide a pre-signed URL for the priority list file for the PriorityList retrieval priority.\n"
         " * **S3StorageClass**: (Required) Input to specify the S3 storage class for the transfered archives. [Learn more](https://docs.aws.amazon.com/console/s3/storageclasses) or see [Amazon S3 pricing](https://aws.amazon.com/s3/pricing).\n"
         " * **WorkflowRun**: (Required) Input to specify the name of your workflow run.\n"
     )
@@ -187,6 +215,9 @@ class ResumeAutomationDocument(BaseAutomationDocument):
         " * **ProvidedInventory**: (Required) Input with two options [YES, NO] to indicate if the inventory is provided.\n"
         " * **WorkflowRun**: (Required) Input to specify the workflow identifier of the workflow that needs to be resumed.\n"
         " * **NamingOverrideFile**: (Optional) Input can be used to provide a pre-signed URL for the naming override file.\n"
+        " * **RetrievalPriority**: (Optional) Input to specify the order in which archives are retrieved: CreationDate, KeyPrefix, SizeAscending, SizeDescending, PriorityList or RequestEfficiency.\n"
+        " * **PriorityPrefixes**: (Optional) Input can be used to provide a comma-separated list of archive key prefixes, from the highest priority, for the KeyPrefix retrieval priority.\n"
+        " * **PriorityListFile**: (Optional) Input can be used to provide a pre-signed URL for the priority list file for the PriorityList retrieval priority.\n"
         " * **S3StorageClass**: (Required) Input to specify the S3 storage class for the transfered archives. [Learn more](https://docs.aws.amazon.com/console/s3/storageclasses) or see [Amazon S3 pricing](https://aws.amazon.com/s3/pricing).\n"
     )
 
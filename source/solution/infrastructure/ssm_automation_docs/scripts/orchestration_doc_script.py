@@ -23,6 +23,16 @@ s3_storage_class_mapping: Dict[str, str] = {
     "S3 Standard - Infrequent Access": "STANDARD_IA",
 }
 
+# Orders in which archives are retrieved, implemented by the Glue partitioning script
+retrieval_priorities = [
+    "CreationDate",
+    "KeyPrefix",
+    "SizeAscending",
+    "SizeDescending",
+    "PriorityList",
+    "RequestEfficiency",
+]
+
 
 def script_handler(events, _context):  # type: ignore
     sfn_client = boto3.client("stepfunctions", config=__boto_config__)
@@ -68,6 +78,10 @@ def script_handler(events, _context):  # type: ignore
         if events["name_override_presigned_url"]
         else "",
         "vault_name": vault_name,
+        "priority_list_presigned_url": events.get("priority_list_presigned_url") or "",
+        "retrieval_priority": create_retrieval_priority(
+            events.get("retrieval_priority_policy"), events.get("priority_prefixes")
+        ),
     }
     sfn_client.start_execution(
         stateMachineArn=events["state_machine_arn"],
@@ -80,6 +94,18 @@ def create_workflow_name(workflow_run=None):  # type: ignore
     return workflow_run or "workflow_" + timestamp[0] + "_" + timestamp[1]
 
 
+def create_retrieval_priority(
+    policy: str | None = None, prefixes: str | None = None
+) -> str:
+    policy = policy or retrieval_priorities[0]
+    if policy not in retrieval_priorities:
+        raise ValueError(f"Unknown retrieval priority {policy}")
+    key_prefixes = [prefix.strip() for prefix in (prefixes or "").split(",")]
+    if policy == "KeyPrefix" and any(key_prefixes):
+        return f"{policy}:{','.join(prefix for prefix in key_prefixes if prefix)}"
+    return policy
+
+
 def retrieve_vault_name(workflow_run: str, table_name: str):  # type: ignore
     ddb_client = boto3.client("dynamodb", config=__boto_config__)
     response = ddb_client.get_item(
@@ -30,6 +30,10 @@ from aws_cdk.aws_lambda_event_sources import DynamoEventSource, SqsDlq, SqsEvent
 from cdk_nag import NagSuppressions
 from constructs import Construct
 
+from solution.application.archive_retrieval.notification_processor import (
+    NOTIFICATION_WORKERS,
+)
+from solution.application.glacier_s3_transfer.packing import PACK_ARCHIVE_SIZE_LIMIT
 from solution.application.glacier_service.glacier_typing import GlacierJobType
 from solution.infrastructure.helpers.logs_insights_query import LogsInsightsQuery
 from solution.infrastructure.helpers.solutions_function import SolutionsPythonFunction
@@ -166,6 +170,25 @@ class SolutionStack(Stack):
             encryption=sqs.QueueEncryption.SQS_MANAGED,
         )
 
+        archive_packing_queue_dlq = sqs.DeadLetterQueue(
+            max_receive_count=24,
+            queue=sqs.Queue(
+                self,
+                "ArchivePackingDLQ",
+                enforce_ssl=True,
+                encryption=sqs.QueueEncryption.SQS_MANAGED,
+            ),
+        )
+
+        stack_info.queues.archive_packing_queue = sqs.Queue(
+            self,
+            "ArchivePackingQueue",
+            visibility_timeout=Duration.seconds(905),
+            dead_letter_queue=archive_packing_queue_dlq,
+            enforce_ssl=True,
+            encryption=sqs.QueueEncryption.SQS_MANAGED,
+        )
+
         stack_info.outputs[OutputKeys.NOTIFICATIONS_SQS_URL] = CfnOutput(
             self,
             OutputKeys.NOTIFICATIONS_SQS_URL,
@@ -184,6 +207,12 @@ class SolutionStack(Stack):
             value=stack_info.queues.validation_queue.queue_url,
         )
 
+        stack_info.outputs[OutputKeys.PACKING_SQS_URL] = CfnOutput(
+            self,
+            OutputKeys.PACKING_SQS_URL,
+            value=stack_info.queues.archive_packing_queue.queue_url,
+        )
+
         stack_info.outputs[OutputKeys.NOTIFICATIONS_SQS_ARN] = CfnOutput(
             self,
             OutputKeys.NOTIFICATIONS_SQS_ARN,
@@ -202,6 +231,12 @@ class SolutionStack(Stack):
             value=stack_info.queues.validation_queue.queue_arn,
         )
 
+        stack_info.outputs[OutputKeys.PACKING_SQS_ARN] = CfnOutput(
+            self,
+            OutputKeys.PACKING_SQS_ARN,
+            value=stack_info.queues.archive_packing_queue.queue_arn,
+        )
+
         async_facilitator_topic.add_subscription(
             subscriptions.SqsSubscription(stack_info.queues.notifications_queue)
         )
@@ -256,6 +291,16 @@ class SolutionStack(Stack):
             allowed_values=["true", "false"],
         )
 
+        stack_info.parameters.pack_archives_threshold_parameter = CfnParameter(
+            self,
+            "PackArchivesThresholdParameter",
+            type="Number",
+            default=0,
+            min_value=0,
+            max_value=PACK_ARCHIVE_SIZE_LIMIT,
+            description=f"Archives up to this size in bytes are packed into aggregate tar objects with an index under the packs/ prefix of the workflow run, instead of being copied to an object each (default is 0, packing disabled, up to {PACK_ARCHIVE_SIZE_LIMIT})",
+        )
+
         stack_info.tables.async_facilitator_table = SolutionsTable(
             self,
             "AsyncFacilitatorTable",
@@ -364,8 +409,9 @@ class SolutionStack(Stack):
             stack_info.parameters.enable_lambda_tracing_parameter.value_as_string,
             handler="solution.application.handlers.notifications_processor",
             code=lambda_source,
-            memory_size=256,
+            memory_size=512,
             timeout=Duration.minutes(15),
+            environment={"NOTIFICATION_WORKERS": str(NOTIFICATION_WORKERS)},
         )
 
         stack_info.eventbridge_rules.completion_checker_trigger = eventbridge.Rule(
@@ -422,7 +468,9 @@ class SolutionStack(Stack):
             SqsEventSource(
                 stack_info.queues.notifications_queue,
                 max_concurrency=NOTIFICATIONS_PROCESSOR_MAX_CONCURRNECY,
-                batch_size=1,
+                # A batch is processed concurrently, a notification per worker
+                batch_size=NOTIFICATION_WORKERS,
+                report_batch_item_failures=True,
             )
         )
 
@@ -708,6 +756,20 @@ class SolutionStack(Stack):
             stack_info.lambdas.notifications_processor_lambda
         )
 
+        stack_info.lambdas.notifications_processor_lambda.add_environment(
+            OutputKeys.PACKING_SQS_URL,
+            stack_info.queues.archive_packing_queue.queue_url,
+        )
+
+        stack_info.lambdas.notifications_processor_lambda.add_environment(
+            "PACK_ARCHIVE_SIZE",
+            stack_info.parameters.pack_archives_threshold_parameter.value_as_string,
+        )
+
+        stack_info.queues.archive_packing_queue.grant_send_messages(
+            stack_info.lambdas.notifications_processor_lambda
+        )
+
         stack_info.interfaces.output_bucket.grant_read_write(
             stack_info.lambdas.notifications_processor_lambda
         )
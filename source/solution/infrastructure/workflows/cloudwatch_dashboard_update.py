@@ -17,9 +17,9 @@ from aws_cdk import aws_stepfunctions_tasks as tasks
 from cdk_nag import NagSuppressions
 
 from solution.application.util.exceptions import ResourceNotFound
+from solution.application.util.metrics import METRICS_NAMESPACE
 from solution.infrastructure.helpers.cloudwatch_dashboard import (
     METRIC_LABEL_LIST,
-    METRICS_NAMESPACE,
     CwDashboard,
 )
 from solution.infrastructure.helpers.solutions_state_machine import (
@@ -39,6 +39,10 @@ class Workflow:
             raise ResourceNotFound("Validation Queue")
         if stack_info.queues.notifications_queue is None:
             raise ResourceNotFound("Notifications Queue")
+        if stack_info.queues.small_chunks_retrieval_queue is None:
+            raise ResourceNotFound("Small Chunks Queue")
+        if stack_info.queues.medium_chunks_retrieval_queue is None:
+            raise ResourceNotFound("Medium Chunks Queue")
 
         self.scope = stack_info.scope
         CwDashboard(
@@ -47,6 +51,19 @@ class Workflow:
                 ("Notifications Queue", stack_info.queues.notifications_queue),
                 ("Chunks retrieval Queue", stack_info.queues.chunks_retrieval_queue),
                 ("Validation Queue", stack_info.queues.validation_queue),
+                (
+                    "Small Chunks retrieval Queue",
+                    stack_info.queues.small_chunks_retrieval_queue,
+                ),
+                (
+                    "Medium Chunks retrieval Queue",
+                    stack_info.queues.medium_chunks_retrieval_queue,
+                ),
+            ],
+            [
+                ("Small lane", stack_info.queues.small_chunks_retrieval_queue),
+                ("Medium lane", stack_info.queues.medium_chunks_retrieval_queue),
+                ("Large lane", stack_info.queues.chunks_retrieval_queue),
             ],
         )  # To create the CloudWatch Dashboard
 
@@ -91,7 +108,9 @@ class Workflow:
             "CloudWatchDashboardUpdateStateMachine",
             stack_info.parameters.enable_step_function_logging_parameter.value_as_string,
             stack_info.parameters.enable_step_function_tracing_parameter.value_as_string,
-            definition_body=sfn.DefinitionBody.from_chainable(get_metrics_from_metric_table.next(put_metrics_to_cw)),
+            definition_body=sfn.DefinitionBody.from_chainable(
+                get_metrics_from_metric_table.next(put_metrics_to_cw)
+            ),
             state_machine_type=SolutionsStateMachine.EXPRESS,
         )
 
@@ -133,6 +133,7 @@ class Workflow:
                 {
                     "WorkflowRun.$": "$.workflow_run",
                     "NameOverridePresignedURL.$": "$.name_override_presigned_url",
+                    "PriorityListPresignedURL.$": "$.priority_list_presigned_url",
                 }
             ),
             result_path="$.archive_naming_override_job_result",
@@ -109,6 +109,14 @@ class Workflow:
         )
         stack_info.default_retry.apply_to_steps([retrieve_archive_initiate_job])
 
+        # Initiations are paced continuously to the daily quota, batch by batch,
+        # instead of waiting out the quota share of each partition
+        pace_initiation = sfn.Wait(
+            stack_info.scope,
+            "PaceInitiation",
+            time=sfn.WaitTime.seconds_path("$.initiate_job_result.Payload.wait_sec"),
+        )
+
         reset_partitions_metadata = tasks.DynamoUpdateItem(
             stack_info.scope,
             "ResetPartitionsMetadata",
@@ -150,7 +158,7 @@ class Workflow:
         initiate_retrieval_distributed_map = NestedDistributedMap(
             scope=stack_info.scope,
             nested_distributed_map_id="InitiateRetrieval",
-            definition=retrieve_archive_initiate_job,
+            definition=retrieve_archive_initiate_job.next(pace_initiation),
             item_selector=item_selector,
             inventory_bucket=stack_info.buckets.inventory_bucket,
             max_concurrency=1,
@@ -176,51 +184,8 @@ class Workflow:
             result_path="$.partitions",
         )
 
-        stack_info.lambdas.calculate_timeout_lambda = SolutionsPythonFunction(
-            stack_info.scope,
-            "CalculateTimeout",
-            stack_info.cfn_conditions.is_gov_cn_partition_condition,
-            stack_info.parameters.enable_lambda_tracing_parameter.value_as_string,
-            handler="solution.application.handlers.initiation_timeout",
-            code=stack_info.lambda_source,
-            runtime=lambda_.Runtime.PYTHON_3_10,
-            memory_size=256,
-            timeout=Duration.minutes(1),
-            environment={
-                OutputKeys.METRIC_TABLE_NAME: stack_info.tables.metric_table.table_name,
-                OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME: stack_info.tables.glacier_retrieval_table.table_name,
-            },
-        )
-
-        stack_info.tables.metric_table.grant_read_write_data(
-            stack_info.lambdas.calculate_timeout_lambda
-        )
-
-        stack_info.tables.glacier_retrieval_table.grant_read_write_data(
-            stack_info.lambdas.calculate_timeout_lambda
-        )
-
-        calculate_timeout_task = tasks.LambdaInvoke(
-            stack_info.scope,
-            "CalculateTimeoutTask",
-            lambda_function=stack_info.lambdas.calculate_timeout_lambda,
-            result_path="$.timeout",
-            retry_on_service_exceptions=False,
-        )
-        stack_info.default_retry.apply_to_steps([calculate_timeout_task])
-
-        wait_state = sfn.Wait(
-            stack_info.scope,
-            "Timeout",
-            time=sfn.WaitTime.seconds_path("$.timeout.Payload.wait_sec"),
-        )
-
-        definition = (
-            reset_partitions_metadata.next(
-                initiate_retrieval_distributed_map.distributed_map_state
-            )
-            .next(calculate_timeout_task)
-            .next(wait_state)
+        definition = reset_partitions_metadata.next(
+            initiate_retrieval_distributed_map.distributed_map_state
         )
 
         item_reader_config = ItemReaderConfig()
@@ -269,9 +234,6 @@ class Workflow:
             stack_info.state_machines.initiate_retrieval_state_machine
         )
 
-        stack_info.lambdas.calculate_timeout_lambda.grant_invoke(
-            stack_info.state_machines.initiate_retrieval_state_machine
-        )
         stack_info.lambdas.initiate_archive_retrieval_lambda.grant_invoke(
             stack_info.state_machines.initiate_retrieval_state_machine
         )
@@ -308,14 +270,6 @@ class Workflow:
             stack_info.lambdas.initiate_archive_retrieval_lambda.node.default_child
         )
 
-        assert isinstance(
-            stack_info.lambdas.calculate_timeout_lambda.node.default_child,
-            CfnElement,
-        )
-        calculate_timeout_lambda_logical_id = Stack.of(stack_info.scope).get_logical_id(
-            stack_info.lambdas.calculate_timeout_lambda.node.default_child
-        )
-
         assert isinstance(
             stack_info.tables.glacier_retrieval_table.node.default_child,
             CfnElement,
@@ -350,23 +304,6 @@ class Workflow:
                     "appliesTo": [
                         f"Resource::<{glacier_retrieval_table_logical_id}.Arn>/index/*",
                         f"Resource::<{initiate_archive_retrieval_lambda_logical_id}.Arn>:*",
-                        f"Resource::<{calculate_timeout_lambda_logical_id}.Arn>:*",
-                    ],
-                },
-            ],
-        )
-
-        assert stack_info.lambdas.calculate_timeout_lambda.role is not None
-        NagSuppressions.add_resource_suppressions(
-            stack_info.lambdas.calculate_timeout_lambda.role.node.find_child(
-                "DefaultPolicy"
-            ).node.find_child("Resource"),
-            [
-                {
-                    "id": "AwsSolutions-IAM5",
-                    "reason": "It's necessary to have wildcard permissions for Glacier Object Retrieval table index to allow read/write",
-                    "appliesTo": [
-                        f"Resource::<{glacier_retrieval_table_logical_id}.Arn>/index/*",
                     ],
                 },
             ],
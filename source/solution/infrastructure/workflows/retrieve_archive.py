@@ -4,9 +4,23 @@ SPDX-License-Identifier: Apache-2.0
 """
 
 from aws_cdk import CfnElement, CfnOutput, Duration, Stack
+from aws_cdk import aws_lambda as lambda_
+from aws_cdk import aws_sqs as sqs
 from aws_cdk.aws_lambda_event_sources import SqsEventSource
 from cdk_nag import NagSuppressions
 
+from solution.application.archive_retrieval.lanes import (
+    LARGE_LANE,
+    MEDIUM_LANE,
+    SMALL_LANE,
+    RetrievalLane,
+)
+from solution.application.archive_retrieval.notification_processor import (
+    SMALL_ARCHIVE_SIZE,
+)
+from solution.application.glacier_s3_transfer.download import DOWNLOAD_RANGE_SIZE
+from solution.application.glacier_s3_transfer.packing import PACK_BATCH_SIZE
+from solution.application.glacier_s3_transfer.stream import STREAM_BUFFER_SIZE
 from solution.application.util.exceptions import ResourceNotFound
 from solution.infrastructure.helpers.solutions_function import SolutionsPythonFunction
 from solution.infrastructure.output_keys import OutputKeys
@@ -29,50 +43,55 @@ class Workflow:
             raise ResourceNotFound("Chunks Queue")
         if stack_info.queues.validation_queue is None:
             raise ResourceNotFound("Validation Queue")
+        if stack_info.lambdas.notifications_processor_lambda is None:
+            raise ResourceNotFound("Notifications processor lambda")
+        if stack_info.queues.archive_packing_queue is None:
+            raise ResourceNotFound("Archive Packing Queue")
+        if stack_info.lambdas.initiate_archive_retrieval_lambda is None:
+            raise ResourceNotFound("Initiate archive retrieval lambda")
 
-        stack_info.lambdas.chunk_retrieval_lambda = SolutionsPythonFunction(
-            stack_info.scope,
-            "ChunkRetrieval",
-            stack_info.cfn_conditions.is_gov_cn_partition_condition,
-            stack_info.parameters.enable_lambda_tracing_parameter.value_as_string,
-            handler="solution.application.handlers.archive_retrieval",
-            code=stack_info.lambda_source,
-            memory_size=1536,
-            timeout=Duration.minutes(15),
-            description="Lambda to retrieve chunks from Glacier, upload them to S3 and generate file checksums.",
-            environment={
-                OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME: stack_info.tables.glacier_retrieval_table.table_name,
-            },
+        stack_info.lambdas.chunk_retrieval_lambda = self._chunk_retrieval_lambda(
+            stack_info, LARGE_LANE, stack_info.queues.chunks_retrieval_queue
         )
 
-        CHUNKS_RETRIEVAL_MAX_CONCURRNECY = 70
-        stack_info.lambdas.chunk_retrieval_lambda.add_event_source(
-            SqsEventSource(
-                stack_info.queues.chunks_retrieval_queue,
-                max_concurrency=CHUNKS_RETRIEVAL_MAX_CONCURRNECY,
-                batch_size=1,
-            )
+        stack_info.queues.small_chunks_retrieval_queue = self._lane_queue(
+            stack_info, SMALL_LANE
         )
-
-        stack_info.interfaces.output_bucket.grant_put(
-            stack_info.lambdas.chunk_retrieval_lambda
+        stack_info.lambdas.small_chunk_retrieval_lambda = self._chunk_retrieval_lambda(
+            stack_info, SMALL_LANE, stack_info.queues.small_chunks_retrieval_queue
         )
 
-        assert stack_info.lambdas.chunk_retrieval_lambda.role is not None
-        stack_info.policies.get_job_output_policy.attach_to_role(
-            stack_info.lambdas.chunk_retrieval_lambda.role
+        stack_info.queues.medium_chunks_retrieval_queue = self._lane_queue(
+            stack_info, MEDIUM_LANE
         )
-        stack_info.tables.glacier_retrieval_table.grant_read_write_data(
-            stack_info.lambdas.chunk_retrieval_lambda
+        stack_info.lambdas.medium_chunk_retrieval_lambda = self._chunk_retrieval_lambda(
+            stack_info,
+            MEDIUM_LANE,
+            stack_info.queues.medium_chunks_retrieval_queue,
         )
 
-        stack_info.lambdas.chunk_retrieval_lambda.add_environment(
-            OutputKeys.VALIDATION_SQS_URL,
-            stack_info.queues.validation_queue.queue_url,
-        )
+        # Initiations are held back while the chunk queues of the lanes are deeper
+        # than the chunk workers can download within the download window
+        for lane, queue in (
+            (SMALL_LANE, stack_info.queues.small_chunks_retrieval_queue),
+            (MEDIUM_LANE, stack_info.queues.medium_chunks_retrieval_queue),
+            (LARGE_LANE, stack_info.queues.chunks_retrieval_queue),
+        ):
+            stack_info.lambdas.initiate_archive_retrieval_lambda.add_environment(
+                lane.queue_url_key, queue.queue_url
+            )
+            queue.grant(
+                stack_info.lambdas.initiate_archive_retrieval_lambda,
+                "sqs:GetQueueAttributes",
+            )
 
-        stack_info.queues.validation_queue.grant_send_messages(
-            stack_info.lambdas.chunk_retrieval_lambda
+        # Small archives are copied by the notifications processor itself
+        stack_info.lambdas.notifications_processor_lambda.add_environment(
+            "SMALL_ARCHIVE_SIZE", str(SMALL_ARCHIVE_SIZE)
+        )
+        assert stack_info.lambdas.notifications_processor_lambda.role is not None
+        stack_info.policies.get_job_output_policy.attach_to_role(
+            stack_info.lambdas.notifications_processor_lambda.role
         )
 
         stack_info.outputs[OutputKeys.CHUNK_RETRIEVAL_LAMBDA_ARN] = CfnOutput(
@@ -159,64 +178,92 @@ class Workflow:
             stack_info.tables.glacier_retrieval_table.node.default_child
         )
 
-        assert isinstance(stack_info.tables.metric_table.node.default_child, CfnElement)
-        metric_table_logical_id = Stack.of(stack_info.scope).get_logical_id(
-            stack_info.tables.metric_table.node.default_child
-        )
-
+        assert stack_info.lambdas.archive_validation_lambda.role is not None
         NagSuppressions.add_resource_suppressions(
-            stack_info.lambdas.chunk_retrieval_lambda.role.node.find_child(
+            stack_info.lambdas.archive_validation_lambda.role.node.find_child(
                 "DefaultPolicy"
             ).node.find_child("Resource"),
             [
                 {
                     "id": "AwsSolutions-IAM5",
-                    "reason": "It's necessary to have wildcard permissions for s3 put object, to allow for copying glacier archives over to s3 in any location",
+                    "reason": "It's necessary to have wildcard permissions for s3 put object, to allow for copying glacier inventory over to s3 in any location",
                     "appliesTo": [
                         "Resource::arn:<AWS::Partition>:s3:::<DestinationBucketParameter>/*",
                         "Action::s3:Abort*",
+                        "Action::s3:DeleteObject*",
+                        "Action::s3:GetBucket*",
+                        "Action::s3:GetObject*",
+                        "Action::s3:List*",
                     ],
                 },
                 {
                     "id": "AwsSolutions-IAM5",
-                    "reason": "It's necessary to have wildcard permissions for Glacier Object Retrieval table index to allow read/write",
-                    "appliesTo": [
-                        f"Resource::<{glacier_retrieval_table_logical_id}.Arn>/index/*",
-                    ],
-                },
-                {
-                    "id": "AwsSolutions-IAM5",
-                    "reason": "It's necessary to have wildcard permissions for Metric table to allow read/write",
+                    "reason": "Wildcard permission is granted to the step function to be able to write to archive download throttling table",
                     "appliesTo": [
-                        f"Resource::<{metric_table_logical_id}.Arn>/index/*",
+                        f"Resource::<{glacier_retrieval_table_logical_id}.Arn>/index/*"
                     ],
                 },
             ],
         )
 
-        assert stack_info.lambdas.archive_validation_lambda.role is not None
+        stack_info.lambdas.archive_packing_lambda = SolutionsPythonFunction(
+            stack_info.scope,
+            "ArchivePacking",
+            stack_info.cfn_conditions.is_gov_cn_partition_condition,
+            stack_info.parameters.enable_lambda_tracing_parameter.value_as_string,
+            handler="solution.application.handlers.archive_packing",
+            code=stack_info.lambda_source,
+            memory_size=1024,
+            timeout=Duration.minutes(15),
+            description="Lambda to pack small archives retrieved from Glacier into aggregate S3 objects with an index.",
+            environment={
+                OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME: stack_info.tables.glacier_retrieval_table.table_name,
+                OutputKeys.OUTPUT_BUCKET_NAME: stack_info.interfaces.output_bucket.bucket_name,
+            },
+        )
+
+        ARCHIVE_PACKING_MAX_CONCURRNECY = 10
+        stack_info.lambdas.archive_packing_lambda.add_event_source(
+            SqsEventSource(
+                stack_info.queues.archive_packing_queue,
+                max_concurrency=ARCHIVE_PACKING_MAX_CONCURRNECY,
+                batch_size=PACK_BATCH_SIZE,
+                max_batching_window=Duration.minutes(1),
+                report_batch_item_failures=True,
+            )
+        )
+
+        stack_info.interfaces.output_bucket.grant_put(
+            stack_info.lambdas.archive_packing_lambda
+        )
+
+        stack_info.tables.glacier_retrieval_table.grant_read_write_data(
+            stack_info.lambdas.archive_packing_lambda
+        )
+
+        assert stack_info.lambdas.archive_packing_lambda.role is not None
+        stack_info.policies.get_job_output_policy.attach_to_role(
+            stack_info.lambdas.archive_packing_lambda.role
+        )
+
         NagSuppressions.add_resource_suppressions(
-            stack_info.lambdas.archive_validation_lambda.role.node.find_child(
+            stack_info.lambdas.archive_packing_lambda.role.node.find_child(
                 "DefaultPolicy"
             ).node.find_child("Resource"),
             [
                 {
                     "id": "AwsSolutions-IAM5",
-                    "reason": "It's necessary to have wildcard permissions for s3 put object, to allow for copying glacier inventory over to s3 in any location",
+                    "reason": "It's necessary to have wildcard permissions for s3 put object, to allow for packing glacier archives to s3 in any location",
                     "appliesTo": [
                         "Resource::arn:<AWS::Partition>:s3:::<DestinationBucketParameter>/*",
                         "Action::s3:Abort*",
-                        "Action::s3:DeleteObject*",
-                        "Action::s3:GetBucket*",
-                        "Action::s3:GetObject*",
-                        "Action::s3:List*",
                     ],
                 },
                 {
                     "id": "AwsSolutions-IAM5",
-                    "reason": "Wildcard permission is granted to the step function to be able to write to archive download throttling table",
+                    "reason": "It's necessary to have wildcard permissions for Glacier Object Retrieval table index to allow read/write",
                     "appliesTo": [
-                        f"Resource::<{glacier_retrieval_table_logical_id}.Arn>/index/*"
+                        f"Resource::<{glacier_retrieval_table_logical_id}.Arn>/index/*",
                     ],
                 },
             ],
@@ -238,3 +285,124 @@ class Workflow:
                 }
             ],
         )
+
+    @staticmethod
+    def _lane_queue(stack_info: StackInfo, lane: RetrievalLane) -> sqs.Queue:
+        assert stack_info.lambdas.notifications_processor_lambda is not None
+        queue = sqs.Queue(
+            stack_info.scope,
+            f"{lane.name}ChunksRetrievalQueue",
+            visibility_timeout=Duration.seconds(905),
+            delivery_delay=Duration.seconds(10),
+            dead_letter_queue=sqs.DeadLetterQueue(
+                max_receive_count=96,
+                queue=sqs.Queue(
+                    stack_info.scope,
+                    f"{lane.name}ChunksRetrievalDLQ",
+                    enforce_ssl=True,
+                    encryption=sqs.QueueEncryption.SQS_MANAGED,
+                ),
+            ),
+            enforce_ssl=True,
+            encryption=sqs.QueueEncryption.SQS_MANAGED,
+        )
+        stack_info.lambdas.notifications_processor_lambda.add_environment(
+            lane.queue_url_key, queue.queue_url
+        )
+        queue.grant_send_messages(stack_info.lambdas.notifications_processor_lambda)
+        return queue
+
+    @staticmethod
+    def _chunk_retrieval_lambda(
+        stack_info: StackInfo, lane: RetrievalLane, queue: sqs.IQueue
+    ) -> lambda_.Function:
+        assert stack_info.tables.glacier_retrieval_table is not None
+        assert stack_info.tables.metric_table is not None
+        assert stack_info.interfaces.output_bucket is not None
+        assert stack_info.policies.get_job_output_policy is not None
+        assert stack_info.parameters.enable_lambda_tracing_parameter is not None
+
+        function = SolutionsPythonFunction(
+            stack_info.scope,
+            f"{lane.name}ChunkRetrieval",
+            stack_info.cfn_conditions.is_gov_cn_partition_condition,
+            stack_info.parameters.enable_lambda_tracing_parameter.value_as_string,
+            handler="solution.application.handlers.archive_retrieval",
+            code=stack_info.lambda_source,
+            memory_size=lane.memory_size,
+            timeout=Duration.minutes(15),
+            description="Lambda to retrieve chunks from Glacier, upload them to S3 and generate file checksums.",
+            environment={
+                OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME: stack_info.tables.glacier_retrieval_table.table_name,
+                "STREAM_BUFFER_SIZE": str(STREAM_BUFFER_SIZE),
+                "DOWNLOAD_CONCURRENCY": str(lane.download_concurrency),
+                "DOWNLOAD_RANGE_SIZE": str(DOWNLOAD_RANGE_SIZE),
+                "UPLOAD_CONCURRENCY": str(lane.upload_concurrency),
+                # Chunks of a batch are processed concurrently, within the Lambda
+                # memory budget
+                "CHUNK_RETRIEVAL_WORKERS": str(lane.batch_size),
+            },
+        )
+
+        function.add_event_source(
+            SqsEventSource(
+                queue,
+                max_concurrency=lane.max_concurrency,
+                batch_size=lane.batch_size,
+                report_batch_item_failures=True,
+            )
+        )
+
+        stack_info.interfaces.output_bucket.grant_put(function)
+
+        assert function.role is not None
+        stack_info.policies.get_job_output_policy.attach_to_role(function.role)
+        stack_info.tables.glacier_retrieval_table.grant_read_write_data(function)
+
+        # The last chunk of an archive validates and completes its upload inline
+        stack_info.interfaces.output_bucket.grant_read(function)
+
+        assert isinstance(
+            stack_info.tables.glacier_retrieval_table.node.default_child, CfnElement
+        )
+        glacier_retrieval_table_logical_id = Stack.of(stack_info.scope).get_logical_id(
+            stack_info.tables.glacier_retrieval_table.node.default_child
+        )
+
+        assert isinstance(stack_info.tables.metric_table.node.default_child, CfnElement)
+        metric_table_logical_id = Stack.of(stack_info.scope).get_logical_id(
+            stack_info.tables.metric_table.node.default_child
+        )
+
+        NagSuppressions.add_resource_suppressions(
+            function.role.node.find_child("DefaultPolicy").node.find_child("Resource"),
+            [
+                {
+                    "id": "AwsSolutions-IAM5",
+                    "reason": "It's necessary to have wildcard permissions for s3 put object, to allow for copying glacier archives over to s3 in any location",
+                    "appliesTo": [
+                        "Resource::arn:<AWS::Partition>:s3:::<DestinationBucketParameter>/*",
+                        "Action::s3:Abort*",
+                        "Action::s3:GetBucket*",
+                        "Action::s3:GetObject*",
+                        "Action::s3:List*",
+                    ],
+                },
+                {
+                    "id": "AwsSolutions-IAM5",
+                    "reason": "It's necessary to have wildcard permissions for Glacier Object Retrieval table index to allow read/write",
+                    "appliesTo": [
+                        f"Resource::<{glacier_retrieval_table_logical_id}.Arn>/index/*",
+                    ],
+                },
+                {
+                    "id": "AwsSolutions-IAM5",
+                    "reason": "It's necessary to have wildcard permissions for Metric table to allow read/write",
+                    "appliesTo": [
+                        f"Resource::<{metric_table_logical_id}.Arn>/index/*",
+                    ],
+                },
+            ],
+        )
+
+        return function
@@ -45,7 +45,10 @@ class Lambdas:
     inventory_validation_lambda: lambda_.Function | None = field(default=None)
     initiate_archive_retrieval_lambda: lambda_.Function | None = field(default=None)
     chunk_retrieval_lambda: lambda_.Function | None = field(default=None)
+    small_chunk_retrieval_lambda: lambda_.Function | None = field(default=None)
+    medium_chunk_retrieval_lambda: lambda_.Function | None = field(default=None)
     archive_validation_lambda: lambda_.Function | None = field(default=None)
+    archive_packing_lambda: lambda_.Function | None = field(default=None)
     extend_download_window_initiate_retrieval_lambda: lambda_.Function | None = field(
         default=None
     )
@@ -54,7 +57,6 @@ class Lambdas:
     )
     send_anonymized_stats_lambda: lambda_.Function | None = field(default=None)
     notifications_processor_lambda: lambda_.Function | None = field(default=None)
-    calculate_timeout_lambda: lambda_.Function | None = field(default=None)
     completion_checker_lambda: lambda_.Function | None = field(default=None)
     archives_needing_status_cleanup_lambda: lambda_.Function | None = field(
         default=None
@@ -82,6 +84,7 @@ class Parameters:
     enable_step_function_logging_parameter: CfnParameter | None = field(default=None)
     enable_lambda_tracing_parameter: CfnParameter | None = field(default=None)
     enable_step_function_tracing_parameter: CfnParameter | None = field(default=None)
+    pack_archives_threshold_parameter: CfnParameter | None = field(default=None)
 
 
 @dataclass
@@ -112,7 +115,10 @@ class Policies:
 class Queues:
     notifications_queue: sqs.Queue | None = field(default=None)
     chunks_retrieval_queue: sqs.Queue | None = field(default=None)
+    small_chunks_retrieval_queue: sqs.Queue | None = field(default=None)
+    medium_chunks_retrieval_queue: sqs.Queue | None = field(default=None)
     validation_queue: sqs.Queue | None = field(default=None)
+    archive_packing_queue: sqs.Queue | None = field(default=None)
 
 
 @dataclass(kw_only=True)
@@ -0,0 +1,83 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import json
+import logging
+import random
+from timeit import default_timer as timer
+from typing import List
+
+from solution.application.chunking.chunk_plan import ChunkPlan
+
+logger = logging.getLogger(__name__)
+
+# An archive at the 10,000 chunks limit
+ARCHIVE_SIZE = 10000 * 2**30 - 1
+CHUNK_SIZE = 2**30
+ROUNDS = 20
+
+
+def _string_ranges(size: int, chunk_size: int) -> List[str]:
+    # Range strings as generate_chunk_array built them before chunk plans
+    chunks = []
+    start_index = 0
+    end_index = min(size, chunk_size) - 1
+    while end_index < size - 1:
+        chunks.append(f"{start_index}-{end_index}")
+        start_index = end_index + 1
+        end_index = min(start_index + chunk_size - 1, size - 1)
+    chunks.append(f"{start_index}-{end_index}")
+    return chunks
+
+
+def test_chunk_plan_against_string_ranges() -> None:
+    start = timer()
+    for _ in range(ROUNDS):
+        ranges = [
+            (int(start), int(end))
+            for start, end in (
+                chunk.split("-") for chunk in _string_ranges(ARCHIVE_SIZE, CHUNK_SIZE)
+            )
+        ]
+    string_ranges = (timer() - start) / ROUNDS
+
+    start = timer()
+    for _ in range(ROUNDS):
+        planned = list(ChunkPlan(ARCHIVE_SIZE, CHUNK_SIZE))
+    chunk_plan = (timer() - start) / ROUNDS
+
+    logger.info(
+        f"{len(ranges)} chunk ranges - string ranges: {string_ranges * 1000:.3f}ms - chunk plan: {chunk_plan * 1000:.3f}ms"
+    )
+    assert planned == ranges
+
+
+def test_chunk_plan_random_access() -> None:
+    indexes = random.sample(range(10000), 100)
+
+    start = timer()
+    chunks = _string_ranges(ARCHIVE_SIZE, CHUNK_SIZE)
+    ranges = [chunks[index] for index in indexes]
+    string_ranges = timer() - start
+
+    start = timer()
+    plan = ChunkPlan(ARCHIVE_SIZE, CHUNK_SIZE)
+    planned = [plan.byte_range(index) for index in indexes]
+    chunk_plan = timer() - start
+
+    logger.info(
+        f"{len(indexes)} random chunk ranges - string ranges: {string_ranges * 1000:.3f}ms - chunk plan: {chunk_plan * 1000:.3f}ms"
+    )
+    assert planned == ranges
+
+
+def test_chunk_plan_payload_size() -> None:
+    string_ranges = len(json.dumps(_string_ranges(ARCHIVE_SIZE, CHUNK_SIZE)))
+    descriptor = len(json.dumps(ChunkPlan(ARCHIVE_SIZE, CHUNK_SIZE).descriptor()))
+
+    logger.info(
+        f"10000 chunk ranges payload - string ranges: {string_ranges} bytes - chunk plan descriptor: {descriptor} bytes"
+    )
+    assert descriptor < string_ranges
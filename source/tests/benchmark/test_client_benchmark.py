@@ -0,0 +1,53 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import logging
+from timeit import default_timer as timer
+from typing import Any, Callable
+
+import boto3
+import pytest
+
+from solution.application import __boto_config__
+from solution.application.util.clients import clear_clients, get_client
+
+logger = logging.getLogger(__name__)
+
+CHUNKS = 20
+# Clients built for each chunk before they were cached
+CHUNK_SERVICES = ["glacier", "dynamodb", "s3", "sqs"]
+
+
+@pytest.fixture(autouse=True)
+def aws_environment(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    clear_clients()
+
+
+def _per_chunk(create: Callable[[str], Any]) -> float:
+    start = timer()
+    for _ in range(CHUNKS):
+        for service_name in CHUNK_SERVICES:
+            create(service_name)
+    return (timer() - start) / CHUNKS
+
+
+def test_cached_clients_against_per_call_clients() -> None:
+    # Warm up botocore's loaders, so only the client construction is measured
+    boto3.client("sts", config=__boto_config__)
+
+    per_call = _per_chunk(lambda name: boto3.client(name, config=__boto_config__))  # type: ignore[call-overload]
+    cold_start = timer()
+    for service_name in CHUNK_SERVICES:
+        get_client(service_name)
+    cold = timer() - cold_start
+    cached = _per_chunk(get_client)
+
+    logger.info(
+        f"Client overhead per chunk - per call clients: {per_call * 1000:.1f}ms - cached clients: {cached * 1000:.3f}ms - first invocation: {cold * 1000:.1f}ms"
+    )
+    assert cached < per_call
@@ -0,0 +1,58 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import logging
+from timeit import default_timer as timer
+
+import pytest
+
+from solution.application.hashing.chunk_hash import ChunkHash, available_cpus
+from solution.application.hashing.s3_hash import S3Hash
+from solution.application.hashing.tree_hash import TreeHash
+
+logger = logging.getLogger(__name__)
+
+ONE_GB = 2**30
+
+
+@pytest.fixture(scope="module")
+def one_gb_chunk() -> bytes:
+    return bytes(range(256)) * (ONE_GB // 256)
+
+
+def test_single_pass_against_two_pass(one_gb_chunk: bytes) -> None:
+    start = timer()
+    tree_hash = TreeHash()
+    tree_hash.update(one_gb_chunk)
+    tree_digest = tree_hash.digest()
+    sha256 = S3Hash.hash(one_gb_chunk)
+    two_pass = timer() - start
+
+    start = timer()
+    chunk_hash = ChunkHash()
+    chunk_hash.update(one_gb_chunk)
+    single_pass_tree_digest = chunk_hash.tree_digest()
+    single_pass_sha256 = chunk_hash.digest()
+    single_pass = timer() - start
+
+    logger.info(
+        f"1 GiB chunk hashing - two pass: {two_pass:.3f}s - single pass: {single_pass:.3f}s"
+    )
+    assert single_pass_tree_digest == tree_digest
+    assert single_pass_sha256 == sha256
+
+
+def test_parallel_against_single_thread(one_gb_chunk: bytes) -> None:
+    single_thread = ChunkHash()
+    single_thread.update(one_gb_chunk)
+
+    parallel = ChunkHash(max_workers=available_cpus())
+    parallel.update(one_gb_chunk)
+
+    logger.info(
+        f"1 GiB chunk hashing - single thread: {single_thread.elapsed:.3f}s - {available_cpus()} threads: {parallel.elapsed:.3f}s"
+    )
+    assert parallel.tree_digest() == single_thread.tree_digest()
+    assert parallel.digest() == single_thread.digest()
@@ -66,6 +66,8 @@ def default_input() -> str:
             upload_id="test_upload_123",
             chunk_size=MOCK_DATA[VAULT_NAME]["inventory-metadata"]["chunkSize"],  # type: ignore
             name_override_presigned_url=None,
+            priority_list_presigned_url=None,
+            retrieval_priority="CreationDate",
             tier="Bulk",
             migration_type="LAUNCH",
             s3_storage_class="GLACIER",
@@ -89,7 +91,7 @@ def sf_history_output_no_inventory(default_input: str, sfn_client: SFNClient) ->
 def sf_history_output_with_inventory(sfn_client: SFNClient) -> Any:
     response = sfn_client.start_execution(
         stateMachineArn=os.environ[OutputKeys.INVENTORY_RETRIEVAL_STATE_MACHINE_ARN],
-        input='{"provided_inventory": "YES", "migration_type": "LAUNCH", "workflow_run": "workflow_run_inventory_retrieval", "name_override_presigned_url": null}',
+        input='{"provided_inventory": "YES", "migration_type": "LAUNCH", "workflow_run": "workflow_run_inventory_retrieval", "name_override_presigned_url": null, "priority_list_presigned_url": null, "retrieval_priority": "CreationDate"}',
     )
     sfn_util.wait_till_state_machine_finish(response["executionArn"], timeout=150)
     return sfn_client.get_execution_history(
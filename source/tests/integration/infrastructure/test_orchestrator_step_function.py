@@ -37,6 +37,8 @@ def default_input() -> str:
             chunk_size=2**20,
             archive_chunk_size=2**20,
             name_override_presigned_url="",
+            priority_list_presigned_url="",
+            retrieval_priority="CreationDate",
             migration_type="LAUNCH",
             tier="Bulk",
             s3_storage_class="STANDARD",
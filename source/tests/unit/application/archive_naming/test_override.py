@@ -19,6 +19,8 @@ else:
 from solution.application import __boto_config__
 from solution.application.archive_naming.override import (
     create_header_file,
+    create_priority_list_header_file,
+    upload_priority_list,
     upload_provided_file,
 )
 from solution.infrastructure.output_keys import OutputKeys
@@ -86,3 +88,28 @@ def test_upload_provided_file_expired_url(
     with patch("urllib.request.urlopen", side_effect=mock_exception) as mock_urlopen:
         with pytest.raises(Exception):
             upload_provided_file(workflow_run, pre_signed_url)
+
+
+def test_upload_priority_list(
+    s3_client: S3Client, workflow_run: str, pre_signed_url: str
+) -> None:
+    content = b"GlacierArchiveID\narchive_2\narchive_1\n"
+    create_priority_list_header_file(workflow_run)
+    with patch("urllib.request.urlopen") as mock_urlopen:
+        mock_urlopen.return_value.__enter__().read.return_value = content
+
+        upload_priority_list(workflow_run, pre_signed_url)
+
+    objects = s3_client.list_objects_v2(
+        Bucket=os.environ[OutputKeys.INVENTORY_BUCKET_NAME],
+        Prefix=f"{workflow_run}/priority_list/",
+    )
+    assert {obj["Key"] for obj in objects["Contents"]} == {
+        f"{workflow_run}/priority_list/priority_list_headers.csv",
+        f"{workflow_run}/priority_list/priority_list.csv",
+    }
+    obj = s3_client.get_object(
+        Bucket=os.environ[OutputKeys.INVENTORY_BUCKET_NAME],
+        Key=f"{workflow_run}/priority_list/priority_list.csv",
+    )
+    assert content == obj["Body"].read()
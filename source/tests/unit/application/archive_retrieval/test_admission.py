@@ -0,0 +1,144 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import os
+from typing import Iterator
+from unittest.mock import patch
+
+import pytest
+from mypy_boto3_dynamodb import DynamoDBClient
+from mypy_boto3_dynamodb.type_defs import CreateTableOutputTypeDef
+from mypy_boto3_sqs import SQSClient
+
+from solution.application.archive_retrieval import admission
+from solution.application.archive_retrieval.lanes import LARGE_LANE, SMALL_LANE
+from solution.application.model.metric_record import MetricRecord
+from solution.application.model.partition_metric_record import PartitionMetricRecord
+from solution.infrastructure.output_keys import OutputKeys
+
+NOW = 1_700_000_000.0
+WINDOW = admission.DOWNLOAD_WINDOW_SECONDS * admission.ADMISSION_WINDOW_RATIO
+
+
+def test_admission_delay_admits_within_window() -> None:
+    assert admission.admission_delay(int(WINDOW) * 100, 100.0, 10) == 0
+
+
+def test_admission_delay_holds_back_beyond_window() -> None:
+    assert admission.admission_delay(int(WINDOW + 600) * 100, 100.0, 10) == 600
+
+
+def test_admission_delay_is_capped() -> None:
+    assert (
+        admission.admission_delay(int(WINDOW) * 10**6, 100.0, 10)
+        == admission.MAX_ADMISSION_DELAY_SECONDS
+    )
+    assert (
+        admission.admission_delay(2**40, 0.0, 10)
+        == admission.MAX_ADMISSION_DELAY_SECONDS
+    )
+
+
+def test_admission_delay_admits_without_backlog() -> None:
+    assert admission.admission_delay(2**40, 100.0, 0) == 0
+    assert admission.admission_delay(0, 100.0, 10) == 0
+    assert admission.admission_delay(2**40, None, 10) == 0
+
+
+def _sample(
+    dynamodb_client: DynamoDBClient, workflow_run: str
+) -> PartitionMetricRecord:
+    return PartitionMetricRecord.parse(
+        dynamodb_client.get_item(
+            TableName=os.environ[OutputKeys.METRIC_TABLE_NAME],
+            Key={"pk": {"S": PartitionMetricRecord.partition_key(workflow_run)}},
+        )["Item"]
+    )
+
+
+def test_measure_download_throughput(
+    dynamodb_client: DynamoDBClient, metric_table_mock: CreateTableOutputTypeDef
+) -> None:
+    workflow_run = "test_measure_download_throughput"
+    measure = admission.measure_download_throughput
+
+    assert measure(dynamodb_client, workflow_run, 0, NOW) is None
+    assert _sample(dynamodb_client, workflow_run).downloaded_sample_time == NOW
+
+    # Sampled again only once the sample is old enough
+    assert measure(dynamodb_client, workflow_run, 10**6, NOW + 60) is None
+    assert _sample(dynamodb_client, workflow_run).downloaded_sample_size == 0
+
+    assert measure(dynamodb_client, workflow_run, 6 * 10**6, NOW + 600) == 10**4
+    # Nothing downloaded keeps the previous throughput
+    assert measure(dynamodb_client, workflow_run, 6 * 10**6, NOW + 1200) == 10**4
+    sample = _sample(dynamodb_client, workflow_run)
+    assert sample.downloaded_sample_time == NOW + 1200
+    assert sample.download_throughput == 10**4
+
+
+@pytest.fixture
+def chunk_queues(sqs_client: SQSClient) -> Iterator[SQSClient]:
+    queue_urls = {
+        lane.queue_url_key: sqs_client.create_queue(QueueName=f"Chunks{lane.name}")[
+            "QueueUrl"
+        ]
+        for lane in (SMALL_LANE, LARGE_LANE)
+    }
+    with patch.dict(os.environ, queue_urls):
+        yield sqs_client
+    for queue_url in queue_urls.values():
+        sqs_client.delete_queue(QueueUrl=queue_url)
+
+
+def test_chunk_queue_depth(chunk_queues: SQSClient) -> None:
+    for queue_url_key in (SMALL_LANE.queue_url_key, LARGE_LANE.queue_url_key):
+        chunk_queues.send_message(
+            QueueUrl=os.environ[queue_url_key], MessageBody="chunk"
+        )
+    assert admission.chunk_queue_depth(chunk_queues) == 2
+
+
+@patch("time.time", return_value=NOW)
+def test_admit_initiation(
+    _time: object,
+    dynamodb_client: DynamoDBClient,
+    metric_table_mock: CreateTableOutputTypeDef,
+    chunk_queues: SQSClient,
+) -> None:
+    workflow_run = "test_admit_initiation"
+    throughput = 10**6
+    # Twice the staged bytes the workers download within the window are in flight
+    staged = int(WINDOW) * throughput * 2
+    dynamodb_client.put_item(
+        TableName=os.environ[OutputKeys.METRIC_TABLE_NAME],
+        Item=MetricRecord(
+            pk=workflow_run, size_staged=staged + 10**9, size_downloaded=10**9
+        ).marshal(),
+    )
+    dynamodb_client.put_item(
+        TableName=os.environ[OutputKeys.METRIC_TABLE_NAME],
+        Item=PartitionMetricRecord(
+            pk=PartitionMetricRecord.partition_key(workflow_run),
+            downloaded_sample_size=0,
+            downloaded_sample_time=NOW - 1000,
+        ).marshal(),
+    )
+    chunk_queues.send_message(
+        QueueUrl=os.environ[LARGE_LANE.queue_url_key], MessageBody="chunk"
+    )
+
+    assert admission.admit_initiation(workflow_run) == (
+        admission.MAX_ADMISSION_DELAY_SECONDS
+    )
+    assert _sample(dynamodb_client, workflow_run).download_throughput == throughput
+
+
+def test_admit_initiation_without_metrics(
+    dynamodb_client: DynamoDBClient,
+    metric_table_mock: CreateTableOutputTypeDef,
+    chunk_queues: SQSClient,
+) -> None:
+    assert admission.admit_initiation("test_admit_initiation_without_metrics") == 0
@@ -0,0 +1,218 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import json
+import os
+import threading
+from concurrent import futures
+from typing import Any, Iterator, List, Optional, Tuple
+from unittest.mock import patch
+
+import pytest
+from mypy_boto3_dynamodb import DynamoDBClient
+from mypy_boto3_s3 import S3Client
+from mypy_boto3_sqs import SQSClient
+
+from solution.application.archive_retrieval import notification_processor
+from solution.application.glacier_service.glacier_typing import GlacierJobType
+from solution.application.model.glacier_transfer_meta_model import (
+    GlacierTransferMetadata,
+    GlacierTransferMetadataRead,
+)
+from solution.application.model.glacier_transfer_model import GlacierTransferModel
+from solution.application.util.clients import get_client
+from solution.application.util.exceptions import FanOutInProgress
+from solution.infrastructure.output_keys import OutputKeys
+
+WORKFLOW_RUN = "test_duplicate_notifications"
+ARCHIVE_ID = "test_archive_id"
+JOB_ID = "test_job_id"
+BUCKET_NAME = "test-duplicate-notifications-bucket"
+ARCHIVE_SIZE = 20 * 2**20
+CHUNK_SIZE = 8 * 2**20
+CHUNKS_COUNT = 3
+DUPLICATES = 8
+
+
+class SerializedClient:
+    """
+    Client whose calls are made one at a time, as DynamoDB serializes the writes
+    to an item, which moto does not do for calls made from several threads.
+    """
+
+    def __init__(self, client: Any, lock: threading.Lock) -> None:
+        self._client = client
+        self._lock = lock
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._client, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            with self._lock:
+                return attribute(*args, **kwargs)
+
+        return call
+
+
+@pytest.fixture
+def requested_archive(
+    glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
+    s3_client: S3Client,
+    sqs_client: SQSClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> Iterator[str]:
+    dynamodb_client, _ = glacier_retrieval_table_mock
+    dynamodb_client.put_item(
+        TableName=os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME],
+        Item=GlacierTransferMetadata(
+            workflow_run=WORKFLOW_RUN,
+            glacier_object_id=ARCHIVE_ID,
+            job_id=JOB_ID,
+            start_time="",
+            vault_name="test_vault",
+            retrieval_type=GlacierJobType.ARCHIVE_RETRIEVAL,
+            description="",
+            retrieve_status=f"{WORKFLOW_RUN}/{GlacierTransferModel.StatusCode.REQUESTED}",
+            file_name=ARCHIVE_ID,
+            s3_storage_class="STANDARD",
+            size=ARCHIVE_SIZE,
+            chunk_size=CHUNK_SIZE,
+        ).marshal(),
+    )
+    s3_client.create_bucket(Bucket=BUCKET_NAME)
+    queue_url = sqs_client.create_queue(QueueName="test-chunks-queue")["QueueUrl"]
+    monkeypatch.setenv(OutputKeys.OUTPUT_BUCKET_NAME, BUCKET_NAME)
+    monkeypatch.setenv(OutputKeys.CHUNKS_SQS_URL, queue_url)
+    monkeypatch.delenv("PACK_ARCHIVE_SIZE", raising=False)
+    monkeypatch.delenv("SMALL_ARCHIVE_SIZE", raising=False)
+    yield queue_url
+    sqs_client.delete_queue(QueueUrl=queue_url)
+
+
+def replay_in_parallel(message: str, duplicates: int) -> None:
+    """
+    Handles the duplicates of the notification in parallel, letting them all read
+    the requested archive before any of them stages it.
+    """
+    lock = threading.Lock()
+    barrier = threading.Barrier(duplicates, timeout=10)
+    read_metadata = notification_processor.get_glacier_transfer_metadata
+
+    def get_glacier_transfer_metadata(
+        ddb_client: DynamoDBClient, job_id: str
+    ) -> Optional[GlacierTransferMetadata]:
+        metadata = read_metadata(ddb_client, job_id)
+        barrier.wait()
+        return metadata
+
+    def serialized_client(service_name: str) -> SerializedClient:
+        return SerializedClient(get_client(service_name), lock)
+
+    with patch.object(
+        notification_processor,
+        "get_glacier_transfer_metadata",
+        get_glacier_transfer_metadata,
+    ), patch.object(notification_processor, "get_client", serialized_client):
+        with futures.ThreadPoolExecutor(duplicates) as executor:
+            handled = [
+                executor.submit(
+                    notification_processor.handle_archive_job_notification, message
+                )
+                for _ in range(duplicates)
+            ]
+        for notification in handled:
+            notification.result()
+
+
+def test_duplicate_notifications_fan_out_once(
+    requested_archive: str,
+    glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
+    s3_client: S3Client,
+    sqs_client: SQSClient,
+) -> None:
+    replay_in_parallel(
+        json.dumps(
+            {
+                "ArchiveId": ARCHIVE_ID,
+                "JobId": JOB_ID,
+                "Completed": True,
+                "StatusCode": "Succeeded",
+                "CompletionDate": "test_completion_date",
+            }
+        ),
+        DUPLICATES,
+    )
+
+    dynamodb_client, _ = glacier_retrieval_table_mock
+    metadata = GlacierTransferMetadata.parse(
+        dynamodb_client.get_item(
+            TableName=os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME],
+            Key=GlacierTransferMetadataRead(
+                workflow_run=WORKFLOW_RUN, glacier_object_id=ARCHIVE_ID
+            ).key,
+        )["Item"]
+    )
+    assert (
+        metadata.retrieve_status
+        == f"{WORKFLOW_RUN}/{GlacierTransferModel.StatusCode.STAGED}"
+    )
+    assert metadata.enqueued_chunks == CHUNKS_COUNT
+
+    # The uploads created by the duplicates that lost the claim are aborted
+    uploads = s3_client.list_multipart_uploads(Bucket=BUCKET_NAME)["Uploads"]
+    assert [upload["UploadId"] for upload in uploads] == [metadata.upload_id]
+
+    messages = sqs_client.receive_message(
+        QueueUrl=requested_archive, MaxNumberOfMessages=10
+    )["Messages"]
+    assert len(messages) == CHUNKS_COUNT
+    assert {json.loads(message["Body"])["UploadId"] for message in messages} == {
+        metadata.upload_id
+    }
+
+
+def test_duplicate_notification_during_fan_out(
+    requested_archive: str,
+    glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
+    sqs_client: SQSClient,
+) -> None:
+    message = json.dumps(
+        {
+            "ArchiveId": ARCHIVE_ID,
+            "JobId": JOB_ID,
+            "Completed": True,
+            "StatusCode": "Succeeded",
+            "CompletionDate": "test_completion_date",
+        }
+    )
+    update_enqueued_chunks = notification_processor.update_enqueued_chunks
+    replayed: List[str] = []
+
+    def replay_before_update(
+        ddb_client: DynamoDBClient, workflow_run: str, archive_id: str, count: int
+    ) -> None:
+        # The duplicate is handled once the winner staged the archive and sent
+        # its chunk events, before it counts them as enqueued, and is retried
+        if not replayed:
+            replayed.append(message)
+            with pytest.raises(FanOutInProgress):
+                notification_processor.handle_archive_job_notification(message)
+        update_enqueued_chunks(ddb_client, workflow_run, archive_id, count)
+
+    with patch.object(
+        notification_processor, "update_enqueued_chunks", replay_before_update
+    ):
+        notification_processor.handle_archive_job_notification(message)
+
+    assert replayed
+    # The retried duplicate finds every chunk event sent
+    notification_processor.handle_archive_job_notification(message)
+    messages = sqs_client.receive_message(
+        QueueUrl=requested_archive, MaxNumberOfMessages=10
+    )["Messages"]
+    part_numbers = [json.loads(message["Body"])["PartNumber"] for message in messages]
+    assert sorted(part_numbers) == list(range(1, CHUNKS_COUNT + 1))
@@ -2,8 +2,11 @@
 Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 SPDX-License-Identifier: Apache-2.0
 """
+import json
 import os
-from typing import TYPE_CHECKING, Any, Callable, Iterator, List, Tuple
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Tuple
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -13,7 +16,9 @@ from mypy_boto3_dynamodb import DynamoDBClient
 from mypy_boto3_glacier.client import GlacierClient
 
 from solution.application import __boto_config__
+from solution.application.archive_retrieval import initiator
 from solution.application.archive_retrieval.initiator import (
+    downloaded_archives,
     extend_retrieval,
     glacier_initiate_job,
     initiate_request,
@@ -24,6 +29,9 @@ from solution.application.model.glacier_transfer_meta_model import (
     GlacierTransferMetadataRead,
 )
 from solution.application.model.glacier_transfer_model import GlacierTransferModel
+from solution.application.util.dynamodb import batch_write_items
+from solution.application.util.exceptions import MaximumRetryLimitExceeded
+from solution.application.util.rate_controller import RateController
 from solution.infrastructure.output_keys import OutputKeys
 
 VAULT_NAME = "test_vault_name"
@@ -85,6 +93,7 @@ if TYPE_CHECKING:
         CreateTableOutputTypeDef,
         GetItemOutputTypeDef,
         PutItemOutputTypeDef,
+        WriteRequestTypeDef,
     )
     from mypy_boto3_glacier.client import GlacierClient
 else:
@@ -93,6 +102,7 @@ else:
     PutItemOutputTypeDef = object
     GlacierClient = object
     CreateTableOutputTypeDef = object
+    WriteRequestTypeDef = object
 
 
 def test_initiate_retrieval_batch(
@@ -128,65 +138,351 @@ def test_initiate_retrieval_batch(
 def test_initiate_request(
     setup_clients: Tuple[GlacierClient, DynamoDBClient],
     default_item: events.InitiateArchiveRetrievalItem,
-    metric_table_mock: CreateTableOutputTypeDef,
 ) -> None:
-    glacier_client, dynamodb_client = setup_clients
+    glacier_client, _ = setup_clients
     sns_topic = "test_topic"
     account_id = "test_account"
-    workflow_run = "test-workflow_run"
     archive_id = "test_archive_id_0"
 
-    initiate_request(
-        default_item, dynamodb_client, glacier_client, sns_topic, account_id
-    )
-
-    glacier_retrieval_response = glacier_retrieval_get_item(
-        workflow_run, archive_id, dynamodb_client
+    archive_metadata = initiate_request(
+        default_item, glacier_client, sns_topic, account_id
     )
 
-    assert glacier_retrieval_response.get("Item") is not None
-    assert glacier_retrieval_response["Item"]["retrieve_status"]["S"].endswith(
+    assert archive_metadata is not None
+    assert archive_metadata.glacier_object_id == archive_id
+    assert archive_metadata.retrieve_status.endswith(
         f"/{GlacierTransferModel.StatusCode.REQUESTED}"
     )
 
-    job_id = glacier_retrieval_response["Item"]["job_id"]["S"]
-    glacier_response = glacier_client.describe_job(vaultName=VAULT_NAME, jobId=job_id)
+    glacier_response = glacier_client.describe_job(
+        vaultName=VAULT_NAME, jobId=archive_metadata.job_id
+    )
     assert archive_id == glacier_response["ArchiveId"]
 
 
-def test_initiate_request_already_downloaded(
+@patch.object(initiator, "WRITE_FLUSH_SECONDS", 60)
+def test_initiate_retrieval_batch_writes_metadata(
+    setup_clients: Tuple[GlacierClient, DynamoDBClient],
+    metric_table_mock: CreateTableOutputTypeDef,
+) -> None:
+    glacier_client, dynamodb_client = setup_clients
+    items = generate_initiate_archive_retrieval_items(count=30)
+
+    with patch(
+        "solution.application.archive_retrieval.initiator.batch_write_items",
+        wraps=batch_write_items,
+    ) as batch_write_items_mock:
+        initiate_retrieval("test_account", "test_topic", items, glacier_client)
+
+    assert sorted(
+        len(call.args[2]) for call in batch_write_items_mock.call_args_list
+    ) == [5, 25]
+    for i in range(30):
+        response = glacier_retrieval_get_item(
+            "test-workflow_run", f"test_archive_id_{i}", dynamodb_client
+        )
+        assert response["Item"]["retrieve_status"]["S"].endswith(
+            f"/{GlacierTransferModel.StatusCode.REQUESTED}"
+        )
+
+
+def test_initiate_retrieval_writes_metadata_before_raising(
+    setup_clients: Tuple[GlacierClient, DynamoDBClient],
+) -> None:
+    glacier_client, dynamodb_client = setup_clients
+    items = generate_initiate_archive_retrieval_items(count=3)
+    for item in items:
+        item["workflow_run"] = "test-workflow_run_failed"
+
+    def initiate_job(
+        glacier_client: GlacierClient,
+        vault_name: str,
+        sns_topic: str,
+        archive_id: str,
+        tier: str,
+        account_id: str,
+    ) -> str:
+        if archive_id == "test_archive_id_1":
+            raise RuntimeError("initiation failed")
+        return f"job_{archive_id}"
+
+    with patch(
+        "solution.application.archive_retrieval.initiator.glacier_initiate_job",
+        side_effect=initiate_job,
+    ), pytest.raises(RuntimeError):
+        initiate_retrieval("test_account", "test_topic", items, glacier_client)
+
+    for archive_id in ("test_archive_id_0", "test_archive_id_2"):
+        response = glacier_retrieval_get_item(
+            "test-workflow_run_failed", archive_id, dynamodb_client
+        )
+        assert response["Item"]["job_id"]["S"] == f"job_{archive_id}"
+    assert "Item" not in glacier_retrieval_get_item(
+        "test-workflow_run_failed", "test_archive_id_1", dynamodb_client
+    )
+
+
+@patch.object(initiator, "INITIATION_POLL_SECONDS", 0.01)
+def test_initiate_retrieval_flushes_stale_writes(
+    setup_clients: Tuple[GlacierClient, DynamoDBClient],
+    metric_table_mock: CreateTableOutputTypeDef,
+) -> None:
+    glacier_client, _ = setup_clients
+    items = generate_initiate_archive_retrieval_items(count=3)
+    for item in items:
+        item["workflow_run"] = "test-workflow_run_stale"
+    written = threading.Event()
+
+    def write(
+        ddb_client: DynamoDBClient,
+        table_name: str,
+        requests: List[WriteRequestTypeDef],
+    ) -> None:
+        batch_write_items(ddb_client, table_name, requests)
+        if requests:
+            written.set()
+
+    def initiate_job(
+        glacier_client: GlacierClient,
+        vault_name: str,
+        sns_topic: str,
+        archive_id: str,
+        tier: str,
+        account_id: str,
+    ) -> str:
+        # The last job is initiated once the others were written
+        if archive_id == "test_archive_id_2":
+            assert written.wait(timeout=5)
+        return f"job_{archive_id}"
+
+    with patch.object(initiator, "WRITE_FLUSH_SECONDS", 0), patch(
+        "solution.application.archive_retrieval.initiator.glacier_initiate_job",
+        side_effect=initiate_job,
+    ), patch(
+        "solution.application.archive_retrieval.initiator.batch_write_items",
+        side_effect=write,
+    ) as batch_write_items_mock:
+        initiate_retrieval("test_account", "test_topic", items, glacier_client)
+
+    assert [
+        len(call.args[2])
+        for call in batch_write_items_mock.call_args_list
+        if call.args[2]
+    ] == [2, 1]
+
+
+def test_initiate_retrieval_stops_before_timeout(
     setup_clients: Tuple[GlacierClient, DynamoDBClient],
-    default_item: events.InitiateArchiveRetrievalItem,
+) -> None:
+    glacier_client, dynamodb_client = setup_clients
+    items = generate_initiate_archive_retrieval_items(count=30)
+    for item in items:
+        item["workflow_run"] = "test-workflow_run_timeout"
+    context = MagicMock()
+    context.get_remaining_time_in_millis.return_value = (
+        initiator.INITIATION_DEADLINE_MS - 1
+    )
+
+    def initiate_job(
+        glacier_client: GlacierClient,
+        vault_name: str,
+        sns_topic: str,
+        archive_id: str,
+        tier: str,
+        account_id: str,
+    ) -> str:
+        time.sleep(0.05)
+        return f"job_{archive_id}"
+
+    with patch(
+        "solution.application.archive_retrieval.initiator.glacier_initiate_job",
+        side_effect=initiate_job,
+    ) as glacier_initiate_job_mock, pytest.raises(TimeoutError):
+        initiate_retrieval("test_account", "test_topic", items, glacier_client, context)
+
+    initiated = [call.args[3] for call in glacier_initiate_job_mock.call_args_list]
+    assert 0 < len(initiated) < len(items)
+    # The jobs initiated before stopping have their metadata
+    for archive_id in initiated:
+        response = glacier_retrieval_get_item(
+            "test-workflow_run_timeout", archive_id, dynamodb_client
+        )
+        assert response["Item"]["job_id"]["S"] == f"job_{archive_id}"
+
+
+def _throttling_glacier(throttles: int) -> MagicMock:
+    """
+    Glacier client throttling the first throttles initiations of each archive
+    """
+    calls: Dict[str, int] = {}
+
+    def initiate_job(jobParameters: Dict[str, Any], **_: Any) -> Dict[str, Any]:
+        archive_id = jobParameters["ArchiveId"]
+        calls[archive_id] = calls.get(archive_id, 0) + 1
+        if calls[archive_id] <= throttles:
+            raise ClientError(
+                error_response={"Error": {"Code": "ThrottlingException"}},
+                operation_name="InitiateJob",
+            )
+        return {"jobId": f"job_{archive_id}"}
+
+    glacier_client = MagicMock()
+    glacier_client.initiate_job.side_effect = initiate_job
+    return glacier_client
+
+
+@patch.object(initiator, "initiation_rate_controller", RateController(1000, 1, 1000))
+def test_initiate_retrieval_requeues_throttled_archives(
+    setup_clients: Tuple[GlacierClient, DynamoDBClient],
+    metric_table_mock: CreateTableOutputTypeDef,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    _, dynamodb_client = setup_clients
+    items = generate_initiate_archive_retrieval_items(count=4)
+    for item in items:
+        item["workflow_run"] = "test-workflow_run_throttled"
+
+    initiate_retrieval(
+        "test_account", "test_topic", items, _throttling_glacier(throttles=2)
+    )
+
+    for i in range(4):
+        response = glacier_retrieval_get_item(
+            "test-workflow_run_throttled", f"test_archive_id_{i}", dynamodb_client
+        )
+        assert response["Item"]["job_id"]["S"] == f"job_test_archive_id_{i}"
+
+    metrics = json.loads(capsys.readouterr().out.splitlines()[-1])
+    assert metrics["ArchivesInitiated"] == 4
+    assert metrics["InitiationsThrottled"] == 8
+    assert metrics["ArchiveInitiationRate"] > 0
+
+
+@patch.object(initiator, "initiation_rate_controller", RateController(1000, 1, 1000))
+def test_initiate_retrieval_raises_after_throttled_attempts(
+    setup_clients: Tuple[GlacierClient, DynamoDBClient],
+) -> None:
+    items = generate_initiate_archive_retrieval_items(count=1)
+
+    with pytest.raises(MaximumRetryLimitExceeded):
+        initiate_retrieval(
+            "test_account",
+            "test_topic",
+            items,
+            _throttling_glacier(throttles=initiator.INITIATION_ATTEMPTS),
+        )
+
+
+def test_initiate_retrieval_already_downloaded(
+    setup_clients: Tuple[GlacierClient, DynamoDBClient],
+    metric_table_mock: CreateTableOutputTypeDef,
 ) -> None:
     glacier_client, dynamodb_client = setup_clients
 
     sns_topic = "test_topic"
     account_id = "test_account"
     workflow_run = "test-workflow_run"
-    archive_id = "test_archive_id_0"
+    items = generate_initiate_archive_retrieval_items(count=3)
 
     glacier_retrieval_put_item(
         workflow_run,
-        archive_id,
+        "test_archive_id_1",
         "downloaded",
         dynamodb_client,
     )
 
-    initiate_request(
-        default_item, dynamodb_client, glacier_client, sns_topic, account_id
-    )
+    with patch(
+        "solution.application.archive_retrieval.initiator.glacier_initiate_job",
+        return_value="test_initiated_job_id",
+    ) as glacier_initiate_job_mock:
+        initiate_retrieval(account_id, sns_topic, items, glacier_client)
 
-    response = glacier_retrieval_get_item(workflow_run, archive_id, dynamodb_client)
+    assert sorted(
+        call.args[3] for call in glacier_initiate_job_mock.call_args_list
+    ) == ["test_archive_id_0", "test_archive_id_2"]
 
-    assert response.get("Item") is not None
+    response = glacier_retrieval_get_item(
+        workflow_run, "test_archive_id_1", dynamodb_client
+    )
     assert response["Item"]["retrieve_status"]["S"].endswith(
         f"/{GlacierTransferModel.StatusCode.DOWNLOADED}"
     )
+    assert response["Item"]["job_id"]["S"] == "test_job_id"
+
+
+def test_extend_retrieval_already_downloaded(
+    setup_clients: Tuple[GlacierClient, DynamoDBClient],
+) -> None:
+    glacier_client, dynamodb_client = setup_clients
+    workflow_run = "test-workflow_run"
+    glacier_retrieval_put_item(
+        workflow_run, "test_archive_id_1", "downloaded", dynamodb_client
+    )
+    glacier_retrieval_put_item(
+        workflow_run, "test_archive_id_2", "requested", dynamodb_client
+    )
+    items: List[events.ExtendArchiveRetrievalItem] = [
+        {
+            "item": {"archive_id": {"S": archive_id}},
+            "workflow_run": workflow_run,
+            "tier": "Bulk",
+            "vault_name": VAULT_NAME,
+            "s3_storage_class": "GLACIER",
+        }
+        for archive_id in ("test_archive_id_1", "test_archive_id_2")
+    ]
+
+    with patch(
+        "solution.application.archive_retrieval.initiator.glacier_initiate_job",
+        return_value="test_extended_job_id",
+    ) as glacier_initiate_job_mock:
+        extend_retrieval("test_account", "test_topic", items, glacier_client)
+
+    glacier_initiate_job_mock.assert_called_once()
+    assert glacier_initiate_job_mock.call_args.args[3] == "test_archive_id_2"
+    response = glacier_retrieval_get_item(
+        workflow_run, "test_archive_id_2", dynamodb_client
+    )
+    assert response["Item"]["job_id"]["S"] == "test_extended_job_id"
+    assert response["Item"]["retrieve_status"]["S"].endswith(
+        f"/{GlacierTransferModel.StatusCode.EXTENDED}"
+    )
 
-    job_id = response["Item"]["job_id"]["S"]
 
-    with pytest.raises(Exception):
-        glacier_client.describe_job(vaultName=VAULT_NAME, jobId=job_id)
+def test_downloaded_archives_batches_reads() -> None:
+    archives = [("test-workflow_run", f"archive_{i}") for i in range(150)]
+    archives.append(archives[0])
+    ddb_client = MagicMock()
+
+    def batch_get_item(RequestItems: Dict[str, Any]) -> Dict[str, Any]:
+        (request,) = RequestItems.values()
+        assert request["ProjectionExpression"] == "pk, retrieve_status"
+        return {
+            "Responses": {
+                os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME]: [
+                    {
+                        "pk": key["pk"],
+                        "retrieve_status": {"S": "test-workflow_run/downloaded"},
+                    }
+                    for key in request["Keys"]
+                    if key["pk"]["S"].endswith(("_7", "_120"))
+                ]
+            }
+        }
+
+    ddb_client.batch_get_item.side_effect = batch_get_item
+    assert downloaded_archives(ddb_client, archives) == {
+        ("test-workflow_run", "archive_7"),
+        ("test-workflow_run", "archive_120"),
+    }
+    assert [
+        len(
+            call.kwargs["RequestItems"][
+                os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME]
+            ]["Keys"]
+        )
+        for call in ddb_client.batch_get_item.call_args_list
+    ] == [100, 50]
 
 
 def test_glacier_initiate_job(glacier_client: GlacierClient) -> None:
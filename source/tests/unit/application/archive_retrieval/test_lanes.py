@@ -0,0 +1,61 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+import os
+from unittest.mock import patch
+
+import pytest
+
+from solution.application.archive_retrieval.lanes import (
+    LARGE_LANE,
+    MEDIUM_LANE,
+    SMALL_LANE,
+    RetrievalLane,
+    lane_queue_url,
+    plan_archive_chunk_size,
+    retrieval_lane,
+)
+from solution.infrastructure.output_keys import OutputKeys
+
+
+@pytest.mark.parametrize(
+    "archive_size, lane",
+    [
+        (0, SMALL_LANE),
+        (64 * 2**20, SMALL_LANE),
+        (64 * 2**20 + 1, MEDIUM_LANE),
+        (2**30, MEDIUM_LANE),
+        (2**30 + 1, LARGE_LANE),
+        (2**40, LARGE_LANE),
+    ],
+)
+def test_retrieval_lane(archive_size: int, lane: RetrievalLane) -> None:
+    assert retrieval_lane(archive_size) is lane
+
+
+def test_lane_queue_url() -> None:
+    with patch.dict(
+        os.environ,
+        {
+            OutputKeys.CHUNKS_SQS_URL: "chunks_sqs_url",
+            SMALL_LANE.queue_url_key: "small_sqs_url",
+        },
+    ):
+        assert lane_queue_url(1) == "small_sqs_url"
+        assert lane_queue_url(2**30 + 1) == "chunks_sqs_url"
+        # Lanes which are not deployed fall back to the chunk retrieval queue
+        os.environ.pop(MEDIUM_LANE.queue_url_key, None)
+        assert lane_queue_url(2**30) == "chunks_sqs_url"
+        assert lane_queue_url(None) == "chunks_sqs_url"
+
+
+@pytest.mark.parametrize(
+    "archive_size", [1, 64 * 2**20, 2**30, 2 * 2**30, 100 * 2**30, 40 * 2**40]
+)
+def test_plan_archive_chunk_size(archive_size: int) -> None:
+    chunk_size = plan_archive_chunk_size(archive_size)
+    assert -(-archive_size // chunk_size) <= 10000
+    if archive_size <= 10000 * 2**30:
+        # Chunks fit twice in the memory of a chunk of their lane
+        assert 2 * chunk_size <= retrieval_lane(archive_size).chunk_memory_budget
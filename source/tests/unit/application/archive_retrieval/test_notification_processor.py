@@ -4,32 +4,49 @@ SPDX-License-Identifier: Apache-2.0
 """
 import json
 import os
-from typing import List, Tuple
+from base64 import b64encode
+from hashlib import sha256
+from io import BytesIO
+from typing import Any, Dict, List, Tuple
 from unittest.mock import Mock, patch
 
 import pytest
 from mypy_boto3_dynamodb import DynamoDBClient
 from mypy_boto3_s3 import S3Client
+from mypy_boto3_sqs import SQSClient
 
+from solution.application.archive_retrieval.lanes import SMALL_LANE
 from solution.application.archive_retrieval.notification_processor import (
+    FAN_OUT_LEASE_SECONDS,
+    SEND_BATCH_ATTEMPTS,
+    claim_fan_out,
     create_multipart_upload,
     get_glacier_transfer_metadata,
     handle_archive_job_notification,
     send_chunk_events,
+    send_message_batch,
+    transfer_small_archive,
     update_glacier_transfer_metadata,
 )
+from solution.application.chunking.chunk_plan import ChunkPlan
 from solution.application.glacier_service.glacier_typing import GlacierJobType
 from solution.application.model.glacier_transfer_meta_model import (
     GlacierTransferMetadata,
     GlacierTransferMetadataRead,
 )
 from solution.application.model.glacier_transfer_model import GlacierTransferModel
+from solution.application.util.exceptions import (
+    FanOutInProgress,
+    GlacierValidationMismatch,
+    MaximumRetryLimitExceeded,
+)
 from solution.infrastructure.output_keys import OutputKeys
 
 VAULT_NAME = "test_vault_name"
 WORKFLOW_RUN = "test_notification_processor"
 ARCHIVE_ID = "test_archive_id"
 JOB_ID = "test_job_id"
+NOW = 1_700_000_000.0
 
 
 @pytest.fixture(scope="module")
@@ -57,16 +74,18 @@ def test_handle_archive_job_notification_happy_path(
     with patch(
         "solution.application.archive_retrieval.notification_processor.get_glacier_transfer_metadata"
     ) as mock_get_glacier_transfer_metadata, patch(
-        "solution.application.archive_retrieval.notification_processor.calculate_chunk_size"
-    ) as mock_calculate_chunk_size, patch(
-        "solution.application.archive_retrieval.notification_processor.generate_chunk_array"
-    ) as mock_generate_chunk_array, patch(
+        "solution.application.archive_retrieval.notification_processor.plan_archive_chunk_size"
+    ) as mock_plan_archive_chunk_size, patch(
+        "solution.application.archive_retrieval.notification_processor.ChunkPlan"
+    ) as mock_chunk_plan, patch(
         "solution.application.archive_retrieval.notification_processor.create_multipart_upload"
     ) as mock_create_multipart_upload, patch(
         "solution.application.archive_retrieval.notification_processor.update_glacier_transfer_metadata"
     ) as mock_update_glacier_transfer_metadata, patch(
         "solution.application.archive_retrieval.notification_processor.send_chunk_events"
-    ) as mock_send_chunk_events:
+    ) as mock_send_chunk_events, patch(
+        "solution.application.archive_retrieval.notification_processor.update_enqueued_chunks"
+    ) as mock_update_enqueued_chunks:
         # Arrange
         mock_get_glacier_transfer_metadata.return_value = mock_metadata
 
@@ -85,11 +104,197 @@ def test_handle_archive_job_notification_happy_path(
 
         # Assert that each expected function call was made
         mock_get_glacier_transfer_metadata.assert_called_once()
-        mock_calculate_chunk_size.assert_called_once()
-        mock_generate_chunk_array.assert_called_once()
+        mock_plan_archive_chunk_size.assert_called_once()
+        mock_chunk_plan.assert_called_once()
         mock_create_multipart_upload.assert_called_once()
         mock_update_glacier_transfer_metadata.assert_called_once()
         mock_send_chunk_events.assert_called_once()
+        mock_update_enqueued_chunks.assert_called_once()
+
+
+def test_handle_archive_job_notification_small_archive(
+    mock_metadata: GlacierTransferMetadata,
+) -> None:
+    with patch(
+        "solution.application.archive_retrieval.notification_processor.get_glacier_transfer_metadata",
+        return_value=mock_metadata,
+    ), patch(
+        "solution.application.archive_retrieval.notification_processor.transfer_small_archive"
+    ) as mock_transfer_small_archive, patch(
+        "solution.application.archive_retrieval.notification_processor.create_multipart_upload"
+    ) as mock_create_multipart_upload, patch(
+        "solution.application.archive_retrieval.notification_processor.send_chunk_events"
+    ) as mock_send_chunk_events, patch.dict(
+        os.environ, {"SMALL_ARCHIVE_SIZE": "1"}
+    ):
+        handle_archive_job_notification(
+            json.dumps(
+                {
+                    "ArchiveId": ARCHIVE_ID,
+                    "JobId": JOB_ID,
+                    "Completed": True,
+                    "StatusCode": "Succeeded",
+                    "CompletionDate": "test_completion_date",
+                }
+            )
+        )
+
+    mock_transfer_small_archive.assert_called_once()
+    assert mock_transfer_small_archive.call_args.args[2:] == (
+        JOB_ID,
+        "test_completion_date",
+    )
+    mock_create_multipart_upload.assert_not_called()
+    mock_send_chunk_events.assert_not_called()
+
+
+def test_handle_archive_job_notification_packed_archive(
+    glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
+    mock_metadata: GlacierTransferMetadata,
+) -> None:
+    dynamodb_client, _ = glacier_retrieval_table_mock
+    dynamodb_client.put_item(
+        TableName=os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME],
+        Item=mock_metadata.marshal(),
+    )
+    with patch(
+        "solution.application.archive_retrieval.notification_processor.send_packing_event"
+    ) as mock_send_packing_event, patch(
+        "solution.application.archive_retrieval.notification_processor.transfer_small_archive"
+    ) as mock_transfer_small_archive, patch(
+        "solution.application.archive_retrieval.notification_processor.create_multipart_upload"
+    ) as mock_create_multipart_upload, patch.dict(
+        os.environ, {"PACK_ARCHIVE_SIZE": "1", "SMALL_ARCHIVE_SIZE": "1"}
+    ):
+        handle_archive_job_notification(
+            json.dumps(
+                {
+                    "ArchiveId": ARCHIVE_ID,
+                    "JobId": JOB_ID,
+                    "Completed": True,
+                    "StatusCode": "Succeeded",
+                    "CompletionDate": "test_completion_date",
+                }
+            )
+        )
+
+    mock_send_packing_event.assert_called_once()
+    assert mock_send_packing_event.call_args.args[1:] == (
+        JOB_ID,
+        "test_completion_date",
+    )
+    mock_transfer_small_archive.assert_not_called()
+    mock_create_multipart_upload.assert_not_called()
+    ddb_metadata = GlacierTransferMetadata.parse(
+        dynamodb_client.get_item(
+            TableName=os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME],
+            Key=GlacierTransferMetadataRead(
+                workflow_run=WORKFLOW_RUN, glacier_object_id=ARCHIVE_ID
+            ).key,
+        )["Item"]
+    )
+    assert (
+        ddb_metadata.retrieve_status
+        == f"{WORKFLOW_RUN}/{GlacierTransferModel.StatusCode.STAGED}"
+    )
+    assert ddb_metadata.download_window == "test_completion_date"
+
+
+def _small_archive(
+    dynamodb_client: DynamoDBClient, data: bytes, glacier_checksum: str
+) -> Tuple[GlacierTransferMetadata, Mock]:
+    metadata = GlacierTransferMetadata(
+        workflow_run=WORKFLOW_RUN,
+        job_id=JOB_ID,
+        start_time="",
+        vault_name=VAULT_NAME,
+        retrieval_type=GlacierJobType.ARCHIVE_RETRIEVAL,
+        description="",
+        retrieve_status=f"{WORKFLOW_RUN}/{GlacierTransferModel.StatusCode.REQUESTED}",
+        glacier_object_id=ARCHIVE_ID,
+        archive_id=ARCHIVE_ID,
+        size=len(data),
+        file_name="small_archive",
+        s3_storage_class="STANDARD",
+        sha256_tree_hash=sha256(data).hexdigest(),
+    )
+    dynamodb_client.put_item(
+        TableName=os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME],
+        Item=metadata.marshal(),
+    )
+    glacier = Mock()
+    glacier.get_job_output.return_value = {
+        "body": BytesIO(data),
+        "checksum": glacier_checksum,
+    }
+    return metadata, glacier
+
+
+def test_transfer_small_archive(
+    glacier_retrieval_table_mock: Tuple[DynamoDBClient, str], s3_client: S3Client
+) -> None:
+    dynamodb_client, _ = glacier_retrieval_table_mock
+    bucket_name = "test_small_archive_bucket"
+    s3_client.create_bucket(Bucket=bucket_name)
+    os.environ[OutputKeys.OUTPUT_BUCKET_NAME] = bucket_name
+    data = b"small archive"
+    metadata, glacier = _small_archive(dynamodb_client, data, sha256(data).hexdigest())
+
+    with patch(
+        "solution.application.glacier_service.glacier_apis_factory.GlacierAPIsFactory.create_instance",
+        return_value=glacier,
+    ):
+        transfer_small_archive(dynamodb_client, metadata, JOB_ID, "test_window")
+
+    glacier.get_job_output.assert_called_once_with(
+        jobId=JOB_ID, range=f"bytes=0-{len(data) - 1}", vaultName=VAULT_NAME
+    )
+    object_key = f"{WORKFLOW_RUN}/small_archive"
+    s3_object = s3_client.get_object(Bucket=bucket_name, Key=object_key)
+    assert s3_object["Body"].read() == data
+    attributes = s3_client.get_object_attributes(
+        Bucket=bucket_name, Key=object_key, ObjectAttributes=["Checksum"]
+    )
+    assert attributes["Checksum"]["ChecksumSHA256"] == b64encode(
+        sha256(data).digest()
+    ).decode("ascii")
+
+    ddb_metadata = GlacierTransferMetadata.parse(
+        dynamodb_client.get_item(
+            TableName=os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME],
+            Key=GlacierTransferMetadataRead(
+                workflow_run=WORKFLOW_RUN, glacier_object_id=ARCHIVE_ID
+            ).key,
+        )["Item"]
+    )
+    assert (
+        ddb_metadata.retrieve_status
+        == f"{WORKFLOW_RUN}/{GlacierTransferModel.StatusCode.DOWNLOADED}"
+    )
+    assert ddb_metadata.download_window == "test_window"
+    assert ddb_metadata.staged_job_id == JOB_ID
+    assert ddb_metadata.s3_destination_bucket == bucket_name
+    assert ddb_metadata.s3_destination_key == f"{WORKFLOW_RUN}/small_archive"
+
+
+def test_transfer_small_archive_mismatch(
+    glacier_retrieval_table_mock: Tuple[DynamoDBClient, str], s3_client: S3Client
+) -> None:
+    dynamodb_client, _ = glacier_retrieval_table_mock
+    bucket_name = "test_small_archive_mismatch_bucket"
+    s3_client.create_bucket(Bucket=bucket_name)
+    os.environ[OutputKeys.OUTPUT_BUCKET_NAME] = bucket_name
+    metadata, glacier = _small_archive(
+        dynamodb_client, b"small archive", sha256(b"corrupted").hexdigest()
+    )
+
+    with patch(
+        "solution.application.glacier_service.glacier_apis_factory.GlacierAPIsFactory.create_instance",
+        return_value=glacier,
+    ), pytest.raises(GlacierValidationMismatch):
+        transfer_small_archive(dynamodb_client, metadata, JOB_ID, "test_window")
+
+    assert "Contents" not in s3_client.list_objects_v2(Bucket=bucket_name)
 
 
 def test_get_glacier_transfer_metadata(
@@ -141,6 +346,20 @@ def test_create_multipart_upload(s3_client: S3Client) -> None:
     assert uploads["Uploads"][0]["Key"] == upload_key
 
 
+def _sqs_mock() -> Mock:
+    sqs_mock = Mock()
+    sqs_mock.send_message_batch.return_value = {"Successful": []}
+    return sqs_mock
+
+
+def _sent_messages(sqs_mock: Mock) -> List[Tuple[str, Dict[str, Any]]]:
+    return [
+        (call.kwargs["QueueUrl"], json.loads(entry["MessageBody"]))
+        for call in sqs_mock.send_message_batch.call_args_list
+        for entry in call.kwargs["Entries"]
+    ]
+
+
 @pytest.mark.parametrize(
     "job_id, workflow_run, vault_name, archive_id, upload_id, object_key, chunks",
     [
@@ -151,7 +370,7 @@ def test_create_multipart_upload(s3_client: S3Client) -> None:
             "test_archive_id",
             "test_upload_id",
             "test_object_key",
-            ["0-100", "101-200", "201-300"],
+            ChunkPlan(301, 101),
         ),
         (
             "test_job_id2",
@@ -160,7 +379,7 @@ def test_create_multipart_upload(s3_client: S3Client) -> None:
             "test_archive_id2",
             "test_upload_id2",
             "test_object_key2",
-            ["1-1", "1-0", "2"],
+            ChunkPlan(1, 2**20),
         ),
     ],
 )
@@ -171,23 +390,23 @@ def test_send_chunk_events(
     archive_id: str,
     upload_id: str,
     object_key: str,
-    chunks: List[str],
+    chunks: ChunkPlan,
 ) -> None:
     # Mocking external dependencies
     os.environ[OutputKeys.CHUNKS_SQS_URL] = "mock_sqs_url"
     os.environ[OutputKeys.OUTPUT_BUCKET_NAME] = "mock_bucket_name"
 
     # Create a mock for boto3.client("sqs")
-    sqs_mock = Mock()
+    sqs_mock = _sqs_mock()
 
     # Patching the boto SQS client creation
     with patch(
-        "solution.application.archive_retrieval.notification_processor.boto3.client",
+        "solution.application.archive_retrieval.notification_processor.get_client",
         return_value=sqs_mock,
     ):
         # Call the function with sample arguments
         send_chunk_events(
-            chunks=chunks,
+            chunk_plan=chunks,
             job_id=job_id,
             workflow_run=workflow_run,
             vault_name=vault_name,
@@ -197,7 +416,7 @@ def test_send_chunk_events(
         )
 
     # Assertions
-    for index, chunk in enumerate(chunks):
+    for index, chunk in enumerate(chunks.byte_ranges()):
         expected_message_body = {
             "JobId": job_id,
             "VaultName": vault_name,
@@ -208,13 +427,252 @@ def test_send_chunk_events(
             "UploadId": upload_id,
             "PartNumber": index + 1,
             "WorkflowRun": workflow_run,
+            "ChunkPlan": chunks.descriptor(),
         }
 
-        # Ensure that send_message was called with the expected arguments
-        sqs_mock.send_message.assert_any_call(
-            QueueUrl="mock_sqs_url", MessageBody=json.dumps(expected_message_body)
+        # Ensure that the message was sent with the expected body
+        assert ("mock_sqs_url", expected_message_body) in _sent_messages(sqs_mock)
+    assert len(_sent_messages(sqs_mock)) == len(chunks)
+
+
+def test_send_chunk_events_carries_staged_metadata() -> None:
+    os.environ[OutputKeys.CHUNKS_SQS_URL] = "mock_sqs_url"
+    os.environ[OutputKeys.OUTPUT_BUCKET_NAME] = "mock_bucket_name"
+    sqs_mock = _sqs_mock()
+
+    with patch(
+        "solution.application.archive_retrieval.notification_processor.get_client",
+        return_value=sqs_mock,
+    ):
+        send_chunk_events(
+            chunk_plan=ChunkPlan(150, 100),
+            job_id="test_job_id",
+            workflow_run="test_workflow_run",
+            vault_name="test_vault_name",
+            archive_id="test_archive_id",
+            upload_id="test_upload_id",
+            object_key="test_object_key",
+            download_window="2023-01-01T00:00:00.000Z",
+        )
+
+    for _, message_body in _sent_messages(sqs_mock):
+        assert message_body["JobId"] == "test_job_id"
+        assert message_body["DownloadWindow"] == "2023-01-01T00:00:00.000Z"
+        assert ChunkPlan.from_descriptor(message_body["ChunkPlan"]) == ChunkPlan(
+            150, 100
         )
-    assert sqs_mock.send_message.call_count == len(chunks)
+
+
+def test_send_chunk_events_routes_to_lane_queue() -> None:
+    os.environ[OutputKeys.CHUNKS_SQS_URL] = "mock_sqs_url"
+    os.environ[OutputKeys.OUTPUT_BUCKET_NAME] = "mock_bucket_name"
+    sqs_mock = _sqs_mock()
+
+    with patch(
+        "solution.application.archive_retrieval.notification_processor.get_client",
+        return_value=sqs_mock,
+    ), patch.dict(os.environ, {SMALL_LANE.queue_url_key: "mock_small_sqs_url"}):
+        send_chunk_events(
+            chunk_plan=ChunkPlan(100, 2**20),
+            job_id="test_job_id",
+            workflow_run="test_workflow_run",
+            vault_name="test_vault_name",
+            archive_id="test_archive_id",
+            upload_id="test_upload_id",
+            object_key="test_object_key",
+        )
+
+    assert _sent_messages(sqs_mock)[0][0] == "mock_small_sqs_url"
+
+
+def test_send_chunk_events_in_batches(sqs_client: SQSClient) -> None:
+    queue_url = sqs_client.create_queue(QueueName="test-chunks-queue")["QueueUrl"]
+    os.environ[OutputKeys.OUTPUT_BUCKET_NAME] = "mock_bucket_name"
+    chunk_plan = ChunkPlan(25 * 2**20, 2**20)
+
+    with patch.dict(os.environ, {OutputKeys.CHUNKS_SQS_URL: queue_url}):
+        send_chunk_events(
+            chunk_plan, JOB_ID, WORKFLOW_RUN, VAULT_NAME, ARCHIVE_ID, "upload", "key"
+        )
+
+    part_numbers = []
+    while messages := sqs_client.receive_message(
+        QueueUrl=queue_url, MaxNumberOfMessages=10
+    ).get("Messages"):
+        for message in messages:
+            body = json.loads(message["Body"])
+            part_numbers.append(body["PartNumber"])
+            assert body["ByteRange"] == chunk_plan.byte_range(body["PartNumber"] - 1)
+            sqs_client.delete_message(
+                QueueUrl=queue_url, ReceiptHandle=message["ReceiptHandle"]
+            )
+    assert sorted(part_numbers) == list(range(1, 26))
+
+
+def test_send_message_batch_resends_failed_entries() -> None:
+    sqs_mock = Mock()
+    sqs_mock.send_message_batch.side_effect = [
+        {"Successful": [{"Id": "0"}], "Failed": [{"Id": "1", "Code": "Throttled"}]},
+        {"Successful": [{"Id": "1"}]},
+    ]
+    entries: List[Any] = [
+        {"Id": "0", "MessageBody": "first"},
+        {"Id": "1", "MessageBody": "second"},
+    ]
+
+    with patch(
+        "solution.application.archive_retrieval.notification_processor.SEND_BATCH_BACKOFF_SECONDS",
+        0,
+    ):
+        send_message_batch(sqs_mock, "mock_sqs_url", entries)
+
+    assert sqs_mock.send_message_batch.call_count == 2
+    assert sqs_mock.send_message_batch.call_args.kwargs["Entries"] == [entries[1]]
+
+
+def test_send_chunk_events_raises_after_failed_attempts() -> None:
+    os.environ[OutputKeys.CHUNKS_SQS_URL] = "mock_sqs_url"
+    os.environ[OutputKeys.OUTPUT_BUCKET_NAME] = "mock_bucket_name"
+    sqs_mock = Mock()
+    sqs_mock.send_message_batch.side_effect = lambda QueueUrl, Entries: {
+        "Failed": [entry for entry in Entries if entry["Id"] == "12"]
+    }
+
+    with patch(
+        "solution.application.archive_retrieval.notification_processor.get_client",
+        return_value=sqs_mock,
+    ), patch(
+        "solution.application.archive_retrieval.notification_processor.SEND_BATCH_BACKOFF_SECONDS",
+        0,
+    ), pytest.raises(
+        MaximumRetryLimitExceeded
+    ):
+        send_chunk_events(
+            ChunkPlan(30, 1), JOB_ID, WORKFLOW_RUN, VAULT_NAME, ARCHIVE_ID, "u", "k"
+        )
+
+    # The other batches were sent in full
+    assert sqs_mock.send_message_batch.call_count == 2 + SEND_BATCH_ATTEMPTS
+
+
+@pytest.mark.parametrize(
+    "enqueued_chunks, fan_out_lease, resumed",
+    [
+        (0, None, True),
+        (0, NOW - 1, True),
+        (2, None, False),
+        (2, NOW + FAN_OUT_LEASE_SECONDS, False),
+        (None, None, False),
+    ],
+)
+@patch("time.time", return_value=NOW)
+def test_handle_archive_job_notification_resumes_fan_out(
+    _time: object,
+    mock_metadata: GlacierTransferMetadata,
+    enqueued_chunks: int | None,
+    fan_out_lease: float | None,
+    resumed: bool,
+) -> None:
+    staged_metadata = GlacierTransferMetadata.parse(mock_metadata.marshal())
+    staged_metadata.retrieve_status = (
+        f"{WORKFLOW_RUN}/{GlacierTransferModel.StatusCode.STAGED}"
+    )
+    staged_metadata.size = 2 * 2**30
+    staged_metadata.chunk_size = 2**30
+    staged_metadata.chunks_count = 2
+    staged_metadata.enqueued_chunks = enqueued_chunks
+    staged_metadata.fan_out_lease = fan_out_lease
+    staged_metadata.upload_id = "test_upload_id"
+    staged_metadata.s3_destination_key = "test_destination_key"
+
+    with patch(
+        "solution.application.archive_retrieval.notification_processor.get_glacier_transfer_metadata",
+        return_value=staged_metadata,
+    ), patch(
+        "solution.application.archive_retrieval.notification_processor.get_client"
+    ), patch(
+        "solution.application.archive_retrieval.notification_processor.send_chunk_events"
+    ) as mock_send_chunk_events, patch(
+        "solution.application.archive_retrieval.notification_processor.update_enqueued_chunks"
+    ) as mock_update_enqueued_chunks:
+        handle_archive_job_notification(
+            json.dumps(
+                {
+                    "ArchiveId": ARCHIVE_ID,
+                    "JobId": JOB_ID,
+                    "Completed": True,
+                    "StatusCode": "Succeeded",
+                    "CompletionDate": "test_completion_date",
+                }
+            )
+        )
+
+    assert mock_send_chunk_events.called is resumed
+    assert mock_update_enqueued_chunks.called is resumed
+    if resumed:
+        (
+            chunk_plan,
+            job_id,
+            *_,
+            upload_id,
+            object_key,
+            _,
+        ) = mock_send_chunk_events.call_args.args
+        assert chunk_plan == ChunkPlan(2 * 2**30, 2**30)
+        assert job_id == JOB_ID
+        assert (upload_id, object_key) == ("test_upload_id", "test_destination_key")
+
+
+@pytest.mark.parametrize(
+    "fan_out_lease, claimed",
+    [
+        # The notification that staged the archive may still be sending events
+        (NOW + FAN_OUT_LEASE_SECONDS, True),
+        # Another duplicate claimed the expired lease
+        (NOW - 1, False),
+    ],
+)
+@patch("time.time", return_value=NOW)
+def test_handle_archive_job_notification_retries_fan_out_in_progress(
+    _time: object,
+    mock_metadata: GlacierTransferMetadata,
+    fan_out_lease: float,
+    claimed: bool,
+) -> None:
+    staged_metadata = GlacierTransferMetadata.parse(mock_metadata.marshal())
+    staged_metadata.retrieve_status = (
+        f"{WORKFLOW_RUN}/{GlacierTransferModel.StatusCode.STAGED}"
+    )
+    staged_metadata.chunks_count = 2
+    staged_metadata.enqueued_chunks = 0
+    staged_metadata.fan_out_lease = fan_out_lease
+
+    with patch(
+        "solution.application.archive_retrieval.notification_processor.get_glacier_transfer_metadata",
+        return_value=staged_metadata,
+    ), patch(
+        "solution.application.archive_retrieval.notification_processor.get_client"
+    ), patch(
+        "solution.application.archive_retrieval.notification_processor.claim_fan_out",
+        return_value=claimed,
+    ), patch(
+        "solution.application.archive_retrieval.notification_processor.send_chunk_events"
+    ) as mock_send_chunk_events, pytest.raises(
+        FanOutInProgress
+    ):
+        handle_archive_job_notification(
+            json.dumps(
+                {
+                    "ArchiveId": ARCHIVE_ID,
+                    "JobId": JOB_ID,
+                    "Completed": True,
+                    "StatusCode": "Succeeded",
+                    "CompletionDate": "test_completion_date",
+                }
+            )
+        )
+
+    mock_send_chunk_events.assert_not_called()
 
 
 @pytest.mark.parametrize(
@@ -240,6 +698,7 @@ def test_send_chunk_events(
 )
 def test_update_glacier_transfer_metadata(
     glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
+    mock_metadata: GlacierTransferMetadata,
     chunks_count: str,
     upload_id: str,
     destination_key: str,
@@ -249,9 +708,15 @@ def test_update_glacier_transfer_metadata(
 ) -> None:
     # Arrange
     dynamodb_client, _ = glacier_retrieval_table_mock
+    requested_metadata = GlacierTransferMetadata.parse(mock_metadata.marshal())
+    requested_metadata.job_id = job_id
+    dynamodb_client.put_item(
+        TableName=os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME],
+        Item=requested_metadata.marshal(),
+    )
 
     # Act
-    update_glacier_transfer_metadata(
+    staged = update_glacier_transfer_metadata(
         dynamodb_client,
         WORKFLOW_RUN,
         ARCHIVE_ID,
@@ -261,6 +726,8 @@ def test_update_glacier_transfer_metadata(
         retrieve_status,
         completion_date,
         job_id,
+        2**30,
+        NOW + FAN_OUT_LEASE_SECONDS,
     )
 
     # Assert
@@ -281,3 +748,112 @@ def test_update_glacier_transfer_metadata(
     assert ddb_metadata.retrieve_status == retrieve_status
     assert ddb_metadata.download_window == completion_date
     assert ddb_metadata.staged_job_id == job_id
+    assert staged
+    assert ddb_metadata.chunk_size == 2**30
+    assert ddb_metadata.enqueued_chunks == 0
+    assert ddb_metadata.fan_out_lease == NOW + FAN_OUT_LEASE_SECONDS
+
+
+def test_update_glacier_transfer_metadata_claims_once(
+    glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
+    mock_metadata: GlacierTransferMetadata,
+) -> None:
+    dynamodb_client, _ = glacier_retrieval_table_mock
+    dynamodb_client.put_item(
+        TableName=os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME],
+        Item=mock_metadata.marshal(),
+    )
+    staged_status = f"{WORKFLOW_RUN}/{GlacierTransferModel.StatusCode.STAGED}"
+
+    def stage(upload_id: str, job_id: str = JOB_ID) -> bool:
+        return update_glacier_transfer_metadata(
+            dynamodb_client,
+            WORKFLOW_RUN,
+            ARCHIVE_ID,
+            "1",
+            upload_id,
+            "test_destination_key",
+            staged_status,
+            "test_completion_date",
+            job_id,
+            2**30,
+            NOW + FAN_OUT_LEASE_SECONDS,
+        )
+
+    assert not stage("test_other_job_upload", job_id="test_other_job_id")
+    assert stage("test_upload")
+    assert not stage("test_duplicate_upload")
+
+    ddb_metadata = GlacierTransferMetadata.parse(
+        dynamodb_client.get_item(
+            TableName=os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME],
+            Key=GlacierTransferMetadataRead(
+                workflow_run=WORKFLOW_RUN, glacier_object_id=ARCHIVE_ID
+            ).key,
+        )["Item"]
+    )
+    assert ddb_metadata.upload_id == "test_upload"
+
+
+def test_claim_fan_out_once(
+    glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
+    mock_metadata: GlacierTransferMetadata,
+) -> None:
+    dynamodb_client, _ = glacier_retrieval_table_mock
+    staged_metadata = GlacierTransferMetadata.parse(mock_metadata.marshal())
+    staged_metadata.chunks_count = 2
+    staged_metadata.enqueued_chunks = 0
+    staged_metadata.fan_out_lease = NOW - 1
+    dynamodb_client.put_item(
+        TableName=os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME],
+        Item=staged_metadata.marshal(),
+    )
+
+    # Duplicates that read the expired lease resume the fan-out once
+    assert claim_fan_out(dynamodb_client, staged_metadata, NOW)
+    assert not claim_fan_out(dynamodb_client, staged_metadata, NOW)
+
+    ddb_metadata = GlacierTransferMetadata.parse(
+        dynamodb_client.get_item(
+            TableName=os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME],
+            Key=GlacierTransferMetadataRead(
+                workflow_run=WORKFLOW_RUN, glacier_object_id=ARCHIVE_ID
+            ).key,
+        )["Item"]
+    )
+    assert ddb_metadata.fan_out_lease == NOW + FAN_OUT_LEASE_SECONDS
+
+
+def test_handle_archive_job_notification_duplicate_aborts_upload(
+    mock_metadata: GlacierTransferMetadata,
+) -> None:
+    with patch(
+        "solution.application.archive_retrieval.notification_processor.get_glacier_transfer_metadata",
+        return_value=mock_metadata,
+    ), patch(
+        "solution.application.archive_retrieval.notification_processor.create_multipart_upload",
+        return_value="test_duplicate_upload",
+    ), patch(
+        "solution.application.archive_retrieval.notification_processor.update_glacier_transfer_metadata",
+        return_value=False,
+    ), patch(
+        "solution.application.archive_retrieval.notification_processor.abort_multipart_upload"
+    ) as mock_abort_multipart_upload, patch(
+        "solution.application.archive_retrieval.notification_processor.send_chunk_events"
+    ) as mock_send_chunk_events:
+        handle_archive_job_notification(
+            json.dumps(
+                {
+                    "ArchiveId": ARCHIVE_ID,
+                    "JobId": JOB_ID,
+                    "Completed": True,
+                    "StatusCode": "Succeeded",
+                    "CompletionDate": "test_completion_date",
+                }
+            )
+        )
+
+    mock_abort_multipart_upload.assert_called_once_with(
+        f"{WORKFLOW_RUN}/{ARCHIVE_ID}", "test_duplicate_upload"
+    )
+    mock_send_chunk_events.assert_not_called()
@@ -0,0 +1,83 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import os
+from typing import Tuple
+from unittest.mock import patch
+
+import pytest
+from mypy_boto3_dynamodb import DynamoDBClient
+from mypy_boto3_dynamodb.type_defs import CreateTableOutputTypeDef
+
+from solution.application.archive_retrieval import pacing
+from solution.application.model.partition_metric_record import PartitionMetricRecord
+from solution.infrastructure.output_keys import OutputKeys
+
+WORKFLOW_RUN = "test_pacing"
+DAILY_QUOTA = 86400 * 2**20
+NOW = 1_700_000_000.0
+
+
+def test_pacing_delay_within_burst() -> None:
+    # 10 minutes of quota is initiated ahead of the pace without waiting
+    paced_until, delay = pacing.pacing_delay(0.0, 600 * 2**20, DAILY_QUOTA, NOW)
+    assert paced_until == NOW + 600
+    assert delay == 0
+
+
+def test_pacing_delay_beyond_burst() -> None:
+    paced_until, delay = pacing.pacing_delay(NOW + 600, 600 * 2**20, DAILY_QUOTA, NOW)
+    assert paced_until == NOW + 1200
+    assert delay == 1200 - pacing.PACING_BURST_SECONDS
+
+
+def test_pacing_delay_builds_no_credit_while_idle() -> None:
+    paced_until, delay = pacing.pacing_delay(
+        NOW - 86400, 3600 * 2**20, DAILY_QUOTA, NOW
+    )
+    assert paced_until == NOW + 3600
+    assert delay == 3600 - pacing.PACING_BURST_SECONDS
+
+
+@pytest.fixture
+def paced_workflow(
+    glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
+    metric_table_mock: CreateTableOutputTypeDef,
+) -> DynamoDBClient:
+    dynamodb_client, _ = glacier_retrieval_table_mock
+    dynamodb_client.put_item(
+        TableName=os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME],
+        Item={
+            "pk": {"S": WORKFLOW_RUN},
+            "sk": {"S": "meta"},
+            "daily_quota": {"N": str(DAILY_QUOTA)},
+        },
+    )
+    return dynamodb_client
+
+
+def _paced_until(dynamodb_client: DynamoDBClient) -> float | None:
+    return PartitionMetricRecord.parse(
+        dynamodb_client.get_item(
+            TableName=os.environ[OutputKeys.METRIC_TABLE_NAME],
+            Key={"pk": {"S": PartitionMetricRecord.partition_key(WORKFLOW_RUN)}},
+        )["Item"]
+    ).paced_until
+
+
+@patch("time.time", return_value=NOW)
+def test_pace_initiation(_time: object, paced_workflow: DynamoDBClient) -> None:
+    assert pacing.pace_initiation(WORKFLOW_RUN, 600 * 2**20) == 0
+    assert _paced_until(paced_workflow) == NOW + 600
+
+    assert pacing.pace_initiation(WORKFLOW_RUN, 1200 * 2**20) == 900
+    assert _paced_until(paced_workflow) == NOW + 1800
+
+
+def test_pace_initiation_without_quota(
+    glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
+    metric_table_mock: CreateTableOutputTypeDef,
+) -> None:
+    assert pacing.pace_initiation("test_pacing_no_quota", 2**40) == 0
@@ -7,7 +7,12 @@ from typing import List
 
 import pytest
 
-from solution.application.chunking.chunk_generator import generate_chunk_array
+from solution.application.chunking.chunk_generator import (
+    MIN_CHUNK_SIZE,
+    generate_chunk_array,
+    is_power_of_two,
+    plan_chunk_size,
+)
 
 
 def test_generate_chunk_array_size_is_not_power_of_two() -> None:
@@ -31,3 +36,35 @@ def test_generate_chunk_array(
     expected_chunks: List[str],
 ) -> None:
     assert expected_chunks == generate_chunk_array(archive_size, chunk_size)
+
+
+GiB = 2**30
+
+
+@pytest.mark.parametrize(
+    "archive_size, memory_budget, expected_chunk_size",
+    [
+        # Small archives are not split below the minimum chunk size
+        (1, GiB, MIN_CHUNK_SIZE),
+        (100 * 2**20, GiB, MIN_CHUNK_SIZE),
+        # Split for parallelism, where the default used to be a single 1 GiB chunk
+        (2 * GiB, GiB, 128 * 2**20),
+        # Bounded by the memory budget
+        (2 * GiB, 128 * 2**20, 64 * 2**20),
+        (100 * GiB, GiB, 512 * 2**20),
+        # Bounded by the chunks count limit, whatever the memory budget
+        (40 * 2**40, GiB, 8 * GiB),
+    ],
+)
+def test_plan_chunk_size(
+    archive_size: int, memory_budget: int, expected_chunk_size: int
+) -> None:
+    chunk_size = plan_chunk_size(archive_size, memory_budget)
+    assert chunk_size == expected_chunk_size
+    assert is_power_of_two(chunk_size)
+    assert -(-archive_size // chunk_size) <= 10000
+
+
+def test_plan_chunk_size_target_parallelism() -> None:
+    assert plan_chunk_size(2 * GiB, GiB, target_parallelism=2) == GiB // 2
+    assert plan_chunk_size(2 * GiB, 4 * GiB, target_parallelism=2) == GiB
@@ -0,0 +1,59 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import json
+from typing import List, Tuple
+
+import pytest
+
+from solution.application.chunking.chunk_plan import ChunkPlan
+from solution.application.util.exceptions import ChunkSizeTooSmall
+
+
+@pytest.mark.parametrize(
+    "chunk_plan, expected_ranges",
+    [
+        (ChunkPlan(384, 128), [(0, 127), (128, 255), (256, 383)]),
+        (ChunkPlan(100, 128), [(0, 99)]),
+        (
+            ChunkPlan(547, 128),
+            [(0, 127), (128, 255), (256, 383), (384, 511), (512, 546)],
+        ),
+        (ChunkPlan(1400, 500, 200), [(0, 499), (300, 799), (600, 1099), (900, 1399)]),
+        (
+            ChunkPlan(1401, 500, 200),
+            [(0, 499), (300, 799), (600, 1099), (900, 1399), (1200, 1400)],
+        ),
+    ],
+)
+def test_chunk_plan(
+    chunk_plan: ChunkPlan, expected_ranges: List[Tuple[int, int]]
+) -> None:
+    assert list(chunk_plan) == expected_ranges
+    assert len(chunk_plan) == len(expected_ranges)
+    assert chunk_plan[-1] == expected_ranges[-1]
+    assert list(chunk_plan.byte_ranges()) == [
+        f"{start}-{end}" for start, end in expected_ranges
+    ]
+
+
+def test_chunk_plan_indexing() -> None:
+    chunk_plan = ChunkPlan(10 * 2**40, 2**30)
+    assert len(chunk_plan) == 10240
+    assert chunk_plan[5000] == (5000 * 2**30, 5001 * 2**30 - 1)
+    assert chunk_plan.byte_range(10239) == f"{10239 * 2**30}-{10 * 2**40 - 1}"
+    with pytest.raises(IndexError):
+        chunk_plan[10240]
+
+
+def test_chunk_plan_descriptor() -> None:
+    chunk_plan = ChunkPlan(10 * 2**40, 2**30, 1024)
+    descriptor = json.loads(json.dumps(chunk_plan.descriptor()))
+    assert ChunkPlan.from_descriptor(descriptor) == chunk_plan
+
+
+def test_chunk_plan_chunk_size_not_above_overlap() -> None:
+    with pytest.raises(ChunkSizeTooSmall):
+        ChunkPlan(1000, 200, 200)
@@ -2,14 +2,20 @@
 Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 SPDX-License-Identifier: Apache-2.0
 """
+import io
 from datetime import timedelta
-from typing import TYPE_CHECKING, Tuple
-from unittest.mock import patch
+from typing import TYPE_CHECKING, Any, Tuple
+from unittest.mock import Mock, patch
 
 import pytest
 
-from solution.application.glacier_s3_transfer.download import GlacierDownload
+from solution.application.glacier_s3_transfer.download import (
+    GlacierDownload,
+    GlacierRangedDownload,
+)
 from solution.application.glacier_service.glacier_typing import GlacierJobType
+from solution.application.hashing.chunk_hash import ChunkHash
+from solution.application.hashing.tree_hash import ONE_MB, TreeHash
 from solution.application.util.exceptions import AccessViolation
 
 if TYPE_CHECKING:
@@ -20,6 +26,7 @@ else:
     InitiateJobOutputTypeDef = object
 
 TEST_DATA = b"test"
+RANGED_DATA = bytes(range(256)) * (5 * ONE_MB // 256 + 7)
 
 
 def test_init(setup_glacier_job: Tuple[GlacierClient, str]) -> None:
@@ -55,6 +62,155 @@ def test_read_prevents_second_access(
         download.read()
 
 
+def test_stream_correctness(setup_glacier_job: Tuple[GlacierClient, str]) -> None:
+    client, job_id = setup_glacier_job
+    download = GlacierDownload(client, job_id, "vault_name", "0-1024")
+
+    # Test that stream() yields full buffers followed by the remainder
+    assert list(download.stream(3)) == [TEST_DATA[:3], TEST_DATA[3:]]
+
+
+def test_stream_prevents_second_access(
+    setup_glacier_job: Tuple[GlacierClient, str]
+) -> None:
+    client, job_id = setup_glacier_job
+    download = GlacierDownload(client, job_id, "vault_name", "0-1024")
+    download.read()
+    with pytest.raises(AccessViolation):
+        next(download.stream(3))
+
+
+def test_ranged_read_correctness() -> None:
+    client = _mock_ranged_glacier_client(RANGED_DATA)
+    download = GlacierRangedDownload(
+        client, "job_id", "vault_name", f"0-{len(RANGED_DATA) - 1}", 3, 2 * ONE_MB
+    )
+
+    assert download.byte_ranges == [
+        f"0-{2 * ONE_MB - 1}",
+        f"{2 * ONE_MB}-{4 * ONE_MB - 1}",
+        f"{4 * ONE_MB}-{len(RANGED_DATA) - 1}",
+    ]
+    assert download.read() == RANGED_DATA
+    assert client.get_job_output.call_count == 3
+
+
+def test_ranged_read_offsets_sub_ranges() -> None:
+    client = _mock_ranged_glacier_client(RANGED_DATA)
+    download = GlacierRangedDownload(
+        client,
+        "job_id",
+        "vault_name",
+        f"{4 * ONE_MB}-{len(RANGED_DATA) - 1}",
+        2,
+        ONE_MB,
+    )
+    assert download.byte_ranges == [
+        f"{4 * ONE_MB}-{5 * ONE_MB - 1}",
+        f"{5 * ONE_MB}-{len(RANGED_DATA) - 1}",
+    ]
+    assert download.read() == RANGED_DATA[4 * ONE_MB :]
+
+
+def test_ranged_read_prevents_second_access() -> None:
+    download = GlacierRangedDownload(
+        _mock_ranged_glacier_client(RANGED_DATA),
+        "job_id",
+        "vault_name",
+        f"0-{len(RANGED_DATA) - 1}",
+        2,
+        ONE_MB,
+    )
+    download.read()
+    with pytest.raises(AccessViolation):
+        download.read()
+
+
+@pytest.mark.parametrize("buffer_size", [ONE_MB // 3, ONE_MB, 3 * ONE_MB])
+def test_ranged_stream_correctness(buffer_size: int) -> None:
+    download = GlacierRangedDownload(
+        _mock_ranged_glacier_client(RANGED_DATA),
+        "job_id",
+        "vault_name",
+        f"0-{len(RANGED_DATA) - 1}",
+        2,
+        2 * ONE_MB,
+    )
+    buffers = list(download.stream(buffer_size))
+
+    assert b"".join(buffers) == RANGED_DATA
+    assert all(len(buffer) == buffer_size for buffer in buffers[:-1])
+
+
+def test_ranged_checksum_matches_tree_hash() -> None:
+    download = GlacierRangedDownload(
+        _mock_ranged_glacier_client(RANGED_DATA),
+        "job_id",
+        "vault_name",
+        f"0-{len(RANGED_DATA) - 1}",
+        2,
+        2 * ONE_MB,
+    )
+    assert download.checksum() is None
+    chunk = download.read()
+
+    tree_hash = TreeHash()
+    tree_hash.update(chunk)
+    assert download.checksum() == tree_hash.digest().hex()
+
+
+def test_ranged_mismatched_ranges() -> None:
+    download = GlacierRangedDownload(
+        _mock_ranged_glacier_client(RANGED_DATA),
+        "job_id",
+        "vault_name",
+        f"0-{len(RANGED_DATA) - 1}",
+        2,
+        2 * ONE_MB,
+    )
+    chunk_hash = ChunkHash()
+    chunk_hash.update(download.read())
+    assert download.mismatched_ranges(chunk_hash.leaves) == []
+
+    corrupted = bytearray(RANGED_DATA)
+    corrupted[3 * ONE_MB] ^= 1
+    chunk_hash = ChunkHash()
+    chunk_hash.update(corrupted)
+    assert download.mismatched_ranges(chunk_hash.leaves) == [
+        f"{2 * ONE_MB}-{4 * ONE_MB - 1}"
+    ]
+
+
+def test_ranged_raises_request_errors_on_init() -> None:
+    client = Mock()
+    client.get_job_output.side_effect = ValueError
+    with pytest.raises(ValueError):
+        GlacierRangedDownload(client, "job_id", "vault_name", f"0-{ONE_MB - 1}", 2)
+
+
+@pytest.mark.parametrize(
+    "concurrency, range_size", [(2, 3 * ONE_MB), (2, ONE_MB // 2), (0, ONE_MB)]
+)
+def test_ranged_invalid_parameters(concurrency: int, range_size: int) -> None:
+    with pytest.raises(ValueError):
+        GlacierRangedDownload(
+            Mock(), "job_id", "vault_name", "0-1024", concurrency, range_size
+        )
+
+
+def _mock_ranged_glacier_client(data: bytes) -> Mock:
+    def get_job_output(**params: str) -> dict[str, Any]:
+        start, end = (int(i) for i in params["range"].split("=")[1].split("-"))
+        body = data[start : end + 1]
+        tree_hash = TreeHash()
+        tree_hash.update(body)
+        return {"body": io.BytesIO(body), "checksum": tree_hash.digest().hex()}
+
+    client = Mock()
+    client.get_job_output.side_effect = get_job_output
+    return client
+
+
 @pytest.fixture
 def setup_glacier_job(
     glacier_client: GlacierClient,
@@ -3,22 +3,24 @@ Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 SPDX-License-Identifier: Apache-2.0
 """
 
+import io
 import os
 from base64 import b64encode
 from datetime import datetime, timedelta
-from typing import TYPE_CHECKING, Iterator, Tuple
+from hashlib import sha256
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Tuple
 from unittest.mock import MagicMock, Mock, patch
 
 import boto3
 import pytest
-from botocore.config import Config
 from mypy_boto3_dynamodb import DynamoDBClient
 from mypy_boto3_glacier import GlacierClient
-from mypy_boto3_sqs import SQSClient
 
-from solution.application import __boto_config__
+from solution.application.glacier_s3_transfer import manifest
 from solution.application.glacier_s3_transfer.facilitator import GlacierToS3Facilitator
+from solution.application.glacier_s3_transfer.stream import ChunkStream
 from solution.application.glacier_service.glacier_typing import GlacierJobType
+from solution.application.hashing.tree_hash import ONE_MB, TreeHash
 from solution.application.model import responses
 from solution.application.model.glacier_transfer_meta_model import (
     GlacierTransferMetadata,
@@ -31,18 +33,11 @@ from solution.application.model.glacier_transfer_part_model import (
 from solution.application.util.exceptions import (
     ExpiredDownloadWindow,
     GlacierValidationMismatch,
+    InvalidGlacierRetrievalMetadata,
 )
 from solution.infrastructure.output_keys import OutputKeys
 
 
-@pytest.fixture
-def validation_sqs_mock(sqs_client: SQSClient) -> Iterator[SQSClient]:
-    sqs_client.create_queue(QueueName=os.environ[OutputKeys.VALIDATION_SQS_URL])
-
-    yield sqs_client
-    sqs_client.delete_queue(QueueUrl=os.environ[OutputKeys.VALIDATION_SQS_URL])
-
-
 @pytest.fixture
 def mock_item() -> GlacierTransferMetadata:
     return GlacierTransferMetadata(
@@ -62,13 +57,13 @@ def mock_item() -> GlacierTransferMetadata:
     )
 
 
-@patch("solution.application.glacier_s3_transfer.facilitator.TreeHash")
+@patch("solution.application.glacier_s3_transfer.facilitator.ChunkHash")
 @patch("solution.application.glacier_s3_transfer.facilitator.GlacierDownload")
 @patch("solution.application.glacier_s3_transfer.facilitator.S3Upload")
 def test_transfer_happy_path(
     upload_mock: MagicMock,
     download_mock: MagicMock,
-    tree_hash_mock: MagicMock,
+    chunk_hash_mock: MagicMock,
     glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
     mock_item: GlacierTransferMetadata,
 ) -> None:
@@ -82,7 +77,8 @@ def test_transfer_happy_path(
         "deadbeef"  # An example checksum which only has hex characters
     )
 
-    tree_hash_mock.return_value.digest.return_value = b"\xde\xad\xbe\xef"
+    chunk_hash_mock.return_value.tree_digest.return_value = b"\xde\xad\xbe\xef"
+    chunk_hash_mock.return_value.elapsed = 0.0
 
     upload_mock.return_value.upload_part = _mock_upload
     facilitator = _create_facilitator()
@@ -107,13 +103,13 @@ def test_transfer_happy_path(
     assert glacier_transfer_part.tree_checksum == expected_result["TreeChecksum"]
 
 
-@patch("solution.application.glacier_s3_transfer.facilitator.TreeHash")
+@patch("solution.application.glacier_s3_transfer.facilitator.ChunkHash")
 @patch("solution.application.glacier_s3_transfer.facilitator.GlacierDownload")
 @patch("solution.application.glacier_s3_transfer.facilitator.S3Upload")
 def test_transfer_glacier_checksum_mismatch(
     upload_mock: MagicMock,
     download_mock: MagicMock,
-    tree_hash_mock: MagicMock,
+    chunk_hash_mock: MagicMock,
     glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
     mock_item: GlacierTransferMetadata,
 ) -> None:
@@ -126,7 +122,8 @@ def test_transfer_glacier_checksum_mismatch(
         "deadbeef1"  # An example checksum which only has hex characters
     )
 
-    tree_hash_mock.return_value.digest.return_value = b"\xde\xad\xbe\xef"
+    chunk_hash_mock.return_value.tree_digest.return_value = b"\xde\xad\xbe\xef"
+    chunk_hash_mock.return_value.elapsed = 0.0
 
     facilitator = _create_facilitator()
     upload_mock.return_value.upload_part = _mock_upload
@@ -134,13 +131,13 @@ def test_transfer_glacier_checksum_mismatch(
         facilitator.transfer()
 
 
-@patch("solution.application.glacier_s3_transfer.facilitator.TreeHash")
+@patch("solution.application.glacier_s3_transfer.facilitator.ChunkHash")
 @patch("solution.application.glacier_s3_transfer.facilitator.GlacierDownload")
 @patch("solution.application.glacier_s3_transfer.facilitator.S3Upload")
 def test_transfer_glacier_checksum_mismatch_disabled(
     upload_mock: MagicMock,
     download_mock: MagicMock,
-    tree_hash_mock: MagicMock,
+    chunk_hash_mock: MagicMock,
     glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
     mock_item: GlacierTransferMetadata,
 ) -> None:
@@ -153,7 +150,8 @@ def test_transfer_glacier_checksum_mismatch_disabled(
         "deadbeef1"  # An example checksum which only has hex characters
     )
 
-    tree_hash_mock.return_value.digest.return_value = b"\xde\xad\xbe\xef"
+    chunk_hash_mock.return_value.tree_digest.return_value = b"\xde\xad\xbe\xef"
+    chunk_hash_mock.return_value.elapsed = 0.0
 
     facilitator = _create_facilitator(GlacierJobType.INVENTORY_RETRIEVAL)
     upload_mock.return_value.upload_part = _mock_upload
@@ -170,6 +168,51 @@ def test_transfer_glacier_checksum_mismatch_disabled(
     assert glacier_transfer_part.tree_checksum == "treechecksum1"
 
 
+@pytest.mark.parametrize("checksum_matches", [True, False])
+@patch("solution.application.glacier_s3_transfer.facilitator.GlacierDownload")
+@patch("solution.application.glacier_s3_transfer.facilitator.S3Upload")
+def test_transfer_streaming(
+    upload_mock: MagicMock,
+    download_mock: MagicMock,
+    checksum_matches: bool,
+    glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
+    mock_item: GlacierTransferMetadata,
+) -> None:
+    _empty_glacier_retrieval_table(glacier_retrieval_table_mock)
+    glacier_retrieval_table_mock[0].put_item(
+        TableName=glacier_retrieval_table_mock[1], Item=mock_item.marshal()
+    )
+    data = b"c" * 101
+    tree_hash = TreeHash()
+    tree_hash.update(data)
+    download_mock.return_value.stream.return_value = iter([data])
+    download_mock.return_value.checksum.return_value = (
+        tree_hash.digest().hex() if checksum_matches else "deadbeef"
+    )
+
+    def upload_part_stream(
+        stream: ChunkStream, part_number: int
+    ) -> responses.GlacierRetrieval:
+        assert stream.read() == data
+        return _mock_upload(data, part_number)
+
+    upload_mock.return_value.upload_part_stream = upload_part_stream
+    facilitator = _create_facilitator(stream_buffer_size=ONE_MB)
+
+    if not checksum_matches:
+        with pytest.raises(GlacierValidationMismatch):
+            facilitator.transfer()
+        download_mock.return_value.read.assert_not_called()
+        return
+
+    result = facilitator.transfer()
+
+    assert result is not None
+    assert result["TreeChecksum"] == b64encode(tree_hash.digest()).decode("ascii")
+    download_mock.return_value.stream.assert_called_once_with(ONE_MB)
+    download_mock.return_value.read.assert_not_called()
+
+
 def test_transfer_glacier_outside_download_window(
     glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
     mock_item: GlacierTransferMetadata,
@@ -187,21 +230,15 @@ def test_transfer_glacier_outside_download_window(
 
 
 @pytest.mark.parametrize(
-    "total_chunks_count, downloaded_chunks_count, message_exist, message_count, message_body",
-    [
-        (1, 1, True, 1, '{"WorkflowRun": "workflow1", "GlacierObjectId": "archive1"}'),
-        (5, 5, True, 1, '{"WorkflowRun": "workflow1", "GlacierObjectId": "archive1"}'),
-        (5, 4, False, 0, None),
-    ],
+    "total_chunks_count, downloaded_chunks_count, validated",
+    [(1, 1, True), (5, 5, True), (5, 4, False)],
 )
-def test_send_validation_event_last_chunk_true(
+@patch("solution.application.glacier_s3_transfer.facilitator.validate_upload")
+def test_validate_if_last_chunk_staged_before_counting(
+    validate_upload_mock: Mock,
     total_chunks_count: int,
     downloaded_chunks_count: int,
-    message_exist: bool,
-    message_count: int,
-    message_body: str | None,
-    sqs_client: SQSClient,
-    validation_sqs_mock: SQSClient,
+    validated: bool,
     glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
     mock_item: GlacierTransferMetadata,
 ) -> None:
@@ -213,42 +250,219 @@ def test_send_validation_event_last_chunk_true(
     )
 
     facilitator = _create_facilitator()
-    facilitator.send_validation_event()
-    response = sqs_client.receive_message(
-        QueueUrl=os.environ[OutputKeys.VALIDATION_SQS_URL]
+    facilitator.validate_if_last_chunk()
+
+    assert validate_upload_mock.called == validated
+    if validated:
+        validate_upload_mock.assert_called_once_with(
+            workflow_run="workflow1",
+            glacier_object_id="archive1",
+            glacier_job_type=GlacierJobType.ARCHIVE_RETRIEVAL,
+        )
+
+
+def test_metadata_read_once_per_container(
+    glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
+    mock_item: GlacierTransferMetadata,
+) -> None:
+    glacier_retrieval_table_mock[0].put_item(
+        TableName=glacier_retrieval_table_mock[1], Item=mock_item.marshal()
     )
+    _create_facilitator()
+    _empty_glacier_retrieval_table(glacier_retrieval_table_mock)
+
+    facilitator = _create_facilitator()
+    assert facilitator.metadata.download_window == mock_item.download_window
 
-    assert message_exist == (True if "Messages" in response else False)
+    with pytest.raises(InvalidGlacierRetrievalMetadata):
+        facilitator._get_metadata(cached=False)
 
-    assert message_count == (len(response["Messages"]) if "Messages" in response else 0)
 
-    assert message_body == (
-        response["Messages"][0]["Body"] if "Messages" in response else None
+@patch("solution.application.glacier_s3_transfer.facilitator.ChunkHash")
+@patch("solution.application.glacier_s3_transfer.facilitator.GlacierDownload")
+@patch("solution.application.glacier_s3_transfer.facilitator.S3Upload")
+def test_transfer_uses_chunk_event_metadata(
+    upload_mock: MagicMock,
+    download_mock: MagicMock,
+    chunk_hash_mock: MagicMock,
+    glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
+    mock_item: GlacierTransferMetadata,
+) -> None:
+    mock_item.download_window = None
+    glacier_retrieval_table_mock[0].put_item(
+        TableName=glacier_retrieval_table_mock[1], Item=mock_item.marshal()
     )
+    download_mock.return_value.read.return_value = b"chunk"
+    download_mock.return_value.checksum.return_value = "deadbeef"
+    chunk_hash_mock.return_value.tree_digest.return_value = b"\xde\xad\xbe\xef"
+    chunk_hash_mock.return_value.elapsed = 0.0
+    upload_mock.return_value.upload_part = _mock_upload
+
+    facilitator = _create_facilitator(
+        staged_job_id="staged_job1",
+        download_window=(datetime.now() + timedelta(hours=1)).isoformat(),
+    )
+    assert facilitator.transfer() is not None
+    assert download_mock.call_args[0][1] == "staged_job1"
 
 
-@patch.object(GlacierToS3Facilitator, "_is_last_chunk")
-@patch.object(GlacierToS3Facilitator, "_get_metadata")
-def test_user_agent_on_sqs_client(
-    _mock_is_last_chunk: Mock,
-    _mock_get_metadata: Mock,
-    glacier_client: GlacierClient,
-    solution_user_agent: str,
+@pytest.mark.parametrize("completed_parts", [4, 5])
+@patch("solution.application.glacier_s3_transfer.facilitator.validate_upload")
+def test_validate_if_last_chunk_uses_chunk_event_chunks_count(
+    validate_upload_mock: Mock,
+    completed_parts: int,
+    glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
+    mock_item: GlacierTransferMetadata,
 ) -> None:
-    with patch("boto3.client") as mock_client:
-        facilitator = _create_facilitator()
-        facilitator.send_validation_event()
+    _populate_glacier_retrieval_table(1, 0, glacier_retrieval_table_mock, mock_item)
 
-        assert mock_client.call_args[0][0] == "sqs"
+    facilitator = _create_facilitator(chunks_count=5)
+    facilitator.completed_parts = completed_parts
+    with patch.object(facilitator, "_get_metadata") as get_metadata_mock:
+        facilitator.validate_if_last_chunk()
+    get_metadata_mock.assert_not_called()
+    assert validate_upload_mock.called == (completed_parts == 5)
 
-        _config = mock_client.call_args[1]["config"]
-        assert type(_config) is Config
 
-        _config_user_agent_extra = _config.__getattribute__("user_agent_extra")
-        assert _config_user_agent_extra == __boto_config__.__getattribute__(
-            "user_agent_extra"
-        )
-        assert _config_user_agent_extra == solution_user_agent
+def test_write_part_info_counts_each_part_once(
+    glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
+    mock_item: GlacierTransferMetadata,
+) -> None:
+    mock_item.chunks_count = 2
+    mock_item.upload_id = "upload1"
+    mock_item.completed_parts = 0
+    glacier_retrieval_table_mock[0].put_item(
+        TableName=glacier_retrieval_table_mock[1], Item=mock_item.marshal()
+    )
+
+    facilitator = _create_facilitator()
+    facilitator._write_part_info(_mock_upload(b"", 1))
+    assert facilitator.completed_parts == 1
+    assert not facilitator._is_last_chunk()
+
+    # A retried chunk overwrites its part without counting it again
+    facilitator._write_part_info({**_mock_upload(b"", 1), "ETag": "etag2"})
+    assert facilitator.completed_parts is None
+    assert not facilitator._is_last_chunk()
+    part = GlacierTransferPart.parse(
+        glacier_retrieval_table_mock[0].get_item(
+            TableName=glacier_retrieval_table_mock[1],
+            Key=GlacierTransferPartRead(
+                workflow_run="workflow1", glacier_object_id="archive1", part_number=1
+            ).key,
+        )["Item"]
+    )
+    assert part.e_tag == "etag2"
+    assert part.upload_id == "upload1"
+
+    facilitator = _create_facilitator(part_number=2)
+    facilitator._write_part_info(_mock_upload(b"", 2))
+    assert facilitator.completed_parts == 2
+    assert facilitator._is_last_chunk()
+
+
+def test_write_part_info_packs_parts_into_manifest(
+    glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
+    mock_item: GlacierTransferMetadata,
+) -> None:
+    _empty_glacier_retrieval_table(glacier_retrieval_table_mock)
+    mock_item.chunks_count = 2
+    mock_item.upload_id = "upload1"
+    mock_item.completed_parts = 0
+    glacier_retrieval_table_mock[0].put_item(
+        TableName=glacier_retrieval_table_mock[1], Item=mock_item.marshal()
+    )
+    part: responses.GlacierRetrieval = {
+        "PartNumber": 1,
+        "ETag": f'"{"1" * 32}"',
+        "ChecksumSHA256": b64encode(sha256(b"chunk").digest()).decode("ascii"),
+        "TreeChecksum": b64encode(sha256(b"tree").digest()).decode("ascii"),
+    }
+
+    facilitator = _create_facilitator()
+    facilitator._write_part_info(part)
+    facilitator._write_part_info({**part, "ETag": f'"{"2" * 32}"'})
+
+    assert facilitator.completed_parts is None
+    manifest_parts = manifest.read_manifest(
+        "workflow1", "archive1", "upload1", 1024 * ONE_MB, 2
+    )
+    assert list(manifest_parts) == [1]
+    assert manifest_parts[1].e_tag == f'"{"2" * 32}"'
+    assert manifest_parts[1].tree_checksum == part["TreeChecksum"]
+    assert "Item" not in glacier_retrieval_table_mock[0].get_item(
+        TableName=glacier_retrieval_table_mock[1],
+        Key=GlacierTransferPartRead(
+            workflow_run="workflow1", glacier_object_id="archive1", part_number=1
+        ).key,
+    )
+
+
+def test_write_part_info_recounts_retried_chunk(
+    glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
+    mock_item: GlacierTransferMetadata,
+) -> None:
+    _empty_glacier_retrieval_table(glacier_retrieval_table_mock)
+    mock_item.chunks_count = 1
+    mock_item.upload_id = "upload1"
+    mock_item.completed_parts = 0
+    glacier_retrieval_table_mock[0].put_item(
+        TableName=glacier_retrieval_table_mock[1], Item=mock_item.marshal()
+    )
+    part: responses.GlacierRetrieval = {
+        "PartNumber": 1,
+        "ETag": f'"{"1" * 32}"',
+        "ChecksumSHA256": b64encode(sha256(b"chunk").digest()).decode("ascii"),
+        "TreeChecksum": b64encode(sha256(b"tree").digest()).decode("ascii"),
+    }
+
+    facilitator = _create_facilitator()
+    facilitator._write_part_info(part)
+    # The chunk failed after writing its part, before counting it
+    glacier_retrieval_table_mock[0].put_item(
+        TableName=glacier_retrieval_table_mock[1], Item=mock_item.marshal()
+    )
+
+    facilitator = _create_facilitator()
+    facilitator._write_part_info(part)
+    assert facilitator.completed_parts is None
+    assert facilitator._is_last_chunk()
+
+
+def test_write_part_info_counts_parts_of_previous_upload(
+    glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
+    mock_item: GlacierTransferMetadata,
+) -> None:
+    _populate_glacier_retrieval_table(1, 2, glacier_retrieval_table_mock, mock_item)
+    mock_item.upload_id = "upload1"
+    mock_item.completed_parts = 0
+    glacier_retrieval_table_mock[0].put_item(
+        TableName=glacier_retrieval_table_mock[1], Item=mock_item.marshal()
+    )
+
+    facilitator = _create_facilitator()
+    facilitator._write_part_info(_mock_upload(b"", 1))
+    assert facilitator.completed_parts == 1
+
+
+def test_write_part_info_staged_before_counting(
+    glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
+    mock_item: GlacierTransferMetadata,
+) -> None:
+    mock_item.upload_id = "upload1"
+    glacier_retrieval_table_mock[0].put_item(
+        TableName=glacier_retrieval_table_mock[1], Item=mock_item.marshal()
+    )
+
+    facilitator = _create_facilitator()
+    facilitator._write_part_info(_mock_upload(b"", 1))
+    assert facilitator.completed_parts is None
+    assert "Item" in glacier_retrieval_table_mock[0].get_item(
+        TableName=glacier_retrieval_table_mock[1],
+        Key=GlacierTransferPartRead(
+            workflow_run="workflow1", glacier_object_id="archive1", part_number=1
+        ).key,
+    )
 
 
 def _populate_glacier_retrieval_table(
@@ -275,8 +489,205 @@ def _populate_glacier_retrieval_table(
         )
 
 
+@pytest.mark.parametrize("stream_buffer_size", [None, ONE_MB // 2])
+@pytest.mark.parametrize("corrupted_range", [None, 1])
+@patch("solution.application.glacier_s3_transfer.facilitator.S3Upload")
+def test_transfer_ranged_download(
+    upload_mock: MagicMock,
+    corrupted_range: int | None,
+    stream_buffer_size: int | None,
+    glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
+    mock_item: GlacierTransferMetadata,
+) -> None:
+    _empty_glacier_retrieval_table(glacier_retrieval_table_mock)
+    glacier_retrieval_table_mock[0].put_item(
+        TableName=glacier_retrieval_table_mock[1], Item=mock_item.marshal()
+    )
+    data = bytes(range(256)) * (3 * ONE_MB // 256 + 5)
+    tree_hash = TreeHash()
+    tree_hash.update(data)
+
+    def get_job_output(**params: str) -> dict[str, Any]:
+        start, end = (int(i) for i in params["range"].split("=")[1].split("-"))
+        sub_range_hash = TreeHash()
+        sub_range_hash.update(data[start : end + 1])
+        checksum = sub_range_hash.digest().hex()
+        if corrupted_range is not None and start == corrupted_range * ONE_MB:
+            checksum = "deadbeef"
+        return {"body": io.BytesIO(data[start : end + 1]), "checksum": checksum}
+
+    def upload_part_stream(
+        stream: ChunkStream, part_number: int
+    ) -> responses.GlacierRetrieval:
+        assert stream.read() == data
+        return _mock_upload(data, part_number)
+
+    def upload_part(
+        chunk: bytes, part_number: int, sha256: bytes | None = None
+    ) -> responses.GlacierRetrieval:
+        assert chunk == data
+        return _mock_upload(data, part_number)
+
+    upload_mock.return_value.upload_part = upload_part
+    upload_mock.return_value.upload_part_stream = upload_part_stream
+    facilitator = _create_facilitator(
+        stream_buffer_size=stream_buffer_size, download_concurrency=2
+    )
+    facilitator.glacier_client = Mock()
+    facilitator.glacier_client.get_job_output.side_effect = get_job_output
+    facilitator.byte_range = f"0-{len(data) - 1}"
+    facilitator.download_range_size = ONE_MB
+
+    if corrupted_range is not None:
+        with pytest.raises(GlacierValidationMismatch):
+            facilitator.transfer()
+        return
+
+    result = facilitator.transfer()
+
+    assert result is not None
+    assert result["TreeChecksum"] == b64encode(tree_hash.digest()).decode("ascii")
+    assert facilitator.glacier_client.get_job_output.call_count == 4
+
+
+@pytest.mark.parametrize("stream_buffer_size", [None, 10])
+@patch(
+    "solution.application.glacier_s3_transfer.facilitator.parts_per_chunk",
+    return_value=4,
+)
+@patch("solution.application.glacier_s3_transfer.facilitator.GlacierDownload")
+@patch("solution.application.glacier_s3_transfer.facilitator.S3Upload")
+def test_transfer_sub_parts(
+    upload_mock: MagicMock,
+    download_mock: MagicMock,
+    _: MagicMock,
+    stream_buffer_size: int | None,
+    glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
+    mock_item: GlacierTransferMetadata,
+) -> None:
+    _empty_glacier_retrieval_table(glacier_retrieval_table_mock)
+    mock_item.chunk_size = 128
+    mock_item.chunks_count = 2
+    glacier_retrieval_table_mock[0].put_item(
+        TableName=glacier_retrieval_table_mock[1], Item=mock_item.marshal()
+    )
+    data = bytes(range(101))
+    tree_hash = TreeHash()
+    tree_hash.update(data)
+    download_mock.return_value.read.return_value = data
+    download_mock.return_value.stream.return_value = iter([data[:10], data[10:]])
+    download_mock.return_value.checksum.return_value = tree_hash.digest().hex()
+
+    def upload_sub_parts(
+        sub_parts: Iterable[bytes | memoryview],
+        first_part_number: int,
+        max_workers: int,
+    ) -> list[responses.GlacierRetrieval]:
+        assert [bytes(sub_part) for sub_part in sub_parts] == [
+            data[:32],
+            data[32:64],
+            data[64:96],
+            data[96:],
+        ]
+        assert first_part_number == 5
+        assert max_workers == 2
+        return [
+            {"PartNumber": number, "ETag": f"etag{number}", "ChecksumSHA256": "c"}
+            for number in range(5, 9)
+        ]
+
+    upload_mock.return_value.upload_sub_parts = upload_sub_parts
+    facilitator = _create_facilitator(
+        stream_buffer_size=stream_buffer_size, upload_concurrency=2
+    )
+    facilitator.part_number = 2
+
+    result = facilitator.transfer()
+
+    assert result is not None
+    assert result["PartNumber"] == 2
+    assert [part["PartNumber"] for part in result["SubParts"]] == [5, 6, 7, 8]
+    dynamo_item = glacier_retrieval_table_mock[0].get_item(
+        TableName=glacier_retrieval_table_mock[1],
+        Key=GlacierTransferPartRead(
+            workflow_run="workflow1", glacier_object_id="archive1", part_number=2
+        ).key,
+    )
+    glacier_transfer_part = GlacierTransferPart.parse(dynamo_item["Item"])
+    assert glacier_transfer_part.s3_parts == [
+        (number, f"etag{number}", "c") for number in range(5, 9)
+    ]
+    assert glacier_transfer_part.checksum_sha_256 == b64encode(
+        sha256(data).digest()
+    ).decode("ascii")
+
+
+@patch(
+    "solution.application.glacier_s3_transfer.facilitator.parts_per_chunk",
+    return_value=1,
+)
+@patch("solution.application.glacier_s3_transfer.facilitator.GlacierDownload")
+@patch("solution.application.glacier_s3_transfer.facilitator.S3Upload")
+def test_transfer_single_sub_part_streams(
+    upload_mock: MagicMock,
+    download_mock: MagicMock,
+    _: MagicMock,
+    glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
+    mock_item: GlacierTransferMetadata,
+) -> None:
+    _empty_glacier_retrieval_table(glacier_retrieval_table_mock)
+    mock_item.chunk_size = 128
+    mock_item.chunks_count = 2
+    glacier_retrieval_table_mock[0].put_item(
+        TableName=glacier_retrieval_table_mock[1], Item=mock_item.marshal()
+    )
+    data = bytes(range(101))
+    tree_hash = TreeHash()
+    tree_hash.update(data)
+    download_mock.return_value.stream.return_value = iter([data[:10], data[10:]])
+    download_mock.return_value.checksum.return_value = tree_hash.digest().hex()
+
+    def upload_part_stream(
+        stream: ChunkStream, part_number: int
+    ) -> responses.GlacierRetrieval:
+        assert stream.read() == data
+        return _mock_upload(data, part_number)
+
+    upload_mock.return_value.upload_part_stream = upload_part_stream
+    facilitator = _create_facilitator(stream_buffer_size=10, upload_concurrency=2)
+
+    result = facilitator.transfer()
+
+    # The whole chunk would be joined in memory as its only sub-part
+    assert result is not None
+    assert "SubParts" not in result
+    upload_mock.return_value.upload_sub_parts.assert_not_called()
+
+
+def test_transfer_sub_parts_byte_range_exceeds_chunk_size(
+    glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
+    mock_item: GlacierTransferMetadata,
+) -> None:
+    _empty_glacier_retrieval_table(glacier_retrieval_table_mock)
+    mock_item.chunk_size = 64
+    glacier_retrieval_table_mock[0].put_item(
+        TableName=glacier_retrieval_table_mock[1], Item=mock_item.marshal()
+    )
+    facilitator = _create_facilitator(upload_concurrency=2)
+    with pytest.raises(InvalidGlacierRetrievalMetadata):
+        facilitator.transfer()
+
+
 def _create_facilitator(
     glacier_job_type: str = GlacierJobType.ARCHIVE_RETRIEVAL,
+    stream_buffer_size: int | None = None,
+    download_concurrency: int = 1,
+    upload_concurrency: int = 1,
+    part_number: int = 1,
+    staged_job_id: str | None = None,
+    download_window: str | None = None,
+    archive_size: int | None = None,
+    chunks_count: int | None = None,
 ) -> GlacierToS3Facilitator:
     return GlacierToS3Facilitator(
         glacier_client=boto3.client("glacier"),
@@ -287,12 +698,21 @@ def _create_facilitator(
         s3_destination_bucket="bucket1",
         s3_destination_key="key1",
         upload_id="upload1",
-        part_number=1,
+        part_number=part_number,
         glacier_job_type=glacier_job_type,
+        stream_buffer_size=stream_buffer_size,
+        download_concurrency=download_concurrency,
+        upload_concurrency=upload_concurrency,
+        staged_job_id=staged_job_id,
+        download_window=download_window,
+        archive_size=archive_size,
+        chunks_count=chunks_count,
     )
 
 
-def _mock_upload(data: bytes, part_number: int) -> responses.GlacierRetrieval:
+def _mock_upload(
+    data: bytes, part_number: int, sha256: bytes | None = None
+) -> responses.GlacierRetrieval:
     return {
         "ETag": "etag1",
         "PartNumber": part_number,
@@ -0,0 +1,120 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from base64 import b64encode
+from hashlib import sha256
+from typing import Tuple
+from unittest.mock import patch
+
+import pytest
+from mypy_boto3_dynamodb import DynamoDBClient
+
+from solution.application.glacier_s3_transfer import manifest
+from solution.application.hashing.tree_hash import ONE_MB
+from solution.application.model.responses import (
+    GlacierRetrieval as GlacierRetrievalResponse,
+)
+from solution.application.util import dynamodb
+
+
+def _part(part_number: int, sub_parts: int = 0) -> GlacierRetrievalResponse:
+    def checksum(value: str) -> str:
+        return b64encode(sha256(value.encode()).digest()).decode("ascii")
+
+    part: GlacierRetrievalResponse = {
+        "PartNumber": part_number,
+        "ETag": f'"{sha256(str(part_number).encode()).hexdigest()[:32]}"',
+        "ChecksumSHA256": checksum(f"chunk{part_number}"),
+        "TreeChecksum": checksum(f"tree{part_number}"),
+    }
+    if sub_parts:
+        part["ETag"] = ""
+        part["SubParts"] = [
+            {
+                "PartNumber": part_number * 10 + index,
+                "ETag": f'"{index:032x}"',
+                "ChecksumSHA256": checksum(f"sub{index}"),
+            }
+            for index in range(sub_parts)
+        ]
+    return part
+
+
+def test_pack_part_round_trip() -> None:
+    part = _part(3)
+    entry = manifest.pack_part(part)
+    assert len(entry) == 32 + 52
+
+    unpacked = manifest.unpack_part("workflow1", "archive1", 3, entry)
+    assert unpacked.part_number == 3
+    assert unpacked.e_tag == part["ETag"]
+    assert unpacked.checksum_sha_256 == part["ChecksumSHA256"]
+    assert unpacked.tree_checksum == part["TreeChecksum"]
+    assert unpacked.sub_parts is None
+
+
+def test_pack_part_round_trip_sub_parts() -> None:
+    part = _part(3, sub_parts=2)
+    entry = manifest.pack_part(part)
+    assert len(entry) == 32 + 2 * 52
+
+    unpacked = manifest.unpack_part("workflow1", "archive1", 3, entry)
+    assert unpacked.tree_checksum == part["TreeChecksum"]
+    assert unpacked.s3_parts == [
+        (s3_part["PartNumber"], s3_part["ETag"], s3_part["ChecksumSHA256"])
+        for s3_part in part["SubParts"]
+    ]
+
+
+def test_pack_part_rejects_unpackable_etag() -> None:
+    with pytest.raises(ValueError):
+        manifest.pack_part({**_part(1), "ETag": "etag1"})
+
+
+def test_shard_parts() -> None:
+    assert manifest.shard_parts(1024 * ONE_MB, 10000) == 350 * 1024 // (6 + 32 + 52)
+    # Chunks which can be uploaded as 16 S3 parts
+    assert manifest.shard_parts(1024 * ONE_MB, 10) == 350 * 1024 // (6 + 32 + 16 * 52)
+    assert manifest.part_shard(1, 10) == 0
+    assert manifest.part_shard(10, 10) == 0
+    assert manifest.part_shard(11, 10) == 1
+
+
+def test_shard_key() -> None:
+    key = manifest.shard_key("workflow1", "archive1", "upload1", 2)
+    assert key["pk"]["S"] == "workflow1|archive1"
+    assert key["sk"]["S"] == f"m|{manifest.upload_key('upload1')}|00002"
+    assert manifest.entry_name(12) == "p00012"
+
+
+@patch.object(dynamodb, "MAX_BATCH_GET_KEYS", 2)
+@patch.object(manifest, "shard_parts", return_value=2)
+def test_read_manifest(
+    _shard_parts_mock: object,
+    glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
+) -> None:
+    client, table_name = glacier_retrieval_table_mock
+    parts = {part_number: _part(part_number) for part_number in (1, 2, 3, 5, 7)}
+    for upload_id in ("upload1", "upload0"):
+        for part_number, part in parts.items():
+            client.update_item(
+                TableName=table_name,
+                Key=manifest.shard_key(
+                    "workflow1",
+                    "archive1",
+                    upload_id,
+                    manifest.part_shard(part_number, 2),
+                ),
+                UpdateExpression="SET #p = :entry",
+                ExpressionAttributeNames={"#p": manifest.entry_name(part_number)},
+                ExpressionAttributeValues={":entry": {"B": manifest.pack_part(part)}},
+            )
+
+    manifest_parts = manifest.read_manifest(
+        "workflow1", "archive1", "upload1", 1024 * ONE_MB, 7
+    )
+
+    assert sorted(manifest_parts) == [1, 2, 3, 5, 7]
+    assert manifest_parts[5].e_tag == parts[5]["ETag"]
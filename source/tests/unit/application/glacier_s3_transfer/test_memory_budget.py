@@ -0,0 +1,107 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import threading
+from concurrent import futures
+
+import pytest
+
+from solution.application.glacier_s3_transfer.memory_budget import (
+    MemoryBudget,
+    chunk_memory_estimate,
+    lambda_memory_budget,
+)
+from solution.application.glacier_s3_transfer.upload import UPLOAD_PART_SIZE
+from solution.application.hashing.tree_hash import ONE_MB
+
+
+def test_lambda_memory_budget(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("AWS_LAMBDA_FUNCTION_MEMORY_SIZE", "1024")
+    assert lambda_memory_budget() == 768 * ONE_MB
+
+
+@pytest.mark.parametrize(
+    "stream_buffer_size, download_concurrency, upload_concurrency, sub_part_size, expected",
+    [
+        (None, 1, 1, None, 2048 * ONE_MB),
+        (8 * ONE_MB, 1, 1, None, 16 * ONE_MB),
+        (8 * ONE_MB, 4, 1, None, 16 * ONE_MB + 4 * 64 * ONE_MB),
+        (
+            8 * ONE_MB,
+            4,
+            2,
+            UPLOAD_PART_SIZE,
+            16 * ONE_MB + 4 * 64 * ONE_MB + 2 * UPLOAD_PART_SIZE,
+        ),
+        (
+            8 * ONE_MB,
+            4,
+            2,
+            512 * ONE_MB,
+            16 * ONE_MB + 4 * 64 * ONE_MB + 2 * 512 * ONE_MB,
+        ),
+        # Chunks uploaded as a single part are streamed
+        (8 * ONE_MB, 4, 2, None, 16 * ONE_MB + 4 * 64 * ONE_MB),
+    ],
+)
+def test_chunk_memory_estimate(
+    stream_buffer_size: int | None,
+    download_concurrency: int,
+    upload_concurrency: int,
+    sub_part_size: int | None,
+    expected: int,
+) -> None:
+    assert (
+        chunk_memory_estimate(
+            1024 * ONE_MB,
+            stream_buffer_size,
+            download_concurrency,
+            64 * ONE_MB,
+            upload_concurrency,
+            sub_part_size,
+        )
+        == expected
+    )
+
+
+def test_chunk_memory_estimate_small_chunk() -> None:
+    assert (
+        chunk_memory_estimate(ONE_MB, ONE_MB, 4, 64 * ONE_MB, 4, UPLOAD_PART_SIZE)
+        == 10 * ONE_MB
+    )
+
+
+def test_memory_budget_bounds_reservations() -> None:
+    budget = MemoryBudget(10)
+    lock = threading.Lock()
+    reserved: list[int] = []
+
+    def reserve(size: int) -> None:
+        with budget.reserve(size):
+            with lock:
+                reserved.append(budget.reserved)
+            threading.Event().wait(0.01)
+
+    with futures.ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(reserve, [4] * 8))
+
+    assert len(reserved) == 8
+    assert max(reserved) <= 8
+    assert budget.reserved == 0
+
+
+def test_memory_budget_admits_oversized_reservation_alone() -> None:
+    budget = MemoryBudget(10)
+    with budget.reserve(20):
+        assert budget.reserved == 20
+    assert budget.reserved == 0
+
+
+def test_memory_budget_releases_on_error() -> None:
+    budget = MemoryBudget(10)
+    with pytest.raises(ValueError):
+        with budget.reserve(5):
+            raise ValueError
+    assert budget.reserved == 0
@@ -0,0 +1,234 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import io
+import os
+import tarfile
+from hashlib import sha256
+from typing import Any, Dict, Tuple
+from unittest.mock import Mock
+
+import pytest
+from mypy_boto3_dynamodb import DynamoDBClient
+from mypy_boto3_s3 import S3Client
+
+from solution.application.glacier_s3_transfer import packing
+from solution.application.glacier_service.glacier_typing import GlacierJobType
+from solution.application.hashing.chunk_hash import ChunkHash
+from solution.application.model import events
+from solution.application.model.glacier_transfer_meta_model import (
+    GlacierTransferMetadata,
+    GlacierTransferMetadataRead,
+)
+from solution.application.model.glacier_transfer_model import GlacierTransferModel
+from solution.application.util.exceptions import GlacierValidationMismatch
+from solution.infrastructure.output_keys import OutputKeys
+
+WORKFLOW_RUN = "workflow_packing"
+BUCKET_NAME = "test-packing-bucket"
+ARCHIVES = {
+    "archive_b": b"second archive",
+    "archive_a": b"first",
+    "archive_c": b"x" * 3000,
+}
+
+
+def _packing_event(archive_id: str, data: bytes) -> events.ArchivePacking:
+    return {
+        "JobId": f"job_{archive_id}",
+        "VaultName": "test_vault",
+        "WorkflowRun": WORKFLOW_RUN,
+        "GlacierObjectId": archive_id,
+        "FileName": f"dir/{archive_id}.txt",
+        "ArchiveSize": len(data),
+        "SHA256TreeHash": sha256(data).hexdigest(),
+        "S3StorageClass": "STANDARD",
+        "DownloadWindow": "2024-01-01T00:00:00.000Z",
+    }
+
+
+def _glacier(archives: Dict[str, bytes]) -> Mock:
+    def get_job_output(jobId: str, **_: Any) -> Dict[str, Any]:
+        data = archives[jobId.removeprefix("job_")]
+        return {"body": io.BytesIO(data), "checksum": sha256(data).hexdigest()}
+
+    glacier = Mock()
+    glacier.get_job_output.side_effect = get_job_output
+    return glacier
+
+
+@pytest.fixture
+def packing_bucket(
+    s3_client: S3Client, glacier_retrieval_table_mock: Tuple[DynamoDBClient, str]
+) -> DynamoDBClient:
+    s3_client.create_bucket(Bucket=BUCKET_NAME)
+    os.environ[OutputKeys.OUTPUT_BUCKET_NAME] = BUCKET_NAME
+    dynamodb_client, _ = glacier_retrieval_table_mock
+    for archive_id, data in ARCHIVES.items():
+        dynamodb_client.put_item(
+            TableName=os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME],
+            Item=GlacierTransferMetadata(
+                workflow_run=WORKFLOW_RUN,
+                glacier_object_id=archive_id,
+                job_id=f"job_{archive_id}",
+                start_time="",
+                vault_name="test_vault",
+                retrieval_type=GlacierJobType.ARCHIVE_RETRIEVAL,
+                description="",
+                retrieve_status=f"{WORKFLOW_RUN}/{GlacierTransferModel.StatusCode.STAGED}",
+                file_name=f"dir/{archive_id}.txt",
+                s3_storage_class="STANDARD",
+                size=len(data),
+            ).marshal(),
+        )
+    return dynamodb_client
+
+
+def test_pack_key_is_deterministic() -> None:
+    key = packing.pack_key(WORKFLOW_RUN, ["b", "a"])
+    assert key == packing.pack_key(WORKFLOW_RUN, ["a", "b"])
+    assert key != packing.pack_key(WORKFLOW_RUN, ["a"])
+    assert key.startswith(f"{WORKFLOW_RUN}/packs/") and key.endswith(".tar")
+
+
+def test_pack_archives(packing_bucket: DynamoDBClient, s3_client: S3Client) -> None:
+    failed = packing.pack_archives(
+        _glacier(ARCHIVES),
+        {
+            f"message_{archive_id}": _packing_event(archive_id, data)
+            for archive_id, data in ARCHIVES.items()
+        },
+    )
+    assert failed == []
+
+    key = packing.pack_key(WORKFLOW_RUN, list(ARCHIVES))
+    pack = s3_client.get_object(Bucket=BUCKET_NAME, Key=key)["Body"].read()
+    with tarfile.open(fileobj=io.BytesIO(pack)) as tar:
+        members = {
+            member.name: tar.extractfile(member).read()  # type: ignore
+            for member in tar
+        }
+    assert members == {
+        f"dir/{archive_id}.txt": data for archive_id, data in ARCHIVES.items()
+    }
+
+    index = packing.read_pack_index(BUCKET_NAME, key)
+    assert [entry["ArchiveId"] for entry in index] == sorted(ARCHIVES)
+    for entry in index:
+        data = ARCHIVES[entry["ArchiveId"]]
+        assert entry["Length"] == len(data)
+        assert entry["SHA256TreeHash"] == sha256(data).hexdigest()
+        assert packing.extract_archive(BUCKET_NAME, key, entry) == data
+
+        metadata = GlacierTransferMetadata.parse(
+            packing_bucket.get_item(
+                TableName=os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME],
+                Key=GlacierTransferMetadataRead(
+                    workflow_run=WORKFLOW_RUN, glacier_object_id=entry["ArchiveId"]
+                ).key,
+            )["Item"]
+        )
+        assert (
+            metadata.retrieve_status
+            == f"{WORKFLOW_RUN}/{GlacierTransferModel.StatusCode.DOWNLOADED}"
+        )
+        assert metadata.s3_destination_key == key
+        assert metadata.pack_offset == entry["Offset"]
+        assert metadata.pack_length == len(data)
+
+
+def test_pack_archives_reports_failed_downloads(
+    packing_bucket: DynamoDBClient, s3_client: S3Client
+) -> None:
+    corrupted = dict(ARCHIVES, archive_b=b"corrupted")
+    failed = packing.pack_archives(
+        _glacier(corrupted),
+        {
+            f"message_{archive_id}": _packing_event(archive_id, data)
+            for archive_id, data in ARCHIVES.items()
+        },
+    )
+    assert failed == ["message_archive_b"]
+
+    key = packing.pack_key(WORKFLOW_RUN, ["archive_a", "archive_c"])
+    index = packing.read_pack_index(BUCKET_NAME, key)
+    assert [entry["ArchiveId"] for entry in index] == ["archive_a", "archive_c"]
+
+
+def test_pack_archives_skips_packed_archives(
+    packing_bucket: DynamoDBClient, s3_client: S3Client
+) -> None:
+    packing_bucket.update_item(
+        TableName=os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME],
+        Key=GlacierTransferMetadataRead(
+            workflow_run=WORKFLOW_RUN, glacier_object_id="archive_a"
+        ).key,
+        UpdateExpression="SET retrieve_status = :rs",
+        ExpressionAttributeValues={
+            ":rs": {"S": f"{WORKFLOW_RUN}/{GlacierTransferModel.StatusCode.DOWNLOADED}"}
+        },
+    )
+    glacier = _glacier(ARCHIVES)
+    packing_events = {
+        f"message_{archive_id}": _packing_event(archive_id, data)
+        for archive_id, data in ARCHIVES.items()
+    }
+    # Sent again by a duplicate notification
+    packing_events["message_duplicate"] = packing_events["message_archive_b"]
+
+    assert packing.pack_archives(glacier, packing_events) == []
+
+    assert sorted(
+        call.kwargs["jobId"] for call in glacier.get_job_output.call_args_list
+    ) == ["job_archive_b", "job_archive_c"]
+    key = packing.pack_key(WORKFLOW_RUN, ["archive_b", "archive_c"])
+    index = packing.read_pack_index(BUCKET_NAME, key)
+    assert [entry["ArchiveId"] for entry in index] == ["archive_b", "archive_c"]
+
+
+def test_write_pack_keeps_first_pack(
+    packing_bucket: DynamoDBClient, s3_client: S3Client
+) -> None:
+    first = packing.pack_archives(
+        _glacier(ARCHIVES),
+        {"message": _packing_event("archive_a", ARCHIVES["archive_a"])},
+    )
+    assert first == []
+    # Downloaded by a concurrent batch after its status was read
+    archives = [
+        packing.PackedArchive(
+            f"message_{archive_id}",
+            _packing_event(archive_id, ARCHIVES[archive_id]),
+            ARCHIVES[archive_id],
+            ChunkHash(),
+        )
+        for archive_id in ("archive_a", "archive_b")
+    ]
+    packing.write_pack(WORKFLOW_RUN, archives)
+
+    metadata = GlacierTransferMetadata.parse(
+        packing_bucket.get_item(
+            TableName=os.environ[OutputKeys.GLACIER_RETRIEVAL_TABLE_NAME],
+            Key=GlacierTransferMetadataRead(
+                workflow_run=WORKFLOW_RUN, glacier_object_id="archive_a"
+            ).key,
+        )["Item"]
+    )
+    assert metadata.s3_destination_key == packing.pack_key(WORKFLOW_RUN, ["archive_a"])
+
+
+def test_extract_archive_mismatch(
+    packing_bucket: DynamoDBClient, s3_client: S3Client
+) -> None:
+    packing.pack_archives(
+        _glacier(ARCHIVES),
+        {"message": _packing_event("archive_a", ARCHIVES["archive_a"])},
+    )
+    key = packing.pack_key(WORKFLOW_RUN, ["archive_a"])
+    (entry,) = packing.read_pack_index(BUCKET_NAME, key)
+    entry["Offset"] -= 1
+
+    with pytest.raises(GlacierValidationMismatch):
+        packing.extract_archive(BUCKET_NAME, key, entry)
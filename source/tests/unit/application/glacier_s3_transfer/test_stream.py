@@ -0,0 +1,71 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import hashlib
+import io
+from typing import Iterator
+from unittest.mock import Mock
+
+import pytest
+
+from solution.application.glacier_s3_transfer.stream import ChunkStream
+from solution.application.hashing.tree_hash import ONE_MB, TreeHash
+
+TEST_DATA = b"abc" * ONE_MB
+
+
+def _mock_download(data: bytes) -> Mock:
+    def stream(buffer_size: int) -> Iterator[bytes]:
+        body = io.BytesIO(data)
+        while buffer := body.read(buffer_size):
+            yield buffer
+
+    download = Mock()
+    download.stream = stream
+    return download
+
+
+def test_read_in_small_sizes() -> None:
+    stream = ChunkStream(_mock_download(TEST_DATA), len(TEST_DATA), ONE_MB)
+    result = b"".join(iter(lambda: stream.read(100000), b""))
+    assert result == TEST_DATA
+    assert stream.bytes_read == len(TEST_DATA)
+
+
+def test_read_all() -> None:
+    stream = ChunkStream(_mock_download(TEST_DATA), len(TEST_DATA), ONE_MB)
+    assert stream.read() == TEST_DATA
+    assert stream.read(10) == b""
+
+
+def test_hashes_match_in_memory_hashes() -> None:
+    stream = ChunkStream(_mock_download(TEST_DATA), len(TEST_DATA), 3 * ONE_MB // 2)
+    stream.read()
+
+    tree_hash = TreeHash()
+    tree_hash.update(TEST_DATA)
+    assert stream.chunk_hash.tree_digest() == tree_hash.digest()
+    assert stream.checksum() == hashlib.sha256(TEST_DATA).digest()
+
+
+@pytest.mark.parametrize("size", [ONE_MB // 3, ONE_MB, 2 * ONE_MB])
+def test_parts(size: int) -> None:
+    stream = ChunkStream(_mock_download(TEST_DATA), len(TEST_DATA), ONE_MB)
+    parts = list(stream.parts(size))
+
+    assert b"".join(parts) == TEST_DATA
+    assert all(len(part) == size for part in parts[:-1])
+    assert stream.bytes_read == len(TEST_DATA)
+
+
+def test_len() -> None:
+    stream = ChunkStream(_mock_download(TEST_DATA), len(TEST_DATA))
+    assert len(stream) == len(TEST_DATA)
+
+
+@pytest.mark.parametrize("buffer_size", [0, -ONE_MB])
+def test_invalid_buffer_size(buffer_size: int) -> None:
+    with pytest.raises(ValueError):
+        ChunkStream(_mock_download(TEST_DATA), len(TEST_DATA), buffer_size)
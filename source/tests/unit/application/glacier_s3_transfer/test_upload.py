@@ -3,12 +3,25 @@ Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 SPDX-License-Identifier: Apache-2.0
 """
 
+import json
+from base64 import b64encode
+from hashlib import sha256
 from typing import TYPE_CHECKING
+from unittest.mock import Mock
 
 import pytest
 
-from solution.application.glacier_s3_transfer.upload import S3Upload
+from solution.application.glacier_s3_transfer.stream import ChunkStream
+from solution.application.glacier_s3_transfer.upload import (
+    MAX_PARTS,
+    S3Upload,
+    parts_per_chunk,
+    sub_part_number,
+    upload_sub_part_size,
+)
+from solution.application.hashing.tree_hash import ONE_MB
 from solution.application.model.glacier_transfer_part_model import GlacierTransferPart
+from solution.application.util.exceptions import GlacierValidationMismatch
 
 if TYPE_CHECKING:
     from mypy_boto3_s3.client import S3Client
@@ -38,6 +51,105 @@ def test_upload_part_2(s3_upload: S3Upload) -> None:
     assert part["PartNumber"] == 2
 
 
+def test_upload_part_stream(s3_upload: S3Upload) -> None:
+    data = b"test-chunk" * ONE_MB
+    download = Mock()
+    download.stream.return_value = iter([data[:ONE_MB], data[ONE_MB:]])
+    part = s3_upload.upload_part_stream(ChunkStream(download, len(data), ONE_MB), 1)
+    assert part["PartNumber"] == 1
+    assert part["ChecksumSHA256"] == b64encode(sha256(data).digest()).decode("ascii")
+
+
+def test_upload_part_stream_short_read(s3_upload: S3Upload) -> None:
+    download = Mock()
+    download.stream.return_value = iter([b"test-chunk"])
+    with pytest.raises(GlacierValidationMismatch):
+        s3_upload.upload_part_stream(ChunkStream(download, 20, ONE_MB), 1)
+
+
+@pytest.mark.parametrize(
+    "chunk_size, chunks_count, expected",
+    [
+        (1024 * ONE_MB, 1, 16),
+        (1024 * ONE_MB, 625, 16),
+        (1024 * ONE_MB, 626, 8),
+        (1024 * ONE_MB, 5000, 2),
+        (1024 * ONE_MB, 10000, 1),
+        (32 * ONE_MB, 1, 1),
+    ],
+)
+def test_parts_per_chunk(chunk_size: int, chunks_count: int, expected: int) -> None:
+    assert parts_per_chunk(chunk_size, chunks_count) == expected
+    assert expected * chunks_count <= MAX_PARTS
+
+
+@pytest.mark.parametrize(
+    "chunk_size, chunks_count, expected",
+    [
+        (1024 * ONE_MB, 625, 64 * ONE_MB),
+        (1024 * ONE_MB, 5000, 512 * ONE_MB),
+        (1024 * ONE_MB, 10000, None),
+        (32 * ONE_MB, 1, None),
+    ],
+)
+def test_upload_sub_part_size(
+    chunk_size: int, chunks_count: int, expected: int | None
+) -> None:
+    assert upload_sub_part_size(chunk_size, chunks_count) == expected
+
+
+def test_sub_part_number() -> None:
+    numbers = [
+        sub_part_number(part_number, index, 4)
+        for part_number in range(1, 4)
+        for index in range(4)
+    ]
+    assert numbers == list(range(1, 13))
+
+
+def test_upload_sub_parts(s3_upload: S3Upload) -> None:
+    data = b"test-chunk" * ONE_MB
+    view = memoryview(data)
+    size = 5 * ONE_MB
+    parts = s3_upload.upload_sub_parts(
+        (view[offset : offset + size] for offset in range(0, len(view), size)), 3, 2
+    )
+
+    assert [part["PartNumber"] for part in parts] == [3, 4]
+    assert parts[1]["ChecksumSHA256"] == b64encode(sha256(data[size:]).digest()).decode(
+        "ascii"
+    )
+
+
+def test_complete_upload_sub_parts(s3_upload: S3Upload) -> None:
+    data = b"test-chunk" * ONE_MB
+    chunks = {
+        # The last chunk only uses the first of its part numbers, leaving a gap
+        2: s3_upload.upload_sub_parts([b"test-chunk2"], 5, 2),
+        1: s3_upload.upload_sub_parts([data[: 5 * ONE_MB], data[5 * ONE_MB :]], 1, 2),
+    }
+    for part_number, s3_parts in chunks.items():
+        s3_upload.include_part(
+            GlacierTransferPart(
+                workflow_run="test_run",
+                glacier_object_id="test_id",
+                part_number=part_number,
+                e_tag="",
+                checksum_sha_256="chunk-checksum",
+                sub_parts=json.dumps(
+                    [
+                        [part["PartNumber"], part["ETag"], part["ChecksumSHA256"]]
+                        for part in s3_parts
+                    ]
+                ),
+            )
+        )
+
+    completion = s3_upload.complete_upload()
+    assert [part["PartNumber"] for part in s3_upload.parts] == [1, 2, 5]
+    assert completion["ETag"][-2] == "3"  # Assert that there were 3 parts included
+
+
 def test_include_part(s3_upload: S3Upload) -> None:
     glacier_transfer_part = GlacierTransferPart(
         workflow_run="test_run",
@@ -20,6 +20,7 @@ from mypy_boto3_s3.type_defs import (
 )
 
 from solution.application.db_accessor.dynamoDb_accessor import DynamoDBAccessor
+from solution.application.glacier_s3_transfer import manifest
 from solution.application.glacier_s3_transfer.upload import S3Upload
 from solution.application.glacier_s3_transfer.validator import validate_upload
 from solution.application.glacier_service.glacier_typing import GlacierJobType
@@ -111,6 +112,7 @@ def insert_glacier_retrieval_metadata(
     chunks_count: int = 1,
     size: int = 1,
     retrieval_type: str = GlacierJobType.ARCHIVE_RETRIEVAL,
+    completed_parts: int | None = None,
 ) -> None:
     glacier_transfer_metadata = GlacierTransferMetadata(
         workflow_run=WORKFLOW_RUN,
@@ -130,10 +132,32 @@ def insert_glacier_retrieval_metadata(
         chunks_count=chunks_count,
         upload_id=upload_id,
         sha256_tree_hash=b64decode(tree_checksum).hex(),
+        completed_parts=completed_parts,
     )
     ddb_accessor.insert_item(glacier_transfer_metadata.marshal())
 
 
+def insert_glacier_retrieval_manifest_entry(
+    ddb_accessor: DynamoDBAccessor,
+    upload_id: str,
+    part_data: GlacierRetrievalResponse,
+    tree_checksum: str,
+    s3_object_key: str,
+    shard: int = 0,
+) -> None:
+    ddb_accessor.dynamodb.update_item(
+        TableName=ddb_accessor.table_name,
+        Key=manifest.shard_key(WORKFLOW_RUN, s3_object_key, upload_id, shard),
+        UpdateExpression="SET #p = :entry",
+        ExpressionAttributeNames={"#p": manifest.entry_name(part_data["PartNumber"])},
+        ExpressionAttributeValues={
+            ":entry": {
+                "B": manifest.pack_part({**part_data, "TreeChecksum": tree_checksum})
+            }
+        },
+    )
+
+
 def test_validation_happy_path(
     output_bucket: S3Client,
     glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
@@ -196,6 +220,60 @@ def test_validation_happy_path(
     )
 
 
+@pytest.mark.parametrize("in_manifest", [(True, True), (True, False)])
+def test_validation_happy_path_manifest(
+    in_manifest: Tuple[bool, bool],
+    output_bucket: S3Client,
+    glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
+) -> None:
+    s3_object_key = "test_validation_happy_path_manifest"
+    glacier_retrieval_ddb_accessor = DynamoDBAccessor(glacier_retrieval_table_mock[1])
+    upload_id = create_multipart_upload(output_bucket, s3_object_key=s3_object_key)[
+        "UploadId"
+    ]
+    data = [b"0" * 5 * 2**20, TEST_DATA]
+    tree_hashes = [get_tree_hash(chunk) for chunk in data]
+
+    # Parts which could not be packed are read from their part items
+    for part_number, (chunk, tree_hash) in enumerate(zip(data, tree_hashes), 1):
+        part_data = upload_part(upload_id, part_number, chunk, s3_object_key)
+        if in_manifest[part_number - 1]:
+            insert_glacier_retrieval_manifest_entry(
+                glacier_retrieval_ddb_accessor,
+                upload_id,
+                part_data,
+                tree_hash,
+                s3_object_key,
+            )
+        else:
+            insert_glacier_retrieval_part_data(
+                glacier_retrieval_ddb_accessor, part_data, tree_hash, s3_object_key
+            )
+
+    archive_tree_hash = TreeHash()
+    for chunk_tree_hash in tree_hashes:
+        archive_tree_hash.include(b64decode(chunk_tree_hash))
+    insert_glacier_retrieval_metadata(
+        ddb_accessor=glacier_retrieval_ddb_accessor,
+        upload_id=upload_id,
+        tree_checksum=b64encode(archive_tree_hash.digest()).decode("ascii"),
+        s3_object_key=s3_object_key,
+        chunks_count=2,
+        size=len(data[0]) + len(data[1]),
+        completed_parts=2,
+    )
+
+    validate_upload(
+        workflow_run=WORKFLOW_RUN,
+        glacier_object_id=s3_object_key,
+        glacier_job_type=GlacierJobType.ARCHIVE_RETRIEVAL,
+    )
+
+    assert output_bucket.get_object(Bucket=OUTPUT_BUCKET_NAME, Key=s3_object_key)[
+        "Body"
+    ].read() == b"".join(data)
+
+
 def test_validation_happy_path_inventory(
     output_bucket: S3Client,
     glacier_retrieval_table_mock: Tuple[DynamoDBClient, str],
@@ -0,0 +1,87 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import hashlib
+
+import pytest
+
+from solution.application.hashing.chunk_hash import ChunkHash
+from solution.application.hashing.s3_hash import S3Hash
+from solution.application.hashing.tree_hash import TreeHash
+
+
+def test_matches_two_pass_hashes() -> None:
+    data = b"abc" * 1234567
+    tree_hash = TreeHash()
+    tree_hash.update(data)
+
+    chunk_hash = ChunkHash()
+    chunk_hash.update(data)
+
+    assert chunk_hash.leaves == _leaves(data, 2**20)
+    assert chunk_hash.tree_digest() == tree_hash.digest()
+    assert chunk_hash.digest() == S3Hash.hash(data)
+
+
+def test_precomputed_hash() -> None:
+    chunk_hash = ChunkHash()
+    chunk_hash.update(b"abc" * 1234567)
+    assert (
+        chunk_hash.tree_digest().hex()
+        == "5a245eddef1227623912286af0a6dd6f1a3cd67ad3d768c1490c2f8a0fafeca9"
+    )
+
+
+@pytest.mark.parametrize("buffer_size", [1, 7, 100, 999, 1000, 1001, 4096])
+def test_leaves_span_updates(buffer_size: int) -> None:
+    data = bytes(range(256)) * 40
+    tree_hash = TreeHash(chunk_size=1000)
+    tree_hash.update(data)
+
+    chunk_hash = ChunkHash(leaf_size=1000)
+    for i in range(0, len(data), buffer_size):
+        chunk_hash.update(memoryview(data)[i : i + buffer_size])
+
+    assert chunk_hash.leaves == _leaves(data, 1000)
+    assert chunk_hash.tree_digest() == tree_hash.digest()
+    assert chunk_hash.digest() == hashlib.sha256(data).digest()
+
+
+def test_empty_data() -> None:
+    chunk_hash = ChunkHash()
+    chunk_hash.update(b"")
+    assert chunk_hash.leaves == []
+    assert chunk_hash.tree_digest() == b""
+    assert chunk_hash.digest() == hashlib.sha256(b"").digest()
+
+
+def _leaves(data: bytes, leaf_size: int) -> list[bytes]:
+    return [
+        hashlib.sha256(data[i : i + leaf_size]).digest()
+        for i in range(0, len(data), leaf_size)
+    ]
+
+
+@pytest.mark.parametrize("buffer_size", [999, 1000, 2500, 10240])
+@pytest.mark.parametrize("max_workers", [2, 4])
+def test_parallel_matches_sequential(buffer_size: int, max_workers: int) -> None:
+    data = bytes(range(256)) * 40
+    sequential = ChunkHash(leaf_size=1000)
+    sequential.update(data)
+
+    parallel = ChunkHash(leaf_size=1000, max_workers=max_workers)
+    for i in range(0, len(data), buffer_size):
+        parallel.update(data[i : i + buffer_size])
+
+    assert parallel.leaves == sequential.leaves
+    assert parallel.tree_digest() == sequential.tree_digest()
+    assert parallel.digest() == sequential.digest()
+
+
+def test_elapsed_time_is_recorded() -> None:
+    chunk_hash = ChunkHash(max_workers=2)
+    assert chunk_hash.elapsed == 0
+    chunk_hash.update(b"abc" * 1234567)
+    assert chunk_hash.elapsed > 0
@@ -4,6 +4,9 @@ SPDX-License-Identifier: Apache-2.0
 """
 
 import hashlib
+import random
+
+import pytest
 
 from solution.application.hashing.tree_hash import TreeHash
 
@@ -56,3 +59,60 @@ def test_precomputed_hash() -> None:
     th = TreeHash()
     th.update(data)
     assert th.digest().hex() == expected_hash
+
+
+@pytest.mark.parametrize("leaves_count", list(range(1, 70)) + [1000, 1023, 1025])
+def test_incremental_digest_matches_pairwise_digest(leaves_count: int) -> None:
+    leaves = [hashlib.sha256(str(i).encode()).digest() for i in range(leaves_count)]
+    th = TreeHash()
+    for leaf in leaves:
+        th.include(leaf)
+    assert th.digest() == _pairwise_digest(leaves)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_interleaved_digests_match_pairwise_digest(seed: int) -> None:
+    generator = random.Random(seed)
+    leaves: list[bytes] = []
+    th = TreeHash()
+    for _ in range(generator.randint(1, 3000)):
+        leaf = generator.randbytes(32)
+        leaves.append(leaf)
+        th.include(leaf)
+        if generator.random() < 0.01:
+            assert th.digest() == _pairwise_digest(leaves)
+    assert th.digest() == _pairwise_digest(leaves)
+
+
+def test_state_is_logarithmic() -> None:
+    th = TreeHash()
+    for i in range(10000):
+        th.include(hashlib.sha256(str(i).encode()).digest())
+    assert len(th.stack) <= 14
+
+
+def test_copy_is_independent() -> None:
+    th = TreeHash()
+    th.update(b"abc" * 1234567)
+    copy = th.copy()
+    copy.include(hashlib.sha256(b"abc").digest())
+    assert th.digest() != copy.digest()
+    assert (
+        th.digest().hex()
+        == "5a245eddef1227623912286af0a6dd6f1a3cd67ad3d768c1490c2f8a0fafeca9"
+    )
+
+
+def _pairwise_digest(hashes: list[bytes]) -> bytes:
+    # Reference implementation reducing each level pairwise
+    calc_hashes = hashes.copy()
+    while len(calc_hashes) > 1:
+        next_hashes = []
+        while len(calc_hashes) > 1:
+            next_hashes.append(
+                hashlib.sha256(calc_hashes.pop(0) + calc_hashes.pop(0)).digest()
+            )
+        if len(calc_hashes) > 0:
+            next_hashes.append(calc_hashes.pop(0))
+        calc_hashes = next_hashes
+    return calc_hashes[0]
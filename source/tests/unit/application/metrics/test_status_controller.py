@@ -205,3 +205,23 @@ def test_increase_archive_status_metric_counter() -> None:
     assert (
         controller.workflow_run_metrics[WORKFLOW_RUN_1]["staged_size"] == ARCHIVE_SIZE
     )
+
+
+def test_increase_archive_status_metric_counter_requested_to_downloaded() -> None:
+    controller = StatusMetricController(records=[])
+
+    controller.increase_archive_status_metric_counter(
+        mock_image(WORKFLOW_RUN_1, GlacierTransferModel.StatusCode.DOWNLOADED),
+        mock_image(WORKFLOW_RUN_1, GlacierTransferModel.StatusCode.REQUESTED),
+    )
+
+    metrics = controller.workflow_run_metrics[WORKFLOW_RUN_1]
+    assert metrics["requested_count"] == 0
+    assert metrics["staged_count"] == 1
+    assert metrics["staged_size"] == ARCHIVE_SIZE
+    assert metrics["downloaded_count"] == 1
+    assert metrics["downloaded_size"] == ARCHIVE_SIZE
+    assert [entry.split(" - ")[-1] for entry in controller.counted_logs] == [
+        "counted_status:staged",
+        "counted_status:downloaded",
+    ]
@@ -5,6 +5,9 @@ SPDX-License-Identifier: Apache-2.0
 
 import pytest
 
+from solution.application.model.glacier_transfer_manifest_model import (
+    GlacierTransferManifestRead,
+)
 from solution.application.model.glacier_transfer_part_model import (
     GlacierTransferPart,
     GlacierTransferPartRead,
@@ -33,6 +36,25 @@ def test_glacier_transfer_part_model(
     assert GlacierTransferPart.parse(marshaled).part_number == 1
 
 
+def test_glacier_transfer_part_model_s3_parts() -> None:
+    part_model = GlacierTransferPart(
+        workflow_run="run_id",
+        glacier_object_id="object_id",
+        checksum_sha_256="shachecksum",
+        e_tag="etag",
+        part_number=1,
+    )
+    assert part_model.s3_parts == [(1, "etag", "shachecksum")]
+
+    part_model.sub_parts = '[[5, "etag5", "checksum5"], [6, "etag6", "checksum6"]]'
+    marshaled = part_model.marshal()
+    assert marshaled["sub_parts"]["S"] == part_model.sub_parts
+    assert GlacierTransferPart.parse(marshaled).s3_parts == [
+        (5, "etag5", "checksum5"),
+        (6, "etag6", "checksum6"),
+    ]
+
+
 @pytest.fixture
 def part_model(tree_checksum: str | None) -> GlacierTransferPart:
     return GlacierTransferPart(
@@ -76,3 +98,16 @@ def part_model_read(part_number: int) -> GlacierTransferPartRead:
         glacier_object_id="object_id",
         part_number=part_number,
     )
+
+
+def test_glacier_transfer_manifest_model() -> None:
+    manifest_model = GlacierTransferManifestRead(
+        workflow_run="run_id", glacier_object_id="object_id", upload_key="key", shard=3
+    )
+    assert manifest_model.key == {
+        "pk": {"S": "run_id|object_id"},
+        "sk": {"S": "m|key|00003"},
+    }
+    parsed = GlacierTransferManifestRead.parse(manifest_model.marshal())
+    assert parsed.upload_key == "key"
+    assert parsed.shard == 3
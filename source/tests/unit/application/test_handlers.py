@@ -4,7 +4,7 @@ SPDX-License-Identifier: Apache-2.0
 """
 
 import json
-from typing import Any, Iterator, Type
+from typing import Any, Callable, Iterator, Type
 from unittest.mock import Mock
 
 import pytest
@@ -101,7 +101,9 @@ class TestNotificationProcessor:
     def test_for_archive_retrieval_event(
         self, mock_handle_archive_job_notification: Mock
     ) -> None:
-        assert notifications_processor(mocked_sqs_event, None) is None
+        assert notifications_processor(mocked_sqs_event, None) == {
+            "batchItemFailures": []
+        }
         mock_handle_archive_job_notification.assert_called_once_with(
             json.loads(str(mocked_sqs_event["Records"][0]["body"]))["Message"]
         )
@@ -117,12 +119,98 @@ class TestNotificationProcessor:
         )
 
         # Act/Assert
-        assert notifications_processor(mocked_sqs_event, None) is None
+        assert notifications_processor(mocked_sqs_event, None) == {
+            "batchItemFailures": []
+        }
         mock_handle_archive_job_notification.assert_not_called()
         mock_handle_job_notification.assert_called_once_with(
             json.loads(str(mocked_sqs_event["Records"][0]["body"]))["Message"]
         )
 
+    def test_reports_failed_records(
+        self, mock_handle_archive_job_notification: Mock
+    ) -> None:
+        records = [
+            dict(
+                mocked_sqs_event["Records"][0],
+                messageId=str(message_id),
+                body=json.dumps(
+                    {
+                        "Message": json.dumps(
+                            {"Action": "ArchiveRetrieval", "JobId": f"job{message_id}"}
+                        )
+                    }
+                ),
+            )
+            for message_id in range(3)
+        ]
+        mock_handle_archive_job_notification.side_effect = self._fail_job("job1")
+
+        result = notifications_processor({"Records": records}, None)
+
+        assert result == {"batchItemFailures": [{"itemIdentifier": "1"}]}
+        assert mock_handle_archive_job_notification.call_count == 3
+
+    def test_reports_malformed_records(
+        self, mock_handle_archive_job_notification: Mock
+    ) -> None:
+        records = [
+            dict(
+                mocked_sqs_event["Records"][0],
+                messageId="0",
+                body=json.dumps(
+                    {
+                        "Message": json.dumps(
+                            {"Action": "ArchiveRetrieval", "JobId": "job0"}
+                        )
+                    }
+                ),
+            ),
+            dict(mocked_sqs_event["Records"][0], messageId="1", body="malformed"),
+            dict(mocked_sqs_event["Records"][0], messageId="2", body=json.dumps({})),
+        ]
+
+        result = notifications_processor({"Records": records}, None)
+
+        assert result == {
+            "batchItemFailures": [{"itemIdentifier": "1"}, {"itemIdentifier": "2"}]
+        }
+        mock_handle_archive_job_notification.assert_called_once()
+
+    def test_processes_duplicate_notifications_once(
+        self, mock_handle_archive_job_notification: Mock
+    ) -> None:
+        records = [
+            dict(
+                mocked_sqs_event["Records"][0],
+                messageId=str(message_id),
+                body=json.dumps(
+                    {
+                        "Message": json.dumps(
+                            {"Action": "ArchiveRetrieval", "JobId": "duplicate"}
+                        )
+                    }
+                ),
+            )
+            for message_id in range(2)
+        ]
+        mock_handle_archive_job_notification.side_effect = self._fail_job("duplicate")
+
+        result = notifications_processor({"Records": records}, None)
+
+        mock_handle_archive_job_notification.assert_called_once()
+        assert result == {
+            "batchItemFailures": [{"itemIdentifier": "0"}, {"itemIdentifier": "1"}]
+        }
+
+    @staticmethod
+    def _fail_job(job_id: str) -> Callable[[str], None]:
+        def handle(message_str: str) -> None:
+            if json.loads(message_str)["JobId"] == job_id:
+                raise ValueError(job_id)
+
+        return handle
+
 
 class TestAsyncFacilitator:
     @pytest.fixture
@@ -161,7 +249,7 @@ class TestArchiveRetrieval:
             {
                 "VaultName": "test_vault",
                 "WorkflowRun": "test_workflow_run",
-                "ByteRange": "test_byte_range",
+                "ByteRange": "0-1023",
                 "GlacierObjectId": "test_glacier_object_id",
                 "S3DestinationBucket": "XXXXXXXXXXXXXXXXXXXXXXXXXX",
                 "S3DestinationKey": "XXXXXXXXXXXXXXXXXXXXXXXXXX",
@@ -188,14 +276,71 @@ class TestArchiveRetrieval:
         mock_glacier_to_s3_facilitator: Mock,
         glacier_client: Iterator[GlacierClient],
     ) -> None:
-        archive_retrieval(mocked_sqs_event, None)
+        assert archive_retrieval(mocked_sqs_event, None) == {"batchItemFailures": []}
         mock_glacier_to_s3_facilitator.assert_called_once()
         mock_glacier_to_s3_facilitator.return_value.transfer.assert_called_once_with()
-        mock_glacier_to_s3_facilitator.return_value.send_validation_event.assert_called_once_with()
+        mock_glacier_to_s3_facilitator.return_value.validate_if_last_chunk.assert_called_once_with()
 
-        # check for send_validation_event() not called
+        # check for validate_if_last_chunk() not called
         mock_glacier_to_s3_facilitator.reset_mock()
         mock_glacier_to_s3_facilitator.return_value.transfer.return_value = None
         archive_retrieval(mocked_sqs_event, None)
         mock_glacier_to_s3_facilitator.return_value.transfer.assert_called_once_with()
-        mock_glacier_to_s3_facilitator.return_value.send_validation_event.assert_not_called()
+        mock_glacier_to_s3_facilitator.return_value.validate_if_last_chunk.assert_not_called()
+
+    def test_reads_chunk_plan(
+        self,
+        mock_glacier_to_s3_facilitator: Mock,
+        glacier_client: Iterator[GlacierClient],
+    ) -> None:
+        record = dict(mocked_sqs_event["Records"][0])
+        record["body"] = json.dumps(
+            dict(
+                json.loads(record["body"]),
+                ChunkPlan={"Size": 3000, "ChunkSize": 1024, "Overlap": 0},
+            )
+        )
+
+        archive_retrieval({"Records": [record]}, None)
+
+        kwargs = mock_glacier_to_s3_facilitator.call_args.kwargs
+        assert kwargs["archive_size"] == 3000
+        assert kwargs["chunks_count"] == 3
+        assert kwargs["chunk_size"] == 1024
+
+    def test_reports_failed_records(
+        self,
+        mock_glacier_to_s3_facilitator: Mock,
+        glacier_client: Iterator[GlacierClient],
+    ) -> None:
+        records = [
+            dict(mocked_sqs_event["Records"][0], messageId=str(message_id))
+            for message_id in range(3)
+        ]
+        mock_glacier_to_s3_facilitator.side_effect = lambda **kwargs: (
+            Mock(transfer=Mock(side_effect=ValueError))
+            if kwargs["glacier_object_id"] == "failing"
+            else Mock()
+        )
+        records[1]["body"] = json.dumps(
+            dict(json.loads(records[1]["body"]), GlacierObjectId="failing")
+        )
+
+        result = archive_retrieval({"Records": records}, None)
+
+        assert result == {"batchItemFailures": [{"itemIdentifier": "1"}]}
+        assert mock_glacier_to_s3_facilitator.call_count == 3
+
+    def test_does_not_start_records_near_timeout(
+        self,
+        mock_glacier_to_s3_facilitator: Mock,
+        glacier_client: Iterator[GlacierClient],
+    ) -> None:
+        context = Mock()
+        context.invoked_function_arn = "arn:aws:lambda:us-east-1:123456789012:function"
+        context.get_remaining_time_in_millis.return_value = 1000
+
+        result = archive_retrieval(mocked_sqs_event, context)
+
+        assert result == {"batchItemFailures": [{"itemIdentifier": "1"}]}
+        mock_glacier_to_s3_facilitator.assert_not_called()
@@ -0,0 +1,55 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from concurrent import futures
+from unittest.mock import patch
+
+from solution.application import __boto_config__
+from solution.application.archive_retrieval.initiator import INITIATION_WORKERS
+from solution.application.archive_retrieval.lanes import RETRIEVAL_LANES
+from solution.application.archive_retrieval.notification_processor import (
+    FAN_OUT_WORKERS,
+    NOTIFICATION_WORKERS,
+)
+from solution.application.util.clients import (
+    MAX_POOL_CONNECTIONS,
+    clear_clients,
+    get_client,
+)
+
+
+def test_get_client_reuses_clients() -> None:
+    s3 = get_client("s3")
+    assert get_client("s3") is s3
+    assert get_client("sqs") is not s3
+
+    clear_clients()
+    assert get_client("s3") is not s3
+
+
+def test_get_client_creates_one_client_across_threads() -> None:
+    with patch("boto3.client") as client_mock:
+        with futures.ThreadPoolExecutor(max_workers=8) as executor:
+            clients = list(executor.map(lambda _: get_client("dynamodb"), range(32)))
+
+    client_mock.assert_called_once()
+    assert all(client is clients[0] for client in clients)
+
+
+def test_get_client_config() -> None:
+    config = get_client("glacier").meta.config
+    assert config.max_pool_connections == MAX_POOL_CONNECTIONS
+    assert config.__getattribute__(
+        "user_agent_extra"
+    ) == __boto_config__.__getattribute__("user_agent_extra")
+
+
+def test_pool_covers_thread_pools() -> None:
+    assert MAX_POOL_CONNECTIONS >= INITIATION_WORKERS
+    assert MAX_POOL_CONNECTIONS >= NOTIFICATION_WORKERS + FAN_OUT_WORKERS
+    for lane in RETRIEVAL_LANES:
+        assert MAX_POOL_CONNECTIONS >= lane.batch_size * (
+            lane.download_concurrency + lane.upload_concurrency
+        )
@@ -0,0 +1,93 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from typing import TYPE_CHECKING, List
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from solution.application.util import dynamodb
+from solution.application.util.exceptions import MaximumRetryLimitExceeded
+
+if TYPE_CHECKING:
+    from mypy_boto3_dynamodb.type_defs import WriteRequestTypeDef
+else:
+    WriteRequestTypeDef = object
+
+TABLE_NAME = "test_table"
+
+
+@patch("time.sleep")
+def test_batch_get_items_retries_unprocessed_keys(sleep_mock: MagicMock) -> None:
+    keys = [{"pk": {"S": f"key_{i}"}} for i in range(3)]
+    ddb_client = MagicMock()
+    ddb_client.batch_get_item.side_effect = [
+        {
+            "Responses": {TABLE_NAME: [keys[0]]},
+            "UnprocessedKeys": {TABLE_NAME: {"Keys": keys[1:]}},
+        },
+        {"Responses": {TABLE_NAME: keys[1:]}, "UnprocessedKeys": {}},
+    ]
+
+    items = dynamodb.batch_get_items(
+        ddb_client, TABLE_NAME, keys, ProjectionExpression="pk"
+    )
+
+    assert items == keys
+    first_request, retry = ddb_client.batch_get_item.call_args_list
+    assert first_request.kwargs["RequestItems"] == {
+        TABLE_NAME: {"Keys": keys, "ProjectionExpression": "pk"}
+    }
+    assert retry.kwargs["RequestItems"] == {TABLE_NAME: {"Keys": keys[1:]}}
+    sleep_mock.assert_called_once_with(dynamodb.BATCH_BACKOFF_SECONDS)
+
+
+@patch.object(dynamodb, "MAX_BATCH_GET_KEYS", 2)
+def test_batch_get_items_chunks_keys() -> None:
+    keys = [{"pk": {"S": f"key_{i}"}} for i in range(5)]
+    ddb_client = MagicMock()
+    ddb_client.batch_get_item.return_value = {"Responses": {}}
+
+    assert dynamodb.batch_get_items(ddb_client, TABLE_NAME, keys) == []
+    assert [
+        call.kwargs["RequestItems"][TABLE_NAME]["Keys"]
+        for call in ddb_client.batch_get_item.call_args_list
+    ] == [keys[0:2], keys[2:4], keys[4:]]
+
+
+@patch("time.sleep")
+def test_batch_write_items_retries_unprocessed_items(sleep_mock: MagicMock) -> None:
+    requests: List[WriteRequestTypeDef] = [
+        {"PutRequest": {"Item": {"pk": {"S": f"key_{i}"}}}} for i in range(27)
+    ]
+    ddb_client = MagicMock()
+    ddb_client.batch_write_item.side_effect = [
+        {"UnprocessedItems": {TABLE_NAME: requests[20:25]}},
+        {"UnprocessedItems": {}},
+        {},
+    ]
+
+    dynamodb.batch_write_items(ddb_client, TABLE_NAME, requests)
+
+    assert [
+        call.kwargs["RequestItems"][TABLE_NAME]
+        for call in ddb_client.batch_write_item.call_args_list
+    ] == [requests[:25], requests[20:25], requests[25:]]
+    sleep_mock.assert_called_once_with(dynamodb.BATCH_BACKOFF_SECONDS)
+
+
+@patch("time.sleep")
+def test_batch_write_items_raises_after_attempts(_sleep_mock: MagicMock) -> None:
+    requests: List[WriteRequestTypeDef] = [
+        {"PutRequest": {"Item": {"pk": {"S": "key"}}}}
+    ]
+    ddb_client = MagicMock()
+    ddb_client.batch_write_item.return_value = {
+        "UnprocessedItems": {TABLE_NAME: requests}
+    }
+
+    with pytest.raises(MaximumRetryLimitExceeded):
+        dynamodb.batch_write_items(ddb_client, TABLE_NAME, requests)
+    assert ddb_client.batch_write_item.call_count == dynamodb.BATCH_WRITE_ATTEMPTS
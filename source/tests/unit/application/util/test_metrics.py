@@ -0,0 +1,24 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import json
+
+import pytest
+
+from solution.application.util.metrics import METRICS_NAMESPACE, put_metrics
+
+
+def test_put_metrics(capsys: pytest.CaptureFixture[str]) -> None:
+    put_metrics({"ChunkEventsEnqueued": (20, "Count"), "Rate": (2.5, "Count/Second")})
+
+    metrics = json.loads(capsys.readouterr().out)
+    assert metrics["ChunkEventsEnqueued"] == 20
+    assert metrics["Rate"] == 2.5
+    (directive,) = metrics["_aws"]["CloudWatchMetrics"]
+    assert directive["Namespace"] == METRICS_NAMESPACE
+    assert directive["Metrics"] == [
+        {"Name": "ChunkEventsEnqueued", "Unit": "Count"},
+        {"Name": "Rate", "Unit": "Count/Second"},
+    ]
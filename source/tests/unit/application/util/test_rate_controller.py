@@ -0,0 +1,69 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from typing import List
+
+import pytest
+
+from solution.application.util.rate_controller import RateController
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+        self.sleeps: List[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _controller(clock: FakeClock, initial_rate: float = 10.0) -> RateController:
+    return RateController(initial_rate, 1.0, 20.0, clock=clock, sleep=clock.sleep)
+
+
+def test_acquire_paces_calls() -> None:
+    clock = FakeClock()
+    controller = _controller(clock)
+
+    for _ in range(3):
+        controller.acquire()
+
+    assert clock.sleeps == pytest.approx([0.1, 0.1])
+
+
+def test_additive_increase() -> None:
+    clock = FakeClock()
+    controller = _controller(clock)
+
+    # About a second of calls at 10 calls per second raises the rate by about 1
+    for _ in range(10):
+        controller.succeeded()
+    assert 10.9 < controller.rate < 11.0
+
+    for _ in range(1000):
+        controller.succeeded()
+    assert controller.rate == controller.max_rate
+
+
+def test_multiplicative_decrease_once_per_interval() -> None:
+    clock = FakeClock()
+    controller = _controller(clock, initial_rate=16.0)
+
+    controller.throttled()
+    controller.throttled()
+    assert controller.rate == 8.0
+
+    clock.now += controller.decrease_interval
+    controller.throttled()
+    assert controller.rate == 4.0
+
+    for _ in range(5):
+        clock.now += controller.decrease_interval
+        controller.throttled()
+    assert controller.rate == controller.min_rate
@@ -0,0 +1,40 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from unittest.mock import patch
+
+from solution.application.util.ttl_cache import TTLCache
+
+
+def test_get_returns_stored_value_until_expired() -> None:
+    cache: TTLCache[str, int] = TTLCache(ttl=10)
+    with patch("time.monotonic", return_value=100.0):
+        cache.put("key", 1)
+    with patch("time.monotonic", return_value=109.9):
+        assert cache.get("key") == 1
+    with patch("time.monotonic", return_value=110.0):
+        assert cache.get("key") is None
+    assert cache.get("missing") is None
+
+
+def test_put_evicts_oldest_entry() -> None:
+    cache: TTLCache[str, int] = TTLCache(ttl=10, maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("a", 3)
+    cache.put("c", 4)
+    assert cache.get("b") is None
+    assert cache.get("a") == 3
+    assert cache.get("c") == 4
+
+
+def test_invalidate_and_clear() -> None:
+    cache: TTLCache[str, int] = TTLCache(ttl=10)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.invalidate("a")
+    assert cache.get("a") is None
+    cache.clear()
+    assert cache.get("b") is None
@@ -21,6 +21,8 @@ from mypy_boto3_glacier import GlacierClient
 from mypy_boto3_s3 import S3Client
 from mypy_boto3_sqs import SQSClient
 
+from solution.application.glacier_s3_transfer.facilitator import clear_metadata_cache
+from solution.application.util.clients import clear_clients
 from solution.infrastructure.aspects.app_registry import AppRegistry
 from solution.infrastructure.output_keys import OutputKeys
 from solution.infrastructure.stack import SolutionStack
@@ -47,6 +49,14 @@ def aws_credentials() -> None:
     os.environ["LOGGING_LEVEL"] = str(logging.INFO)
 
 
+@pytest.fixture(autouse=True)
+def clear_process_caches() -> None:
+    # Clients and retrieval metadata are cached per process, so each test creates
+    # its own within its mocks
+    clear_clients()
+    clear_metadata_cache()
+
+
 @pytest.fixture(scope="module")
 def solution_user_agent() -> str:
     return "AwsSolution/SO0293/v1.1.3"
@@ -0,0 +1,128 @@
+"""
+Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+SPDX-License-Identifier: Apache-2.0
+"""
+from typing import List
+
+import pytest
+from pyspark.sql import DataFrame, SparkSession
+
+from solution.infrastructure.glue_helper.scripts.partitioning import (
+    PARTITION_SIZE,
+    REQUEST_RANGE_SIZE,
+    add_partitions,
+    parse_retrieval_priority,
+    request_efficiency,
+)
+
+COLUMNS = ["ArchiveId", "CreationDate", "Size", "Filename"]
+ARCHIVES = [
+    ("archive_1", "2020-01-01T00:00:00Z", 4 * 2**30, "docs/report.pdf"),
+    ("archive_2", "2020-01-02T00:00:00Z", 2**20, "photos/cat.jpg"),
+    ("archive_3", "2020-01-03T00:00:00Z", 64 * 2**20, "videos/holiday.mp4"),
+    ("archive_4", "2020-01-04T00:00:00Z", 2**10, "photos/dog.jpg"),
+]
+
+
+def test_parse_retrieval_priority() -> None:
+    assert parse_retrieval_priority("") == ("CreationDate", [])
+    assert parse_retrieval_priority("SizeAscending") == ("SizeAscending", [])
+    assert parse_retrieval_priority("KeyPrefix:photos/,docs/") == (
+        "KeyPrefix",
+        ["photos/", "docs/"],
+    )
+    with pytest.raises(ValueError):
+        parse_retrieval_priority("Newest")
+
+
+def test_request_efficiency() -> None:
+    # Archives smaller than a request range are dominated by their job initiation
+    assert request_efficiency(2**20) == 2**19
+    assert request_efficiency(REQUEST_RANGE_SIZE) == REQUEST_RANGE_SIZE / 2
+    assert request_efficiency(100 * REQUEST_RANGE_SIZE) == pytest.approx(
+        REQUEST_RANGE_SIZE * 100 / 101
+    )
+
+
+def _retrieval_order(
+    retrieval_priority: str, priority_list: DataFrame | None = None
+) -> List[str]:
+    spark = SparkSession.builder.appName("TestApp").getOrCreate()
+    df = spark.createDataFrame(ARCHIVES, COLUMNS)
+    result_df = add_partitions(df, retrieval_priority, priority_list)
+    return [
+        row.ArchiveId
+        for row in result_df.orderBy("RetrievalOrder").select("ArchiveId").collect()
+    ]
+
+
+def test_add_partitions_by_creation_date() -> None:
+    assert _retrieval_order("CreationDate") == [
+        "archive_1",
+        "archive_2",
+        "archive_3",
+        "archive_4",
+    ]
+
+
+def test_add_partitions_by_key_prefix() -> None:
+    assert _retrieval_order("KeyPrefix:photos/,videos/") == [
+        "archive_2",
+        "archive_4",
+        "archive_3",
+        "archive_1",
+    ]
+
+
+def test_add_partitions_by_size() -> None:
+    assert _retrieval_order("SizeAscending") == [
+        "archive_4",
+        "archive_2",
+        "archive_3",
+        "archive_1",
+    ]
+    assert _retrieval_order("SizeDescending") == [
+        "archive_1",
+        "archive_3",
+        "archive_2",
+        "archive_4",
+    ]
+
+
+def test_add_partitions_by_priority_list() -> None:
+    spark = SparkSession.builder.appName("TestApp").getOrCreate()
+    priority_list = spark.createDataFrame(
+        [("",), ("archive_3",), ("archive_2",)], ["GlacierArchiveID"]
+    )
+    assert _retrieval_order("PriorityList", priority_list) == [
+        "archive_3",
+        "archive_2",
+        "archive_1",
+        "archive_4",
+    ]
+
+
+def test_add_partitions_by_request_efficiency() -> None:
+    assert _retrieval_order("RequestEfficiency") == [
+        "archive_1",
+        "archive_3",
+        "archive_2",
+        "archive_4",
+    ]
+
+
+def test_add_partitions_follow_retrieval_order() -> None:
+    spark = SparkSession.builder.appName("TestApp").getOrCreate()
+    df = spark.createDataFrame(
+        [
+            ("archive_1", "2020-01-01T00:00:00Z", PARTITION_SIZE, "a"),
+            ("archive_2", "2020-01-02T00:00:00Z", 1, "b"),
+        ],
+        COLUMNS,
+    )
+    result_df = add_partitions(df, "SizeAscending")
+    partitions = {
+        row.ArchiveId: row.PartitionId
+        for row in result_df.select("ArchiveId", "PartitionId").collect()
+    }
+    assert partitions == {"archive_2": "0000000000", "archive_1": "0000000001"}
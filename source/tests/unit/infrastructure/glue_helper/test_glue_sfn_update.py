@@ -167,7 +167,7 @@ def test_autogenerate_etl_script(glue_sfn_update: GlueSfnUpdate) -> None:
                     "node-9": {
                         "CustomCode": {
                             "Name": "ArchiveNaming",
-                            "Inputs": ["node-7"],
+                            "Inputs": ["node-7", "node-19"],
                             "ClassName": "ArchiveNaming",
                             "Code": glue_sfn_update.custom_code,
                         }
@@ -284,6 +284,20 @@ def test_autogenerate_etl_script(glue_sfn_update: GlueSfnUpdate) -> None:
                             "Path.$": "States.Format('s3://test-bucket/{}/sorted_inventory/', $.workflow_run)",
                         }
                     },
+                    "node-19": {
+                        "S3CsvSource": {
+                            "Name": "S3 bucket - Priority List",
+                            "Paths.$": "States.Array(States.Format('s3://test-bucket/{}/priority_list/', $.workflow_run))",
+                            "QuoteChar": "quote",
+                            "Separator": "comma",
+                            "Recurse": True,
+                            "WithHeader": True,
+                            "Escaper": "",
+                            "OutputSchemas": [
+                                {"Columns": glue_sfn_update.priority_list_columns}
+                            ],
+                        }
+                    },
                 },
                 "Command": {
                     "Name": "glueetl",
@@ -306,3 +320,13 @@ def test_start_job(glue_sfn_update: GlueSfnUpdate) -> None:
         == "true"
     )
     assert state_json["Parameters"]["Arguments"]["--job-language"] == "python"
+    assert (
+        state_json["Parameters"]["Arguments"]["--retrieval_priority.$"]
+        == "$.retrieval_priority"
+    )
+
+
+def test_sorting_follows_retrieval_order() -> None:
+    assert SORTING_SQL_QUERY.endswith(
+        "ORDER BY myDataSource.PartitionId, myDataSource.RetrievalOrder;"
+    )
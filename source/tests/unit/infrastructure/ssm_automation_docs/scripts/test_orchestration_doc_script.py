@@ -14,6 +14,7 @@ from mypy_boto3_dynamodb import DynamoDBClient
 from solution.infrastructure.ssm_automation_docs.scripts.orchestration_doc_script import (
     check_cross_account_transfer,
     check_cross_region_transfer,
+    create_retrieval_priority,
     script_handler,
 )
 
@@ -63,6 +64,9 @@ def test_script_handler_launch_automation() -> None:
             "acknowledge_cross_region": "YES",
             "name_override_presigned_url": None,
             "vault_name": "test_vault",
+            "priority_list_presigned_url": "",
+            "retrieval_priority_policy": "KeyPrefix",
+            "priority_prefixes": "photos/, docs/,",
             "bucket_name": "test_bucket_name",
             "region": "us-east-1",
         }
@@ -73,9 +77,12 @@ def test_script_handler_launch_automation() -> None:
         events.pop("region")
         events.pop("allow_cross_region_data_transfer")
         events.pop("acknowledge_cross_region")
+        events.pop("retrieval_priority_policy")
+        events.pop("priority_prefixes")
 
         events["s3_storage_class"] = "GLACIER_IR"
         events["name_override_presigned_url"] = ""
+        events["retrieval_priority"] = "KeyPrefix:photos/,docs/"
         # assert that the start_execution method was called with the correct arguments
         mock_step_function_client.start_execution.assert_called_once_with(
             stateMachineArn=events.pop("state_machine_arn"), input=json.dumps(events)
@@ -166,12 +173,26 @@ def test_script_handler_resume_automation(
         events["s3_storage_class"] = "GLACIER_IR"
         events["name_override_presigned_url"] = ""
         events["vault_name"] = "test_vault_name"
+        events["priority_list_presigned_url"] = ""
+        events["retrieval_priority"] = "CreationDate"
         # assert that the start_execution method was called with the correct arguments
         mock_step_function_client.start_execution.assert_called_once_with(
             stateMachineArn=events.pop("state_machine_arn"), input=json.dumps(events)
         )
 
 
+def test_create_retrieval_priority() -> None:
+    assert create_retrieval_priority() == "CreationDate"  # type: ignore
+    assert create_retrieval_priority("SizeAscending", "photos/") == "SizeAscending"  # type: ignore
+    assert create_retrieval_priority("KeyPrefix", " ") == "KeyPrefix"  # type: ignore
+    assert (
+        create_retrieval_priority("KeyPrefix", "photos/, docs/")  # type: ignore
+        == "KeyPrefix:photos/,docs/"
+    )
+    with pytest.raises(ValueError):
+        create_retrieval_priority("Newest")  # type: ignore
+
+
 def test_check_cross_region_acknowledgement_NO_same_region() -> None:
     with mock.patch("boto3.client") as mock_client:
         mock_client_instance = mock_client.return_value
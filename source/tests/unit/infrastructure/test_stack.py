@@ -11,6 +11,19 @@ import aws_cdk as core
 import aws_cdk.assertions as assertions
 import pytest
 
+from solution.application.archive_retrieval.lanes import (
+    LARGE_LANE,
+    MEDIUM_LANE,
+    SMALL_LANE,
+    RetrievalLane,
+)
+from solution.application.archive_retrieval.notification_processor import (
+    NOTIFICATION_WORKERS,
+)
+from solution.application.glacier_s3_transfer.packing import (
+    PACK_ARCHIVE_SIZE_LIMIT,
+    PACK_BATCH_SIZE,
+)
 from solution.application.model.glacier_transfer_model import GlacierTransferModel
 from solution.infrastructure.output_keys import OutputKeys
 from solution.infrastructure.stack import SolutionStack
@@ -269,6 +282,153 @@ def test_archive_validation_lambda_created(
     )
 
 
+def test_archive_packing_lambda_created(
+    stack: SolutionStack, template: assertions.Template
+) -> None:
+    resources_list = ["ArchivePacking"]
+    logical_id = get_logical_id(stack, resources_list)
+    assert_resource_name_has_correct_type_and_props(
+        stack,
+        template,
+        resources_list=resources_list,
+        cfn_type="AWS::Lambda::Function",
+        props={
+            "Properties": {
+                "Handler": "solution.application.handlers.archive_packing",
+                "Runtime": {"Fn::If": ["GovCnCondition", "python3.11", "python3.12"]},
+                "MemorySize": 1024,
+                "Timeout": 900,
+            },
+        },
+    )
+    template.has_resource_properties(
+        "AWS::Lambda::EventSourceMapping",
+        {
+            "FunctionName": {"Ref": logical_id},
+            "BatchSize": PACK_BATCH_SIZE,
+            "MaximumBatchingWindowInSeconds": 60,
+            "FunctionResponseTypes": ["ReportBatchItemFailures"],
+        },
+    )
+    template.has_parameter(
+        "PackArchivesThresholdParameter",
+        {"Type": "Number", "Default": 0, "MaxValue": PACK_ARCHIVE_SIZE_LIMIT},
+    )
+
+
+def test_notifications_processor_lambda_created(
+    stack: SolutionStack, template: assertions.Template
+) -> None:
+    resources_list = ["NotificationsProcessor"]
+    logical_id = get_logical_id(stack, resources_list)
+    assert_resource_name_has_correct_type_and_props(
+        stack,
+        template,
+        resources_list=resources_list,
+        cfn_type="AWS::Lambda::Function",
+        props={
+            "Properties": {
+                "Handler": "solution.application.handlers.notifications_processor",
+                "Environment": {
+                    "Variables": assertions.Match.object_like(
+                        {"NOTIFICATION_WORKERS": str(NOTIFICATION_WORKERS)}
+                    )
+                },
+            },
+        },
+    )
+    template.has_resource_properties(
+        "AWS::Lambda::EventSourceMapping",
+        {
+            "FunctionName": {"Ref": logical_id},
+            "BatchSize": NOTIFICATION_WORKERS,
+            "FunctionResponseTypes": ["ReportBatchItemFailures"],
+        },
+    )
+
+
+@pytest.mark.parametrize("lane", [SMALL_LANE, MEDIUM_LANE, LARGE_LANE])
+def test_chunk_retrieval_lane_created(
+    stack: SolutionStack, template: assertions.Template, lane: RetrievalLane
+) -> None:
+    resources_list = [f"{lane.name}ChunkRetrieval"]
+    logical_id = get_logical_id(stack, resources_list)
+    assert_resource_name_has_correct_type_and_props(
+        stack,
+        template,
+        resources_list=resources_list,
+        cfn_type="AWS::Lambda::Function",
+        props={
+            "Properties": {
+                "Handler": "solution.application.handlers.archive_retrieval",
+                "MemorySize": lane.memory_size,
+            },
+        },
+    )
+    template.has_resource_properties(
+        "AWS::Lambda::EventSourceMapping",
+        {
+            "FunctionName": {"Ref": logical_id},
+            "BatchSize": lane.batch_size,
+            "ScalingConfig": {"MaximumConcurrency": lane.max_concurrency},
+            "EventSourceArn": {
+                "Fn::GetAtt": [
+                    get_logical_id(stack, [f"{lane.name}ChunksRetrievalQueue"]),
+                    "Arn",
+                ]
+            },
+        },
+    )
+
+
+def test_initiate_retrieval_reads_chunk_queue_depth(
+    stack: SolutionStack, template: assertions.Template
+) -> None:
+    match = assertions.Match()
+    queue_logical_ids = {
+        lane.queue_url_key: get_logical_id(stack, [f"{lane.name}ChunksRetrievalQueue"])
+        for lane in (SMALL_LANE, MEDIUM_LANE, LARGE_LANE)
+    }
+    template.has_resource_properties(
+        "AWS::Lambda::Function",
+        {
+            "Handler": "solution.application.handlers.initiate_archive_retrieval_batch",
+            "Environment": {
+                "Variables": match.object_like(
+                    {
+                        queue_url_key: {"Ref": logical_id}
+                        for queue_url_key, logical_id in queue_logical_ids.items()
+                    }
+                )
+            },
+        },
+    )
+    template.has_resource_properties(
+        "AWS::IAM::Policy",
+        {
+            "PolicyDocument": {
+                "Statement": match.array_with(
+                    [
+                        {
+                            "Action": "sqs:GetQueueAttributes",
+                            "Effect": "Allow",
+                            "Resource": match.array_with(
+                                [
+                                    {"Fn::GetAtt": [logical_id, "Arn"]}
+                                    for logical_id in sorted(queue_logical_ids.values())
+                                ]
+                            ),
+                        }
+                    ]
+                )
+            },
+            "Roles": [
+                {"Ref": match.string_like_regexp("InitiateArchiveRetrievalRole")}
+            ],
+        },
+    )
+
+
 def test_inventory_chunk_determination_created(
     stack: SolutionStack, template: assertions.Template
 ) -> None:
@@ -940,6 +1100,36 @@ def test_app_registry_attr_group_association(
     )
 
 
+def test_initiate_retrieval_paced_by_batch(
+    stack: SolutionStack, template: assertions.Template
+) -> None:
+    definitions = [
+        "".join(
+            part
+            for part in state_machine["Properties"]["DefinitionString"]["Fn::Join"][1]
+            if isinstance(part, str)
+        )
+        for state_machine in template.find_resources(
+            "AWS::StepFunctions::StateMachine"
+        ).values()
+    ]
+    (definition,) = [
+        definition
+        for definition in definitions
+        if '"RetrieveArchiveInitiateJob"' in definition
+    ]
+    assert (
+        '"PaceInitiation":{"Type":"Wait","SecondsPath":"$.initiate_job_result.Payload.wait_sec"'
+        in definition
+    )
+    assert '"Next":"PaceInitiation"' in definition
+    assert "CalculateTimeout" not in definition
+    assert not template.find_resources(
+        "AWS::Lambda::Function",
+        {"Properties": {"Handler": "solution.application.handlers.initiation_timeout"}},
+    )
+
+
 def test_sqs_queues_encrypted(
     stack: SolutionStack, template: assertions.Template
 ) -> None:
@@ -957,6 +1147,8 @@ def test_logs_insights_query(
         get_logical_id(stack, ["MetricsProcessor"]),
         get_logical_id(stack, ["ArchivesNeedingWindowExtension"]),
         get_logical_id(stack, ["ExtendDownloadInitiateRetrieval"]),
+        get_logical_id(stack, ["SmallChunkRetrieval"]),
+        get_logical_id(stack, ["MediumChunkRetrieval"]),
     ]
 
     Log_group_names = [